@@ -68,10 +68,11 @@ XXX To do:
 
 __version__ = "0.3"
 
-__all__ = ["HTTPServer", "BaseHTTPRequestHandler"]
+__all__ = ["HTTPServer", "ThreadPoolHTTPServer", "BaseHTTPRequestHandler"]
 
 import sys
 import time
+import errno
 import socket # For gethostbyaddr()
 from warnings import filterwarnings, catch_warnings
 with catch_warnings():
@@ -99,6 +100,227 @@ DEFAULT_ERROR_CONTENT_TYPE = "text/html"
 def _quote_html(html):
     return html.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
 
+# Maximal size of the header block read by the fast request parser
+_MAXHEADERBLOCK = 65536
+
+
+class _RequestReader(object):
+    """Buffered file object for reading requests from a socket.
+
+    socket._fileobject copies the rest of its buffer on every
+    readline(), which is costly when several headers or pipelined
+    requests have been received at once.  This reader keeps the
+    received data in one string with a read position, and can return
+    a whole header block with a single search.
+    """
+
+    def __init__(self, sock, bufsize=8192):
+        self._sock = sock
+        self._bufsize = bufsize
+        self._buf = ''
+        self._pos = 0
+        self.closed = False
+
+    def fileno(self):
+        return self._sock.fileno()
+
+    def close(self):
+        self._buf = ''
+        self._pos = 0
+        self.closed = True
+
+    def _recv(self, size):
+        while True:
+            try:
+                return self._sock.recv(size)
+            except socket.error, e:
+                if e.args[0] != errno.EINTR:
+                    raise
+
+    def _fill(self):
+        # Append received data to the buffer; return False on EOF.
+        data = self._recv(self._bufsize)
+        if not data:
+            return False
+        if self._pos:
+            self._buf = self._buf[self._pos:] + data
+            self._pos = 0
+        else:
+            self._buf += data
+        return True
+
+    def _consume(self, end):
+        data = self._buf[self._pos:end]
+        if end >= len(self._buf):
+            self._buf = ''
+            self._pos = 0
+        else:
+            self._pos = end
+        return data
+
+    def has_pending_request(self):
+        """Return True if a complete request head has been received
+        but not read yet."""
+        buf = self._buf
+        return buf.find('\n\r\n', self._pos) >= 0 or buf.find('\n\n', self._pos) >= 0
+
+    def readline(self, size=-1):
+        while True:
+            nl = self._buf.find('\n', self._pos)
+            if nl >= 0:
+                end = nl + 1
+                break
+            if 0 <= size <= len(self._buf) - self._pos:
+                end = self._pos + size
+                break
+            if not self._fill():
+                end = len(self._buf)
+                break
+        if 0 <= size < end - self._pos:
+            end = self._pos + size
+        return self._consume(end)
+
+    def readlines(self, sizehint=0):
+        lines = []
+        total = 0
+        while True:
+            line = self.readline()
+            if not line:
+                break
+            lines.append(line)
+            total += len(line)
+            if sizehint and total >= sizehint:
+                break
+        return lines
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+    def read(self, size=-1):
+        avail = len(self._buf) - self._pos
+        if 0 <= size <= avail:
+            return self._consume(self._pos + size)
+        # Collect the chunks in a list to avoid quadratic copying for
+        # large bodies.
+        chunks = [self._consume(len(self._buf))]
+        left = size - avail
+        while size < 0 or left > 0:
+            data = self._recv(max(left, self._bufsize))
+            if not data:
+                break
+            if size >= 0 and len(data) > left:
+                self._buf = data[left:]
+                data = data[:left]
+            chunks.append(data)
+            left -= len(data)
+        return ''.join(chunks)
+
+    def read_header_block(self, limit=_MAXHEADERBLOCK):
+        """Read a header block and the blank line ending it.
+
+        Return the header lines as one string, without the blank line;
+        at EOF return what was received.  Return None if no blank line
+        is found within limit bytes.
+        """
+        while True:
+            buf = self._buf
+            pos = self._pos
+            if buf.startswith('\r\n', pos):
+                self._consume(pos + 2)
+                return ''
+            if buf.startswith('\n', pos):
+                self._consume(pos + 1)
+                return ''
+            crlf = buf.find('\n\r\n', pos)
+            lf = buf.find('\n\n', pos)
+            if crlf >= 0 and (lf < 0 or crlf < lf):
+                if crlf - pos > limit:
+                    return None
+                block = buf[pos:crlf + 1]
+                self._consume(crlf + 3)
+                return block
+            if lf >= 0:
+                if lf - pos > limit:
+                    return None
+                block = buf[pos:lf + 1]
+                self._consume(lf + 2)
+                return block
+            if len(buf) - pos > limit:
+                return None
+            # A lone '\r' may already be in the buffer; it is only
+            # matched once the following '\n' has been received.
+            if not self._fill():
+                return self._consume(len(self._buf))
+
+
+# Attributes of _LazyMessage set when the header block is parsed
+_MESSAGE_ATTRS = frozenset(['dict', 'headers', 'unixfrom', 'status'])
+# Attributes of _LazyMessage set when the content type is parsed
+_TYPE_ATTRS = frozenset(['encodingheader', 'typeheader', 'plisttext',
+                         'type', 'maintype', 'subtype', 'plist'])
+
+class _LazyMessage(mimetools.Message):
+    """mimetools.Message built from an already read header block.
+
+    The block is only split into headers when a header is first looked
+    up, and the content type only parsed when it is first used.
+    """
+
+    def __init__(self, block):
+        self.fp = None
+        self.seekable = 0
+        self.startofheaders = None
+        self.startofbody = None
+        self._block = block
+
+    def __getattr__(self, name):
+        if name in _MESSAGE_ATTRS and '_block' in self.__dict__:
+            self._parse_block(self.__dict__.pop('_block'))
+        elif name in _TYPE_ATTRS and 'typeheader' not in self.__dict__:
+            self.encodingheader = self.getheader('content-transfer-encoding')
+            self.typeheader = self.getheader('content-type')
+            self.parsetype()
+            self.parseplist()
+        else:
+            raise AttributeError(name)
+        return self.__dict__[name]
+
+    def _parse_block(self, block):
+        # Same rules as rfc822.Message.readheaders(), minus the
+        # handling of Unix From lines which cannot occur in HTTP.
+        self.dict = headers = {}
+        self.headers = lines = []
+        self.unixfrom = ''
+        self.status = ''
+        name = ''
+        for line in block.splitlines(True):
+            if name and line[0] in ' \t':
+                # It's a continuation line.
+                lines.append(line)
+                headers[name] = (headers[name] + "\n " + line.strip()).strip()
+                continue
+            i = line.find(':')
+            if i > 0:
+                name = line[:i].lower()
+                lines.append(line)
+                headers[name] = line[i+1:].strip()
+            else:
+                # It's not a header line; stop here.  Like a Message
+                # read from an unseekable file, the line is lost.
+                if not headers:
+                    self.status = 'No headers; bad seek'
+                else:
+                    self.status = ('Non-header line where header expected; '
+                                   'bad seek')
+                break
+
+
 class HTTPServer(SocketServer.TCPServer):
 
     allow_reuse_address = 1    # Seems to make sense in testing environment
@@ -111,6 +333,10 @@ class HTTPServer(SocketServer.TCPServer):
         self.server_port = port
 
 
+class ThreadPoolHTTPServer(SocketServer.ThreadPoolMixIn, HTTPServer):
+    """HTTPServer which handles requests with a fixed pool of threads."""
+
+
 class BaseHTTPRequestHandler(SocketServer.StreamRequestHandler):
 
     """HTTP request handler base class.
@@ -193,7 +419,9 @@ class BaseHTTPRequestHandler(SocketServer.StreamRequestHandler):
     - command, path and version are the broken-down request line;
 
     - headers is an instance of mimetools.Message (or a derived
-    class) containing the header information;
+    class) containing the header information; it is created from
+    MessageClass, or lazily from the whole header block if
+    fast_request_parsing is true;
 
     - rfile is a file object open for reading positioned at the
     start of the optional input data part;
@@ -229,6 +457,20 @@ class BaseHTTPRequestHandler(SocketServer.StreamRequestHandler):
     # Most web servers default to HTTP 0.9, i.e. don't send a status line.
     default_request_version = "HTTP/0.9"
 
+    # If true, read requests through a buffer which returns the whole
+    # header block at once, build self.headers lazily from it, and
+    # buffer the responses so that the replies to pipelined requests
+    # are sent together.
+    fast_request_parsing = False
+
+    def setup(self):
+        SocketServer.StreamRequestHandler.setup(self)
+        if self.fast_request_parsing:
+            self.rfile.close()
+            self.rfile = _RequestReader(self.connection)
+            self.wfile.close()
+            self.wfile = self.connection.makefile('wb', -1)
+
     def parse_request(self):
         """Parse a request (internal).
 
@@ -288,7 +530,14 @@ class BaseHTTPRequestHandler(SocketServer.StreamRequestHandler):
         self.command, self.path, self.request_version = command, path, version
 
         # Examine the headers and look for a Connection directive
-        self.headers = self.MessageClass(self.rfile, 0)
+        if self.fast_request_parsing:
+            block = self._read_header_block()
+            if block is None:
+                self.send_error(400, "Request header block too large")
+                return False
+            self.headers = _LazyMessage(block)
+        else:
+            self.headers = self.MessageClass(self.rfile, 0)
 
         conntype = self.headers.get('Connection', "")
         if conntype.lower() == 'close':
@@ -298,6 +547,23 @@ class BaseHTTPRequestHandler(SocketServer.StreamRequestHandler):
             self.close_connection = 0
         return True
 
+    def _read_header_block(self):
+        # Return the header block for fast_request_parsing, or None if
+        # it is too large.  rfile may have been replaced by another
+        # file object, which is read line by line.
+        if isinstance(self.rfile, _RequestReader):
+            return self.rfile.read_header_block()
+        lines = []
+        size = 0
+        while True:
+            line = self.rfile.readline(_MAXHEADERBLOCK + 1)
+            if line in ('\r\n', '\n', ''):
+                return ''.join(lines)
+            size += len(line)
+            if size > _MAXHEADERBLOCK:
+                return None
+            lines.append(line)
+
     def handle_one_request(self):
         """Handle a single HTTP request.
 
@@ -326,6 +592,12 @@ class BaseHTTPRequestHandler(SocketServer.StreamRequestHandler):
                 return
             method = getattr(self, mname)
             method()
+            if (self.fast_request_parsing and not self.close_connection and
+                isinstance(self.rfile, _RequestReader) and
+                self.rfile.has_pending_request()):
+                # Another request has already been received: handle it
+                # before sending both responses at once.
+                return
             self.wfile.flush() #actually send the response if not already done.
         except socket.timeout, e:
             #a read or a write timed out.  Discard this connection
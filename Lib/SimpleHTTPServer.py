@@ -183,6 +183,11 @@ class SimpleHTTPRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
         -- note however that this the default server uses this
         to copy binary data as well.
 
+        When the source is a regular file and the destination the
+        file object of the connection, the data is sent with
+        os.sendfile() where available, without being copied through
+        the process.
+
         """
         shutil.copyfileobj(source, outputfile)
 
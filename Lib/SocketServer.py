@@ -21,6 +21,8 @@ For request-based servers (including socket-based):
         - synchronous (one request is handled at a time)
         - forking (each request is handled by a new process)
         - threading (each request is handled by a new thread)
+        - thread pool (each request is handled by one of a fixed
+          set of threads)
 
 The classes in this module favor the server type that is simplest to
 write: a synchronous TCP/IP server.  This is bad class design, but
@@ -50,7 +52,7 @@ stream server is the address family, which is simply repeated in both
 unix server classes.
 
 Forking and threading versions of each type of server can be created
-using the ForkingMixIn and ThreadingMixIn mix-in classes.  For
+using the ForkingMixIn, ThreadingMixIn and ThreadPoolMixIn mix-in classes.  For
 instance, a threading UDP server class is created as follows:
 
         class ThreadingUDPServer(ThreadingMixIn, UDPServer): pass
@@ -134,15 +136,22 @@ import select
 import sys
 import os
 import errno
+import time
+import Queue
 try:
     import threading
 except ImportError:
     import dummy_threading as threading
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 __all__ = ["TCPServer","UDPServer","ForkingUDPServer","ForkingTCPServer",
            "ThreadingUDPServer","ThreadingTCPServer","BaseRequestHandler",
            "StreamRequestHandler","DatagramRequestHandler",
-           "ThreadingMixIn", "ForkingMixIn"]
+           "ThreadingMixIn", "ForkingMixIn", "ThreadPoolMixIn",
+           "ThreadPoolUDPServer", "ThreadPoolTCPServer"]
 if hasattr(socket, "AF_UNIX"):
     __all__.extend(["UnixStreamServer","UnixDatagramServer",
                     "ThreadingUnixStreamServer",
@@ -157,6 +166,43 @@ def _eintr_retry(func, *args):
             if e.args[0] != errno.EINTR:
                 raise
 
+if hasattr(select, 'poll'):
+    class _ReadSelector(object):
+        """Wait until one of a fixed set of objects becomes readable.
+
+        Uses select.poll(), which unlike select.select() does not fail
+        for file descriptors above FD_SETSIZE.
+        """
+
+        def __init__(self, objs):
+            self._poller = poller = select.poll()
+            self._fd_map = {}
+            for obj in objs:
+                fd = obj if isinstance(obj, (int, long)) else obj.fileno()
+                self._fd_map[fd] = obj
+                poller.register(fd, select.POLLIN)
+
+        def select(self, timeout=None):
+            """Return the list of readable objects, waiting at most
+            timeout seconds (forever if timeout is None)."""
+            if timeout is not None:
+                # poll() takes milliseconds; round up so that a small
+                # timeout does not turn into a busy loop.
+                timeout = int(timeout * 1000 + 0.999)
+            events = _eintr_retry(self._poller.poll, timeout)
+            return [self._fd_map[fd] for fd, event in events]
+else:
+    class _ReadSelector(object):
+        """Wait until one of a fixed set of objects becomes readable."""
+
+        def __init__(self, objs):
+            self._objs = list(objs)
+
+        def select(self, timeout=None):
+            """Return the list of readable objects, waiting at most
+            timeout seconds (forever if timeout is None)."""
+            return _eintr_retry(select.select, self._objs, [], [], timeout)[0]
+
 class BaseServer:
 
     """Base class for server classes.
@@ -164,7 +210,7 @@ class BaseServer:
     Methods for the caller:
 
     - __init__(server_address, RequestHandlerClass)
-    - serve_forever(poll_interval=0.5)
+    - serve_forever(poll_interval=None)
     - shutdown()
     - handle_request()  # if you do not use serve_forever()
     - fileno() -> int   # for select()
@@ -209,6 +255,8 @@ class BaseServer:
         self.RequestHandlerClass = RequestHandlerClass
         self.__is_shut_down = threading.Event()
         self.__shutdown_request = False
+        self.__wakeup_lock = threading.Lock()
+        self.__wakeup_fd = None
 
     def server_activate(self):
         """Called by constructor to activate the server.
@@ -218,28 +266,58 @@ class BaseServer:
         """
         pass
 
-    def serve_forever(self, poll_interval=0.5):
+    def serve_forever(self, poll_interval=None):
         """Handle one request at a time until shutdown.
 
-        Polls for shutdown every poll_interval seconds. Ignores
-        self.timeout. If you need to do periodic tasks, do them in
-        another thread.
+        Waits for requests until shutdown() is called, which wakes the
+        loop up through a pipe.  If poll_interval is given, it is the
+        longest time spent waiting before the shutdown flag is checked
+        again; where no wakeup pipe is available it defaults to 0.5
+        seconds.  Ignores self.timeout. If you need to do periodic
+        tasks, do them in another thread.
         """
         self.__is_shut_down.clear()
+        wakeup_fd = self.__open_wakeup()
         try:
+            objs = [self]
+            if wakeup_fd is not None:
+                objs.append(wakeup_fd)
+            elif poll_interval is None:
+                poll_interval = 0.5
+            selector = _ReadSelector(objs)
             while not self.__shutdown_request:
-                # XXX: Consider using another file descriptor or
-                # connecting to the socket to wake this up instead of
-                # polling. Polling reduces our responsiveness to a
-                # shutdown request and wastes cpu at all other times.
-                r, w, e = _eintr_retry(select.select, [self], [], [],
-                                       poll_interval)
-                if self in r:
+                if self in selector.select(poll_interval):
                     self._handle_request_noblock()
         finally:
+            self.__close_wakeup(wakeup_fd)
             self.__shutdown_request = False
             self.__is_shut_down.set()
 
+    def __open_wakeup(self):
+        # Create the pipe used by shutdown() to interrupt the wait in
+        # serve_forever().  Returns the read end, or None if the
+        # platform cannot wait on pipes and sockets together.
+        if os.name != 'posix':
+            return None
+        r, w = os.pipe()
+        if fcntl is not None and hasattr(fcntl, 'FD_CLOEXEC'):
+            for fd in r, w:
+                flags = fcntl.fcntl(fd, fcntl.F_GETFD)
+                fcntl.fcntl(fd, fcntl.F_SETFD, flags | fcntl.FD_CLOEXEC)
+        with self.__wakeup_lock:
+            self.__wakeup_fd = w
+        return r
+
+    def __close_wakeup(self, wakeup_fd):
+        if wakeup_fd is None:
+            return
+        # The lock prevents shutdown() from writing to a descriptor
+        # which has been closed and possibly reused.
+        with self.__wakeup_lock:
+            os.close(self.__wakeup_fd)
+            self.__wakeup_fd = None
+        os.close(wakeup_fd)
+
     def shutdown(self):
         """Stops the serve_forever loop.
 
@@ -248,6 +326,9 @@ class BaseServer:
         deadlock.
         """
         self.__shutdown_request = True
+        with self.__wakeup_lock:
+            if self.__wakeup_fd is not None:
+                os.write(self.__wakeup_fd, b'\0')
         self.__is_shut_down.wait()
 
     # The distinction between handling, getting, processing and
@@ -273,8 +354,7 @@ class BaseServer:
             timeout = self.timeout
         elif self.timeout is not None:
             timeout = min(timeout, self.timeout)
-        fd_sets = _eintr_retry(select.select, [self], [], [], timeout)
-        if not fd_sets[0]:
+        if not _ReadSelector([self]).select(timeout):
             self.handle_timeout()
             return
         self._handle_request_noblock()
@@ -282,7 +362,7 @@ class BaseServer:
     def _handle_request_noblock(self):
         """Handle one request, without blocking.
 
-        I assume that select.select has returned that the socket is
+        I assume that the selector has returned that the socket is
         readable before this function was called, so there should be
         no risk of blocking in get_request().
         """
@@ -610,12 +690,150 @@ class ThreadingMixIn:
         t.start()
 
 
+def _next_method(cls, obj, name):
+    # Return the bound method called name that the class following cls
+    # in the (classic, depth-first) method resolution order of obj's
+    # class defines; the mix-in classes cannot use super().
+    def mro(klass):
+        yield klass
+        for base in klass.__bases__:
+            for k in mro(base):
+                yield k
+    seen_cls = False
+    for klass in mro(obj.__class__):
+        if klass is cls:
+            seen_cls = True
+        elif seen_cls and name in klass.__dict__:
+            return klass.__dict__[name].__get__(obj, obj.__class__)
+    raise AttributeError(name)
+
+
+class ThreadPoolMixIn(ThreadingMixIn):
+    """Mix-in class to handle requests with a fixed pool of threads.
+
+    Accepted requests are put on a bounded queue, from which pool_size
+    long-lived worker threads take them.  The workers are started on
+    the first request and stopped by server_close().
+    """
+
+    # Number of worker threads
+    pool_size = 10
+
+    # Maximum number of accepted requests waiting for a worker
+    pool_queue_size = 100
+
+    # If true, process_request() waits for room when the queue is
+    # full, leaving further connections in the listen backlog.
+    # Otherwise the request is passed to handle_pool_full().
+    pool_block = True
+
+    # Idle workers would otherwise keep the process alive if the server
+    # is never closed.
+    daemon_threads = True
+
+    _pool_queue = None
+
+    def _start_pool(self):
+        self._pool_queue = Queue.Queue(self.pool_queue_size)
+        self._pool_lock = threading.Lock()
+        self._pool_counters = {'processed': 0, 'rejected': 0,
+                               'max_queued': 0, 'total_wait': 0.0,
+                               'max_wait': 0.0}
+        self._pool_threads = []
+        for i in range(self.pool_size):
+            t = threading.Thread(target=self._pool_worker,
+                                 args=(self._pool_queue,))
+            t.daemon = self.daemon_threads
+            t.start()
+            self._pool_threads.append(t)
+
+    def _pool_worker(self, queue):
+        counters = self._pool_counters
+        while True:
+            item = queue.get()
+            if item is None:
+                break
+            request, client_address, enqueued = item
+            wait = time.time() - enqueued
+            with self._pool_lock:
+                counters['processed'] += 1
+                counters['total_wait'] += wait
+                if wait > counters['max_wait']:
+                    counters['max_wait'] = wait
+            self.process_request_thread(request, client_address)
+
+    def process_request(self, request, client_address):
+        """Queue the request for processing by a worker thread."""
+        if self._pool_queue is None:
+            self._start_pool()
+        queue = self._pool_queue
+        item = (request, client_address, time.time())
+        try:
+            queue.put(item, self.pool_block)
+        except Queue.Full:
+            with self._pool_lock:
+                self._pool_counters['rejected'] += 1
+            self.handle_pool_full(request, client_address)
+            return
+        queued = queue.qsize()
+        with self._pool_lock:
+            if queued > self._pool_counters['max_queued']:
+                self._pool_counters['max_queued'] = queued
+
+    def handle_pool_full(self, request, client_address):
+        """Called instead of queueing a request when the queue is full
+        and pool_block is false.
+
+        Closes the request; may be overridden, for instance to send a
+        "busy" reply first.
+        """
+        self.shutdown_request(request)
+
+    def pool_stats(self):
+        """Return a dictionary of counters describing the pool.
+
+        'workers' and 'queued' are the current number of worker threads
+        and of requests waiting for one, 'max_queued' the largest queue
+        depth seen, 'processed' and 'rejected' the number of requests
+        handed to a worker or refused because the queue was full, and
+        'total_wait' and 'max_wait' the time in seconds requests spent
+        in the queue.
+        """
+        if self._pool_queue is None:
+            stats = {'processed': 0, 'rejected': 0, 'max_queued': 0,
+                     'total_wait': 0.0, 'max_wait': 0.0}
+            stats['workers'] = stats['queued'] = 0
+            return stats
+        with self._pool_lock:
+            stats = dict(self._pool_counters)
+        stats['workers'] = len(self._pool_threads)
+        stats['queued'] = self._pool_queue.qsize()
+        return stats
+
+    def server_close(self):
+        """Stop the worker threads once the queued requests are done,
+        then clean up the server.
+        """
+        queue = self._pool_queue
+        if queue is not None:
+            threads = self._pool_threads
+            self._pool_queue = None
+            for t in threads:
+                queue.put(None)
+            for t in threads:
+                t.join()
+        _next_method(ThreadPoolMixIn, self, 'server_close')()
+
+
 class ForkingUDPServer(ForkingMixIn, UDPServer): pass
 class ForkingTCPServer(ForkingMixIn, TCPServer): pass
 
 class ThreadingUDPServer(ThreadingMixIn, UDPServer): pass
 class ThreadingTCPServer(ThreadingMixIn, TCPServer): pass
 
+class ThreadPoolUDPServer(ThreadPoolMixIn, UDPServer): pass
+class ThreadPoolTCPServer(ThreadPoolMixIn, TCPServer): pass
+
 if hasattr(socket, 'AF_UNIX'):
 
     class UnixStreamServer(TCPServer):
@@ -0,0 +1,148 @@
+"""Bounded least-recently-used cache.
+
+This is the cache used by the module level caches of re, fnmatch and
+urlparse.  Unlike a plain dict that is cleared once it grows past a
+limit, an LRUCache only discards the entries that have not been used
+for the longest time, so a working set slightly larger than the limit
+does not cause every entry to be rebuilt.
+"""
+
+__all__ = ["LRUCache", "CacheInfo"]
+
+
+class CacheInfo(tuple):
+    'CacheInfo(hits, misses, evictions, maxsize, currsize)'
+
+    __slots__ = ()
+
+    _fields = ('hits', 'misses', 'evictions', 'maxsize', 'currsize')
+
+    def __new__(cls, hits, misses, evictions, maxsize, currsize):
+        return tuple.__new__(cls, (hits, misses, evictions, maxsize, currsize))
+
+    def __repr__(self):
+        return ('CacheInfo(hits=%r, misses=%r, evictions=%r, maxsize=%r, '
+                'currsize=%r)' % self)
+
+    def __getnewargs__(self):
+        return tuple(self)
+
+    # operator.itemgetter is not used here because this module is
+    # imported by re while the extension modules are not yet built.
+    hits = property(lambda self: self[0], doc='Number of successful lookups')
+    misses = property(lambda self: self[1], doc='Number of failed lookups')
+    evictions = property(lambda self: self[2],
+                         doc='Number of entries discarded to stay in bounds')
+    maxsize = property(lambda self: self[3], doc='Maximum number of entries')
+    currsize = property(lambda self: self[4], doc='Current number of entries')
+
+
+# Names for the fields of an entry of the cache.
+_VALUE, _STAMP = 0, 1
+
+def _stamp(item):
+    return item[1][_STAMP]
+
+
+class LRUCache(object):
+    """Mapping holding at most maxsize entries.
+
+    Lookups through get() move the entry to the most recently used
+    position and are counted as hits or misses.  Storing a new entry
+    into a full cache discards the least recently used one.  A maxsize
+    of None means the cache is unbounded; a maxsize of 0 disables it.
+
+    The cache takes no lock, so that it can be used from any thread, in
+    a child process forked while another thread was using it, and by
+    keys whose comparison uses the cache again.  Concurrent updates at
+    worst cause an extra miss or eviction, or skew the statistics.
+    """
+
+    def __init__(self, maxsize=128):
+        self._check_maxsize(maxsize)
+        self._maxsize = maxsize
+        # Maps keys to [value, stamp] entries; the stamp of an entry is
+        # the value of the clock when it was last used.
+        self._map = {}
+        self._clock = 0
+        self._hits = self._misses = self._evictions = 0
+
+    @staticmethod
+    def _check_maxsize(maxsize):
+        if maxsize is not None and maxsize < 0:
+            raise ValueError("maxsize must be None or a non-negative integer")
+
+    @property
+    def maxsize(self):
+        return self._maxsize
+
+    def __len__(self):
+        return len(self._map)
+
+    def __contains__(self, key):
+        return key in self._map
+
+    def __getitem__(self, key):
+        value = self.get(key, self)
+        if value is self:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        """Return the value for key, or default if it is not cached."""
+        entry = self._map.get(key)
+        if entry is None:
+            self._misses += 1
+            return default
+        self._clock += 1
+        entry[_STAMP] = self._clock
+        self._hits += 1
+        return entry[_VALUE]
+
+    def __setitem__(self, key, value):
+        if self._maxsize == 0:
+            return
+        self._clock += 1
+        self._map[key] = [value, self._clock]
+        self._trim()
+
+    def _trim(self):
+        # Discard least recently used entries until within bounds.  Finding
+        # them takes a scan of the entries, but only happens when an entry
+        # is added to a full cache, after a miss.
+        maxsize = self._maxsize
+        if maxsize is None:
+            return
+        mapping = self._map
+        excess = len(mapping) - maxsize
+        if excess <= 0:
+            return
+        # items() copies the entries at once, so the cache can change
+        # while they are compared.
+        if excess == 1:
+            oldest = [min(mapping.items(), key=_stamp)]
+        else:
+            oldest = sorted(mapping.items(), key=_stamp)[:excess]
+        for key, entry in oldest:
+            # Another thread may have discarded the entry already.
+            if mapping.pop(key, None) is not None:
+                self._evictions += 1
+
+    def __delitem__(self, key):
+        del self._map[key]
+
+    def clear(self):
+        """Discard all entries and reset the statistics."""
+        self._map.clear()
+        self._hits = self._misses = self._evictions = 0
+
+    def resize(self, maxsize):
+        """Change the maximum size, discarding entries if necessary."""
+        self._check_maxsize(maxsize)
+        self._maxsize = maxsize
+        self._trim()
+
+    def info(self):
+        """Return a CacheInfo with the statistics of the cache."""
+        return CacheInfo(self._hits, self._misses, self._evictions,
+                         self._maxsize, len(self._map))
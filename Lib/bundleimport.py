@@ -0,0 +1,265 @@
+"""Import modules from a bundle of compiled code objects.
+
+A bundle is a single file holding the compiled code of many modules, as
+written by compileall.compile_bundle().  Once install() has been called,
+the name of a bundle on sys.path makes the modules in it importable, just
+like the name of a zip archive does.  The file is mapped into memory when
+it is first used and the code of each module is unmarshalled straight from
+the mapping, so no .pyc files are opened or checked against their sources.
+
+A bundle starts with a header of the form
+
+    BUNDLE_MAGIC, imp.get_magic(), flags, index offset
+
+which is followed by the marshalled code objects.  The index, at the end of
+the file, is a marshalled dictionary mapping each full module name to a
+tuple (offset, size, is package, file name, source hash).  If the
+CHECK_SOURCE flag is set, a module whose source file exists and doesn't
+match the recorded SHA-1 hash is left to the importers of the following
+sys.path entries, so that edited sources are used instead of stale code.
+"""
+
+import imp
+import marshal
+import os
+import struct
+import sys
+
+try:
+    import mmap
+except ImportError:
+    mmap = None
+
+__all__ = ["bundleimporter", "install", "write_bundle", "BUNDLE_MAGIC",
+           "CHECK_SOURCE"]
+
+BUNDLE_MAGIC = 'PYBUNDLE'
+CHECK_SOURCE = 1
+
+_header = struct.Struct('<8s4sIQ')
+
+# Maps the file name of each bundle opened to its _Bundle
+_bundle_cache = {}
+
+
+class _Bundle(object):
+    """The contents of a bundle file."""
+
+    def __init__(self, path):
+        f = open(path, 'rb')
+        try:
+            header = f.read(_header.size)
+            if len(header) != _header.size or \
+               header[:len(BUNDLE_MAGIC)] != BUNDLE_MAGIC:
+                raise ImportError("not a bundle file: %r" % path)
+            magic, pyc_magic, self.flags, offset = _header.unpack(header)
+            if pyc_magic != imp.get_magic():
+                raise ImportError("bad magic number in bundle %r" % path)
+            self.data = None
+            if mmap is not None:
+                try:
+                    self.data = mmap.mmap(f.fileno(), 0,
+                                          access=mmap.ACCESS_READ)
+                except EnvironmentError:
+                    pass
+            if self.data is None:
+                f.seek(0)
+                self.data = f.read()
+        finally:
+            f.close()
+        self.index = marshal.loads(buffer(self.data, offset))
+        # Full module names mapped to whether their source is unchanged
+        self.checked = {}
+
+    def get(self, fullname):
+        """Return the index entry of a module, or None."""
+        entry = self.index.get(fullname)
+        if entry is None or not self.flags & CHECK_SOURCE:
+            return entry
+        valid = self.checked.get(fullname)
+        if valid is None:
+            valid = self.checked[fullname] = _source_matches(entry[3],
+                                                             entry[4])
+        if not valid:
+            return None
+        return entry
+
+    def get_code(self, entry):
+        return marshal.loads(buffer(self.data, entry[0], entry[1]))
+
+
+def _source_matches(filename, source_hash):
+    try:
+        f = open(filename, 'rb')
+    except IOError:
+        # Without a source there is nothing to prefer to the bundle
+        return True
+    try:
+        source = f.read()
+    finally:
+        f.close()
+    import hashlib
+    return hashlib.sha1(source).digest() == source_hash
+
+
+class bundleimporter(object):
+    """bundleimporter(archivepath) -> bundleimporter object
+
+    Create a new bundleimporter instance.  'archivepath' must be the path
+    to a bundle file, optionally followed by the path of a package in it,
+    such as "app.pyb/pkg" for the __path__ of the package "pkg".  An
+    ImportError is raised if 'archivepath' doesn't point to a valid
+    bundle.
+    """
+
+    def __init__(self, path):
+        archive = path
+        prefix = []
+        while not os.path.isfile(archive):
+            # A real directory can't be part of a path inside a bundle
+            if os.path.isdir(archive):
+                raise ImportError("not a bundle file: %r" % path)
+            head, tail = os.path.split(archive)
+            if not tail:
+                raise ImportError("not a bundle file: %r" % path)
+            prefix.insert(0, tail)
+            archive = head
+        bundle = _bundle_cache.get(archive)
+        if bundle is None:
+            bundle = _bundle_cache[archive] = _Bundle(archive)
+        self.archive = archive
+        self.prefix = '.'.join(prefix)
+        self._bundle = bundle
+
+    def __repr__(self):
+        if self.prefix:
+            path = os.path.join(self.archive, *self.prefix.split('.'))
+        else:
+            path = self.archive
+        return '<bundleimporter object "%s">' % path
+
+    def _get_entry(self, fullname):
+        name = fullname.rpartition('.')[2]
+        if self.prefix:
+            name = self.prefix + '.' + name
+        return name, self._bundle.get(name)
+
+    def _entry(self, fullname):
+        name, entry = self._get_entry(fullname)
+        if entry is None:
+            raise ImportError("can't find module %r" % fullname)
+        return name, entry
+
+    def find_module(self, fullname, path=None):
+        """find_module(fullname, path=None) -> self or None.
+
+        Search for a module specified by 'fullname'.  Return the importer
+        itself if the module is in the bundle (and its source hasn't
+        changed, for bundles which check it), else None.
+        """
+        if self._get_entry(fullname)[1] is None:
+            return None
+        return self
+
+    def load_module(self, fullname):
+        """load_module(fullname) -> module.
+
+        Load the module specified by 'fullname'.  Raise ImportError if the
+        module couldn't be found.
+        """
+        name, entry = self._entry(fullname)
+        code = self._bundle.get_code(entry)
+        module = sys.modules.get(fullname)
+        created = module is None
+        if created:
+            module = sys.modules[fullname] = imp.new_module(fullname)
+        module.__file__ = entry[3]
+        module.__loader__ = self
+        if entry[2]:
+            # Submodules are looked for in the bundle, then next to the
+            # source, which holds extension modules and edited sources
+            module.__path__ = [os.path.join(self.archive, *name.split('.')),
+                               os.path.dirname(entry[3])]
+            module.__package__ = fullname
+        else:
+            module.__package__ = fullname.rpartition('.')[0]
+        try:
+            exec code in module.__dict__
+        except:
+            if created:
+                sys.modules.pop(fullname, None)
+            raise
+        return sys.modules[fullname]
+
+    def get_code(self, fullname):
+        """get_code(fullname) -> code object.
+
+        Return the code object for the specified module.
+        """
+        return self._bundle.get_code(self._entry(fullname)[1])
+
+    def get_source(self, fullname):
+        """get_source(fullname) -> source string.
+
+        Return the source code of the specified module, read from the file
+        it was compiled from, or None if that file is not available.
+        """
+        filename = self._entry(fullname)[1][3]
+        try:
+            f = open(filename, 'U')
+        except IOError:
+            return None
+        try:
+            return f.read()
+        finally:
+            f.close()
+
+    def get_filename(self, fullname):
+        """get_filename(fullname) -> filename string.
+
+        Return the name of the source file the module was compiled from.
+        """
+        return self._entry(fullname)[1][3]
+
+    def is_package(self, fullname):
+        """is_package(fullname) -> bool.
+
+        Return True if the module specified by fullname is a package.
+        """
+        return bool(self._entry(fullname)[1][2])
+
+
+def install():
+    """Make the bundles on sys.path importable.
+
+    Add bundleimporter to sys.path_hooks and forget the paths for which no
+    importer was found before, so that bundles among them are picked up.
+    """
+    if bundleimporter not in sys.path_hooks:
+        sys.path_hooks.append(bundleimporter)
+    for path, importer in sys.path_importer_cache.items():
+        if importer is None or isinstance(importer, imp.NullImporter):
+            del sys.path_importer_cache[path]
+
+
+def write_bundle(file, modules, flags=0):
+    """Write a bundle to the open binary file 'file'.
+
+    'modules' is a sequence of (full module name, is package, file name,
+    source hash, code object) tuples.
+    """
+    start = file.tell()
+    file.write(_header.pack(BUNDLE_MAGIC, imp.get_magic(), flags, 0))
+    index = {}
+    for fullname, ispkg, filename, source_hash, code in modules:
+        # The marshal format of .pyc files with the same magic number
+        data = marshal.dumps(code, 3)
+        index[fullname] = (file.tell() - start, len(data), ispkg, filename,
+                           source_hash)
+        file.write(data)
+    offset = file.tell() - start
+    file.write(marshal.dumps(index))
+    end = file.tell()
+    file.seek(start)
+    file.write(_header.pack(BUNDLE_MAGIC, imp.get_magic(), flags, offset))
+    file.seek(end)
@@ -2,7 +2,9 @@
 
 When called as a script with arguments, this compiles the directories
 given as arguments recursively; the -l option prevents it from
-recursing into directories.
+recursing into directories.  With the -b option, the modules found in
+the directories are written to a single bundle file instead, which
+bundleimport can import from.
 
 Without arguments, if compiles all modules on sys.path, without
 recursing into subdirectories.  (Even though it should do so for
@@ -16,7 +18,7 @@ import py_compile
 import struct
 import imp
 
-__all__ = ["compile_dir","compile_file","compile_path"]
+__all__ = ["compile_dir","compile_file","compile_path","compile_bundle"]
 
 def compile_dir(dir, maxlevels=10, ddir=None,
                 force=0, rx=None, quiet=0):
@@ -129,6 +131,109 @@ def compile_path(skip_curdir=1, maxlevels=0, force=0, quiet=0):
                                               force, quiet=quiet)
     return success
 
+def _bundle_modules(dir, package, maxlevels, ddir, rx, found):
+    """Yield the modules to put in a bundle from one directory."""
+    try:
+        names = os.listdir(dir)
+    except os.error:
+        print "Can't list", dir
+        names = []
+    names.sort()
+    for name in names:
+        fullname = os.path.join(dir, name)
+        dfile = os.path.join(ddir, name)
+        if rx is not None and rx.search(fullname):
+            continue
+        if os.path.isdir(fullname):
+            if maxlevels > 0 and '.' not in name and \
+               not os.path.islink(fullname) and \
+               os.path.isfile(os.path.join(fullname, '__init__.py')):
+                for module in _bundle_modules(fullname, package + name + '.',
+                                              maxlevels - 1, dfile, rx,
+                                              found):
+                    yield module
+        elif name.endswith('.py') and '.' not in name[:-3]:
+            modname = package + name[:-3]
+            if modname.endswith('.__init__'):
+                modname = modname[:-len('.__init__')]
+            if modname in found:
+                continue
+            found.add(modname)
+            yield modname, fullname, dfile
+
+def compile_bundle(bundle, dirs, maxlevels=10, ddir=None, rx=None, quiet=0,
+                   check_source=False):
+    """Byte-compile the modules in some directories into a bundle file.
+
+    Arguments (bundle and dirs are required):
+
+    bundle:    the name of the bundle file to write
+    dirs:      the directories to take modules from; each is searched
+               like a sys.path entry, and the first module of each name
+               found is used
+    maxlevels: maximum recursion level into packages (default 10)
+    ddir:      the directory that will be prepended to the path to the
+               file as it is compiled into the bundle (only with a
+               single directory)
+    quiet:     if 1, be quiet during compilation
+    check_source: if true, record a hash of each source in the bundle,
+               so that modules whose source has changed since are imported
+               from the source instead
+    """
+    import bundleimport
+    if ddir is not None and len(dirs) != 1:
+        raise ValueError("ddir requires exactly one directory")
+    success = 1
+    found = set()
+    modules = []
+    for dir in dirs:
+        if not quiet:
+            print 'Listing', dir, '...'
+        # The file names recorded are where the sources are looked for at
+        # run time, so they must not depend on the current directory
+        modules_found = _bundle_modules(dir, '', maxlevels,
+                                        ddir or os.path.abspath(dir), rx,
+                                        found)
+        for modname, fullname, dfile in modules_found:
+            if not quiet:
+                print 'Compiling', fullname, '...'
+            try:
+                with open(fullname, 'rb') as f:
+                    source = f.read()
+            except IOError, e:
+                print "Sorry", e
+                success = 0
+                continue
+            if check_source:
+                import hashlib
+                source_hash = hashlib.sha1(source).digest()
+            else:
+                source_hash = None
+            text = source.replace('\r\n', '\n').replace('\r', '\n')
+            if text and text[-1] != '\n':
+                text += '\n'
+            try:
+                code = compile(text, dfile, 'exec')
+            except Exception, err:
+                if quiet:
+                    print 'Compiling', fullname, '...'
+                print py_compile.PyCompileError(err.__class__, err,
+                                                dfile).msg
+                success = 0
+                continue
+            ispkg = os.path.basename(fullname) == '__init__.py'
+            modules.append((modname, ispkg, dfile, source_hash, code))
+    flags = check_source and bundleimport.CHECK_SOURCE or 0
+    # Write a new file and rename it, rather than overwriting a bundle
+    # which running programs may have mapped into memory
+    tmp = bundle + '.tmp'
+    with open(tmp, 'wb') as f:
+        bundleimport.write_bundle(f, modules, flags)
+    if os.name == 'nt' and os.path.exists(bundle):
+        os.remove(bundle)
+    os.rename(tmp, bundle)
+    return success
+
 def expand_args(args, flist):
     """read names in flist and append to args"""
     expanded = args[:]
@@ -152,11 +257,11 @@ def main():
     """Script main program."""
     import getopt
     try:
-        opts, args = getopt.getopt(sys.argv[1:], 'lfqd:x:i:')
+        opts, args = getopt.getopt(sys.argv[1:], 'lfqd:x:i:b:c')
     except getopt.error, msg:
         print msg
         print "usage: python compileall.py [-l] [-f] [-q] [-d destdir] " \
-              "[-x regexp] [-i list] [directory|file ...]"
+              "[-x regexp] [-i list] [-b bundle [-c]] [directory|file ...]"
         print
         print "arguments: zero or more file and directory names to compile; " \
               "if no arguments given, "
@@ -177,6 +282,11 @@ def main():
         print "-i file: add all the files and directories listed in file to " \
               "the list considered for"
         print '         compilation; if "-", names are read from stdin'
+        print "-b bundle: write the modules found in the directories to " \
+              "the bundle file"
+        print "           instead of writing .pyc files"
+        print "-c: with -b, import modules whose source has changed since " \
+              "from the source"
 
         sys.exit(2)
     maxlevels = 10
@@ -185,6 +295,8 @@ def main():
     quiet = 0
     rx = None
     flist = None
+    bundle = None
+    check_source = False
     for o, a in opts:
         if o == '-l': maxlevels = 0
         if o == '-d': ddir = a
@@ -194,6 +306,8 @@ def main():
             import re
             rx = re.compile(a)
         if o == '-i': flist = a
+        if o == '-b': bundle = a
+        if o == '-c': check_source = True
     if ddir:
         if len(args) != 1 and not os.path.isdir(args[0]):
             print "-d destdir require exactly one directory argument"
@@ -206,7 +320,11 @@ def main():
                     args = expand_args(args, flist)
             except IOError:
                 success = 0
-            if success:
+            if success and bundle is not None:
+                if not compile_bundle(bundle, args, maxlevels, ddir, rx,
+                                      quiet, check_source):
+                    success = 0
+            elif success:
                 for arg in args:
                     if os.path.isdir(arg):
                         if not compile_dir(arg, maxlevels, ddir,
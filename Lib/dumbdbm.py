@@ -4,18 +4,20 @@ For database spam, spam.dir contains the index (a text file),
 spam.bak *may* contain a backup of the index (also a text file),
 while spam.dat contains the data (a binary file).
 
-XXX TO DO:
-
-- seems to contain a bug when updating...
+The data file is a log: values are only ever appended to it, and the
+directory file is a journal of index records which is appended to on
+every update and rewritten in full when the database is closed.  Space
+used by overwritten and deleted values is reclaimed by reorganize(),
+which is also called automatically once more than half of the data file
+is garbage.
 
-- reclaim free space (currently, space once occupied by deleted or expanded
-items is never reused)
+XXX TO DO:
 
 - support concurrent access (currently, if two processes take turns making
 updates, they can mess up the index)
 
 - support efficient access to large databases (currently, the whole index
-is read when the database is opened, and some updates rewrite the whole index)
+is read when the database is opened)
 
 - support opening for read-only (flag = 'm')
 
@@ -27,66 +29,130 @@ import UserDict
 
 _open = __builtin__.open
 
-_BLOCKSIZE = 512
+# reorganize() is called automatically when the garbage in the data file
+# exceeds both _MIN_GARBAGE bytes and the size of the live values, and the
+# directory file is rewritten when it holds more than twice as many records
+# as there are keys, plus _MIN_RECORDS.
+_MIN_GARBAGE = 1 << 20
+_MIN_RECORDS = 1000
 
 error = IOError                         # For anydbm
 
+def _fsync(f):
+    f.flush()
+    if hasattr(_os, 'fsync'):
+        _os.fsync(f.fileno())
+
 class _Database(UserDict.DictMixin):
 
-    # The on-disk directory and data files can remain in mutually
-    # inconsistent states for an arbitrarily long time (see comments
-    # at the end of __setitem__).  This is only repaired when _commit()
-    # gets called.  One place _commit() gets called is from __del__(),
-    # and if that occurs at program shutdown time, module globals may
-    # already have gotten rebound to None.  Since it's crucial that
-    # _commit() finish successfully, we can't ignore shutdown races
-    # here, and _commit() must not reference any globals.
+    # The on-disk directory and data files can be left in an inconsistent
+    # state if the program crashes before the buffered records have been
+    # flushed (see sync()).  _commit() is called from __del__(), and if
+    # that occurs at program shutdown time, module globals may already
+    # have gotten rebound to None.  Since it's crucial that _commit()
+    # finish successfully, we can't ignore shutdown races here, and
+    # _commit() and close() must not reference any globals.
     _os = _os       # for _commit()
     _open = _open   # for _commit()
 
     def __init__(self, filebasename, mode):
         self._mode = mode
+        self._datf = self._dirf = None
 
         # The directory file is a text file.  Each line looks like
         #    "%r, (%d, %d)\n" % (key, pos, siz)
         # where key is the string key, pos is the offset into the dat
         # file of the associated value's first byte, and siz is the number
-        # of bytes in the associated value.
+        # of bytes in the associated value.  Records are appended as keys
+        # are set, so a later line for a key overrides the earlier ones;
+        # a line "%r, None\n" % key records that the key was deleted.
         self._dirfile = filebasename + _os.extsep + 'dir'
 
         # The data file is a binary file pointed into by the directory
         # file, and holds the values associated with keys.  Each value
-        # begins at a _BLOCKSIZE-aligned byte offset, and is a raw
-        # binary 8-bit string value.
+        # is a raw binary 8-bit string value appended to the file.
         self._datfile = filebasename + _os.extsep + 'dat'
         self._bakfile = filebasename + _os.extsep + 'bak'
 
+        # reorganize() writes the new data file to the .tmp file and the
+        # new directory file to the .new file (see _recover()).
+        self._tmpfile = filebasename + _os.extsep + 'tmp'
+        self._newfile = filebasename + _os.extsep + 'new'
+
         # The index is an in-memory dict, mirroring the directory file.
         self._index = None  # maps keys to (pos, siz) pairs
 
+        # The directory file is only rewritten by _commit() if the database
+        # has been modified, so that read-only databases can be closed.
+        self._modified = False
+
+        # Set if the directory file ends with a partly written record,
+        # which must be dropped before new records are appended.
+        self._torn = False
+
+        self._recover()
+
         # Mod by Jack: create data file if needed
         try:
             f = _open(self._datfile, 'r')
         except IOError:
             with _open(self._datfile, 'w') as f:
                 self._chmod(self._datfile)
+            self._modified = True
         else:
             f.close()
         self._update()
-
-    # Read directory file into the in-memory index dict.
+        # The data file is reopened for writing by _addval() when needed,
+        # so that read-only databases can be opened.
+        self._datf = _open(self._datfile, 'rb')
+        self._writing = False
+
+    # Finish or undo a reorganize() interrupted by a crash.  The .new file
+    # is complete once the .tmp file has replaced the data file, so it is
+    # only installed as the directory file then.
+    def _recover(self):
+        if not _os.path.exists(self._newfile):
+            return
+        if _os.path.exists(self._tmpfile):
+            if _os.path.exists(self._datfile):
+                # The old data file and directory file are still in place
+                _os.unlink(self._tmpfile)
+                _os.unlink(self._newfile)
+                return
+            # The old data file was removed but not yet replaced
+            _os.rename(self._tmpfile, self._datfile)
+        self._install_index(self._newfile)
+
+    # Read directory file into the in-memory index dict, and count the
+    # bytes used by live values and the garbage in the data file.
     def _update(self):
         self._index = {}
+        self._records = 0
+        datsize = _os.path.getsize(self._datfile)
         try:
             f = _open(self._dirfile)
         except IOError:
-            pass
+            self._modified = True
         else:
             with f:
                 for line in f:
                     line = line.rstrip()
-                    key, pos_and_siz_pair = eval(line)
-                    self._index[key] = pos_and_siz_pair
+                    try:
+                        key, pos_and_siz_pair = eval(line)
+                    except (SyntaxError, ValueError, TypeError):
+                        # A record torn by a crash ends the journal
+                        self._torn = True
+                        self._modified = True
+                        break
+                    self._records += 1
+                    if pos_and_siz_pair is None:
+                        self._index.pop(key, None)
+                    elif sum(pos_and_siz_pair) <= datsize:
+                        self._index[key] = pos_and_siz_pair
+                    # else the value never made it to the data file
+        self._live = sum(siz for pos, siz in self._index.itervalues())
+        self._datsize = datsize
+        self._garbage = datsize - self._live
 
     # Write the index dict to the directory file.  The original directory
     # file (if any) is renamed with a .bak extension first.  If a .bak
@@ -95,9 +161,21 @@ class _Database(UserDict.DictMixin):
         # CAUTION:  It's vital that _commit() succeed, and _commit() can
         # be called from __del__().  Therefore we must never reference a
         # global in this routine.
-        if self._index is None:
+        if self._index is None or self._datf is None or not self._modified:
             return  # nothing to do
 
+        # The data must reach the disk before the index pointing to it
+        self._datf.flush()
+        if self._dirf is not None:
+            self._dirf.close()
+            self._dirf = None
+
+        self._backup_index()
+        self._write_index(self._dirfile, self._index)
+        self._records = len(self._index)
+        self._modified = self._torn = False
+
+    def _backup_index(self):
         try:
             self._os.unlink(self._bakfile)
         except self._os.error:
@@ -108,88 +186,140 @@ class _Database(UserDict.DictMixin):
         except self._os.error:
             pass
 
-        with self._open(self._dirfile, 'w') as f:
-            self._chmod(self._dirfile)
-            for key, pos_and_siz_pair in self._index.iteritems():
+    # Replace the directory file with filename, which has been written by
+    # _write_index().
+    def _install_index(self, filename):
+        self._backup_index()
+        self._os.rename(filename, self._dirfile)
+
+    def _write_index(self, filename, index, sync=False):
+        with self._open(filename, 'w') as f:
+            self._chmod(filename)
+            for key, pos_and_siz_pair in index.iteritems():
                 f.write("%r, %r\n" % (key, pos_and_siz_pair))
+            if sync:
+                _fsync(f)
 
-    sync = _commit
+    def sync(self):
+        if self._datf is None:
+            return
+        self._datf.flush()
+        if self._dirf is not None:
+            self._dirf.flush()
 
     def __getitem__(self, key):
         pos, siz = self._index[key]     # may raise KeyError
-        with _open(self._datfile, 'rb') as f:
-            f.seek(pos)
-            dat = f.read(siz)
-        return dat
+        f = self._datf
+        f.seek(pos)
+        self._writing = False
+        return f.read(siz)
 
-    # Append val to the data file, starting at a _BLOCKSIZE-aligned
-    # offset.  The data file is first padded with NUL bytes (if needed)
-    # to get to an aligned offset.  Return pair
+    # Append val to the data file.  Return pair
     #     (starting offset of val, len(val))
     def _addval(self, val):
-        with _open(self._datfile, 'rb+') as f:
-            f.seek(0, 2)
-            pos = int(f.tell())
-            npos = ((pos + _BLOCKSIZE - 1) // _BLOCKSIZE) * _BLOCKSIZE
-            f.write('\0'*(npos-pos))
-            pos = npos
-            f.write(val)
-        return (pos, len(val))
-
-    # Write val to the data file, starting at offset pos.  The caller
-    # is responsible for ensuring that there's enough room starting at
-    # pos to hold val, without overwriting some other value.  Return
-    # pair (pos, len(val)).
-    def _setval(self, pos, val):
-        with _open(self._datfile, 'rb+') as f:
+        f = self._datf
+        if f.mode == 'rb':
+            f.close()
+            f = self._datf = _open(self._datfile, 'rb+')
+            self._writing = False
+        pos = self._datsize
+        if not self._writing:
+            # A seek is required between reading and writing
             f.seek(pos)
-            f.write(val)
+            self._writing = True
+        f.write(val)
+        self._datsize += len(val)
+        self._live += len(val)
         return (pos, len(val))
 
-    # key is a new key whose associated value starts in the data file
-    # at offset pos and with length siz.  Add an index record to
-    # the in-memory index dict, and append one to the directory file.
-    def _addkey(self, key, pos_and_siz_pair):
-        self._index[key] = pos_and_siz_pair
-        with _open(self._dirfile, 'a') as f:
+    # Append a record for key to the directory file.  pos_and_siz_pair
+    # is None if key has been deleted.  The value and then the record are
+    # flushed, so that the files are consistent if the process dies.
+    def _addrecord(self, key, pos_and_siz_pair):
+        if self._dirf is None:
+            if self._torn:
+                self._commit()
+            self._dirf = _open(self._dirfile, 'a')
             self._chmod(self._dirfile)
-            f.write("%r, %r\n" % (key, pos_and_siz_pair))
+        self._datf.flush()
+        self._dirf.write("%r, %r\n" % (key, pos_and_siz_pair))
+        self._dirf.flush()
+        self._records += 1
+        self._modified = True
+
+    # Drop the value of key, if any, from the live values.
+    def _dropval(self, key):
+        try:
+            pos, siz = self._index.pop(key)
+        except KeyError:
+            return False
+        self._live -= siz
+        self._garbage += siz
+        return True
 
     def __setitem__(self, key, val):
         if not type(key) == type('') == type(val):
             raise TypeError, "keys and values must be strings"
-        if key not in self._index:
-            self._addkey(key, self._addval(val))
-        else:
-            # See whether the new value is small enough to fit in the
-            # (padded) space currently occupied by the old value.
-            pos, siz = self._index[key]
-            oldblocks = (siz + _BLOCKSIZE - 1) // _BLOCKSIZE
-            newblocks = (len(val) + _BLOCKSIZE - 1) // _BLOCKSIZE
-            if newblocks <= oldblocks:
-                self._index[key] = self._setval(pos, val)
-            else:
-                # The new value doesn't fit in the (padded) space used
-                # by the old value.  The blocks used by the old value are
-                # forever lost.
-                self._index[key] = self._addval(val)
-
-            # Note that _index may be out of synch with the directory
-            # file now:  _setval() and _addval() don't update the directory
-            # file.  This also means that the on-disk directory and data
-            # files are in a mutually inconsistent state, and they'll
-            # remain that way until _commit() is called.  Note that this
-            # is a disaster (for the database) if the program crashes
-            # (so that _commit() never gets called).
+        self._dropval(key)
+        pos_and_siz_pair = self._addval(val)
+        self._index[key] = pos_and_siz_pair
+        self._addrecord(key, pos_and_siz_pair)
+        self._maybe_compact()
 
     def __delitem__(self, key):
-        # The blocks used by the associated value are lost.
-        del self._index[key]
-        # XXX It's unclear why we do a _commit() here (the code always
-        # XXX has, so I'm not changing it).  _setitem__ doesn't try to
-        # XXX keep the directory file in synch.  Why should we?  Or
-        # XXX why shouldn't __setitem__?
-        self._commit()
+        if not self._dropval(key):
+            raise KeyError(key)
+        self._addrecord(key, None)
+        self._maybe_compact()
+
+    def _maybe_compact(self):
+        if self._garbage > _MIN_GARBAGE and self._garbage > self._live:
+            self.reorganize()
+        elif self._records > 2 * len(self._index) + _MIN_RECORDS:
+            self._commit()
+
+    def reorganize(self):
+        """Reclaim the space used by overwritten and deleted values.
+
+        The live values are copied to a new data file, in the order of
+        their offsets, which then replaces the old one.  The directory file
+        for the new data file is written beforehand, so that a crash at any
+        point leaves either the old files or the new ones.
+        """
+        old = self._datf
+        index = {}
+        with _open(self._tmpfile, 'wb') as f:
+            self._chmod(self._tmpfile)
+            pos = 0
+            items = sorted(self._index.iteritems(), key=lambda item: item[1])
+            for key, (oldpos, siz) in items:
+                old.seek(oldpos)
+                f.write(old.read(siz))
+                index[key] = (pos, siz)
+                pos += siz
+            _fsync(f)
+        self._write_index(self._newfile, index, sync=True)
+        if self._dirf is not None:
+            self._dirf.close()
+            self._dirf = None
+        old.close()
+        self._datf = None
+        # Once the new data file is in place, _recover() completes the
+        # reorganization if it is interrupted
+        try:
+            _os.rename(self._tmpfile, self._datfile)
+        except _os.error:
+            # Windows does not replace an existing file
+            _os.unlink(self._datfile)
+            _os.rename(self._tmpfile, self._datfile)
+        self._install_index(self._newfile)
+        self._datf = _open(self._datfile, 'rb+')
+        self._writing = False
+        self._index = index
+        self._records = len(index)
+        self._modified = self._torn = False
+        self._datsize = self._live = pos
+        self._garbage = 0
 
     def keys(self):
         return self._index.keys()
@@ -208,8 +338,18 @@ class _Database(UserDict.DictMixin):
         return len(self._index)
 
     def close(self):
-        self._commit()
-        self._index = self._datfile = self._dirfile = self._bakfile = None
+        # CAUTION:  Like _commit(), close() can be called from __del__()
+        # and must not reference a global.
+        try:
+            self._commit()
+        finally:
+            if self._datf is not None:
+                self._datf.close()
+            if self._dirf is not None:
+                self._dirf.close()
+            self._datf = self._dirf = None
+            self._index = self._datfile = self._dirfile = None
+            self._bakfile = self._tmpfile = self._newfile = None
 
     __del__ = close
 
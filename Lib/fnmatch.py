@@ -11,16 +11,23 @@ corresponding to PATTERN.  (It does not compile it.)
 """
 
 import re
+import _lrucache
 
 __all__ = ["filter", "fnmatch", "fnmatchcase", "translate"]
 
-_cache = {}
 _MAXCACHE = 100
+_cache = _lrucache.LRUCache(_MAXCACHE)
 
 def _purge():
     """Clear the pattern cache"""
     _cache.clear()
 
+def _compile_pattern(pat):
+    re_pat = _cache.get(pat)
+    if re_pat is None:
+        re_pat = _cache[pat] = re.compile(translate(pat))
+    return re_pat
+
 def fnmatch(name, pat):
     """Test whether FILENAME matches PATTERN.
 
@@ -47,12 +54,7 @@ def filter(names, pat):
     import os,posixpath
     result=[]
     pat=os.path.normcase(pat)
-    if not pat in _cache:
-        res = translate(pat)
-        if len(_cache) >= _MAXCACHE:
-            _cache.clear()
-        _cache[pat] = re.compile(res)
-    match=_cache[pat].match
+    match=_compile_pattern(pat).match
     if os.path is posixpath:
         # normcase on posix is NOP. Optimize it away from the loop.
         for name in names:
@@ -71,12 +73,7 @@ def fnmatchcase(name, pat):
     its arguments.
     """
 
-    if not pat in _cache:
-        res = translate(pat)
-        if len(_cache) >= _MAXCACHE:
-            _cache.clear()
-        _cache[pat] = re.compile(res)
-    return _cache[pat].match(name) is not None
+    return _compile_pattern(pat).match(name) is not None
 
 def translate(pat):
     """Translate a shell PATTERN to a regular expression.
@@ -35,6 +35,11 @@ def iglob(pathname):
     patterns.
 
     """
+    return _iglob(pathname, False)
+
+def _iglob(pathname, dironly):
+    # dironly is true when the matches are only used as directories to
+    # look into: other files are skipped.
     dirname, basename = os.path.split(pathname)
     if not has_magic(pathname):
         if basename:
@@ -46,36 +51,40 @@ def iglob(pathname):
                 yield pathname
         return
     if not dirname:
-        for name in glob1(os.curdir, basename):
+        for name in _glob1(os.curdir, basename, dironly):
             yield name
         return
     # `os.path.split()` returns the argument itself as a dirname if it is a
     # drive or UNC path.  Prevent an infinite recursion if a drive or UNC path
     # contains magic characters (i.e. r'\\?\C:').
     if dirname != pathname and has_magic(dirname):
-        dirs = iglob(dirname)
+        dirs = _iglob(dirname, True)
     else:
         dirs = [dirname]
     if has_magic(basename):
-        glob_in_dir = glob1
+        for dirname in dirs:
+            for name in _glob1(dirname, basename, dironly):
+                yield os.path.join(dirname, name)
     else:
-        glob_in_dir = glob0
-    for dirname in dirs:
-        for name in glob_in_dir(dirname, basename):
-            yield os.path.join(dirname, name)
+        for dirname in dirs:
+            for name in glob0(dirname, basename):
+                yield os.path.join(dirname, name)
 
 # These 2 helper functions non-recursively glob inside a literal directory.
 # They return a list of basenames. `glob1` accepts a pattern while `glob0`
 # takes a literal basename (so it only has to check for its existence).
 
 def glob1(dirname, pattern):
+    return _glob1(dirname, pattern, False)
+
+def _glob1(dirname, pattern, dironly):
     if not dirname:
         dirname = os.curdir
     if isinstance(pattern, _unicode) and not isinstance(dirname, unicode):
         dirname = unicode(dirname, sys.getfilesystemencoding() or
                                    sys.getdefaultencoding())
     try:
-        names = os.listdir(dirname)
+        names = _listdir(dirname, dironly)
     except os.error:
         return []
     if pattern[0] != '.':
@@ -93,6 +102,21 @@ def glob0(dirname, basename):
             return [basename]
     return []
 
+def _listdir(dirname, dironly):
+    # Like os.listdir(), but only returning the subdirectories if dironly
+    # is true.  os.scandir() usually knows which entries are directories
+    # without calling stat().
+    if not dironly:
+        return os.listdir(dirname)
+    names = []
+    for entry in os.scandir(dirname):
+        try:
+            if entry.is_dir():
+                names.append(entry.name)
+        except os.error:
+            pass
+    return names
+
 
 magic_check = re.compile('[*?[]')
 
@@ -69,9 +69,18 @@ Req-sent-unread-response       _CS_REQ_SENT       <response_class>
 from array import array
 import os
 import socket
+import time
 from sys import py3kwarning
 from urlparse import urlsplit
 import warnings
+try:
+    import select
+except ImportError:
+    select = None
+try:
+    from thread import allocate_lock as _allocate_lock
+except ImportError:
+    from dummy_thread import allocate_lock as _allocate_lock
 with warnings.catch_warnings():
     if py3kwarning:
         warnings.filterwarnings("ignore", ".*mimetools has been removed",
@@ -83,7 +92,7 @@ try:
 except ImportError:
     from StringIO import StringIO
 
-__all__ = ["HTTP", "HTTPResponse", "HTTPConnection",
+__all__ = ["HTTP", "HTTPResponse", "HTTPConnection", "HTTPConnectionPool",
            "HTTPException", "NotConnected", "UnknownProtocol",
            "UnknownTransferEncoding", "UnimplementedFileMode",
            "IncompleteRead", "InvalidURL", "ImproperConnectionState",
@@ -683,6 +692,26 @@ class HTTPResponse:
         return self.msg.items()
 
 
+def _split_hostport(host, port, default_port):
+    if port is None:
+        i = host.rfind(':')
+        j = host.rfind(']')         # ipv6 addresses have [...]
+        if i > j:
+            try:
+                port = int(host[i+1:])
+            except ValueError:
+                if host[i+1:] == "":  # http://foo.com:/ == http://foo.com/
+                    port = default_port
+                else:
+                    raise InvalidURL("nonnumeric port: '%s'" % host[i+1:])
+            host = host[:i]
+        else:
+            port = default_port
+        if host and host[0] == '[' and host[-1] == ']':
+            host = host[1:-1]
+    return (host, port)
+
+
 class HTTPConnection:
 
     _http_vsn = 11
@@ -741,23 +770,7 @@ class HTTPConnection:
             self._tunnel_headers.clear()
 
     def _get_hostport(self, host, port):
-        if port is None:
-            i = host.rfind(':')
-            j = host.rfind(']')         # ipv6 addresses have [...]
-            if i > j:
-                try:
-                    port = int(host[i+1:])
-                except ValueError:
-                    if host[i+1:] == "":  # http://foo.com:/ == http://foo.com/
-                        port = self.default_port
-                    else:
-                        raise InvalidURL("nonnumeric port: '%s'" % host[i+1:])
-                host = host[:i]
-            else:
-                port = self.default_port
-            if host and host[0] == '[' and host[-1] == ']':
-                host = host[1:-1]
-        return (host, port)
+        return _split_hostport(host, port, self.default_port)
 
     def set_debuglevel(self, level):
         self.debuglevel = level
@@ -805,6 +818,12 @@ class HTTPConnection:
             self.__response = None
         self.__state = _CS_IDLE
 
+    def _is_reusable(self):
+        # True if the connection is open, no request is in progress and
+        # the last response has been read completely.
+        return (self.sock is not None and self.__state == _CS_IDLE and
+                (self.__response is None or self.__response.isclosed()))
+
     def send(self, data):
         """Send `data' to the server."""
         if self.sock is None:
@@ -1084,6 +1103,135 @@ class HTTPConnection:
         return response
 
 
+def _is_dropped(sock):
+    # An idle persistent connection should have nothing to read: if it
+    # is readable, the server has closed it (or sent garbage).
+    if select is None:
+        return False
+    try:
+        if hasattr(select, 'poll'):
+            poller = select.poll()
+            poller.register(sock, select.POLLIN)
+            return bool(poller.poll(0))
+        return bool(select.select([sock], [], [], 0)[0])
+    except (select.error, socket.error, ValueError):
+        return True
+
+
+# Connection arguments of these types are compared by value in pool keys
+_plain_types = (type(None), bool, int, long, float, str, unicode, tuple)
+
+
+class HTTPConnectionPool:
+    """Pool of persistent connections to HTTP servers.
+
+    Idle connections are kept per scheme, host, port, connection class and
+    connection arguments, so a connection is only reused by callers which
+    would have created it the same way.  get_connection() returns an idle connection which is still usable if there is one, or
+    a new connection; release() gives a connection back once its response
+    has been read completely.
+    """
+
+    # Connection classes used for each scheme
+    connection_classes = {'http': HTTPConnection}
+
+    def __init__(self, maxsize=10, idle_timeout=60.0):
+        # maxsize is the number of idle connections kept per key;
+        # connections idle for more than idle_timeout seconds are closed
+        # instead of being reused.
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        self._idle = {}
+        self._lock = _allocate_lock()
+
+    def _key(self, scheme, host, port, connection_class, kwargs):
+        if connection_class is None:
+            try:
+                connection_class = self.connection_classes[scheme]
+            except KeyError:
+                raise ValueError("unsupported scheme: %r" % (scheme,))
+        host, port = _split_hostport(host, port, connection_class.default_port)
+        # The timeout is set again on reuse.  Other arguments, such as an
+        # SSL context, are compared by identity unless they are plain
+        # values; the connection keeps them alive while it is pooled.
+        args = []
+        for name, value in sorted(kwargs.iteritems()):
+            if name == 'timeout':
+                continue
+            if not isinstance(value, _plain_types):
+                value = id(value)
+            args.append((name, value))
+        return (scheme, host, port, connection_class, tuple(args)), \
+               connection_class
+
+    def get_connection(self, scheme, host, port=None, connection_class=None,
+                       **kwargs):
+        """Return a connection to host and port for the given scheme.
+
+        An idle pooled connection is returned if one is still open;
+        otherwise a new connection is created, passing kwargs to
+        connection_class, or to the class registered for the scheme if it
+        is None.  Connections are only reused for the same class and
+        kwargs.  If a timeout is given, it is also applied to reused
+        connections.
+        """
+        key, connection_class = self._key(scheme, host, port,
+                                          connection_class, kwargs)
+        now = time.time()
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                if not idle:
+                    break
+                # Most recently used first: it is the most likely to
+                # still be open.
+                conn, released = idle.pop()
+            if (now - released > self.idle_timeout or
+                _is_dropped(conn.sock)):
+                conn.close()
+                continue
+            if 'timeout' in kwargs:
+                conn.timeout = kwargs['timeout']
+                if conn.timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:
+                    conn.sock.settimeout(conn.timeout)
+            conn._pool_key = key
+            return conn
+        conn = connection_class(key[1], key[2], **kwargs)
+        conn._pool_key = key
+        conn._pool_args = kwargs
+        return conn
+
+    def release(self, conn):
+        """Give back a connection obtained from get_connection().
+
+        The connection is kept for reuse if its last response has been
+        read completely and the server did not close it; otherwise it is
+        closed.
+        """
+        key = getattr(conn, '_pool_key', None)
+        if key is None or not conn._is_reusable():
+            conn.close()
+            return
+        conn._pool_key = None
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            idle.append((conn, time.time()))
+            excess = len(idle) - self.maxsize
+            extra = idle[:max(excess, 0)]
+            del idle[:max(excess, 0)]
+        for conn, released in extra:
+            conn.close()
+
+    def close(self):
+        """Close all idle connections."""
+        with self._lock:
+            idle = self._idle
+            self._idle = {}
+        for conns in idle.itervalues():
+            for conn, released in conns:
+                conn.close()
+
+
 class HTTP:
     "Compatibility class with httplib.py from 1.5."
 
@@ -1213,6 +1361,8 @@ else:
 
     __all__.append("HTTPSConnection")
 
+    HTTPConnectionPool.connection_classes['https'] = HTTPSConnection
+
     class HTTPS(HTTP):
         """Compatibility with 1.5 httplib interface
 
@@ -1,7 +1,9 @@
-"""Backport of importlib.import_module from 3.x."""
+"""Backport of importlib.import_module from 3.x, plus lazy imports."""
 # While not critical (and in no way guaranteed!), it would be nice to keep this
 # code compatible with Python 2.3.
+import imp
 import sys
+import types
 
 def _resolve_name(name, package, level):
     """Return the absolute name of the module to be imported."""
@@ -17,6 +19,18 @@ def _resolve_name(name, package, level):
     return "%s.%s" % (package[:dot], name)
 
 
+def _resolve_relative(name, package):
+    """Return the absolute name for the relative module name 'name'."""
+    if not package:
+        raise TypeError("relative imports require the 'package' argument")
+    level = 0
+    for character in name:
+        if character != '.':
+            break
+        level += 1
+    return _resolve_name(name[level:], package, level)
+
+
 def import_module(name, package=None):
     """Import a module.
 
@@ -26,13 +40,152 @@ def import_module(name, package=None):
 
     """
     if name.startswith('.'):
-        if not package:
-            raise TypeError("relative imports require the 'package' argument")
-        level = 0
-        for character in name:
-            if character != '.':
-                break
-            level += 1
-        name = _resolve_name(name[level:], package, level)
+        name = _resolve_relative(name, package)
     __import__(name)
     return sys.modules[name]
+
+
+class _LazyModule(types.ModuleType):
+    """Placeholder which imports the module it stands for on first use.
+
+    Any attribute access triggers the real import and is then forwarded to
+    the real module, so references to the placeholder keep working after
+    sys.modules has been updated to hold the module itself.
+
+    """
+
+    def __init__(self, name):
+        types.ModuleType.__init__(self, name)
+        namespace = types.ModuleType.__getattribute__(self, '__dict__')
+        namespace['__lazy_module__'] = None
+        namespace['__lazy_size__'] = len(namespace) + 1
+
+    def __repr__(self):
+        namespace = types.ModuleType.__getattribute__(self, '__dict__')
+        if namespace['__lazy_module__'] is not None:
+            return repr(namespace['__lazy_module__'])
+        return '<lazy module %r>' % namespace['__name__']
+
+    def __getattribute__(self, attr):
+        return getattr(_LazyModule._load(self), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(_LazyModule._load(self), attr, value)
+
+    def __delattr__(self, attr):
+        delattr(_LazyModule._load(self), attr)
+
+    def _load(self):
+        namespace = types.ModuleType.__getattribute__(self, '__dict__')
+        module = namespace['__lazy_module__']
+        if module is not None:
+            if len(namespace) > namespace['__lazy_size__']:
+                _LazyModule._forward(self, module)
+            return module
+        name = namespace['__name__']
+        imp.acquire_lock()
+        try:
+            module = namespace['__lazy_module__']
+            if module is None:
+                if sys.modules.get(name) is self:
+                    del sys.modules[name]
+                _loading.add(name)
+                try:
+                    try:
+                        __import__(name)
+                    except:
+                        sys.modules.setdefault(name, self)
+                        raise
+                finally:
+                    _loading.discard(name)
+                module = namespace['__lazy_module__'] = sys.modules[name]
+                _LazyModule._forward(self, module)
+        finally:
+            imp.release_lock()
+        return module
+
+    def _forward(self, module):
+        # The import system binds submodules directly in the namespace of
+        # their parent; pass those on to the real module.
+        namespace = types.ModuleType.__getattribute__(self, '__dict__')
+        for key in namespace.keys():
+            if not key.startswith('__'):
+                setattr(module, key, namespace.pop(key))
+
+
+# Names of modules whose placeholders are being replaced by the real thing
+_loading = set()
+
+
+def lazy_import(name, package=None):
+    """Return a module which is only imported when it is first used.
+
+    A placeholder is put in sys.modules, so that later import statements
+    for the same module return it as well; the first attribute access on
+    the placeholder performs the import.  Modules which are already
+    imported are returned directly.  The 'package' argument has the same
+    meaning as for import_module().  Errors from the import are raised
+    when the module is first used.
+
+    """
+    if name.startswith('.'):
+        name = _resolve_relative(name, package)
+    imp.acquire_lock()
+    try:
+        try:
+            return sys.modules[name]
+        except KeyError:
+            module = sys.modules[name] = _LazyModule(name)
+            return module
+    finally:
+        imp.release_lock()
+
+
+class _LazyFinder(object):
+    """Meta path hook which makes marked modules and packages lazy."""
+
+    def __init__(self):
+        self.names = set()
+
+    def find_module(self, fullname, path=None):
+        if fullname in _loading:
+            return None
+        name = fullname
+        while name not in self.names:
+            if '.' not in name:
+                return None
+            name = name[:name.rindex('.')]
+        # Only claim modules which exist, as implicit relative imports look
+        # for submodules which usually don't
+        try:
+            file, pathname, description = imp.find_module(
+                fullname[fullname.rfind('.') + 1:], path)
+        except ImportError:
+            return None
+        if file is not None:
+            file.close()
+        return self
+
+    def load_module(self, fullname):
+        return lazy_import(fullname)
+
+
+_lazy_finder = _LazyFinder()
+
+
+def mark_lazy(*names):
+    """Make import statements for the named modules and packages lazy.
+
+    From now on, importing one of the modules, or any submodule of one of
+    the packages, gives a placeholder as returned by lazy_import() instead
+    of executing the module.  Modules which are already imported are not
+    affected.
+
+    """
+    imp.acquire_lock()
+    try:
+        _lazy_finder.names.update(names)
+        if _lazy_finder not in sys.meta_path:
+            sys.meta_path.append(_lazy_finder)
+    finally:
+        imp.release_lock()
@@ -99,13 +99,13 @@ Using json.tool from the shell to validate and pretty-print::
 """
 __version__ = '2.0.9'
 __all__ = [
-    'dump', 'dumps', 'load', 'loads',
-    'JSONDecoder', 'JSONEncoder',
+    'dump', 'dumps', 'load', 'loads', 'iterload',
+    'JSONDecoder', 'JSONEncoder', 'IncrementalDecoder',
 ]
 
 __author__ = 'Bob Ippolito <bob@redivi.com>'
 
-from .decoder import JSONDecoder
+from .decoder import JSONDecoder, IncrementalDecoder
 from .encoder import JSONEncoder
 
 _default_encoder = JSONEncoder(
@@ -176,18 +176,19 @@ def dump(obj, fp, skipkeys=False, ensure_ascii=True, check_circular=True,
         check_circular and allow_nan and
         cls is None and indent is None and separators is None and
         encoding == 'utf-8' and default is None and not sort_keys and not kw):
-        iterable = _default_encoder.iterencode(obj)
+        encoder = _default_encoder
     else:
         if cls is None:
             cls = JSONEncoder
-        iterable = cls(skipkeys=skipkeys, ensure_ascii=ensure_ascii,
+        encoder = cls(skipkeys=skipkeys, ensure_ascii=ensure_ascii,
             check_circular=check_circular, allow_nan=allow_nan, indent=indent,
             separators=separators, encoding=encoding,
-            default=default, sort_keys=sort_keys, **kw).iterencode(obj)
-    # could accelerate with writelines in some versions of Python, at
-    # a debuggability cost
-    for chunk in iterable:
-        fp.write(chunk)
+            default=default, sort_keys=sort_keys, **kw)
+    if isinstance(encoder, JSONEncoder):
+        encoder.dump(obj, fp)
+    else:
+        for chunk in encoder.iterencode(obj):
+            fp.write(chunk)
 
 
 def dumps(obj, skipkeys=False, ensure_ascii=True, check_circular=True,
@@ -290,6 +291,48 @@ def load(fp, encoding=None, cls=None, object_hook=None, parse_float=None,
         **kw)
 
 
+def iterload(fp, items=False, encoding=None, cls=None, object_hook=None,
+        parse_float=None, parse_int=None, parse_constant=None,
+        object_pairs_hook=None, chunk_size=65536, **kw):
+    """Deserialize the JSON documents in ``fp`` (a ``.readline()``-supporting
+    file-like object) one at a time, returning an iterator of the Python
+    objects.
+
+    If ``items`` is false (the default) ``fp`` holds a sequence of JSON
+    documents separated by optional whitespace, such as JSON lines, and
+    each document is produced as soon as it has been read.  If ``items`` is
+    true ``fp`` holds a single JSON array and its items are produced
+    one at a time.  Either way only the text of the document being decoded
+    is kept in memory.
+
+    ``fp`` is read with ``fp.readline(chunk_size)``, so a line is decoded
+    as soon as it arrives from a pipe or socket and long lines are read in
+    blocks of ``chunk_size``.
+
+    The other arguments have the same meaning as in ``load()``.
+
+    """
+    if cls is None:
+        cls = JSONDecoder
+    if object_hook is not None:
+        kw['object_hook'] = object_hook
+    if object_pairs_hook is not None:
+        kw['object_pairs_hook'] = object_pairs_hook
+    if parse_float is not None:
+        kw['parse_float'] = parse_float
+    if parse_int is not None:
+        kw['parse_int'] = parse_int
+    if parse_constant is not None:
+        kw['parse_constant'] = parse_constant
+    decoder = IncrementalDecoder(cls(encoding=encoding, **kw), items=items)
+    while 1:
+        data = fp.readline(chunk_size)
+        for obj in decoder.decode(data, final=not data):
+            yield obj
+        if not data:
+            break
+
+
 def loads(s, encoding=None, cls=None, object_hook=None, parse_float=None,
         parse_int=None, parse_constant=None, object_pairs_hook=None, **kw):
     """Deserialize ``s`` (a ``str`` or ``unicode`` instance containing a JSON
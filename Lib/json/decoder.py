@@ -10,7 +10,7 @@ try:
 except ImportError:
     c_scanstring = None
 
-__all__ = ['JSONDecoder']
+__all__ = ['JSONDecoder', 'IncrementalDecoder']
 
 FLAGS = re.VERBOSE | re.MULTILINE | re.DOTALL
 
@@ -383,3 +383,183 @@ class JSONDecoder(object):
         except StopIteration:
             raise ValueError("No JSON object could be decoded")
         return obj, end
+
+
+VALUE_STRUCT = re.compile(r'["\[\]{}]')
+VALUE_STRINGCHUNK = re.compile(r'["\\]')
+VALUE_SCALAR_END = re.compile(r'[\s,\[\]{}"]')
+
+class IncrementalDecoder(object):
+    """Decode JSON text that arrives in pieces, such as a file read in
+    blocks or the data received from a socket.
+
+    ``decode(data, final=False)`` adds ``data`` to the buffered text and
+    returns a list of the values completed by it, in the same way as
+    ``codecs.IncrementalDecoder``.  Only the text of the value being
+    decoded is kept in memory.
+
+    If ``items`` is false (the default) the text is a sequence of JSON
+    documents separated by optional whitespace, as in JSON lines, and each
+    document is a value.  If ``items`` is true the text holds a single
+    JSON array and each of its items is a value, so that a huge array can
+    be processed an item at a time.
+
+    The values are decoded with ``decoder`` (a ``JSONDecoder`` instance;
+    ``JSONDecoder()`` if not given).
+
+    """
+
+    def __init__(self, decoder=None, items=False):
+        if decoder is None:
+            decoder = JSONDecoder()
+        self.decoder = decoder
+        self.items = items
+        self.reset()
+
+    def reset(self):
+        """Discard the buffered text and start decoding a new stream.
+
+        """
+        self._buf = ''
+        # 'value' while a value is expected; with items true also 'open'
+        # before the opening bracket, 'first' before the first item,
+        # 'comma' between items and 'closed' after the closing bracket
+        self._state = 'open' if self.items else 'value'
+        self._start = None
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+
+    def decode(self, data, final=False, _w=WHITESPACE.match):
+        """Add ``data`` (a ``str`` or ``unicode`` instance) to the text and
+        return a list of the values completed by it.  ``final`` must be
+        true for the last piece of the text, after which the decoder is
+        reset.
+
+        """
+        buf = self._buf + data if self._buf else data
+        values = []
+        idx = 0
+        try:
+            while 1:
+                if self._start is not None:
+                    obj, end = self._decode_value(buf, final)
+                    if end is None:
+                        break
+                    values.append(obj)
+                    self._start = None
+                    self._state = 'comma' if self.items else 'value'
+                    idx = end
+                    continue
+                idx = _w(buf, idx).end()
+                if idx == len(buf):
+                    break
+                if self._state == 'value':
+                    self._start_value(buf, idx)
+                elif self._state == 'open':
+                    if buf[idx] != '[':
+                        raise ValueError(errmsg("Expecting '['", buf, idx))
+                    self._state = 'first'
+                    idx += 1
+                elif self._state == 'comma':
+                    if buf[idx] == ',':
+                        self._state = 'value'
+                        idx += 1
+                    elif buf[idx] == ']':
+                        self._state = 'closed'
+                        idx += 1
+                    else:
+                        raise ValueError(errmsg(
+                            "Expecting , delimiter", buf, idx))
+                elif self._state == 'first':
+                    if buf[idx] == ']':
+                        self._state = 'closed'
+                        idx += 1
+                    else:
+                        self._start_value(buf, idx)
+                else:
+                    raise ValueError(errmsg("Extra data", buf, idx, len(buf)))
+            if final:
+                if self._start is not None or self._state not in (
+                        'value', 'closed'):
+                    raise ValueError(errmsg(
+                        "Unexpected end of JSON data", buf, len(buf)))
+                self.reset()
+                return values
+        except:
+            self.reset()
+            raise
+        # Keep only the text of the value being decoded
+        if self._start is not None:
+            idx = self._start
+            self._start = 0
+            self._pos -= idx
+        else:
+            idx = len(buf)
+        self._buf = buf[idx:]
+        return values
+
+    def _start_value(self, buf, idx):
+        self._start = self._pos = idx
+        self._depth = 0
+        self._in_string = False
+
+    def _decode_value(self, buf, final):
+        # Return the value which begins at self._start and the index just
+        # after it, or (None, None) if it is not complete yet
+        start = self._start
+        if buf[start] not in '[{"':
+            # A number or constant may go on in the next piece
+            if VALUE_SCALAR_END.search(buf, start) is None and not final:
+                return None, None
+            return self.decoder.raw_decode(buf, start)
+        if self._pos == start:
+            # Most values arrive whole, so try to decode before scanning
+            try:
+                return self.decoder.raw_decode(buf, start)
+            except ValueError:
+                if final:
+                    raise
+        if self._value_end(buf) is None and not final:
+            return None, None
+        return self.decoder.raw_decode(buf, start)
+
+    def _value_end(self, buf):
+        # Return the index just after the array, object or string which
+        # begins at self._start, or None if it is not complete yet.  The
+        # scan resumes where the previous call stopped, so each character
+        # is looked at once however many pieces the value arrives in.
+        pos = self._pos
+        while 1:
+            if self._in_string:
+                m = VALUE_STRINGCHUNK.search(buf, pos)
+                if m is None:
+                    pos = len(buf)
+                    break
+                if m.group() == '\\':
+                    if m.end() == len(buf):
+                        pos = m.start()
+                        break
+                    pos = m.end() + 1
+                    continue
+                self._in_string = False
+                pos = m.end()
+                if not self._depth:
+                    return pos
+            else:
+                m = VALUE_STRUCT.search(buf, pos)
+                if m is None:
+                    pos = len(buf)
+                    break
+                pos = m.end()
+                c = m.group()
+                if c == '"':
+                    self._in_string = True
+                elif c in '[{':
+                    self._depth += 1
+                else:
+                    self._depth -= 1
+                    if not self._depth:
+                        return pos
+        self._pos = pos
+        return None
@@ -29,6 +29,8 @@ for i in range(0x20):
 
 INFINITY = float('inf')
 FLOAT_REPR = repr
+# Number of characters JSONEncoder.dump() passes to each fp.write() call
+CHUNK_SIZE = 65536
 
 def encode_basestring(s):
     """Return a JSON representation of a Python string
@@ -219,6 +221,35 @@ class JSONEncoder(object):
                 mysocket.write(chunk)
 
         """
+        return self._make_iterencode(_one_shot)(o, 0)
+
+    def dump(self, o, fp, chunk_size=CHUNK_SIZE):
+        """Encode the given object and write its representation to the
+        ``.write()``-supporting file-like object fp.
+
+        When the C accelerator can handle this encoder, the output is
+        written in chunks of about *chunk_size* characters, so that large
+        objects are neither written a few characters at a time nor
+        encoded completely in memory first.  Otherwise each chunk produced
+        by `iterencode` is written as it is produced.  That is also the case
+        when ensure_ascii is false, since the chunks may then mix str and
+        unicode instances which cannot be joined.
+
+        """
+        if (type(self).iterencode.__func__ is JSONEncoder.iterencode.__func__
+                and self.ensure_ascii and self._can_use_c_encoder()):
+            _iterencode = self._make_iterencode(_one_shot=True)
+            _iterencode(o, 0, fp.write, chunk_size)
+        else:
+            for chunk in self.iterencode(o):
+                fp.write(chunk)
+
+    def _can_use_c_encoder(self):
+        return (c_make_encoder is not None and not self.sort_keys
+                and (self.indent is None
+                     or isinstance(self.indent, (int, long))))
+
+    def _make_iterencode(self, _one_shot):
         if self.check_circular:
             markers = {}
         else:
@@ -256,18 +287,15 @@ class JSONEncoder(object):
             return text
 
 
-        if (_one_shot and c_make_encoder is not None
-                and self.indent is None and not self.sort_keys):
-            _iterencode = c_make_encoder(
+        if _one_shot and self._can_use_c_encoder():
+            return c_make_encoder(
                 markers, self.default, _encoder, self.indent,
                 self.key_separator, self.item_separator, self.sort_keys,
                 self.skipkeys, self.allow_nan)
-        else:
-            _iterencode = _make_iterencode(
-                markers, self.default, _encoder, self.indent, floatstr,
-                self.key_separator, self.item_separator, self.sort_keys,
-                self.skipkeys, _one_shot)
-        return _iterencode(o, 0)
+        return _make_iterencode(
+            markers, self.default, _encoder, self.indent, floatstr,
+            self.key_separator, self.item_separator, self.sort_keys,
+            self.skipkeys, _one_shot)
 
 def _make_iterencode(markers, _default, _encoder, _indent, _floatstr,
         _key_separator, _item_separator, _sort_keys, _skipkeys, _one_shot,
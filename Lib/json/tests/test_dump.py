@@ -27,6 +27,35 @@ class TestDump(object):
         self.assertEqual(self.dumps(a, default=crasher),
                  '[null, null, null, null, null]')
 
+    def test_dump_chunks(self):
+        chunks = []
+        class Writer(object):
+            write = chunks.append
+        obj = [{'a': range(10)}, 'b' * 100] * 100
+        self.json.JSONEncoder().dump(obj, Writer(), chunk_size=500)
+        self.assertEqual(''.join(chunks), self.dumps(obj))
+        self.assertTrue(all(len(chunk) < 1000 for chunk in chunks))
+
+    def test_dump_non_ascii_str(self):
+        # The chunks of str and unicode are written without joining them
+        chunks = []
+        class Writer(object):
+            write = chunks.append
+        obj = {u'k': '\xc3\xa9', 'x': [u'abc']}
+        self.json.dump(obj, Writer(), ensure_ascii=False)
+        self.assertEqual(self.json.loads(''.join(
+                         chunk.encode('utf-8') if isinstance(chunk, unicode)
+                         else chunk for chunk in chunks)),
+                         {u'k': u'\xe9', u'x': [u'abc']})
+
+    def test_dump_subclass_iterencode(self):
+        class Encoder(self.json.JSONEncoder):
+            def iterencode(self, o, _one_shot=False):
+                yield '[]'
+        sio = StringIO()
+        self.json.dump({}, sio, cls=Encoder)
+        self.assertEqual(sio.getvalue(), '[]')
+
 
 class TestPyDump(TestDump, PyTest): pass
 class TestCDump(TestDump, CTest): pass
@@ -0,0 +1,81 @@
+from StringIO import StringIO
+from json.tests import PyTest, CTest
+
+
+DOCS = [
+    {"a": [1, 2.5, None], "b": {"c": 'd\\"}'}},
+    [[], {}, "", "]\"[", u"\u20ac"],
+    -12,
+    3.5e10,
+    "x",
+    True,
+    None,
+]
+
+
+class TestIncremental(object):
+    def feed(self, decoder, text, size):
+        values = []
+        for i in range(0, len(text), size):
+            values.extend(decoder.decode(text[i:i + size]))
+        values.extend(decoder.decode('', final=True))
+        return values
+
+    def test_documents(self):
+        text = '\n'.join(self.dumps(doc) for doc in DOCS) + '\n'
+        for size in (1, 2, 3, 7, len(text)):
+            decoder = self.json.IncrementalDecoder()
+            self.assertEqual(self.feed(decoder, text, size), DOCS)
+        # Documents need not be separated by whitespace
+        decoder = self.json.IncrementalDecoder()
+        self.assertEqual(decoder.decode('{}[]"a"1 '), [{}, [], u'a', 1])
+
+    def test_values_as_completed(self):
+        decoder = self.json.IncrementalDecoder()
+        self.assertEqual(decoder.decode('{"a": [1'), [])
+        self.assertEqual(decoder.decode(', 2]}\n{"b"'), [{'a': [1, 2]}])
+        self.assertEqual(decoder.decode(': 3}'), [{'b': 3}])
+        # A number may continue in the next piece
+        self.assertEqual(decoder.decode('12'), [])
+        self.assertEqual(decoder.decode('34'), [])
+        self.assertEqual(decoder.decode('', final=True), [1234])
+
+    def test_items(self):
+        text = ' [' + ', '.join(self.dumps(doc) for doc in DOCS) + ']\n'
+        for size in (1, 3, len(text)):
+            decoder = self.json.IncrementalDecoder(items=True)
+            self.assertEqual(self.feed(decoder, text, size), DOCS)
+        decoder = self.json.IncrementalDecoder(items=True)
+        self.assertEqual(self.feed(decoder, '[]', 1), [])
+
+    def test_errors(self):
+        for text, items in [('[1, 2', False), ('"abc', False),
+                            ('[1, 2', True), ('[1, 2,]', True),
+                            ('[1 2]', True), ('[1][2]', True),
+                            ('{}', True), ('[1, x]', False)]:
+            decoder = self.json.IncrementalDecoder(items=items)
+            self.assertRaises(ValueError, self.feed, decoder, text, 1)
+            # The decoder can be used again after an error
+            self.assertEqual(self.feed(decoder, '[3]', 1),
+                             [3] if items else [[3]])
+
+    def test_decoder(self):
+        decoder = self.json.IncrementalDecoder(
+            self.json.JSONDecoder(parse_int=float), items=True)
+        self.assertEqual(decoder.decode('[1, 2]', final=True), [1.0, 2.0])
+
+    def test_iterload(self):
+        text = ''.join(self.dumps(doc) + '\n' for doc in DOCS)
+        self.assertEqual(list(self.json.iterload(StringIO(text))), DOCS)
+        self.assertEqual(list(self.json.iterload(StringIO(text),
+                                                 chunk_size=5)), DOCS)
+        text = self.dumps(DOCS, indent=2)
+        it = self.json.iterload(StringIO(text), items=True,
+                                object_pairs_hook=list)
+        self.assertEqual(next(it), [(u'a', [1, 2.5, None]),
+                                    (u'b', [(u'c', u'd\\"}')])])
+        self.assertEqual(list(it)[1:], DOCS[2:])
+
+
+class TestPyIncremental(TestIncremental, PyTest): pass
+class TestCIncremental(TestIncremental, CTest): pass
@@ -55,6 +55,34 @@ class TestIndent(object):
         # indent=None is more compact
         check(None, '{"3": 1}')
 
+    def test_indent_nested(self):
+        h = [[1, [2, {'a': [3, {}]}]], [], {'b': None}]
+        expect = textwrap.dedent("""\
+        [
+           [
+              1,
+              [
+                 2,
+                 {
+                    "a": [
+                       3,
+                       {}
+                    ]
+                 }
+              ]
+           ],
+           [],
+           {
+              "b": null
+           }
+        ]""")
+        self.assertEqual(self.dumps(h, indent=3, separators=(',', ': ')),
+                         expect)
+
+        sio = StringIO()
+        self.json.dump(h, sio, indent=3, separators=(',', ': '))
+        self.assertEqual(sio.getvalue(), expect)
+
 
 class TestPyIndent(TestIndent, PyTest): pass
 class TestCIndent(TestIndent, CTest): pass
@@ -23,7 +23,7 @@ Copyright (C) 2001-2014 Vinay Sajip. All Rights Reserved.
 To use, simply 'import logging' and log away!
 """
 
-import sys, os, time, cStringIO, traceback, warnings, weakref, collections
+import sys, os, re, time, cStringIO, traceback, warnings, weakref, collections
 
 __all__ = ['BASIC_FORMAT', 'BufferingFormatter', 'CRITICAL', 'DEBUG', 'ERROR',
            'FATAL', 'FileHandler', 'Filter', 'Formatter', 'Handler', 'INFO',
@@ -71,6 +71,10 @@ else:
     _srcfile = __file__
 _srcfile = os.path.normcase(_srcfile)
 
+# Maps the co_filename of the code objects seen by findCaller() to whether
+# it is _srcfile, so that each file name is only normalized once
+_srcfileCache = {}
+
 # next bit filched from 1.5.2's inspect.py
 def currentframe():
     """Return the frame object for the caller's stack frame."""
@@ -115,6 +119,13 @@ logMultiprocessing = 1
 #
 logProcesses = 1
 
+#
+# The LogRecord attributes which are only filled in when a handler or filter
+# may use them (see Logger.getRecordAttributes())
+#
+_callerAttributes = frozenset(['pathname', 'filename', 'module', 'lineno',
+                               'funcName'])
+
 #---------------------------------------------------------------------------
 #   Level related stuff
 #---------------------------------------------------------------------------
@@ -241,9 +252,13 @@ class LogRecord(object):
     information to be logged.
     """
     def __init__(self, name, level, pathname, lineno,
-                 msg, args, exc_info, func=None):
+                 msg, args, exc_info, func=None, attrs=None):
         """
         Initialize a logging record with interesting information.
+
+        If attrs is a set of attribute names, the thread and process
+        attributes which are not in it are set to None instead of being
+        looked up.
         """
         ct = time.time()
         self.name = name
@@ -286,13 +301,15 @@ class LogRecord(object):
         self.created = ct
         self.msecs = (ct - long(ct)) * 1000
         self.relativeCreated = (self.created - _startTime) * 1000
-        if logThreads and thread:
+        if logThreads and thread and (attrs is None or 'thread' in attrs or
+                                      'threadName' in attrs):
             self.thread = thread.get_ident()
             self.threadName = threading.current_thread().name
         else:
             self.thread = None
             self.threadName = None
-        if not logMultiprocessing:
+        if not logMultiprocessing or (attrs is not None and
+                                      'processName' not in attrs):
             self.processName = None
         else:
             self.processName = 'MainProcess'
@@ -306,7 +323,8 @@ class LogRecord(object):
                     self.processName = mp.current_process().name
                 except StandardError:
                     pass
-        if logProcesses and hasattr(os, 'getpid'):
+        if logProcesses and hasattr(os, 'getpid') and (attrs is None or
+                                                       'process' in attrs):
             self.process = os.getpid()
         else:
             self.process = None
@@ -350,6 +368,20 @@ def makeLogRecord(dict):
 #   Formatter classes and functions
 #---------------------------------------------------------------------------
 
+# Maps format strings to the names of the record attributes they use
+_fmtAttributes = {}
+_fmtAttributesPattern = re.compile(r'%\((\w+)\)')
+
+def _getFormatAttributes(fmt):
+    try:
+        return _fmtAttributes[fmt]
+    except KeyError:
+        attrs = set(_fmtAttributesPattern.findall(fmt))
+        if 'asctime' in attrs:
+            attrs.update(('created', 'msecs'))
+        attrs = _fmtAttributes[fmt] = frozenset(attrs)
+        return attrs
+
 class Formatter(object):
     """
     Formatter instances are used to convert a LogRecord to text.
@@ -455,6 +487,19 @@ class Formatter(object):
         """
         return self._fmt.find("%(asctime)") >= 0
 
+    def getRecordAttributes(self):
+        """
+        Return the names of the record attributes used by the format string,
+        as a frozenset, or None if the formatter may use any attribute.
+
+        Subclasses may override format() and use other attributes, so this
+        version returns None for them; a subclass which knows which
+        attributes it uses can override this method.
+        """
+        if type(self) is not Formatter:
+            return None
+        return _getFormatAttributes(self._fmt)
+
     def format(self, record):
         """
         Format the specified record as text.
@@ -731,6 +776,19 @@ class Handler(Filterer):
             fmt = _defaultFormatter
         return fmt.format(record)
 
+    def getRecordAttributes(self):
+        """
+        Return the names of the record attributes used by this handler and
+        its filters and formatter, as a frozenset, or None if it may use
+        any attribute.
+
+        Loggers only look up the source location, thread and process of an
+        event if a handler may use them.  This version returns None; a
+        handler which only uses the text returned by format() can return
+        the attributes used by its formatter.
+        """
+        return None
+
     def emit(self, record):
         """
         Do whatever it takes to actually log the specified logging record.
@@ -820,8 +878,18 @@ class StreamHandler(Handler):
     A handler class which writes logging records, appropriately formatted,
     to a stream. Note that this class does not close the stream, as
     sys.stdout or sys.stderr may be used.
+
+    By default the stream is flushed after every record. Call
+    setBuffering() to flush only when enough output has accumulated, when
+    a time limit has passed or when a severe record is logged.
     """
 
+    bufferSize = 0
+    flushInterval = 1.0
+    flushLevel = ERROR
+    _unflushed = 0
+    _lastFlush = 0.0
+
     def __init__(self, stream=None):
         """
         Initialize the handler.
@@ -833,6 +901,39 @@ class StreamHandler(Handler):
             stream = sys.stderr
         self.stream = stream
 
+    def getRecordAttributes(self):
+        """
+        Return the names of the record attributes used by the formatter.
+
+        Subclasses may override emit() and use other attributes, so the
+        attributes are only known for StreamHandler and FileHandler
+        instances without filters.
+        """
+        if self.filters or type(self) not in (StreamHandler, FileHandler):
+            return None
+        return (self.formatter or _defaultFormatter).getRecordAttributes()
+
+    def setBuffering(self, bufferSize, flushInterval=1.0, flushLevel=ERROR):
+        """
+        Set the buffering policy of the handler.
+
+        If bufferSize is greater than zero, the stream is flushed only when
+        at least bufferSize characters have been written since the last
+        flush, when a record is emitted more than flushInterval seconds
+        after the last flush (None disables this check) or when a record of
+        level flushLevel or higher is emitted. A bufferSize of zero restores
+        the default of flushing after every record.
+        """
+        self.acquire()
+        try:
+            self.bufferSize = bufferSize
+            self.flushInterval = flushInterval
+            self.flushLevel = _checkLevel(flushLevel)
+            self._unflushed = 0
+            self._lastFlush = time.time()
+        finally:
+            self.release()
+
     def flush(self):
         """
         Flushes the stream.
@@ -841,9 +942,28 @@ class StreamHandler(Handler):
         try:
             if self.stream and hasattr(self.stream, "flush"):
                 self.stream.flush()
+            if self.bufferSize > 0:
+                self._unflushed = 0
+                self._lastFlush = time.time()
         finally:
             self.release()
 
+    def _needsFlush(self, record, size):
+        """
+        Check whether the stream should be flushed after writing size
+        characters for the record.
+        """
+        if self.bufferSize <= 0:
+            return True
+        self._unflushed += size
+        if self._unflushed >= self.bufferSize:
+            return True
+        if record.levelno >= self.flushLevel:
+            return True
+        interval = self.flushInterval
+        return (interval is not None and
+                abs(record.created - self._lastFlush) >= interval)
+
     def emit(self, record):
         """
         Emit a record.
@@ -853,7 +973,8 @@ class StreamHandler(Handler):
         exception information is present, it is formatted using
         traceback.print_exception and appended to the stream.  If the stream
         has an 'encoding' attribute, it is used to determine how to do the
-        output to the stream.
+        output to the stream. The stream is then flushed, subject to the
+        policy set by setBuffering().
         """
         try:
             msg = self.format(record)
@@ -880,7 +1001,8 @@ class StreamHandler(Handler):
                         stream.write(fs % msg)
                 except UnicodeError:
                     stream.write(fs % msg.encode("UTF-8"))
-            self.flush()
+            if self._needsFlush(record, len(msg) + 1):
+                self.flush()
         except (KeyboardInterrupt, SystemExit):
             raise
         except:
@@ -1236,20 +1358,24 @@ class Logger(Filterer):
         rv = "(unknown file)", 0, "(unknown function)"
         while hasattr(f, "f_code"):
             co = f.f_code
-            filename = os.path.normcase(co.co_filename)
-            if filename == _srcfile:
+            try:
+                isSrcfile = _srcfileCache[co.co_filename]
+            except KeyError:
+                isSrcfile = os.path.normcase(co.co_filename) == _srcfile
+                _srcfileCache[co.co_filename] = isSrcfile
+            if isSrcfile:
                 f = f.f_back
                 continue
             rv = (co.co_filename, f.f_lineno, co.co_name)
             break
         return rv
 
-    def makeRecord(self, name, level, fn, lno, msg, args, exc_info, func=None, extra=None):
+    def makeRecord(self, name, level, fn, lno, msg, args, exc_info, func=None, extra=None, attrs=None):
         """
         A factory method which can be overridden in subclasses to create
         specialized LogRecords.
         """
-        rv = LogRecord(name, level, fn, lno, msg, args, exc_info, func)
+        rv = LogRecord(name, level, fn, lno, msg, args, exc_info, func, attrs)
         if extra is not None:
             for key in extra:
                 if (key in ["message", "asctime"]) or (key in rv.__dict__):
@@ -1262,7 +1388,16 @@ class Logger(Filterer):
         Low-level logging routine which creates a LogRecord and then calls
         all the handlers of this logger to handle the record.
         """
-        if _srcfile:
+        # Subclasses which override makeRecord() may use any attribute, as
+        # may replacements set on the instance, which need not be methods
+        if (getattr(self.makeRecord, 'im_func', None) is
+            Logger.makeRecord.im_func):
+            attrs = self.getRecordAttributes(level)
+        else:
+            attrs = None
+        if attrs is not None and attrs.isdisjoint(_callerAttributes):
+            fn, lno, func = "(unknown file)", 0, "(unknown function)"
+        elif _srcfile:
             #IronPython doesn't track Python frames, so findCaller raises an
             #exception on some versions of IronPython. We trap it here so that
             #IronPython can use logging.
@@ -1275,9 +1410,40 @@ class Logger(Filterer):
         if exc_info:
             if not isinstance(exc_info, tuple):
                 exc_info = sys.exc_info()
-        record = self.makeRecord(self.name, level, fn, lno, msg, args, exc_info, func, extra)
+        if attrs is None:
+            record = self.makeRecord(self.name, level, fn, lno, msg, args,
+                                     exc_info, func, extra)
+        else:
+            record = self.makeRecord(self.name, level, fn, lno, msg, args,
+                                     exc_info, func, extra, attrs)
         self.handle(record)
 
+    def getRecordAttributes(self, level):
+        """
+        Return the names of the record attributes used by the filters of
+        this logger and the handlers which will handle an event of the
+        specified level, as a frozenset, or None if they may use any
+        attribute.
+
+        The handlers are found in the same way as by callHandlers().
+        """
+        if self.filters:
+            return None
+        attrs = set()
+        c = self
+        while c:
+            for hdlr in c.handlers:
+                if level >= hdlr.level:
+                    hdlrAttrs = hdlr.getRecordAttributes()
+                    if hdlrAttrs is None:
+                        return None
+                    attrs.update(hdlrAttrs)
+            if not c.propagate:
+                c = None    #break out
+            else:
+                c = c.parent
+        return frozenset(attrs)
+
     def handle(self, record):
         """
         Call the handlers for the specified record.
@@ -30,6 +30,7 @@ import io
 import logging
 import logging.handlers
 import os
+import Queue
 import re
 import socket
 import struct
@@ -692,6 +693,7 @@ class DictConfigurator(BaseConfigurator):
 
     def configure_handler(self, config):
         """Configure a handler from a dictionary."""
+        config_copy = dict(config)  # for restoring in case of error
         formatter = config.pop('formatter', None)
         if formatter:
             try:
@@ -701,6 +703,7 @@ class DictConfigurator(BaseConfigurator):
                                  '%r: %s' % (formatter, e))
         level = config.pop('level', None)
         filters = config.pop('filters', None)
+        listener = None
         if '()' in config:
             c = config.pop('()')
             if not hasattr(c, '__call__') and hasattr(types, 'ClassType') and type(c) != types.ClassType:
@@ -715,12 +718,39 @@ class DictConfigurator(BaseConfigurator):
                 try:
                     th = self.config['handlers'][config['target']]
                     if not isinstance(th, logging.Handler):
-                        config['class'] = cname # restore for deferred configuration
+                        config.update(config_copy) # restore for deferred configuration
                         raise StandardError('target not configured yet')
                     config['target'] = th
                 except StandardError as e:
                     raise ValueError('Unable to set target handler '
                                      '%r: %s' % (config['target'], e))
+            #Special case for handler which feeds other handlers from a queue
+            elif issubclass(klass, logging.handlers.QueueHandler):
+                targets = []
+                for h in config.get('handlers', []):
+                    try:
+                        th = self.config['handlers'][h]
+                        if not isinstance(th, logging.Handler):
+                            config.update(config_copy) # restore for deferred configuration
+                            raise StandardError('target not configured yet')
+                    except StandardError as e:
+                        raise ValueError('Unable to set target handler '
+                                         '%r: %s' % (h, e))
+                    targets.append(th)
+                queue = config.get('queue')
+                if queue is None:
+                    queue = Queue.Queue()
+                elif isinstance(queue, dict):
+                    queue = self.configure_custom(queue)
+                config['queue'] = queue
+                if 'handlers' in config:
+                    listener_kwargs = dict([(k, config.pop(k))
+                                            for k in ('respect_handler_level',
+                                                      'batch_size')
+                                            if k in config])
+                    config.pop('handlers')
+                    listener = logging.handlers.QueueListener(queue, *targets,
+                                                              **listener_kwargs)
             elif issubclass(klass, logging.handlers.SMTPHandler) and\
                 'mailhost' in config:
                 config['mailhost'] = self.as_tuple(config['mailhost'])
@@ -746,6 +776,9 @@ class DictConfigurator(BaseConfigurator):
             result.setLevel(logging._checkLevel(level))
         if filters:
             self.add_filters(result, filters)
+        if listener is not None:
+            result.listener = listener
+            listener.start()
         return result
 
     def add_handlers(self, logger, handlers):
@@ -23,9 +23,14 @@ Copyright (C) 2001-2013 Vinay Sajip. All Rights Reserved.
 To use, simply 'import logging.handlers' and log away!
 """
 
-import errno, logging, socket, os, cPickle, struct, time, re
+import errno, logging, socket, os, cPickle, struct, time, re, copy, Queue
 from stat import ST_DEV, ST_INO, ST_MTIME
 
+try:
+    import threading
+except ImportError: #pragma: no cover
+    threading = None
+
 try:
     import codecs
 except ImportError:
@@ -106,6 +111,11 @@ class RotatingFileHandler(BaseRotatingHandler):
         respectively.
 
         If maxBytes is zero, rollover never occurs.
+
+        If buffering has been enabled with setBuffering(), the size of the
+        file is tracked in memory instead of being queried from the stream
+        for every record, so the file should not be shared with other
+        writers.
         """
         # If rotation/rollover is wanted, it doesn't make sense to use another
         # mode. If for example 'w' were specified, then if there were multiple
@@ -117,6 +127,7 @@ class RotatingFileHandler(BaseRotatingHandler):
         BaseRotatingHandler.__init__(self, filename, mode, encoding, delay)
         self.maxBytes = maxBytes
         self.backupCount = backupCount
+        self._size = None
 
     def doRollover(self):
         """
@@ -125,6 +136,7 @@ class RotatingFileHandler(BaseRotatingHandler):
         if self.stream:
             self.stream.close()
             self.stream = None
+        self._size = None
         if self.backupCount > 0:
             for i in range(self.backupCount - 1, 0, -1):
                 sfn = "%s.%d" % (self.baseFilename, i)
@@ -154,9 +166,20 @@ class RotatingFileHandler(BaseRotatingHandler):
             self.stream = self._open()
         if self.maxBytes > 0:                   # are we rolling over?
             msg = "%s\n" % self.format(record)
-            self.stream.seek(0, 2)  #due to non-posix-compliant Windows feature
-            if self.stream.tell() + len(msg) >= self.maxBytes:
+            if self.bufferSize <= 0:
+                self._size = None
+                self.stream.seek(0, 2)  #due to non-posix-compliant Windows feature
+                if self.stream.tell() + len(msg) >= self.maxBytes:
+                    return 1
+                return 0
+            # Seeking would flush the stream, so when buffering keep a
+            # running total, querying the stream only after a rollover.
+            if self._size is None:
+                self.stream.seek(0, 2)
+                self._size = self.stream.tell()
+            if self._size + len(msg) >= self.maxBytes:
                 return 1
+            self._size += len(msg)
         return 0
 
 class TimedRotatingFileHandler(BaseRotatingHandler):
@@ -386,10 +409,16 @@ class WatchedFileHandler(logging.FileHandler):
 
     This handler is based on a suggestion and patch by Chad J.
     Schroeder.
+
+    If statInterval is greater than zero, the file is checked at most once
+    per statInterval seconds rather than on every emit.
     """
-    def __init__(self, filename, mode='a', encoding=None, delay=0):
+    def __init__(self, filename, mode='a', encoding=None, delay=0,
+                 statInterval=0):
         logging.FileHandler.__init__(self, filename, mode, encoding, delay)
+        self.statInterval = statInterval
         self.dev, self.ino = -1, -1
+        self._lastStat = None
         self._statstream()
 
     def _statstream(self):
@@ -409,6 +438,13 @@ class WatchedFileHandler(logging.FileHandler):
         # once and then fstat'ing our new fd if we opened a new log stream.
         # See issue #14632: Thanks to John Mulligan for the problem report
         # and patch.
+        if self.statInterval > 0:
+            last = self._lastStat
+            if (last is not None and
+                0 <= record.created - last < self.statInterval):
+                logging.FileHandler.emit(self, record)
+                return
+            self._lastStat = record.created
         try:
             # stat the file by path, checking for existence
             sres = os.stat(self.baseFilename)
@@ -1220,3 +1256,208 @@ class MemoryHandler(BufferingHandler):
             BufferingHandler.close(self)
         finally:
             self.release()
+
+
+class QueueHandler(logging.Handler):
+    """
+    This handler sends events to a queue, such as a Queue.Queue or a
+    multiprocessing.Queue, from which a QueueListener passes them to other
+    handlers on a separate thread, so that the threads which log do not
+    wait for slow I/O.
+
+    If the queue is full, the record is dropped unless block is true, in
+    which case emit() waits up to timeout seconds (forever if timeout is
+    None) for a free slot before dropping it. The number of records which
+    were dropped is kept in the dropped attribute.
+    """
+    def __init__(self, queue, block=False, timeout=None):
+        """
+        Initialise an instance, using the passed queue.
+        """
+        logging.Handler.__init__(self)
+        self.queue = queue
+        self.block = block
+        self.timeout = timeout
+        self.dropped = 0
+        # A QueueListener which is stopped when the handler is closed
+        self.listener = None
+
+    def enqueue(self, record):
+        """
+        Enqueue a record.
+
+        The base implementation uses put() with the block and timeout
+        attributes, so it raises Queue.Full if the queue stays full. You
+        may want to override this method if you want to use a queue with
+        a different interface.
+        """
+        self.queue.put(record, self.block, self.timeout)
+
+    def prepare(self, record):
+        """
+        Prepare a record for queuing.
+
+        The record is formatted, and a copy of it is returned in which the
+        message and the exception information are replaced by the formatted
+        text, so that it can be pickled and so that the handlers behind the
+        queue do not format it again. You may want to override this method
+        if you want to enqueue something else, such as a dict or a string.
+        """
+        msg = self.format(record)
+        record = copy.copy(record)
+        record.message = msg
+        record.msg = msg
+        record.args = None
+        record.exc_info = None
+        record.exc_text = None
+        return record
+
+    def emit(self, record):
+        """
+        Emit a record.
+
+        Writes the prepared record to the queue, or drops it if the queue
+        is full.
+        """
+        try:
+            self.enqueue(self.prepare(record))
+        except Queue.Full:
+            self.dropped += 1
+        except (KeyboardInterrupt, SystemExit):
+            raise
+        except:
+            self.handleError(record)
+
+    def close(self):
+        """
+        Close the handler.
+
+        If a listener was attached to the handler, it is stopped, after it
+        has handled the records which are still queued.
+        """
+        self.acquire()
+        try:
+            listener, self.listener = self.listener, None
+        finally:
+            self.release()
+        if listener is not None:
+            listener.stop()
+        logging.Handler.close(self)
+
+class QueueListener(object):
+    """
+    This class runs a thread which takes the records sent by a QueueHandler
+    from a queue and passes them to handlers.
+
+    The records are taken from the queue in batches of up to batch_size, and
+    each record is passed to every handler, or only to those whose level it
+    reaches if respect_handler_level is true. These two options can only be
+    passed as keyword arguments.
+    """
+    _sentinel = None
+
+    def __init__(self, queue, *handlers, **kwargs):
+        """
+        Initialise an instance with the specified queue and handlers.
+        """
+        self.respect_handler_level = kwargs.pop('respect_handler_level', False)
+        self.batch_size = kwargs.pop('batch_size', 100)
+        if kwargs:
+            raise TypeError('unexpected keyword arguments: %s' %
+                            ', '.join(sorted(kwargs)))
+        self.queue = queue
+        self.handlers = handlers
+        self._thread = None
+
+    def dequeue(self, block):
+        """
+        Dequeue a record and return it, optionally blocking.
+
+        The base implementation uses get(), so it raises Queue.Empty if
+        block is false and the queue is empty. You may want to override
+        this method if you want to use a queue with a different interface.
+        """
+        return self.queue.get(block)
+
+    def start(self):
+        """
+        Start the listener.
+
+        This starts up a background thread to monitor the queue for records
+        to process.
+        """
+        self._thread = t = threading.Thread(target=self._monitor)
+        t.setDaemon(True)
+        t.start()
+
+    def prepare(self, record):
+        """
+        Prepare a record for handling.
+
+        This method just returns the passed-in record. You may want to
+        override this method if you need to do any custom marshalling or
+        manipulation of the record before passing it to the handlers.
+        """
+        return record
+
+    def handle(self, record):
+        """
+        Handle a record.
+
+        This just loops through the handlers offering them the record to
+        handle.
+        """
+        record = self.prepare(record)
+        for handler in self.handlers:
+            if not self.respect_handler_level or record.levelno >= handler.level:
+                handler.handle(record)
+
+    def _monitor(self):
+        """
+        Monitor the queue for records, and ask the handlers to deal with
+        them.
+
+        This method runs on a separate, internal thread. It waits for a
+        record, takes whatever else is queued up to batch_size records,
+        and handles them. The thread terminates when it sees a sentinel
+        object in the queue.
+        """
+        q = self.queue
+        has_task_done = hasattr(q, 'task_done')
+        stop = False
+        while not stop:
+            records = [self.dequeue(True)]
+            try:
+                while len(records) < self.batch_size:
+                    records.append(self.dequeue(False))
+            except Queue.Empty:
+                pass
+            for record in records:
+                if record is self._sentinel:
+                    stop = True
+                else:
+                    self.handle(record)
+                if has_task_done:
+                    q.task_done()
+
+    def enqueue_sentinel(self):
+        """
+        Write a sentinel to the queue to tell the listener to quit. This
+        implementation uses put(), which waits for a free slot if the queue
+        is full. You may want to override this method if you want to use a
+        queue with a different interface.
+        """
+        self.queue.put(self._sentinel)
+
+    def stop(self):
+        """
+        Stop the listener.
+
+        This asks the thread to terminate, and then waits for it to do so.
+        Note that if you don't call this before your application exits, there
+        may be some records still left on the queue, which won't be processed.
+        """
+        if self._thread is not None:
+            self.enqueue_sentinel()
+            self._thread.join()
+            self._thread = None
@@ -50,6 +50,7 @@ __all__ = [
     'Lock', 'RLock', 'Semaphore', 'BoundedSemaphore', 'Condition',
     'Event', 'Queue', 'JoinableQueue', 'Pool', 'Value', 'Array',
     'RawValue', 'RawArray', 'SUBDEBUG', 'SUBWARNING',
+    'get_start_method', 'set_start_method',
     ]
 
 __author__ = 'R. Oudkerk (r.m.oudkerk@gmail.com)'
@@ -164,6 +165,21 @@ def allow_connection_pickling():
     '''
     from multiprocessing import reduction
 
+def get_start_method():
+    '''
+    Returns the method used to start child processes
+    '''
+    from multiprocessing.forking import get_start_method
+    return get_start_method()
+
+def set_start_method(method):
+    '''
+    Sets the method used to start child processes -- 'fork' (the default) or
+    'forkserver' on Unix, 'spawn' on Windows
+    '''
+    from multiprocessing.forking import set_start_method
+    set_start_method(method)
+
 #
 # Definitions depending on native semaphores
 #
@@ -210,19 +226,19 @@ def Event():
     from multiprocessing.synchronize import Event
     return Event()
 
-def Queue(maxsize=0):
+def Queue(maxsize=0, shared_memory=0):
     '''
     Returns a queue object
     '''
     from multiprocessing.queues import Queue
-    return Queue(maxsize)
+    return Queue(maxsize, shared_memory)
 
-def JoinableQueue(maxsize=0):
+def JoinableQueue(maxsize=0, shared_memory=0):
     '''
     Returns a queue object
     '''
     from multiprocessing.queues import JoinableQueue
-    return JoinableQueue(maxsize)
+    return JoinableQueue(maxsize, shared_memory)
 
 def Pool(processes=None, initializer=None, initargs=(), maxtasksperchild=None):
     '''
@@ -275,3 +291,15 @@ if sys.platform == 'win32':
         set_executable(executable)
 
     __all__ += ['set_executable']
+
+else:
+
+    def set_forkserver_preload(module_names):
+        '''
+        Sets the list of modules which the fork server imports when it is
+        started, so that processes forked from it do not have to
+        '''
+        from multiprocessing.forkserver import set_forkserver_preload
+        set_forkserver_preload(module_names)
+
+    __all__ += ['set_forkserver_preload']
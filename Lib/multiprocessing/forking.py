@@ -39,7 +39,8 @@ import errno
 
 from multiprocessing import util, process
 
-__all__ = ['Popen', 'assert_spawning', 'exit', 'duplicate', 'close', 'ForkingPickler']
+__all__ = ['Popen', 'assert_spawning', 'exit', 'duplicate', 'close', 'ForkingPickler',
+           'get_start_method', 'set_start_method']
 
 #
 # Check that the current thread is spawning a child process
@@ -101,17 +102,48 @@ else:
 
 if sys.platform != 'win32':
     import time
+    import thread
+
+    import _multiprocessing
 
     exit = os._exit
     duplicate = os.dup
     close = os.close
 
+    #
+    # The method used to start child processes
+    #
+
+    _start_method = 'fork'
+
+    def get_start_method():
+        '''
+        Return the method used to start child processes
+        '''
+        return _start_method
+
+    def set_start_method(method):
+        '''
+        Set the method used to start child processes: 'fork' or 'forkserver'
+        '''
+        global _start_method
+        if method not in ('fork', 'forkserver'):
+            raise ValueError('unknown start method %r' % method)
+        if method == 'forkserver' and not hasattr(_multiprocessing, 'sendfd'):
+            raise ValueError('the "forkserver" start method is not '
+                             'supported on this platform')
+        _start_method = method
+
     #
     # We define a Popen class similar to the one from subprocess, but
     # whose constructor takes a process object as its argument.
     #
 
     class Popen(object):
+        '''
+        Start a subprocess to run the code of a process object
+        '''
+        _tls = thread._local()
 
         def __init__(self, process_obj):
             sys.stdout.flush()
@@ -175,7 +207,40 @@ if sys.platform != 'win32':
 
         @staticmethod
         def thread_is_spawning():
-            return False
+            # true while a process object is pickled for the fork server
+            return getattr(Popen._tls, 'fds', None) is not None
+
+        @staticmethod
+        def duplicate_for_child(fd):
+            # the fork server passes the fds to the child in a list, and the
+            # child looks up the index returned here with get_inherited()
+            Popen._tls.fds.append(fd)
+            return len(Popen._tls.fds) - 1
+
+        @staticmethod
+        def get_inherited(index):
+            from multiprocessing.forkserver import get_inherited_fds
+            return get_inherited_fds()[index]
+
+    #
+    # Make Connection picklable for processes started by the fork server
+    #
+
+    def reduce_connection(conn):
+        if not Popen.thread_is_spawning():
+            raise RuntimeError(
+                'By default %s objects can only be shared between processes\n'
+                'using inheritance' % type(conn).__name__
+                )
+        return rebuild_connection, (Popen.duplicate_for_child(conn.fileno()),
+                                    conn.readable, conn.writable)
+
+    def rebuild_connection(index, readable, writable):
+        return _multiprocessing.Connection(
+            Popen.get_inherited(index), readable=readable, writable=writable
+            )
+
+    ForkingPickler.register(_multiprocessing.Connection, reduce_connection)
 
 #
 # Windows
@@ -209,6 +274,20 @@ else:
     exit = win32.ExitProcess
     close = win32.CloseHandle
 
+    def get_start_method():
+        '''
+        Return the method used to start child processes
+        '''
+        return 'spawn'
+
+    def set_start_method(method):
+        '''
+        Set the method used to start child processes: only 'spawn' is
+        supported on Windows
+        '''
+        if method != 'spawn':
+            raise ValueError('unknown start method %r' % method)
+
     #
     # _python_exe is the assumed path to the python executable.
     # People embedding Python want to modify it.
@@ -287,6 +366,11 @@ else:
         def duplicate_for_child(handle):
             return duplicate(handle, Popen._tls.process_handle)
 
+        @staticmethod
+        def get_inherited(handle):
+            # the handle was duplicated into the child by the parent
+            return handle
+
         def wait(self, timeout=None):
             if self.returncode is None:
                 if timeout is None:
@@ -469,6 +553,9 @@ def prepare(data):
     if 'orig_dir' in data:
         process.ORIGINAL_DIR = data['orig_dir']
 
+    if 'start_method' in data:
+        set_start_method(data['start_method'])
+
     if 'main_path' in data:
         main_path = data['main_path']
         main_name = os.path.splitext(os.path.basename(main_path))[0]
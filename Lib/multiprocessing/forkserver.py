@@ -0,0 +1,404 @@
+#
+# Module implementing a fork server
+#
+# multiprocessing/forkserver.py
+#
+# Copyright (c) 2006-2008, R Oudkerk
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of author nor the names of any contributors may be
+#    used to endorse or promote products derived from this software
+#    without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+# OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE.
+#
+
+
+__all__ = ['Popen', 'ensure_running', 'set_forkserver_preload']
+
+import os
+import sys
+import errno
+import fcntl
+import select
+import signal
+import socket
+import struct
+import threading
+import time
+import cStringIO
+
+from pickle import load, HIGHEST_PROTOCOL
+
+import _multiprocessing
+from multiprocessing import connection, forking, process, util
+from multiprocessing import semaphore_tracker
+from multiprocessing.forking import ForkingPickler
+
+#
+# The fork server is a fresh interpreter, started with the preloaded
+# modules imported, which forks a child for each connection it accepts on
+# a Unix domain socket.  The parent sends the file descriptors which the
+# child needs followed by the pickled process object; the server replies
+# with the pid of the child and, once the child has exited, its exit code.
+#
+
+_header = struct.Struct('!ii')  # number of fds, size of data
+_int = struct.Struct('!i')
+
+# the file descriptors received by a child of the fork server
+_inherited_fds = None
+
+class ForkServer(object):
+
+    def __init__(self):
+        self._address = None
+        self._alive_w = None
+        self._preload_modules = []
+        self._lock = threading.Lock()
+
+    def set_preload(self, module_names):
+        '''
+        Set the list of modules which the fork server imports on startup
+        '''
+        if not all(type(name) is str for name in module_names):
+            raise TypeError('module_names must be a list of strings')
+        self._preload_modules = list(module_names)
+
+    def ensure_running(self):
+        '''
+        Start the fork server if it is not running yet
+        '''
+        self._lock.acquire()
+        try:
+            if self._alive_w is not None:
+                return
+            debug = util.debug
+            # the server and its children register the semaphores they
+            # create with the same tracker as the parent
+            sem_tracker_fd = semaphore_tracker.getfd()
+            address = connection.arbitrary_address('AF_UNIX')
+            listener = socket.socket(socket.AF_UNIX)
+            try:
+                listener.bind(address)
+                os.chmod(address, 0600)
+                listener.listen(100)
+
+                # the server exits when the write end of this pipe is closed
+                alive_r, alive_w = os.pipe()
+                try:
+                    kwds = {}
+                    if '__main__' in self._preload_modules:
+                        main_path = _get_main_path()
+                        if main_path is not None:
+                            kwds['main_path'] = main_path
+                    prog = ('import sys; sys.path[:] = %r; '
+                            'from multiprocessing.forkserver import main; '
+                            'main(%d, %d, %d, %r, **%r)'
+                            % (sys.path, listener.fileno(), alive_r,
+                               sem_tracker_fd, self._preload_modules, kwds))
+                    args = ([sys.executable] +
+                            util._args_from_interpreter_flags() +
+                            ['-c', prog])
+                    pid = util.spawnv_passfds(
+                        sys.executable, args,
+                        [listener.fileno(), alive_r, sem_tracker_fd])
+                    debug('started fork server with pid %d', pid)
+                except:
+                    os.close(alive_w)
+                    raise
+                finally:
+                    os.close(alive_r)
+            finally:
+                listener.close()
+            self._address, self._alive_w = address, alive_w
+        finally:
+            self._lock.release()
+
+    def connect_to_new_process(self, fds, data):
+        '''
+        Ask the fork server to start a child which receives the file
+        descriptors fds and the pickled data; return a socket connected to
+        the server and the pid of the child
+        '''
+        self.ensure_running()
+        s = socket.socket(socket.AF_UNIX)
+        try:
+            s.connect(self._address)
+            s.sendall(_header.pack(len(fds), len(data)))
+            for fd in fds:
+                _multiprocessing.sendfd(s.fileno(), fd)
+            s.sendall(data)
+            pid = _read_int(s)
+        except:
+            s.close()
+            raise
+        return s, pid
+
+_forkserver = ForkServer()
+ensure_running = _forkserver.ensure_running
+set_forkserver_preload = _forkserver.set_preload
+
+#
+# Popen class for processes started by the fork server
+#
+
+class Popen(forking.Popen):
+    '''
+    Start a subprocess to run the code of a process object by asking the
+    fork server to fork it
+    '''
+
+    def __init__(self, process_obj):
+        sys.stdout.flush()
+        sys.stderr.flush()
+        self.returncode = None
+
+        prep_data = _get_preparation_data(process_obj._name)
+        to_child = cStringIO.StringIO()
+        fds = forking.Popen._tls.fds = []
+        try:
+            ForkingPickler(to_child, HIGHEST_PROTOCOL).dump(prep_data)
+            ForkingPickler(to_child, HIGHEST_PROTOCOL).dump(process_obj)
+        finally:
+            del forking.Popen._tls.fds
+        self._sock, self.pid = _forkserver.connect_to_new_process(
+            fds, to_child.getvalue())
+
+def get_inherited_fds():
+    '''
+    Return the list of file descriptors which the parent passed to this
+    child of the fork server, in the order of Popen.duplicate_for_child()
+    '''
+    return _inherited_fds
+
+    def poll(self, flag=os.WNOHANG):
+        if flag & os.WNOHANG:
+            return self.wait(0)
+        return self.wait()
+
+    def wait(self, timeout=None):
+        if self.returncode is None:
+            if timeout is not None:
+                deadline = time.time() + timeout
+            while True:
+                try:
+                    ready = select.select([self._sock], [], [], timeout)[0]
+                except select.error as e:
+                    if e.args[0] != errno.EINTR:
+                        raise
+                    if timeout is not None:
+                        timeout = max(deadline - time.time(), 0)
+                else:
+                    break
+            if not ready:
+                return None
+            try:
+                self.returncode = _read_int(self._sock)
+            except (EOFError, socket.error):
+                # the fork server has died
+                self.returncode = 255
+            self._sock.close()
+        return self.returncode
+
+def _get_main_path():
+    main_path = getattr(sys.modules['__main__'], '__file__', None)
+    if not main_path and sys.argv[0] not in ('', '-c'):
+        main_path = sys.argv[0]
+    if main_path is not None:
+        # the __main__.py of a package run with -m has no main guard
+        name = os.path.splitext(os.path.basename(main_path))[0]
+        if name == '__main__':
+            return None
+        if not os.path.isabs(main_path) and process.ORIGINAL_DIR is not None:
+            main_path = os.path.join(process.ORIGINAL_DIR, main_path)
+        main_path = os.path.normpath(main_path)
+    return main_path
+
+def _get_preparation_data(name):
+    '''
+    Return info about parent needed by child to unpickle process object
+    '''
+    d = dict(
+        name=name,
+        sys_path=sys.path,
+        sys_argv=sys.argv,
+        log_to_stderr=util._log_to_stderr,
+        orig_dir=process.ORIGINAL_DIR,
+        dir=os.getcwd(),
+        authkey=process.current_process().authkey,
+        start_method=forking.get_start_method(),
+        )
+
+    if util._logger is not None:
+        d['log_level'] = util._logger.getEffectiveLevel()
+
+    # the server has already imported the main module if it was preloaded
+    if '__main__' not in _forkserver._preload_modules:
+        main_path = _get_main_path()
+        if main_path is not None:
+            d['main_path'] = main_path
+
+    return d
+
+#
+# Fork server
+#
+
+def main(listener_fd, alive_r, sem_tracker_fd, preload, main_path=None):
+    '''
+    Run the fork server
+    '''
+    semaphore_tracker._semaphore_tracker._fd = sem_tracker_fd
+    if main_path is not None:
+        process.current_process()._inheriting = True
+        try:
+            forking.prepare({'main_path': main_path})
+        finally:
+            process.current_process()._inheriting = False
+    for name in preload:
+        try:
+            __import__(name)
+        except ImportError:
+            pass
+
+    # Interrupts from the terminal are for the parent.  SIGCHLD is only
+    # handled so that it wakes up select() through sig_r.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    sig_r, sig_w = os.pipe()
+    for fd in (sig_r, sig_w):
+        flags = fcntl.fcntl(fd, fcntl.F_GETFL)
+        fcntl.fcntl(fd, fcntl.F_SETFL, flags | os.O_NONBLOCK)
+    signal.set_wakeup_fd(sig_w)
+    signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+
+    listener = socket.fromfd(listener_fd, socket.AF_UNIX, socket.SOCK_STREAM)
+    os.close(listener_fd)
+    children = {}                       # pid -> socket of parent
+
+    while True:
+        try:
+            ready = select.select([listener, alive_r, sig_r], [], [])[0]
+        except select.error as e:
+            if e.args[0] != errno.EINTR:
+                raise
+            continue
+
+        if alive_r in ready:
+            # the parent has exited
+            return
+
+        if sig_r in ready:
+            try:
+                os.read(sig_r, 4096)
+            except OSError:
+                pass
+            _reap_children(children)
+
+        if listener in ready:
+            try:
+                s = listener.accept()[0]
+            except socket.error:
+                continue
+            pid = os.fork()
+            if pid == 0:
+                code = 1
+                try:
+                    listener.close()
+                    for fd in (alive_r, sig_r, sig_w):
+                        os.close(fd)
+                    for conn in children.values():
+                        conn.close()
+                    signal.set_wakeup_fd(-1)
+                    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+                    signal.signal(signal.SIGINT, signal.default_int_handler)
+                    code = _serve_one(s)
+                except Exception:
+                    sys.excepthook(*sys.exc_info())
+                finally:
+                    sys.stdout.flush()
+                    sys.stderr.flush()
+                    os._exit(code)
+            try:
+                s.sendall(_int.pack(pid))
+            except socket.error:
+                pass
+            children[pid] = s
+
+def _reap_children(children):
+    # report the exit codes of the children which have exited
+    while True:
+        try:
+            pid, sts = os.waitpid(-1, os.WNOHANG)
+        except OSError as e:
+            if e.errno == errno.EINTR:
+                continue
+            break
+        if pid == 0:
+            break
+        s = children.pop(pid, None)
+        if s is not None:
+            if os.WIFSIGNALED(sts):
+                returncode = -os.WTERMSIG(sts)
+            else:
+                returncode = os.WEXITSTATUS(sts)
+            try:
+                s.sendall(_int.pack(returncode))
+            except socket.error:
+                pass
+            s.close()
+
+def _serve_one(s):
+    # receive the file descriptors and the process object, then run it
+    global _inherited_fds
+    nfds, size = _header.unpack(_recvall(s, _header.size))
+    # the pickled data refers to the fds by their index in this list
+    _inherited_fds = [_multiprocessing.recvfd(s.fileno())
+                      for i in range(nfds)]
+    data = _recvall(s, size)
+    s.close()
+
+    if 'random' in sys.modules:
+        import random
+        random.seed()
+
+    from_parent = cStringIO.StringIO(data)
+    process.current_process()._inheriting = True
+    try:
+        forking.prepare(load(from_parent))
+        self = load(from_parent)
+    finally:
+        process.current_process()._inheriting = False
+    return self._bootstrap()
+
+def _recvall(s, size):
+    chunks = []
+    while size > 0:
+        chunk = s.recv(size)
+        if not chunk:
+            raise EOFError
+        chunks.append(chunk)
+        size -= len(chunk)
+    return ''.join(chunks)
+
+def _read_int(s):
+    return _int.unpack(_recvall(s, _int.size))[0]
@@ -64,6 +64,11 @@ job_counter = itertools.count()
 def mapstar(args):
     return map(*args)
 
+def timedmapstar(args):
+    t = time.time()
+    result = map(*args)
+    return time.time() - t, result
+
 #
 # Code run by worker processes
 #
@@ -243,48 +248,56 @@ class Pool(object):
         assert self._state == RUN
         return self.apply_async(func, args, kwds).get()
 
-    def map(self, func, iterable, chunksize=None):
+    def map(self, func, iterable, chunksize=None, max_pending=None):
         '''
         Equivalent of `map()` builtin
         '''
         assert self._state == RUN
-        return self.map_async(func, iterable, chunksize).get()
+        return self.map_async(func, iterable, chunksize,
+                              max_pending=max_pending).get()
 
-    def imap(self, func, iterable, chunksize=1):
+    def imap(self, func, iterable, chunksize=1, max_pending=None):
         '''
         Equivalent of `itertools.imap()` -- can be MUCH slower than `Pool.map()`
+        unless `chunksize` is greater than 1 or None (adaptive chunks)
         '''
         assert self._state == RUN
-        if chunksize == 1:
-            result = IMapIterator(self._cache)
-            self._taskqueue.put((((result._job, i, func, (x,), {})
-                         for i, x in enumerate(iterable)), result._set_length))
-            return result
-        else:
-            assert chunksize > 1
-            task_batches = Pool._get_tasks(func, iterable, chunksize)
-            result = IMapIterator(self._cache)
-            self._taskqueue.put((((result._job, i, mapstar, (x,), {})
-                     for i, x in enumerate(task_batches)), result._set_length))
-            return (item for chunk in result for item in chunk)
+        return self._imap(IMapIterator, func, iterable, chunksize, max_pending)
 
-    def imap_unordered(self, func, iterable, chunksize=1):
+    def imap_unordered(self, func, iterable, chunksize=1, max_pending=None):
         '''
         Like `imap()` method but ordering of results is arbitrary
         '''
         assert self._state == RUN
-        if chunksize == 1:
-            result = IMapUnorderedIterator(self._cache)
-            self._taskqueue.put((((result._job, i, func, (x,), {})
-                         for i, x in enumerate(iterable)), result._set_length))
-            return result
+        return self._imap(IMapUnorderedIterator, func, iterable, chunksize,
+                          max_pending)
+
+    def _imap(self, iterator_class, func, iterable, chunksize, max_pending):
+        window = None
+        if max_pending is not None:
+            window = TaskWindow(max_pending)
+        if chunksize is None:
+            chunker = AdaptiveChunker(len(self._pool), iterable)
+            result = iterator_class(self._cache, chunker, window)
+            tasks = ((result._job, i, timedmapstar, (x,), {})
+                     for i, x in enumerate(chunker.tasks(func, iterable)))
+        elif chunksize == 1:
+            result = iterator_class(self._cache, window=window)
+            tasks = ((result._job, i, func, (x,), {})
+                     for i, x in enumerate(iterable))
         else:
             assert chunksize > 1
             task_batches = Pool._get_tasks(func, iterable, chunksize)
-            result = IMapUnorderedIterator(self._cache)
-            self._taskqueue.put((((result._job, i, mapstar, (x,), {})
-                     for i, x in enumerate(task_batches)), result._set_length))
-            return (item for chunk in result for item in chunk)
+            result = iterator_class(self._cache, window=window)
+            tasks = ((result._job, i, mapstar, (x,), {})
+                     for i, x in enumerate(task_batches))
+        if window is not None:
+            self._start_feeder(result, tasks, result._set_length)
+        else:
+            self._taskqueue.put((tasks, result._set_length))
+        if chunksize == 1:
+            return result
+        return (item for chunk in result for item in chunk)
 
     def apply_async(self, func, args=(), kwds={}, callback=None):
         '''
@@ -295,13 +308,21 @@ class Pool(object):
         self._taskqueue.put(([(result._job, None, func, args, kwds)], None))
         return result
 
-    def map_async(self, func, iterable, chunksize=None, callback=None):
+    def map_async(self, func, iterable, chunksize=None, callback=None,
+                  max_pending=None):
         '''
         Asynchronous equivalent of `map()` builtin
         '''
         assert self._state == RUN
-        if not hasattr(iterable, '__len__'):
-            iterable = list(iterable)
+        if max_pending is not None:
+            window = TaskWindow(max_pending)
+            if not hasattr(iterable, '__len__'):
+                return self._map_stream(func, iterable, chunksize, callback,
+                                        window)
+        else:
+            window = None
+            if not hasattr(iterable, '__len__'):
+                iterable = list(iterable)
 
         if chunksize is None:
             chunksize, extra = divmod(len(iterable), len(self._pool) * 4)
@@ -311,11 +332,45 @@ class Pool(object):
             chunksize = 0
 
         task_batches = Pool._get_tasks(func, iterable, chunksize)
-        result = MapResult(self._cache, chunksize, len(iterable), callback)
-        self._taskqueue.put((((result._job, i, mapstar, (x,), {})
-                              for i, x in enumerate(task_batches)), None))
+        result = MapResult(self._cache, chunksize, len(iterable), callback,
+                           window)
+        tasks = ((result._job, i, mapstar, (x,), {})
+                 for i, x in enumerate(task_batches))
+        if window is not None:
+            self._start_feeder(result, tasks, None)
+        else:
+            self._taskqueue.put((tasks, None))
         return result
 
+    def _map_stream(self, func, iterable, chunksize, callback, window):
+        # The length of the iterable is unknown, so the results are
+        # collected by chunk until the task handler has exhausted it
+        if chunksize is None:
+            chunker = AdaptiveChunker(len(self._pool))
+            result = MapResult(self._cache, None, None, callback, window,
+                               chunker)
+            tasks = ((result._job, i, timedmapstar, (x,), {})
+                     for i, x in enumerate(chunker.tasks(func, iterable)))
+        else:
+            assert chunksize > 0
+            task_batches = Pool._get_tasks(func, iterable, chunksize)
+            result = MapResult(self._cache, chunksize, None, callback, window)
+            tasks = ((result._job, i, mapstar, (x,), {})
+                     for i, x in enumerate(task_batches))
+        self._start_feeder(result, tasks, result._set_length)
+        return result
+
+    def _start_feeder(self, result, tasks, set_length):
+        # Waiting for room in the window of a job would hold up the tasks of
+        # all the other jobs if done by the task handler, so each job with a
+        # window is fed to the task handler by a thread of its own
+        feeder = threading.Thread(
+            target=Pool._feed_window,
+            args=(self._taskqueue, result._window, tasks, set_length)
+            )
+        feeder.daemon = True
+        feeder.start()
+
     @staticmethod
     def _handle_workers(pool):
         thread = threading.current_thread()
@@ -329,6 +384,17 @@ class Pool(object):
         pool._taskqueue.put(None)
         debug('worker handler exiting')
 
+    @staticmethod
+    def _feed_window(taskqueue, window, tasks, set_length):
+        n = 0
+        for task in window.tasks(tasks):
+            taskqueue.put(([task], None))
+            n += 1
+        if set_length and not window.closed:
+            debug('feeder doing set_length()')
+            set_length(n)
+        debug('feeder exiting')
+
     @staticmethod
     def _handle_tasks(taskqueue, put, outqueue, pool, cache):
         thread = threading.current_thread()
@@ -458,6 +524,11 @@ class Pool(object):
     def join(self):
         debug('joining pool')
         assert self._state in (CLOSE, TERMINATE)
+        # Nothing may be left to consume the results of the jobs held back
+        # by their window, so let them run to completion
+        for result in self._cache.values():
+            if result._window is not None:
+                result._window.lift()
         self._worker_handler.join()
         self._task_handler.join()
         self._result_handler.join()
@@ -482,6 +553,11 @@ class Pool(object):
         worker_handler._state = TERMINATE
         task_handler._state = TERMINATE
 
+        # The feeder of a job may be waiting for room in its window
+        for result in cache.values():
+            if result._window is not None:
+                result._window.close()
+
         debug('helping task handler/workers to finish')
         cls._help_stuff_finish(inqueue, task_handler, len(pool))
 
@@ -531,6 +607,7 @@ class ApplyResult(object):
         self._cache = cache
         self._ready = False
         self._callback = callback
+        self._window = None
         cache[self._job] = self
 
     def ready(self):
@@ -577,21 +654,46 @@ AsyncResult = ApplyResult       # create alias -- see #17805
 
 class MapResult(ApplyResult):
 
-    def __init__(self, cache, chunksize, length, callback):
+    def __init__(self, cache, chunksize, length, callback, window=None,
+                 chunker=None):
         ApplyResult.__init__(self, cache, callback)
         self._success = True
-        self._value = [None] * length
         self._chunksize = chunksize
-        if chunksize <= 0:
-            self._number_left = 0
-            self._ready = True
-            del cache[self._job]
+        self._window = window
+        self._chunker = chunker
+        if length is None:
+            # Chunks of an iterable of unknown length are kept apart until
+            # `_set_length()` tells how many there are
+            self._value = None
+            self._chunks = {}
+            self._number_left = None
         else:
-            self._number_left = length//chunksize + bool(length % chunksize)
+            self._value = [None] * length
+            self._chunks = None
+            if chunksize <= 0:
+                self._number_left = 0
+                self._ready = True
+                del cache[self._job]
+            else:
+                self._number_left = length//chunksize + bool(length % chunksize)
 
     def _set(self, i, success_result):
+        if self._window is not None:
+            self._window.release()
+        if self._chunker is not None:
+            success_result = self._chunker.unpack(success_result)
         success, result = success_result
         if success:
+            if self._chunks is not None:
+                self._cond.acquire()
+                try:
+                    self._chunks[i] = result
+                    done = len(self._chunks) == self._number_left
+                finally:
+                    self._cond.release()
+                if done:
+                    self._set_value()
+                return
             self._value[i*self._chunksize:(i+1)*self._chunksize] = result
             self._number_left -= 1
             if self._number_left == 0:
@@ -606,8 +708,16 @@ class MapResult(ApplyResult):
                     self._cond.release()
 
         else:
-            self._success = False
-            self._value = result
+            if self._window is not None:
+                # Stop feeding the tasks of a failed job
+                self._window.close()
+            self._cond.acquire()
+            try:
+                self._success = False
+                self._number_left = -1
+                self._value = result
+            finally:
+                self._cond.release()
             del self._cache[self._job]
             self._cond.acquire()
             try:
@@ -616,16 +726,184 @@ class MapResult(ApplyResult):
             finally:
                 self._cond.release()
 
+    def _set_length(self, length):
+        self._cond.acquire()
+        try:
+            if not self._success:
+                return
+            self._number_left = length
+            done = len(self._chunks) == length
+        finally:
+            self._cond.release()
+        if done:
+            self._set_value()
+
+    def _set_value(self):
+        chunks = self._chunks
+        self._value = [x for i in range(len(chunks)) for x in chunks[i]]
+        self._chunks = None
+        if self._callback:
+            self._callback(self._value)
+        del self._cache[self._job]
+        self._cond.acquire()
+        try:
+            self._ready = True
+            self._cond.notify()
+        finally:
+            self._cond.release()
+
+#
+# Class which chooses the chunks of `Pool.imap()` when `chunksize` is None
+#
+
+class AdaptiveChunker(object):
+    '''
+    Sizes the chunks of an `imap()` call from the time the workers spent
+    on the previous ones, so that each chunk holds about `target` seconds
+    of work: enough to amortize the cost of sending it to a worker, but
+    little enough to keep the workers evenly loaded.  When the length of
+    the iterable is known, the chunks also shrink towards the end so that
+    no worker is left with a large chunk while the others are idle.
+    '''
+    target = 0.05
+    max_chunksize = 65536
+
+    def __init__(self, processes, iterable=None):
+        self._processes = processes
+        try:
+            self._remaining = len(iterable)
+        except TypeError:
+            self._remaining = None
+        self._item_time = None
+        self._chunksize = 1
+
+    def tasks(self, func, it):
+        it = iter(it)
+        while 1:
+            self._chunksize = self.chunksize()
+            x = tuple(itertools.islice(it, self._chunksize))
+            if not x:
+                return
+            if self._remaining is not None:
+                self._remaining -= len(x)
+            yield (func, x)
+
+    def chunksize(self):
+        '''
+        Return the size of the next chunk
+        '''
+        item_time = self._item_time
+        if item_time is None:
+            # No chunk has completed yet
+            return 1
+        if item_time > 0:
+            size = int(self.target / item_time)
+        else:
+            size = self.max_chunksize
+        # Grow gradually since the measurements of small chunks are noisy
+        size = min(size, 2 * self._chunksize, self.max_chunksize)
+        if self._remaining is not None:
+            # Leave at least two chunks per worker for the tail
+            size = min(size, -(-self._remaining // (2 * self._processes)))
+        return max(size, 1)
+
+    def unpack(self, obj):
+        '''
+        Record the timing of a completed chunk and return its result
+        '''
+        success, value = obj
+        if not success:
+            return obj
+        elapsed, value = value
+        item_time = elapsed / len(value)
+        if self._item_time is None:
+            self._item_time = item_time
+        else:
+            self._item_time = 0.75 * self._item_time + 0.25 * item_time
+        return success, value
+
+#
+# Class which bounds the number of tasks of a job waiting in the pool
+#
+
+class TaskWindow(object):
+    '''
+    Makes the feeder of a job pause once `max_pending` tasks of the job
+    have been sent to the workers but not yet consumed, so that neither the
+    input nor the results pile up when the consumer is slower than the
+    workers.  A slot is freed by `release()`; `close()` stops the feeding
+    and `lift()` removes the bound.
+    '''
+
+    def __init__(self, max_pending):
+        if max_pending < 1:
+            raise ValueError("max_pending must be at least 1")
+        self._cond = threading.Condition(threading.Lock())
+        self._max_pending = max_pending
+        self._pending = 0
+        self._closed = False
+        self._lifted = False
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def tasks(self, taskseq):
+        it = iter(taskseq)
+        while 1:
+            self._cond.acquire()
+            try:
+                while (self._pending >= self._max_pending and
+                       not self._lifted and not self._closed):
+                    self._cond.wait()
+                if self._closed:
+                    return
+                self._pending += 1
+            finally:
+                self._cond.release()
+            # Only take the next task from the input once there is room
+            try:
+                task = it.next()
+            except StopIteration:
+                return
+            yield task
+
+    def release(self):
+        self._cond.acquire()
+        try:
+            self._pending -= 1
+            self._cond.notify()
+        finally:
+            self._cond.release()
+
+    def close(self):
+        self._cond.acquire()
+        try:
+            self._closed = True
+            self._cond.notify()
+        finally:
+            self._cond.release()
+
+    def lift(self):
+        self._cond.acquire()
+        try:
+            self._lifted = True
+            self._cond.notify()
+        finally:
+            self._cond.release()
+
 #
 # Class whose instances are returned by `Pool.imap()`
 #
 
 class IMapIterator(object):
 
-    def __init__(self, cache):
+    def __init__(self, cache, chunker=None, window=None):
         self._cond = threading.Condition(threading.Lock())
         self._job = job_counter.next()
         self._cache = cache
+        self._chunker = chunker
+        self._window = window
         self._items = collections.deque()
         self._index = 0
         self._length = None
@@ -653,6 +931,8 @@ class IMapIterator(object):
         finally:
             self._cond.release()
 
+        if self._window is not None:
+            self._window.release()
         success, value = item
         if success:
             return value
@@ -661,6 +941,8 @@ class IMapIterator(object):
     __next__ = next                    # XXX
 
     def _set(self, i, obj):
+        if self._chunker is not None:
+            obj = self._chunker.unpack(obj)
         self._cond.acquire()
         try:
             if self._index == i:
@@ -696,6 +978,8 @@ class IMapIterator(object):
 class IMapUnorderedIterator(IMapIterator):
 
     def _set(self, i, obj):
+        if self._chunker is not None:
+            obj = self._chunker.unpack(obj)
         self._cond.acquire()
         try:
             self._items.append(obj)
@@ -126,7 +126,9 @@ class Process(object):
         if self._Popen is not None:
             Popen = self._Popen
         else:
-            from .forking import Popen
+            from .forking import Popen, get_start_method
+            if get_start_method() == 'forkserver':
+                from .forkserver import Popen
         self._popen = Popen(self)
         _current_process._children.add(self)
 
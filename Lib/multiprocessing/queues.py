@@ -41,10 +41,16 @@ import collections
 import time
 import atexit
 import weakref
+import array
+import mmap
+import struct
+import cPickle
+import cStringIO
 
 from Queue import Empty, Full
 import _multiprocessing
 from multiprocessing import Pipe
+from multiprocessing.heap import Arena, Heap
 from multiprocessing.synchronize import Lock, BoundedSemaphore, Semaphore, Condition
 from multiprocessing.util import debug, info, Finalize, register_after_fork
 from multiprocessing.forking import assert_spawning
@@ -55,14 +61,18 @@ from multiprocessing.forking import assert_spawning
 
 class Queue(object):
 
-    def __init__(self, maxsize=0):
+    def __init__(self, maxsize=0, shared_memory=0):
         if maxsize <= 0:
             maxsize = _multiprocessing.SemLock.SEM_VALUE_MAX
         self._maxsize = maxsize
         self._reader, self._writer = Pipe(duplex=False)
         self._rlock = Lock()
         self._opid = os.getpid()
-        if sys.platform == 'win32':
+        if shared_memory > 0:
+            self._ring = RingBuffer(shared_memory)
+        else:
+            self._ring = None
+        if sys.platform == 'win32' and self._ring is None:
             self._wlock = None
         else:
             self._wlock = Lock()
@@ -76,11 +86,11 @@ class Queue(object):
     def __getstate__(self):
         assert_spawning(self)
         return (self._maxsize, self._reader, self._writer,
-                self._rlock, self._wlock, self._sem, self._opid)
+                self._rlock, self._wlock, self._sem, self._opid, self._ring)
 
     def __setstate__(self, state):
         (self._maxsize, self._reader, self._writer,
-         self._rlock, self._wlock, self._sem, self._opid) = state
+         self._rlock, self._wlock, self._sem, self._opid, self._ring) = state
         self._after_fork()
 
     def _after_fork(self):
@@ -92,8 +102,14 @@ class Queue(object):
         self._joincancelled = False
         self._closed = False
         self._close = None
-        self._send = self._writer.send
-        self._recv = self._reader.recv
+        if self._ring is None:
+            self._send = self._writer.send
+            self._recv = self._reader.recv
+        else:
+            dumps, send_bytes = self._ring.dumps, self._writer.send_bytes
+            loads, recv_bytes = self._ring.loads, self._reader.recv_bytes
+            self._send = lambda obj: send_bytes(dumps(obj))
+            self._recv = lambda: loads(recv_bytes())
         self._poll = self._reader.poll
 
     def put(self, obj, block=True, timeout=None):
@@ -236,7 +252,7 @@ class Queue(object):
         nwait = notempty.wait
         bpopleft = buffer.popleft
         sentinel = _sentinel
-        if sys.platform != 'win32':
+        if writelock is not None:
             wacquire = writelock.acquire
             wrelease = writelock.release
         else:
@@ -284,6 +300,139 @@ class Queue(object):
 
 _sentinel = object()
 
+#
+# Ring buffer in shared memory used by Queue to pass large buffers
+#
+# Feeder threads reserve space in the ring for the contents of large
+# `bytearray`, `array.array` and `buffer` objects (and for a large string
+# passed directly to `put()`) and copy them there; only their location is
+# pickled and sent through the pipe.  Since reserving space and sending
+# happen while holding the queue's write lock, and reading happens while
+# holding its read lock, space is released in the order it was reserved.
+#
+
+class RingBuffer(object):
+
+    _header = struct.Struct('QQ')   # bytes reserved, bytes released
+    threshold = 64 * 1024
+
+    def __init__(self, size):
+        size = Heap._roundup(size + self._header.size, mmap.PAGESIZE)
+        self._arena = Arena(size)
+        self._lock = Lock()
+        self._after_fork()
+
+    def __getstate__(self):
+        assert_spawning(self)
+        return (self._arena, self._lock)
+
+    def __setstate__(self, state):
+        self._arena, self._lock = state
+        self._after_fork()
+
+    def _after_fork(self):
+        self._buffer = self._arena.buffer
+        self._size = self._arena.size - self._header.size
+
+    def reserve(self, length):
+        # return the position of length free bytes, or None if the ring is
+        # too full; positions count all the bytes ever reserved
+        size = self._size
+        if length > size:
+            return None
+        self._lock.acquire()
+        try:
+            reserved, released = self._header.unpack_from(self._buffer, 0)
+            offset = reserved % size
+            if offset + length > size:
+                # does not fit before the end: skip to the start
+                reserved += size - offset
+            if reserved + length - released > size:
+                return None
+            self._header.pack_into(self._buffer, 0,
+                                   reserved + length, released)
+            return reserved
+        finally:
+            self._lock.release()
+
+    def release(self, stop):
+        # release everything reserved before position stop
+        self._lock.acquire()
+        try:
+            reserved, released = self._header.unpack_from(self._buffer, 0)
+            self._header.pack_into(self._buffer, 0,
+                                   reserved, max(released, stop))
+        finally:
+            self._lock.release()
+
+    def write(self, data):
+        # copy data (an object supporting the buffer interface) into the
+        # ring, returning its position or None if there is no room
+        data = buffer(data)
+        start = self.reserve(len(data))
+        if start is not None:
+            self._buffer.seek(self._header.size + start % self._size)
+            self._buffer.write(data)
+        return start
+
+    def read(self, start, length):
+        # return a buffer object referring to data in the ring
+        return buffer(self._buffer, self._header.size + start % self._size,
+                      length)
+
+    def _persistent_id(self, obj):
+        t = type(obj)
+        if t is bytearray:
+            kind, typecode = 'bytearray', None
+        elif t is array.array:
+            kind, typecode = 'array', obj.typecode
+        elif t is buffer:
+            kind, typecode = 'str', None
+        else:
+            return None
+        start = None
+        length = len(buffer(obj))
+        if length >= self.threshold:
+            start = self.write(obj)
+        if start is None:
+            if t is buffer:
+                # buffer objects cannot be pickled
+                return ('str', str(obj))
+            return None
+        return (kind, typecode, start, length)
+
+    def dumps(self, obj):
+        if type(obj) is str and len(obj) >= self.threshold:
+            obj = buffer(obj)
+        f = cStringIO.StringIO()
+        p = cPickle.Pickler(f, cPickle.HIGHEST_PROTOCOL)
+        p.inst_persistent_id = self._persistent_id
+        p.dump(obj)
+        return f.getvalue()
+
+    def loads(self, s):
+        stops = []
+        def persistent_load(pid):
+            if len(pid) == 2:
+                return pid[1]
+            kind, typecode, start, length = pid
+            stops.append(start + length)
+            data = self.read(start, length)
+            if kind == 'bytearray':
+                return bytearray(data)
+            elif kind == 'str':
+                return str(data)
+            obj = array.array(typecode)
+            obj.fromstring(data)
+            return obj
+        u = cPickle.Unpickler(cStringIO.StringIO(s))
+        u.persistent_load = persistent_load
+        try:
+            return u.load()
+        finally:
+            if stops:
+                self.release(max(stops))
+
 #
 # A queue type which also supports join() and task_done() methods
 #
@@ -294,8 +443,8 @@ _sentinel = object()
 
 class JoinableQueue(Queue):
 
-    def __init__(self, maxsize=0):
-        Queue.__init__(self, maxsize)
+    def __init__(self, maxsize=0, shared_memory=0):
+        Queue.__init__(self, maxsize, shared_memory)
         self._unfinished_tasks = Semaphore(0)
         self._cond = Condition()
 
@@ -150,7 +150,7 @@ def reduce_handle(handle):
 def rebuild_handle(pickled_data):
     address, handle, inherited = pickled_data
     if inherited:
-        return handle
+        return Popen.get_inherited(handle)
     sub_debug('rebuilding handle %d', handle)
     conn = Client(address, authkey=current_process().authkey)
     conn.send((handle, os.getpid()))
@@ -0,0 +1,181 @@
+#
+# Module implementing a process which unlinks leaked named semaphores
+#
+# multiprocessing/semaphore_tracker.py
+#
+# Copyright (c) 2006-2008, R Oudkerk
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in the
+#    documentation and/or other materials provided with the distribution.
+# 3. Neither the name of author nor the names of any contributors may be
+#    used to endorse or promote products derived from this software
+#    without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE AUTHOR AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.  IN NO EVENT SHALL THE AUTHOR OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS
+# OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION)
+# HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY
+# OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF
+# SUCH DAMAGE.
+#
+
+__all__ = ['ensure_running', 'register', 'unregister']
+
+import os
+import sys
+import signal
+import threading
+import warnings
+
+import _multiprocessing
+from multiprocessing import util
+
+#
+# Semaphores created for the fork server keep their names, so that the
+# children it forks can open them.  The creating process unlinks them with
+# a finalizer, which does not run if it is killed or leaves through
+# os._exit().  Every process using such semaphores therefore registers
+# their names with the semaphore tracker, a fresh interpreter which reads
+# the names from a pipe.  Once all the processes holding the write end of
+# the pipe have exited, the tracker unlinks the names still registered.
+#
+
+class SemaphoreTracker(object):
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fd = None
+
+    def getfd(self):
+        self.ensure_running()
+        return self._fd
+
+    def ensure_running(self):
+        '''
+        Start the semaphore tracker if it is not running yet
+        '''
+        self._lock.acquire()
+        try:
+            if self._fd is not None:
+                return
+            fds_to_pass = []
+            try:
+                fds_to_pass.append(sys.stderr.fileno())
+            except Exception:
+                pass
+            r, w = os.pipe()
+            try:
+                fds_to_pass.append(r)
+                prog = ('import sys; sys.path[:] = %r; '
+                        'from multiprocessing.semaphore_tracker import main; '
+                        'main(%d)' % (sys.path, r))
+                args = ([sys.executable] +
+                        util._args_from_interpreter_flags() + ['-c', prog])
+                pid = util.spawnv_passfds(sys.executable, args, fds_to_pass)
+                util.debug('started semaphore tracker with pid %d', pid)
+            except:
+                os.close(w)
+                raise
+            else:
+                self._fd = w
+            finally:
+                os.close(r)
+        finally:
+            self._lock.release()
+
+    def register(self, name):
+        '''
+        Register name of semaphore with semaphore tracker
+        '''
+        self._send('REGISTER', name)
+
+    def unregister(self, name):
+        '''
+        Unregister name of semaphore with semaphore tracker
+        '''
+        self._send('UNREGISTER', name)
+
+    def _send(self, cmd, name):
+        self.ensure_running()
+        msg = '%s:%s\n' % (cmd, name)
+        # writes of up to PIPE_BUF bytes are atomic, so the messages of
+        # several processes do not get mixed up
+        if len(msg) > 512:
+            raise ValueError('name too long')
+        nbytes = os.write(self._fd, msg)
+        assert nbytes == len(msg)
+
+_semaphore_tracker = SemaphoreTracker()
+ensure_running = _semaphore_tracker.ensure_running
+register = _semaphore_tracker.register
+unregister = _semaphore_tracker.unregister
+getfd = _semaphore_tracker.getfd
+
+def main(fd):
+    '''
+    Run the semaphore tracker
+    '''
+    # protect the process from ^C and "killall python" etc
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+    for f in (sys.stdin, sys.stdout):
+        try:
+            f.close()
+        except Exception:
+            pass
+
+    cache = set()
+    try:
+        # keep track of registered/unregistered semaphores
+        f = os.fdopen(fd, 'rb')
+        try:
+            for line in f:
+                try:
+                    cmd, name = line.strip().split(':', 1)
+                    if cmd == 'REGISTER':
+                        cache.add(name)
+                    elif cmd == 'UNREGISTER':
+                        cache.discard(name)
+                    else:
+                        raise RuntimeError('unrecognized command %r' % cmd)
+                except Exception:
+                    try:
+                        sys.excepthook(*sys.exc_info())
+                    except:
+                        pass
+        finally:
+            f.close()
+    finally:
+        # all processes have terminated; cleanup any remaining semaphores
+        if cache:
+            try:
+                warnings.warn('semaphore_tracker: There appear to be %d '
+                              'leaked semaphores to clean up at shutdown' %
+                              len(cache))
+            except Exception:
+                pass
+        for name in cache:
+            # For some reason the process which created and registered this
+            # semaphore has failed to unregister it. Presumably it has died.
+            # We therefore unlink it.
+            try:
+                _multiprocessing.SemLock._unlink(name)
+            except Exception, e:
+                try:
+                    warnings.warn('semaphore_tracker: %r: %s' % (name, e))
+                except Exception:
+                    pass
@@ -45,7 +45,8 @@ from time import time as _time, sleep as _sleep
 import _multiprocessing
 from multiprocessing.process import current_process
 from multiprocessing.util import Finalize, register_after_fork, debug
-from multiprocessing.forking import assert_spawning, Popen
+from multiprocessing.forking import assert_spawning, Popen, get_start_method
+from multiprocessing import semaphore_tracker
 
 # Try to import the mp.synchronize module cleanly, if it fails
 # raise ImportError for platforms lacking a working sem_open implementation.
@@ -72,7 +73,11 @@ SEM_VALUE_MAX = _multiprocessing.SemLock.SEM_VALUE_MAX
 class SemLock(object):
 
     def __init__(self, kind, value, maxvalue):
-        sl = self._semlock = _multiprocessing.SemLock(kind, value, maxvalue)
+        # processes started by the fork server do not inherit the
+        # semaphore, so they open it by name
+        unlink = get_start_method() != 'forkserver'
+        sl = self._semlock = _multiprocessing.SemLock(kind, value, maxvalue,
+                                                      unlink)
         debug('created semlock with handle %s' % sl.handle)
         self._make_methods()
 
@@ -81,6 +86,17 @@ class SemLock(object):
                 obj._semlock._after_fork()
             register_after_fork(self, _after_fork)
 
+        if sl.name is not None:
+            # the semaphore tracker unlinks the name if this process dies
+            # before the finalizer has run
+            semaphore_tracker.register(sl.name)
+            Finalize(self, SemLock._cleanup, (sl.name,), exitpriority=0)
+
+    @staticmethod
+    def _cleanup(name):
+        _multiprocessing.SemLock._unlink(name)
+        semaphore_tracker.unregister(name)
+
     def _make_methods(self):
         self.acquire = self._semlock.acquire
         self.release = self._semlock.release
@@ -94,6 +110,13 @@ class SemLock(object):
     def __getstate__(self):
         assert_spawning(self)
         sl = self._semlock
+        if sys.platform != 'win32':
+            if sl.name is None:
+                raise RuntimeError(
+                    '%s objects created before the start method was set to '
+                    '"forkserver" cannot be passed to child processes'
+                    % type(self).__name__)
+            return (sl.handle, sl.kind, sl.maxvalue, sl.name)
         return (Popen.duplicate_for_child(sl.handle), sl.kind, sl.maxvalue)
 
     def __setstate__(self, state):
@@ -348,3 +348,27 @@ class ForkAwareLocal(threading.local):
         register_after_fork(self, lambda obj : obj.__dict__.clear())
     def __reduce__(self):
         return type(self), ()
+
+#
+# Start a fresh interpreter without inheriting other file descriptors
+#
+
+try:
+    MAXFD = os.sysconf('SC_OPEN_MAX')
+except (AttributeError, ValueError):
+    MAXFD = 256
+
+def spawnv_passfds(path, args, passfds):
+    # fork and exec path, keeping only stdio and passfds open
+    passfds = sorted(passfds)
+    pid = os.fork()
+    if pid == 0:
+        try:
+            low = 3
+            for fd in passfds + [MAXFD]:
+                os.closerange(low, fd)
+                low = fd + 1
+            os.execv(path, args)
+        finally:
+            os._exit(127)
+    return pid
@@ -130,6 +130,89 @@ SEEK_END = 2
 
 #'
 
+# scandir() for the platforms where posixmodule does not implement it: the
+# entries call stat() whenever the file type is needed.
+
+class _DirEntry(object):
+    __slots__ = ('name', 'path', '_stat', '_lstat')
+
+    def __init__(self, dirpath, name):
+        self.name = name
+        self.path = path.join(dirpath, name)
+        self._stat = self._lstat = None
+
+    def __repr__(self):
+        return '<DirEntry %r>' % (self.name,)
+
+    def stat(self, follow_symlinks=True):
+        if follow_symlinks:
+            if self._stat is None:
+                self._stat = stat(self.path)
+            return self._stat
+        if self._lstat is None:
+            if 'lstat' in globals():
+                self._lstat = lstat(self.path)
+            else:
+                self._lstat = self.stat()
+        return self._lstat
+
+    def _test_mode(self, follow_symlinks, mode_bits):
+        try:
+            st = self.stat(follow_symlinks)
+        except error, err:
+            if err.errno == errno.ENOENT:
+                return False
+            raise
+        return (st.st_mode & 0170000) == mode_bits
+
+    def is_dir(self, follow_symlinks=True):
+        return self._test_mode(follow_symlinks, 0040000)
+
+    def is_file(self, follow_symlinks=True):
+        return self._test_mode(follow_symlinks, 0100000)
+
+    def is_symlink(self):
+        return self._test_mode(False, 0120000)
+
+    def inode(self):
+        return self.stat(False).st_ino
+
+class _ScandirIterator(object):
+
+    def __init__(self, dirpath):
+        self._dirpath = dirpath
+        self._names = iter(listdir(dirpath))
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        return _DirEntry(self._dirpath, next(self._names))
+
+    def close(self):
+        self._names = iter(())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+def _scandir_python(path=curdir):
+    """scandir(path='.') -> iterator of DirEntry objects
+
+    Return an iterator over the entries of the directory given by path,
+    in arbitrary order, excluding '.' and '..'.  The entries have the
+    attributes name and path and the methods is_dir(), is_file(),
+    is_symlink(), stat() and inode()."""
+    return _ScandirIterator(path)
+
+try:
+    scandir
+except NameError:
+    scandir = _scandir_python
+    __all__.append("scandir")
+
 # Super directory utilities.
 # (Inspired by Eric Raymond; the doc strings are mostly his)
 
@@ -236,7 +319,7 @@ def walk(top, topdown=True, onerror=None, followlinks=False):
     the value of topdown, the list of subdirectories is retrieved before the
     tuples for the directory and its subdirectories are generated.
 
-    By default errors from the os.listdir() call are ignored.  If
+    By default errors from the os.scandir() call are ignored.  If
     optional arg 'onerror' is specified, it should be a function; it
     will be called with one argument, an os.error instance.  It can
     report the error to continue with the walk, or raise the exception
@@ -265,37 +348,54 @@ def walk(top, topdown=True, onerror=None, followlinks=False):
 
     """
 
-    islink, join, isdir = path.islink, path.join, path.isdir
+    islink, join = path.islink, path.join
 
     # We may not have read permission for top, in which case we can't
     # get a list of the files the directory contains.  os.path.walk
     # always suppressed the exception then, rather than blow up for a
     # minor reason when (say) a thousand readable directories are still
     # left to visit.  That logic is copied here.
+    #
+    # scandir() usually knows the type of the entries from the directory
+    # itself, so this needs no stat() call per entry.
+    dirs, nondirs, walk_dirs = [], [], []
     try:
-        # Note that listdir and error are globals in this module due
+        # Note that scandir and error are globals in this module due
         # to earlier import-*.
-        names = listdir(top)
+        for entry in scandir(top):
+            try:
+                is_dir = entry.is_dir()
+            except error:
+                is_dir = False
+            if is_dir:
+                dirs.append(entry.name)
+                if not topdown:
+                    # The dirnames list cannot be modified: decide now
+                    # which subdirectories will be walked.
+                    try:
+                        is_symlink = entry.is_symlink()
+                    except error:
+                        is_symlink = False
+                    if followlinks or not is_symlink:
+                        walk_dirs.append(entry.path)
+            else:
+                nondirs.append(entry.name)
     except error, err:
         if onerror is not None:
             onerror(err)
         return
 
-    dirs, nondirs = [], []
-    for name in names:
-        if isdir(join(top, name)):
-            dirs.append(name)
-        else:
-            nondirs.append(name)
-
     if topdown:
         yield top, dirs, nondirs
-    for name in dirs:
-        new_path = join(top, name)
-        if followlinks or not islink(new_path):
+        for name in dirs:
+            new_path = join(top, name)
+            if followlinks or not islink(new_path):
+                for x in walk(new_path, topdown, onerror, followlinks):
+                    yield x
+    else:
+        for new_path in walk_dirs:
             for x in walk(new_path, topdown, onerror, followlinks):
                 yield x
-    if not topdown:
         yield top, dirs, nondirs
 
 __all__.append("walk")
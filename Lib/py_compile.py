@@ -12,6 +12,10 @@ import traceback
 
 MAGIC = imp.get_magic()
 
+# The marshal format written by the import machinery for this magic number,
+# which is newer than the default of marshal.dump()
+_PYC_MARSHAL_VERSION = 3
+
 __all__ = ["compile", "main", "PyCompileError"]
 
 
@@ -123,7 +127,7 @@ def compile(file, cfile=None, dfile=None, doraise=False):
     with open(cfile, 'wb') as fc:
         fc.write('\0\0\0\0')
         wr_long(fc, timestamp)
-        marshal.dump(codeobject, fc)
+        marshal.dump(codeobject, fc, _PYC_MARSHAL_VERSION)
         fc.flush()
         fc.seek(0, 0)
         fc.write(MAGIC)
@@ -104,6 +104,7 @@ This module also defines an exception 'error'.
 import sys
 import sre_compile
 import sre_parse
+import _lrucache
 try:
     import _locale
 except ImportError:
@@ -111,9 +112,9 @@ except ImportError:
 
 # public symbols
 __all__ = [ "match", "search", "sub", "subn", "split", "findall",
-    "compile", "purge", "template", "escape", "I", "L", "M", "S", "X",
-    "U", "IGNORECASE", "LOCALE", "MULTILINE", "DOTALL", "VERBOSE",
-    "UNICODE", "error" ]
+    "compile", "purge", "template", "escape", "cache_info",
+    "set_cache_size", "I", "L", "M", "S", "X", "U", "IGNORECASE", "LOCALE",
+    "MULTILINE", "DOTALL", "VERBOSE", "UNICODE", "error" ]
 
 __version__ = "2.2.1"
 
@@ -198,6 +199,19 @@ def purge():
     _cache.clear()
     _cache_repl.clear()
 
+def cache_info():
+    """Return statistics of the compiled pattern cache as a named tuple
+    (hits, misses, evictions, maxsize, currsize)."""
+    return _cache.info()
+
+def set_cache_size(maxsize):
+    """Set the maximum number of compiled patterns kept in the cache.
+
+    The least recently used patterns are discarded when the cache is
+    full.  None means no limit, 0 disables caching."""
+    _cache.resize(maxsize)
+    _cache_repl.resize(maxsize)
+
 def template(pattern, flags=0):
     "Compile a template pattern, returning a pattern object"
     return _compile(pattern, flags|T)
@@ -220,12 +234,12 @@ def escape(pattern):
 # --------------------------------------------------------------------
 # internals
 
-_cache = {}
-_cache_repl = {}
+_MAXCACHE = 100
 
-_pattern_type = type(sre_compile.compile("", 0))
+_cache = _lrucache.LRUCache(_MAXCACHE)
+_cache_repl = _lrucache.LRUCache(_MAXCACHE)
 
-_MAXCACHE = 100
+_pattern_type = type(sre_compile.compile("", 0))
 
 def _compile(*key):
     # internal: compile pattern
@@ -233,12 +247,11 @@ def _compile(*key):
     bypass_cache = flags & DEBUG
     if not bypass_cache:
         cachekey = (type(key[0]),) + key
-        try:
-            p, loc = _cache[cachekey]
+        cached = _cache.get(cachekey)
+        if cached is not None:
+            p, loc = cached
             if loc is None or loc == _locale.setlocale(_locale.LC_CTYPE):
                 return p
-        except KeyError:
-            pass
     if isinstance(pattern, _pattern_type):
         if flags:
             raise ValueError('Cannot process flags argument with a compiled pattern')
@@ -250,8 +263,6 @@ def _compile(*key):
     except error, v:
         raise error, v # invalid expression
     if not bypass_cache:
-        if len(_cache) >= _MAXCACHE:
-            _cache.clear()
         if p.flags & LOCALE:
             if not _locale:
                 return p
@@ -271,8 +282,6 @@ def _compile_repl(*key):
         p = sre_parse.parse_template(repl, pattern)
     except error, v:
         raise error, v # invalid expression
-    if len(_cache_repl) >= _MAXCACHE:
-        _cache_repl.clear()
     _cache_repl[key] = p
     return p
 
@@ -53,15 +53,20 @@ check which of the entries you access are mutable and/or which ones you
 actually mutate, so it must cache, and write back at close, all of the
 entries that you access.  You can call d.sync() to write back all the
 entries in the cache, and empty the cache (d.sync() also synchronizes
-the persistent dictionary on disk, if feasible).
+the persistent dictionary on disk, if feasible).  Only the entries whose
+pickle has changed since they were read are actually written back.
+
+To bound the memory used by the cache, pass the keyword argument
+cachesize=n as well: d then keeps only the n most recently used entries,
+and writes back the least recently used one when it has to make room.
 """
 
 # Try using cPickle and cStringIO if available.
 
 try:
-    from cPickle import Pickler, Unpickler
+    from cPickle import Pickler, Unpickler, dumps
 except ImportError:
-    from pickle import Pickler, Unpickler
+    from pickle import Pickler, Unpickler, dumps
 
 try:
     from cStringIO import StringIO
@@ -69,6 +74,8 @@ except ImportError:
     from StringIO import StringIO
 
 import UserDict
+import collections
+import itertools
 
 __all__ = ["Shelf","BsdDbShelf","DbfilenameShelf","open"]
 
@@ -82,6 +89,10 @@ class _ClosedDict(UserDict.DictMixin):
     def __repr__(self):
         return '<Closed Dictionary>'
 
+# Entries of these types cannot be modified in place
+_immutable_types = (str, unicode, int, long, float, complex, bool,
+                    type(None))
+
 class Shelf(UserDict.DictMixin):
     """Base class for shelf implementations.
 
@@ -89,13 +100,18 @@ class Shelf(UserDict.DictMixin):
     See the module's __doc__ string for an overview of the interface.
     """
 
-    def __init__(self, dict, protocol=None, writeback=False):
+    def __init__(self, dict, protocol=None, writeback=False, cachesize=None):
+        if cachesize is not None and cachesize < 1:
+            raise ValueError('cachesize must be at least 1')
         self.dict = dict
         if protocol is None:
             protocol = 0
         self._protocol = protocol
         self.writeback = writeback
-        self.cache = {}
+        self.cachesize = cachesize
+        self.cache = self._new_cache()
+        # Pickles of the mutable cached entries, as last read or written
+        self._pickles = {}
 
     def keys(self):
         return self.dict.keys()
@@ -118,19 +134,22 @@ class Shelf(UserDict.DictMixin):
         try:
             value = self.cache[key]
         except KeyError:
-            f = StringIO(self.dict[key])
-            value = Unpickler(f).load()
+            data = self.dict[key]
+            value = Unpickler(StringIO(data)).load()
             if self.writeback:
+                self._cache(key, value, data)
+        else:
+            if self.cachesize is not None:
+                # Mark as most recently used
+                del self.cache[key]
                 self.cache[key] = value
         return value
 
     def __setitem__(self, key, value):
+        data = dumps(value, self._protocol)
+        self.dict[key] = data
         if self.writeback:
-            self.cache[key] = value
-        f = StringIO()
-        p = Pickler(f, self._protocol)
-        p.dump(value)
-        self.dict[key] = f.getvalue()
+            self._cache(key, value, data)
 
     def __delitem__(self, key):
         del self.dict[key]
@@ -138,6 +157,79 @@ class Shelf(UserDict.DictMixin):
             del self.cache[key]
         except KeyError:
             pass
+        self._pickles.pop(key, None)
+
+    def update(self, other=None, **kwargs):
+        """Store all the items of other and kwargs, like dict.update()."""
+        if other is None:
+            items = kwargs.iteritems()
+        else:
+            if hasattr(other, 'iteritems'):
+                items = other.iteritems()
+            elif hasattr(other, 'keys'):
+                items = ((key, other[key]) for key in other.keys())
+            else:
+                items = other
+            if kwargs:
+                items = itertools.chain(items, kwargs.iteritems())
+        if self.writeback or not hasattr(self.dict, 'update'):
+            for key, value in items:
+                self[key] = value
+        else:
+            # Let the underlying mapping store the pickles in one go
+            protocol = self._protocol
+            self.dict.update((key, dumps(value, protocol))
+                             for key, value in items)
+
+    def get_many(self, keys, default=None):
+        """Return a list of the values of keys, default for missing keys."""
+        values = []
+        append = values.append
+        cache = self.cache
+        db = self.dict
+        writeback = self.writeback
+        for key in keys:
+            if key in cache:
+                append(self[key])
+                continue
+            try:
+                data = db[key]
+            except KeyError:
+                append(default)
+                continue
+            value = Unpickler(StringIO(data)).load()
+            if writeback:
+                self._cache(key, value, data)
+            append(value)
+        return values
+
+    def _new_cache(self):
+        if self.cachesize is None:
+            return {}
+        return collections.OrderedDict()
+
+    def _cache(self, key, value, data):
+        cache = self.cache
+        if key in cache:
+            del cache[key]
+        cache[key] = value
+        if isinstance(value, _immutable_types):
+            # Can never need writing back
+            self._pickles.pop(key, None)
+        else:
+            self._pickles[key] = data
+        if self.cachesize is not None and len(cache) > self.cachesize:
+            key, value = cache.popitem(last=False)
+            self._writeback(key, value)
+
+    def _writeback(self, key, value):
+        try:
+            old = self._pickles.pop(key)
+        except KeyError:
+            return
+        data = dumps(value, self._protocol)
+        if data != old:
+            self.dict[key] = data
 
     def close(self):
         self.sync()
@@ -160,11 +252,10 @@ class Shelf(UserDict.DictMixin):
 
     def sync(self):
         if self.writeback and self.cache:
-            self.writeback = False
             for key, entry in self.cache.iteritems():
-                self[key] = entry
-            self.writeback = True
-            self.cache = {}
+                self._writeback(key, entry)
+            self.cache = self._new_cache()
+            self._pickles = {}
         if hasattr(self.dict, 'sync'):
             self.dict.sync()
 
@@ -182,8 +273,8 @@ class BsdDbShelf(Shelf):
     See the module's __doc__ string for an overview of the interface.
     """
 
-    def __init__(self, dict, protocol=None, writeback=False):
-        Shelf.__init__(self, dict, protocol, writeback)
+    def __init__(self, dict, protocol=None, writeback=False, cachesize=None):
+        Shelf.__init__(self, dict, protocol, writeback, cachesize)
 
     def set_location(self, key):
         (key, value) = self.dict.set_location(key)
@@ -218,12 +309,14 @@ class DbfilenameShelf(Shelf):
     See the module's __doc__ string for an overview of the interface.
     """
 
-    def __init__(self, filename, flag='c', protocol=None, writeback=False):
+    def __init__(self, filename, flag='c', protocol=None, writeback=False,
+                 cachesize=None):
         import anydbm
-        Shelf.__init__(self, anydbm.open(filename, flag), protocol, writeback)
+        Shelf.__init__(self, anydbm.open(filename, flag), protocol, writeback,
+                       cachesize)
 
 
-def open(filename, flag='c', protocol=None, writeback=False):
+def open(filename, flag='c', protocol=None, writeback=False, cachesize=None):
     """Open a persistent dictionary for reading and writing.
 
     The filename parameter is the base filename for the underlying
@@ -231,9 +324,10 @@ def open(filename, flag='c', protocol=None, writeback=False):
     filename and more than one file may be created.  The optional flag
     parameter has the same interpretation as the flag parameter of
     anydbm.open(). The optional protocol parameter specifies the
-    version of the pickle protocol (0, 1, or 2).
+    version of the pickle protocol (0, 1, or 2).  The optional cachesize
+    parameter bounds the number of entries cached when writeback is true.
 
     See the module's __doc__ string for an overview of the interface.
     """
 
-    return DbfilenameShelf(filename, flag, protocol, writeback)
+    return DbfilenameShelf(filename, flag, protocol, writeback, cachesize)
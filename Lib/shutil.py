@@ -43,8 +43,50 @@ try:
 except NameError:
     WindowsError = None
 
+# Buffer size used by copyfile() when the data cannot be copied in the
+# kernel.
+COPY_BUFSIZE = 1024 * 1024 if os.name == 'nt' else 64 * 1024
+
+# In-kernel file copies, disabled once the kernel turns out not to
+# support them.
+_USE_CP_COPY_FILE_RANGE = (hasattr(os, 'copy_file_range') and
+                           sys.platform.startswith('linux'))
+_USE_CP_SENDFILE = (hasattr(os, 'sendfile') and
+                    sys.platform.startswith('linux'))
+
+class _GiveupOnFastCopy(Exception):
+    """The file cannot be copied in the kernel; copy it in user space."""
+
+def _copyfileobj_to_socket(fsrc, fdst):
+    # Send fsrc from its current position to EOF with os.sendfile() if
+    # fdst is the file object of a socket and fsrc a regular file.
+    # Return False if this is not possible and nothing has been sent.
+    socket = sys.modules.get('socket')
+    if socket is None or not isinstance(fdst, socket._fileobject):
+        # No socket can exist if the module has never been imported.
+        return False
+    sock = fdst._sock
+    # Subclasses such as ssl.SSLSocket transform the data they send, so
+    # only plain sockets may be written to directly.
+    if (type(sock) not in (socket._realsocket, socket._socketobject) or
+        not sock.type & socket.SOCK_STREAM or
+        sock.gettimeout() == 0):
+        return False
+    try:
+        offset = fsrc.tell()
+    except (AttributeError, IOError, ValueError):
+        return False
+    fdst.flush()
+    try:
+        socket._sendfile_use_sendfile(sock, fsrc, offset)
+    except socket._GiveupOnSendfile:
+        return False
+    return True
+
 def copyfileobj(fsrc, fdst, length=16*1024):
     """copy data from file-like object fsrc to file-like object fdst"""
+    if _copyfileobj_to_socket(fsrc, fdst):
+        return
     while 1:
         buf = fsrc.read(length)
         if not buf:
@@ -63,8 +105,94 @@ def _samefile(src, dst):
     return (os.path.normcase(os.path.abspath(src)) ==
             os.path.normcase(os.path.abspath(dst)))
 
+def _fastcopy_kernel(fsrc, fdst, copy_func, blocksize):
+    # Copy fsrc to fdst with copy_func(infd, outfd, blocksize), which
+    # copies from and to the current file positions.
+    infd = fsrc.fileno()
+    outfd = fdst.fileno()
+    copied = 0
+    while True:
+        try:
+            n = copy_func(infd, outfd, blocksize)
+        except OSError, err:
+            err.filename = fsrc.name
+            if err.errno == errno.ENOSPC or copied:
+                # The file system is full, or a part of the file has
+                # been copied already: the caller cannot start over.
+                raise
+            raise _GiveupOnFastCopy(err)
+        if n == 0:
+            if not copied:
+                # Files of some pseudo file systems (/proc...) report a
+                # size of 0 and cannot be copied in the kernel.
+                raise _GiveupOnFastCopy("nothing copied")
+            break
+        copied += n
+
+def _copy_file_range(infd, outfd, count):
+    return os.copy_file_range(infd, outfd, count)
+
+def _sendfile(infd, outfd, count):
+    return os.sendfile(outfd, infd, None, count)
+
+def _fastcopy(fsrc, fdst):
+    """Copy the regular file fsrc to fdst in the kernel where possible."""
+    global _USE_CP_COPY_FILE_RANGE, _USE_CP_SENDFILE
+    try:
+        infd = fsrc.fileno()
+        fdst.fileno()
+    except (AttributeError, EnvironmentError, ValueError):
+        # Not real files.
+        copyfileobj(fsrc, fdst)
+        return
+    try:
+        size = os.fstat(infd).st_size
+    except OSError:
+        size = 0
+    if _USE_CP_COPY_FILE_RANGE or _USE_CP_SENDFILE:
+        # Copy large blocks, but not the whole file at once on 32-bit
+        # platforms.
+        blocksize = max(size, 1 << 23)
+        if sys.maxsize < 2 ** 32:
+            blocksize = min(blocksize, 1 << 30)
+        if _USE_CP_COPY_FILE_RANGE:
+            try:
+                return _fastcopy_kernel(fsrc, fdst, _copy_file_range,
+                                        blocksize)
+            except _GiveupOnFastCopy, err:
+                if getattr(err.args[0], 'errno', None) == errno.ENOSYS:
+                    _USE_CP_COPY_FILE_RANGE = False
+        if _USE_CP_SENDFILE:
+            try:
+                return _fastcopy_kernel(fsrc, fdst, _sendfile, blocksize)
+            except _GiveupOnFastCopy, err:
+                if getattr(err.args[0], 'errno', None) in (errno.ENOSYS,
+                                                           errno.ENOTSOCK):
+                    _USE_CP_SENDFILE = False
+    # Don't allocate a large buffer for a small file.
+    _copyfileobj_readinto(fsrc, fdst, min(size, COPY_BUFSIZE) or COPY_BUFSIZE)
+
+def _copyfileobj_readinto(fsrc, fdst, length=COPY_BUFSIZE):
+    # Like copyfileobj(), but reusing a single buffer.
+    fsrc_readinto = fsrc.readinto
+    fdst_write = fdst.write
+    buf = bytearray(length)
+    view = memoryview(buf)
+    while 1:
+        n = fsrc_readinto(buf)
+        if not n:
+            break
+        elif n < length:
+            fdst_write(view[:n])
+        else:
+            fdst_write(buf)
+
 def copyfile(src, dst):
-    """Copy data from src to dst"""
+    """Copy data from src to dst
+
+    On Linux the data is copied in the kernel with copy_file_range() or
+    sendfile() when possible.
+    """
     if _samefile(src, dst):
         raise Error("`%s` and `%s` are the same file" % (src, dst))
 
@@ -81,7 +209,7 @@ def copyfile(src, dst):
 
     with open(src, 'rb') as fsrc:
         with open(dst, 'wb') as fdst:
-            copyfileobj(fsrc, fdst)
+            _fastcopy(fsrc, fdst)
 
 def copymode(src, dst):
     """Copy mode bits from src to dst"""
@@ -142,7 +270,7 @@ def ignore_patterns(*patterns):
         return set(ignored_names)
     return _ignore_patterns
 
-def copytree(src, dst, symlinks=False, ignore=None):
+def copytree(src, dst, symlinks=False, ignore=None, workers=None):
     """Recursively copy a directory tree using copy2().
 
     The destination directory must not already exist.
@@ -165,27 +293,35 @@ def copytree(src, dst, symlinks=False, ignore=None):
     list of names relative to the `src` directory that should
     not be copied.
 
+    If workers is greater than 1, the directories are still created in
+    order, but the files are copied concurrently by that many threads.
+    The directories get their permission bits and times once all the
+    files have been copied.
+
     XXX Consider this example code rather than the ultimate tool.
 
     """
-    names = os.listdir(src)
+    if workers is not None and workers > 1:
+        return _copytree_concurrent(src, dst, symlinks, ignore, workers)
+    entries = list(os.scandir(src))
     if ignore is not None:
-        ignored_names = ignore(src, names)
+        ignored_names = ignore(src, [entry.name for entry in entries])
     else:
         ignored_names = set()
 
     os.makedirs(dst)
     errors = []
-    for name in names:
+    for entry in entries:
+        name = entry.name
         if name in ignored_names:
             continue
         srcname = os.path.join(src, name)
         dstname = os.path.join(dst, name)
         try:
-            if symlinks and os.path.islink(srcname):
+            if symlinks and entry.is_symlink():
                 linkto = os.readlink(srcname)
                 os.symlink(linkto, dstname)
-            elif os.path.isdir(srcname):
+            elif entry.is_dir():
                 copytree(srcname, dstname, symlinks, ignore)
             else:
                 # Will raise a SpecialFileError for unsupported file types
@@ -207,6 +343,88 @@ def copytree(src, dst, symlinks=False, ignore=None):
     if errors:
         raise Error, errors
 
+def _copytree_walk(src, dst, symlinks, ignore, copy_file, dirs, errors):
+    # Create the directory tree of copytree(), passing the files to
+    # copy_file(srcname, dstname) and recording the directories in dirs,
+    # subdirectories first.
+    entries = list(os.scandir(src))
+    if ignore is not None:
+        ignored_names = ignore(src, [entry.name for entry in entries])
+    else:
+        ignored_names = set()
+
+    os.makedirs(dst)
+    for entry in entries:
+        name = entry.name
+        if name in ignored_names:
+            continue
+        srcname = os.path.join(src, name)
+        dstname = os.path.join(dst, name)
+        try:
+            if symlinks and entry.is_symlink():
+                linkto = os.readlink(srcname)
+                os.symlink(linkto, dstname)
+            elif entry.is_dir():
+                _copytree_walk(srcname, dstname, symlinks, ignore, copy_file,
+                               dirs, errors)
+            else:
+                copy_file(srcname, dstname)
+        except EnvironmentError, why:
+            errors.append((srcname, dstname, str(why)))
+    dirs.append((src, dst))
+
+def _copytree_concurrent(src, dst, symlinks, ignore, workers):
+    # copytree() copying the files on a pool of threads.
+    import threading
+    import Queue
+
+    errors = []
+    # Bounded, so that the walk does not run far ahead of the copies.
+    files = Queue.Queue(workers * 4)
+
+    def worker():
+        while True:
+            item = files.get()
+            if item is None:
+                break
+            srcname, dstname = item
+            try:
+                # Will raise a SpecialFileError for unsupported file types
+                copy2(srcname, dstname)
+            except Exception, why:
+                # Any error is recorded: a dead worker would leave the walk
+                # blocked on the full queue.
+                errors.append((srcname, dstname, str(why)))
+
+    threads = []
+    for i in range(workers):
+        t = threading.Thread(target=worker, name='copytree-%d' % i)
+        t.daemon = True
+        t.start()
+        threads.append(t)
+    dirs = []
+    try:
+        _copytree_walk(src, dst, symlinks, ignore,
+                       lambda srcname, dstname: files.put((srcname, dstname)),
+                       dirs, errors)
+    finally:
+        for t in threads:
+            files.put(None)
+        for t in threads:
+            t.join()
+    # Copying the files changed the times of the directories.
+    for srcdir, dstdir in dirs:
+        try:
+            copystat(srcdir, dstdir)
+        except OSError, why:
+            if WindowsError is not None and isinstance(why, WindowsError):
+                # Copying file access times may fail on Windows
+                pass
+            else:
+                errors.append((srcdir, dstdir, str(why)))
+    if errors:
+        raise Error, errors
+
 def rmtree(path, ignore_errors=False, onerror=None):
     """Recursively delete a directory tree.
 
@@ -232,18 +450,21 @@ def rmtree(path, ignore_errors=False, onerror=None):
         onerror(os.path.islink, path, sys.exc_info())
         # can't continue even if onerror hook returns
         return
-    names = []
+    entries = []
     try:
-        names = os.listdir(path)
+        # The directory is read with scandir(), which usually tells the
+        # directories apart without an lstat() per entry; onerror still
+        # gets os.listdir for compatibility.
+        entries = list(os.scandir(path))
     except os.error, err:
         onerror(os.listdir, path, sys.exc_info())
-    for name in names:
-        fullname = os.path.join(path, name)
+    for entry in entries:
+        fullname = entry.path
         try:
-            mode = os.lstat(fullname).st_mode
+            is_dir = entry.is_dir(follow_symlinks=False)
         except os.error:
-            mode = 0
-        if stat.S_ISDIR(mode):
+            is_dir = False
+        if is_dir:
             rmtree(fullname, ignore_errors, onerror)
         else:
             try:
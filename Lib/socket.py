@@ -80,6 +80,7 @@ else:
          SSL_ERROR_INVALID_ERROR_CODE
 
 import os, sys, warnings
+from stat import S_ISREG
 
 try:
     from cStringIO import StringIO
@@ -92,6 +93,8 @@ except ImportError:
     errno = None
 EBADF = getattr(errno, 'EBADF', 9)
 EINTR = getattr(errno, 'EINTR', 4)
+EAGAIN = getattr(errno, 'EAGAIN', 11)
+EWOULDBLOCK = getattr(errno, 'EWOULDBLOCK', 11)
 
 __all__ = ["getfqdn", "create_connection"]
 __all__.extend(os._get_exports_list(_socket))
@@ -172,6 +175,122 @@ class _closedsocket(object):
     send = recv = recv_into = sendto = recvfrom = recvfrom_into = _dummy
     __getattr__ = _dummy
 
+# Support for socket.sendfile().  These functions take any object with the
+# interface of the platform socket objects, so they can also be used on the
+# socket behind a _fileobject.
+
+class _GiveupOnSendfile(Exception):
+    """os.sendfile() cannot be used; send() the data instead."""
+
+def _check_sendfile_params(sock, file, offset, count):
+    if not sock.type & SOCK_STREAM:
+        raise ValueError("only SOCK_STREAM type sockets are supported")
+    if count is not None:
+        if not isinstance(count, (int, long)):
+            raise TypeError(
+                "count must be a positive integer (got %r)" % (count,))
+        if count <= 0:
+            raise ValueError(
+                "count must be a positive integer (got %r)" % (count,))
+
+def _wait_writable(sock, wait):
+    # Wait for a socket with a timeout to become writable again.
+    import select
+    fd = sock.fileno()
+    while True:
+        try:
+            if hasattr(select, 'poll'):
+                poller = select.poll()
+                poller.register(fd, select.POLLOUT)
+                ready = poller.poll(None if wait is None else wait * 1000)
+            else:
+                ready = select.select([], [fd], [], wait)[1]
+        except select.error, err:
+            if err.args[0] == EINTR:
+                continue
+            raise
+        if not ready:
+            raise timeout('timed out')
+        return
+
+def _sendfile_use_sendfile(sock, file, offset=0, count=None):
+    sendfile = getattr(os, 'sendfile', None)
+    if sendfile is None:
+        raise _GiveupOnSendfile("os.sendfile() not available")
+    try:
+        fileno = file.fileno()
+        st = os.fstat(fileno)
+    except (AttributeError, EnvironmentError, ValueError), err:
+        raise _GiveupOnSendfile(err)
+    if not S_ISREG(st.st_mode):
+        raise _GiveupOnSendfile("not a regular file")
+    if not st.st_size:
+        # Files of some pseudo file systems (/proc...) report a size of 0
+        # whatever their contents.
+        raise _GiveupOnSendfile("file reports a size of 0")
+    # Limit the size of each call, a huge count is refused by some
+    # platforms.
+    blocksize = min(count or st.st_size, 1 << 30)
+    wait = sock.gettimeout()
+    if wait == 0:
+        raise ValueError("non-blocking sockets are not supported")
+    sockno = sock.fileno()
+    total_sent = 0
+    try:
+        while True:
+            if count:
+                blocksize = min(count - total_sent, blocksize)
+                if blocksize <= 0:
+                    break
+            try:
+                sent = sendfile(sockno, fileno, offset, blocksize)
+            except OSError, err:
+                if err.errno in (EAGAIN, EWOULDBLOCK):
+                    # Sockets with a timeout are non-blocking at the
+                    # system level.
+                    _wait_writable(sock, wait)
+                    continue
+                if err.errno == EINTR:
+                    continue
+                if total_sent == 0:
+                    # Typically the file cannot be mmap()ed, or the
+                    # platform does not support this kind of socket.
+                    raise _GiveupOnSendfile(err)
+                raise error(err.errno, err.strerror)
+            if sent == 0:
+                if total_sent == 0:
+                    raise _GiveupOnSendfile("nothing sent")
+                break  # EOF
+            offset += sent
+            total_sent += sent
+        return total_sent
+    finally:
+        if total_sent > 0 and hasattr(file, 'seek'):
+            file.seek(offset)
+
+def _sendfile_use_send(sock, file, offset=0, count=None):
+    if sock.gettimeout() == 0:
+        raise ValueError("non-blocking sockets are not supported")
+    if offset:
+        file.seek(offset)
+    blocksize = min(count, 8192) if count else 8192
+    total_sent = 0
+    try:
+        while True:
+            if count:
+                blocksize = min(count - total_sent, blocksize)
+                if blocksize <= 0:
+                    break
+            data = file.read(blocksize)
+            if not data:
+                break
+            sock.sendall(data)
+            total_sent += len(data)
+        return total_sent
+    finally:
+        if total_sent > 0 and hasattr(file, 'seek'):
+            file.seek(offset + total_sent)
+
 # Wrapper around platform socket objects. This implements
 # a platform-independent dup() functionality. The
 # implementation currently relies on reference counting
@@ -216,6 +335,21 @@ class _socketobject(object):
         and bufsize arguments are as for the built-in open() function."""
         return _fileobject(self._sock, mode, bufsize)
 
+    def sendfile(self, file, offset=0, count=None):
+        """sendfile(file[, offset[, count]]) -> sent
+
+        Send the contents of file, starting at offset, until EOF is reached
+        or count bytes have been sent, and return the number of bytes sent.
+        If file is a regular file and os.sendfile() is available, the data
+        is sent without being copied through user space; otherwise it is
+        read and sent with sendall().  The file position is left after the
+        last byte sent.  Non-blocking sockets are not supported."""
+        _check_sendfile_params(self, file, offset, count)
+        try:
+            return _sendfile_use_sendfile(self, file, offset, count)
+        except _GiveupOnSendfile:
+            return _sendfile_use_send(self, file, offset, count)
+
     family = property(lambda self: self._sock.family, doc="the socket family")
     type = property(lambda self: self._sock.type, doc="the socket type")
     proto = property(lambda self: self._sock.proto, doc="the socket protocol")
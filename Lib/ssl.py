@@ -130,6 +130,7 @@ except NameError:
     _SSLv2_IF_EXISTS = None
 
 from socket import socket, _fileobject, _delegate_methods, error as socket_error
+from socket import _check_sendfile_params, _sendfile_use_send
 if sys.platform == "win32":
     from _ssl import enum_certificates, enum_crls
 
@@ -704,6 +705,15 @@ class SSLSocket(socket):
         else:
             return socket.sendall(self, data, flags)
 
+    def sendfile(self, file, offset=0, count=None):
+        self._checkClosed()
+        if self._sslobj:
+            # The data has to go through the SSL layer.
+            _check_sendfile_params(self, file, offset, count)
+            return _sendfile_use_send(self, file, offset, count)
+        else:
+            return socket.sendfile(self, file, offset, count)
+
     def recv(self, buflen=1024, flags=0):
         self._checkClosed()
         if self._sslobj:
@@ -4,7 +4,7 @@ Various tests for synchronization primitives.
 
 import sys
 import time
-from thread import start_new_thread, get_ident
+from thread import start_new_thread, get_ident, TIMEOUT_MAX
 import threading
 import unittest
 
@@ -62,6 +62,14 @@ class BaseTestCase(unittest.TestCase):
         support.threading_cleanup(*self._threads)
         support.reap_children()
 
+    def assertTimeout(self, actual, expected):
+        # The waiting and/or time.time() can be imprecise, which
+        # is why comparing to the expected value would sometimes fail
+        # (especially under Windows).
+        self.assertGreaterEqual(actual, expected * 0.6)
+        # Test nothing insane happened
+        self.assertLess(actual, expected * 10.0)
+
 
 class BaseLockTests(BaseTestCase):
     """
@@ -179,6 +187,51 @@ class LockTests(BaseLockTests):
         lock.acquire()
         lock.release()
 
+    def test_timeout(self):
+        lock = self.locktype()
+        # Can't set timeout if not blocking
+        self.assertRaises(ValueError, lock.acquire, 0, 1)
+        # Invalid timeout values
+        self.assertRaises(ValueError, lock.acquire, timeout=-100)
+        self.assertRaises(OverflowError, lock.acquire, timeout=1e100)
+        self.assertRaises(OverflowError, lock.acquire, timeout=TIMEOUT_MAX + 1)
+        # TIMEOUT_MAX is ok
+        lock.acquire(timeout=TIMEOUT_MAX)
+        lock.release()
+        t1 = time.time()
+        self.assertTrue(lock.acquire(timeout=5))
+        t2 = time.time()
+        # Just a sanity test that it didn't actually wait for the timeout.
+        self.assertLess(t2 - t1, 5)
+        results = []
+        def f():
+            t1 = time.time()
+            results.append(lock.acquire(timeout=0.5))
+            t2 = time.time()
+            results.append(t2 - t1)
+        Bunch(f, 1).wait_for_finished()
+        self.assertFalse(results[0])
+        self.assertTimeout(results[1], 0.5)
+
+    def test_timeout_released(self):
+        # A thread waiting with a timeout gets the lock as soon as it is
+        # released, without waiting for the timeout to expire.
+        lock = self.locktype()
+        lock.acquire()
+        results = []
+        def f():
+            t1 = time.time()
+            results.append(lock.acquire(timeout=10))
+            results.append(time.time() - t1)
+            lock.release()
+        b = Bunch(f, 1)
+        b.wait_for_started()
+        _wait()
+        lock.release()
+        b.wait_for_finished()
+        self.assertTrue(results[0])
+        self.assertLess(results[1], 5)
+
 
 class RLockTests(BaseLockTests):
     """
@@ -501,6 +554,19 @@ class BaseSemaphoreTests(BaseTestCase):
         sem.release()
         b.wait_for_finished()
 
+    def test_acquire_timeout(self):
+        sem = self.semtype(2)
+        self.assertRaises(ValueError, sem.acquire, False, timeout=1.0)
+        self.assertTrue(sem.acquire(timeout=0.005))
+        self.assertTrue(sem.acquire(timeout=0.005))
+        self.assertFalse(sem.acquire(timeout=0.005))
+        sem.release()
+        self.assertTrue(sem.acquire(timeout=0.005))
+        t = time.time()
+        self.assertFalse(sem.acquire(timeout=0.5))
+        dt = time.time() - t
+        self.assertTimeout(dt, 0.5)
+
     def test_with(self):
         sem = self.semtype(2)
         def _with(err=None):
@@ -0,0 +1,136 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+from test import test_support
+from test.test_importhooks import ImportHooksBaseTestCase
+
+import bundleimport
+import compileall
+
+
+TESTMOD = "bundletestmodule"
+TESTPACK = "bundletestpackage"
+
+
+class BundleImportTestCase(ImportHooksBaseTestCase):
+
+    def setUp(self):
+        ImportHooksBaseTestCase.setUp(self)
+        bundleimport._bundle_cache.clear()
+        self.addCleanup(bundleimport._bundle_cache.clear)
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.src = os.path.join(self.directory, 'src')
+        self.bundle = os.path.join(self.directory, 'test.pyb')
+        self.write(TESTMOD + '.py', 'def get_name():\n    return __name__\n')
+        self.write(TESTPACK + '/__init__.py', 'x = 1\n')
+        self.write(TESTPACK + '/sub.py',
+                   'from . import %s as mod\n' % TESTMOD)
+        self.write(TESTPACK + '/%s.py' % TESTMOD, 'y = 2\n')
+
+    def write(self, name, source):
+        path = os.path.join(self.src, *name.split('/'))
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as f:
+            f.write(source)
+
+    def make_bundle(self, check_source=False):
+        compileall.compile_bundle(self.bundle, [self.src], quiet=True,
+                                  check_source=check_source)
+        bundleimport.install()
+        sys.path.insert(0, self.bundle)
+
+    def test_import(self):
+        self.make_bundle()
+        mod = __import__(TESTMOD)
+        self.assertEqual(mod.get_name(), TESTMOD)
+        self.assertIsInstance(mod.__loader__, bundleimport.bundleimporter)
+        self.assertEqual(mod.__file__, os.path.join(self.src, TESTMOD + '.py'))
+        self.assertEqual(mod.get_name.func_code.co_filename, mod.__file__)
+
+    def test_package(self):
+        self.make_bundle()
+        __import__(TESTPACK + '.sub')
+        pkg = sys.modules[TESTPACK]
+        sub = sys.modules[TESTPACK + '.sub']
+        self.assertEqual(pkg.__path__,
+                         [os.path.join(self.bundle, TESTPACK),
+                          os.path.join(self.src, TESTPACK)])
+        self.assertEqual(sub.mod.y, 2)
+        self.assertEqual(sub.__package__, TESTPACK)
+        self.assertEqual(sub.__loader__.prefix, TESTPACK)
+
+    def test_loader_methods(self):
+        self.make_bundle()
+        importer = bundleimport.bundleimporter(self.bundle)
+        self.assertIs(importer.find_module(TESTMOD), importer)
+        self.assertIsNone(importer.find_module('spam'))
+        self.assertTrue(importer.is_package(TESTPACK))
+        self.assertFalse(importer.is_package(TESTMOD))
+        self.assertEqual(importer.get_source(TESTPACK), 'x = 1\n')
+        self.assertEqual(importer.get_filename(TESTPACK),
+                         os.path.join(self.src, TESTPACK, '__init__.py'))
+        ns = {}
+        exec importer.get_code(TESTPACK) in ns
+        self.assertEqual(ns['x'], 1)
+        self.assertRaises(ImportError, importer.get_code, 'spam')
+        self.assertRaises(ImportError, importer.load_module, 'spam')
+        shutil.rmtree(self.src)
+        self.assertIsNone(importer.get_source(TESTPACK))
+        # The code doesn't depend on the sources
+        mod = importer.load_module(TESTMOD)
+        self.assertEqual(mod.get_name(), TESTMOD)
+
+    def test_not_a_bundle(self):
+        self.assertRaises(ImportError, bundleimport.bundleimporter,
+                          self.directory)
+        self.assertRaises(ImportError, bundleimport.bundleimporter,
+                          os.path.join(self.src, TESTMOD + '.py'))
+        self.assertRaises(ImportError, bundleimport.bundleimporter,
+                          os.path.join(self.directory, 'spam.pyb'))
+        self.make_bundle()
+        with open(self.bundle, 'r+b') as f:
+            f.seek(len(bundleimport.BUNDLE_MAGIC))
+            f.write('\0\0\0\0')
+        self.assertRaises(ImportError, bundleimport.bundleimporter,
+                          self.bundle)
+
+    def test_unchecked(self):
+        self.make_bundle()
+        self.write(TESTPACK + '/__init__.py', 'x = 3\n')
+        sys.path.append(self.src)
+        self.assertEqual(__import__(TESTPACK).x, 1)
+
+    def test_check_source(self):
+        self.make_bundle(check_source=True)
+        self.write(TESTPACK + '/__init__.py', 'x = 3\n')
+        sys.path.append(self.src)
+        pkg = __import__(TESTPACK + '.sub')
+        self.assertEqual(pkg.x, 3)
+        self.assertNotIsInstance(getattr(pkg, '__loader__', None),
+                                 bundleimport.bundleimporter)
+        # The package's __path__ only holds the source directory now
+        self.assertFalse(hasattr(pkg.sub, '__loader__'))
+        # Unchanged modules still come from the bundle
+        self.assertIsInstance(__import__(TESTMOD).__loader__,
+                              bundleimport.bundleimporter)
+
+    def test_install(self):
+        compileall.compile_bundle(self.bundle, [self.src], quiet=True)
+        sys.path.insert(0, self.bundle)
+        self.assertRaises(ImportError, __import__, TESTMOD)
+        bundleimport.install()
+        bundleimport.install()
+        self.assertEqual(sys.path_hooks.count(bundleimport.bundleimporter), 1)
+        self.assertEqual(__import__(TESTMOD).get_name(), TESTMOD)
+
+
+def test_main():
+    test_support.run_unittest(BundleImportTestCase)
+
+if __name__ == "__main__":
+    test_main()
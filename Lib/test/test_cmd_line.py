@@ -134,6 +134,19 @@ class CmdLineTest(unittest.TestCase):
         self.assertEqual(err.splitlines().count(b'Unknown option: -a'), 1)
         self.assertEqual(b'', out)
 
+    def test_importtime(self):
+        rc, out, err = assert_python_ok('-X', 'importtime', '-c',
+                                        'import json')
+        lines = err.splitlines()
+        self.assertEqual(lines[0],
+                         'import time: self [us] | cumulative | '
+                         'imported package')
+        self.assertIn('|   json.decoder', err)
+        self.assertTrue(lines[-1].endswith('| json'), lines[-1])
+        rc, out, err = assert_python_failure('-X', 'spam', '-c', 'pass')
+        self.assertIn('Unknown option: -X spam', err)
+
+
 
 def test_main():
     test.test_support.run_unittest(CmdLineTest)
@@ -71,6 +71,28 @@ class CompileallTests(unittest.TestCase):
         os.unlink(self.bc_path)
         os.unlink(self.bc_path2)
 
+    def test_compile_bundle(self):
+        import bundleimport
+        os.mkdir(os.path.join(self.directory, 'pkg'))
+        for name in ('__init__.py', 'mod.py'):
+            open(os.path.join(self.directory, 'pkg', name), 'w').close()
+        with open(os.path.join(self.directory, 'bad.py'), 'w') as file:
+            file.write('x = (\n')
+        bundle = os.path.join(self.directory, 'test.pyb')
+        with test_support.captured_stdout():
+            self.assertFalse(compileall.compile_bundle(
+                bundle, [self.directory], quiet=True))
+        importer = bundleimport.bundleimporter(bundle)
+        for name in ('_test', '_test2', 'pkg'):
+            self.assertIs(importer.find_module(name), importer, name)
+        importer = bundleimport.bundleimporter(os.path.join(bundle, 'pkg'))
+        self.assertIs(importer.find_module('pkg.mod'), importer)
+        importer = bundleimport.bundleimporter(bundle)
+        self.assertIsNone(importer.find_module('bad'))
+        self.assertTrue(importer.is_package('pkg'))
+        self.assertEqual(importer.get_filename('_test'), self.source_path)
+        self.assertFalse(os.path.exists(self.bc_path))
+
 def test_main():
     test_support.run_unittest(CompileallTests)
 
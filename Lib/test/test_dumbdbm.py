@@ -6,11 +6,12 @@ import os
 import unittest
 import dumbdbm
 from test import test_support
+from test.script_helper import assert_python_ok
 
 _fname = test_support.TESTFN
 
 def _delete_files():
-    for ext in [".dir", ".dat", ".bak"]:
+    for ext in [".dir", ".dat", ".bak", ".tmp", ".new"]:
         try:
             os.unlink(_fname + ext)
         except OSError:
@@ -112,6 +113,137 @@ class DumbDBMTestCase(unittest.TestCase):
         self.assertEqual(f['1'], 'hello')
         self.assertEqual(f['2'], 'hello2')
 
+    def test_journal(self):
+        # Updates reach the directory file without a full rewrite
+        f = dumbdbm.open(_fname)
+        f['1'] = 'hello'
+        f['2'] = 'hello2'
+        f['1'] = 'hello3'
+        del f['2']
+        f.sync()
+        g = dumbdbm.open(_fname)
+        self.assertEqual(g.items(), [('1', 'hello3')])
+        g.close()
+        f.close()
+
+    def test_reorganize(self):
+        f = dumbdbm.open(_fname)
+        for i in range(10):
+            f['a'] = str(i) * 1000
+        f['b'] = 'x' * 100
+        f['c'] = 'y'
+        del f['c']
+        f.reorganize()
+        self.assertEqual(os.path.getsize(_fname + '.dat'), 1100)
+        self.assertEqual(f['a'], '9' * 1000)
+        self.assertEqual(f['b'], 'x' * 100)
+        f['c'] = 'z'
+        f.close()
+        f = dumbdbm.open(_fname)
+        self.assertEqual(sorted(f.items()),
+                         [('a', '9' * 1000), ('b', 'x' * 100), ('c', 'z')])
+        f.close()
+
+    def test_automatic_reorganize(self):
+        f = dumbdbm.open(_fname)
+        value = 'x' * 10000
+        for i in range(500):
+            f['a'] = value
+            f[str(i % 10)] = value
+        self.assertLessEqual(os.path.getsize(_fname + '.dat'),
+                             2 * (dumbdbm._MIN_GARBAGE + 11 * len(value)))
+        f.close()
+        f = dumbdbm.open(_fname)
+        self.assertEqual(len(f), 11)
+        self.assertEqual(f['5'], value)
+        f.close()
+
+    def test_crash(self):
+        # Every update is on disk once it returns
+        code = (
+            'import dumbdbm, os\n'
+            'f = dumbdbm.open(%r)\n'
+            'for i in range(3000):\n'
+            '    f[str(i)] = str(i) * 10\n'
+            'del f["0"]\n'
+            'os._exit(0)\n' % os.path.abspath(_fname))
+        assert_python_ok('-c', code)
+        f = dumbdbm.open(_fname)
+        self.assertEqual(len(f), 2999)
+        self.assertEqual(f['2999'], '2999' * 10)
+        f.close()
+
+    def test_torn_record(self):
+        f = dumbdbm.open(_fname)
+        f['a'] = 'x'
+        f['b'] = 'y'
+        f.close()
+        with open(_fname + '.dir', 'a') as dirf:
+            dirf.write("'c', (2,")
+        f = dumbdbm.open(_fname)
+        self.assertEqual(sorted(f.items()), [('a', 'x'), ('b', 'y')])
+        f['d'] = 'z'
+        f.sync()
+        g = dumbdbm.open(_fname)
+        self.assertEqual(sorted(g.items()),
+                         [('a', 'x'), ('b', 'y'), ('d', 'z')])
+        g.close()
+        f.close()
+
+    def test_reorganize_interrupted(self):
+        # The new data file is in place but not the new directory file
+        f = dumbdbm.open(_fname)
+        f['a'] = 'x' * 100
+        f['a'] = 'y' * 100
+        f['b'] = 'z'
+        f.close()
+        f = dumbdbm.open(_fname)
+        def crash(filename):
+            raise KeyboardInterrupt
+        f._install_index = crash
+        self.assertRaises(KeyboardInterrupt, f.reorganize)
+        f.close()
+        self.assertEqual(os.path.getsize(_fname + '.dat'), 101)
+        self.assertTrue(os.path.exists(_fname + '.new'))
+        f = dumbdbm.open(_fname)
+        self.assertEqual(sorted(f.items()), [('a', 'y' * 100), ('b', 'z')])
+        f.close()
+        self.assertFalse(os.path.exists(_fname + '.new'))
+
+    def test_reorganize_not_committed(self):
+        # The old files are kept if the new data file is not in place
+        f = dumbdbm.open(_fname)
+        f['a'] = 'x'
+        f.close()
+        with open(_fname + '.tmp', 'wb') as tmp:
+            tmp.write('garbage')
+        with open(_fname + '.new', 'w') as new:
+            new.write("'a', (2, 5)\n")
+        f = dumbdbm.open(_fname)
+        self.assertEqual(f.items(), [('a', 'x')])
+        f.close()
+        self.assertFalse(os.path.exists(_fname + '.tmp'))
+        self.assertFalse(os.path.exists(_fname + '.new'))
+
+    @unittest.skipUnless(hasattr(os, 'chmod'), 'os.chmod not available')
+    def test_readonly_files(self):
+        f = dumbdbm.open(_fname)
+        f['a'] = 'x'
+        f.close()
+        os.chmod(_fname + '.dat', 0444)
+        os.chmod(_fname + '.dir', 0444)
+        try:
+            with open(_fname + '.dat', 'rb+'):
+                pass
+        except IOError:
+            pass
+        else:
+            self.skipTest('read-only files are writable')
+        f = dumbdbm.open(_fname, 'r')
+        self.assertEqual(f['a'], 'x')
+        self.assertRaises(IOError, f.__setitem__, 'b', 'y')
+        f.close()
+
 
     def read_helper(self, f):
         keys = self.keys_helper(f)
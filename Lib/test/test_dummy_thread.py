@@ -62,6 +62,16 @@ class LockTests(unittest.TestCase):
                         "Unconditional locking did not return True.")
         self.assertTrue(self.lock.acquire() is True)
 
+    def test_timed_acquire_fail(self):
+        #Test acquiring a locked lock with a timeout returns False once the
+        #timeout expired.
+        self.lock.acquire()
+        start_time = time.time()
+        self.assertFalse(self.lock.acquire(1, 0.1))
+        self.assertGreaterEqual(time.time() - start_time, 0.05)
+        self.lock.release()
+        self.assertTrue(self.lock.acquire(timeout=0.1))
+
     def test_uncond_acquire_blocking(self):
         #Make sure that unconditional acquiring of a locked lock blocks.
         def delay_unlock(to_unlock, delay):
@@ -4,7 +4,7 @@ import shutil
 import sys
 import unittest
 
-from test.test_support import run_unittest, TESTFN
+from test.test_support import run_unittest, swap_attr, TESTFN
 
 
 def fsdecode(s):
@@ -144,6 +144,19 @@ class GlobTests(unittest.TestCase):
                        fsdecode(self.norm('aab') + os.sep)},
                       ])
 
+    def test_glob_magic_directory_skips_files(self):
+        # Matches of a magic directory component that are not directories
+        # are dropped before their contents are listed.
+        listed = []
+        real_listdir = os.listdir
+        def listdir(dirname):
+            listed.append(dirname)
+            return real_listdir(dirname)
+        with swap_attr(os, 'listdir', listdir):
+            res = self.glob('*', '*F')
+        self.assertIn(self.norm('aab', 'F'), res)
+        self.assertNotIn(self.norm('ZZZ'), map(os.path.normpath, listed))
+
     @unittest.skipUnless(hasattr(os, 'symlink'), "Requires symlink support")
     def test_glob_symlinks(self):
         eq = self.assertSequencesEqual_noorder
@@ -4,6 +4,13 @@ import StringIO
 import socket
 import errno
 import os
+import time
+import BaseHTTPServer
+import SocketServer
+try:
+    import threading
+except ImportError:
+    threading = None
 
 import unittest
 TestCase = unittest.TestCase
@@ -687,10 +694,196 @@ class TunnelTests(TestCase):
         self.assertTrue('Host: destination.com' in conn.sock.data)
 
 
+class KeepAliveHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = 'port %d' % self.client_address[1]
+        self.send_response(200)
+        if self.path == '/close':
+            self.send_header('Connection', 'close')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class KeepAliveServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients closing connections with unread data reset them.
+        pass
+
+
+@unittest.skipUnless(threading, 'Threading required for this test.')
+class ConnectionPoolTest(TestCase):
+
+    def setUp(self):
+        self.server = KeepAliveServer((HOST, 0), KeepAliveHandler)
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       kwargs={'poll_interval': 0.01})
+        self.thread.start()
+        self.pool = httplib.HTTPConnectionPool()
+
+    def tearDown(self):
+        self.pool.close()
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+
+    def get(self, conn, path='/'):
+        conn.request('GET', path)
+        response = conn.getresponse()
+        body = response.read()
+        self.assertEqual(response.status, 200)
+        return body
+
+    def test_reuse(self):
+        conn = self.pool.get_connection('http', HOST, self.port)
+        body = self.get(conn)
+        self.pool.release(conn)
+        conn2 = self.pool.get_connection('http', '%s:%d' % (HOST, self.port))
+        self.assertIs(conn2, conn)
+        self.assertEqual(self.get(conn2), body)
+        self.pool.release(conn2)
+
+    def test_separate_keys(self):
+        conn = self.pool.get_connection('http', HOST, self.port)
+        self.get(conn)
+        self.pool.release(conn)
+        other = self.pool.get_connection('http', 'localhost', self.port)
+        self.assertIsNot(other, conn)
+        other.close()
+
+    def test_incomplete_response_not_reused(self):
+        conn = self.pool.get_connection('http', HOST, self.port)
+        conn.request('GET', '/')
+        response = conn.getresponse()
+        response.read(2)
+        self.pool.release(conn)
+        self.assertIsNone(conn.sock)
+        conn2 = self.pool.get_connection('http', HOST, self.port)
+        self.assertIsNot(conn2, conn)
+        conn2.close()
+
+    def test_server_close_not_reused(self):
+        conn = self.pool.get_connection('http', HOST, self.port)
+        self.get(conn, '/close')
+        self.pool.release(conn)
+        conn2 = self.pool.get_connection('http', HOST, self.port)
+        self.assertIsNot(conn2, conn)
+        conn2.close()
+
+    def test_dropped_connection(self):
+        conn = self.pool.get_connection('http', HOST, self.port)
+        self.get(conn)
+        # Shut down the read side as a server closing the connection
+        # would; the pool must notice the pending EOF.
+        conn.sock.shutdown(socket.SHUT_RD)
+        self.pool.release(conn)
+        conn2 = self.pool.get_connection('http', HOST, self.port)
+        self.assertIsNot(conn2, conn)
+        self.assertIsNone(conn.sock)
+        conn2.close()
+
+    def test_idle_timeout(self):
+        self.pool.idle_timeout = 0
+        conn = self.pool.get_connection('http', HOST, self.port)
+        self.get(conn)
+        self.pool.release(conn)
+        time.sleep(0.01)
+        conn2 = self.pool.get_connection('http', HOST, self.port)
+        self.assertIsNot(conn2, conn)
+        self.assertIsNone(conn.sock)
+        conn2.close()
+
+    def test_maxsize(self):
+        self.pool.maxsize = 1
+        conns = [self.pool.get_connection('http', HOST, self.port)
+                 for i in range(2)]
+        for conn in conns:
+            self.get(conn)
+        for conn in conns:
+            self.pool.release(conn)
+        # The first connection released is the one discarded.
+        self.assertIsNone(conns[0].sock)
+        self.assertIsNotNone(conns[1].sock)
+        self.assertIs(self.pool.get_connection('http', HOST, self.port),
+                      conns[1])
+        conns[1].close()
+
+    def test_timeout_applied_on_reuse(self):
+        conn = self.pool.get_connection('http', HOST, self.port, timeout=30)
+        self.get(conn)
+        self.pool.release(conn)
+        conn = self.pool.get_connection('http', HOST, self.port, timeout=5)
+        self.assertEqual(conn.sock.gettimeout(), 5)
+        conn.close()
+
+    def test_close(self):
+        conn = self.pool.get_connection('http', HOST, self.port)
+        self.get(conn)
+        self.pool.release(conn)
+        self.pool.close()
+        self.assertIsNone(conn.sock)
+
+    def test_unsupported_scheme(self):
+        self.assertRaises(ValueError, self.pool.get_connection,
+                          'ftp', HOST, self.port)
+
+    def test_connection_class(self):
+        class Connection(httplib.HTTPConnection):
+            def __init__(self, host, port=None, context=None, **kwargs):
+                httplib.HTTPConnection.__init__(self, host, port, **kwargs)
+                self.context = context
+
+        conn = self.pool.get_connection('http', HOST, self.port, Connection)
+        self.assertIsInstance(conn, Connection)
+        self.get(conn)
+        self.pool.release(conn)
+        # Other classes don't get the connection
+        other = self.pool.get_connection('http', HOST, self.port)
+        self.assertNotIsInstance(other, Connection)
+        other.close()
+        self.assertIs(self.pool.get_connection('http', HOST, self.port,
+                                               Connection), conn)
+        self.get(conn)
+        self.pool.release(conn)
+
+    def test_arguments_in_key(self):
+        class Connection(httplib.HTTPConnection):
+            def __init__(self, host, port=None, context=None, **kwargs):
+                httplib.HTTPConnection.__init__(self, host, port, **kwargs)
+                self.context = context
+
+        context, other_context = object(), object()
+        conn = self.pool.get_connection('http', HOST, self.port, Connection,
+                                        context=context)
+        self.get(conn)
+        self.pool.release(conn)
+        other = self.pool.get_connection('http', HOST, self.port, Connection,
+                                         context=other_context)
+        self.assertIsNot(other, conn)
+        other.close()
+        other = self.pool.get_connection('http', HOST, self.port, Connection,
+                                         context=context, strict=True)
+        self.assertIsNot(other, conn)
+        other.close()
+        self.assertIs(self.pool.get_connection('http', HOST, self.port,
+                                               Connection, context=context,
+                                               timeout=10), conn)
+        conn.close()
+
+
 @test_support.reap_threads
 def test_main(verbose=None):
     test_support.run_unittest(HeaderTests, OfflineTest, BasicTest, TimeoutTest,
-                              HTTPSTest, SourceAddressTest, TunnelTests)
+                              HTTPSTest, SourceAddressTest, TunnelTests,
+                              ConnectionPoolTest)
 
 if __name__ == '__main__':
     test_main()
@@ -9,10 +9,13 @@ import sys
 import re
 import base64
 import shutil
+import socket
 import urllib
 import httplib
+import mimetools
 import tempfile
 import unittest
+import BaseHTTPServer
 import CGIHTTPServer
 
 
@@ -150,6 +153,130 @@ class BaseHTTPRequestHandlerTestCase(unittest.TestCase):
         self.assertEqual(result[0], b'HTTP/1.1 414 Request-URI Too Long\r\n')
         self.assertFalse(self.handler.get_called)
 
+    def test_fast_request_parsing(self):
+        self.handler.fast_request_parsing = True
+        result = self.send_typical_request(
+            'GET / HTTP/1.1\r\nHost: example.com\r\n\r\n')
+        self.verify_http_server_response(result[0])
+        self.verify_expected_headers(result[1:-1])
+        self.verify_get_called()
+        self.assertEqual(self.handler.headers['host'], 'example.com')
+
+    def test_fast_request_parsing_header_block_too_large(self):
+        self.handler.fast_request_parsing = True
+        result = self.send_typical_request(
+            'GET / HTTP/1.1\r\n' + 'X-Spam: eggs\r\n' * 10000 + '\r\n')
+        self.assertEqual(result[0], 'HTTP/1.1 400 Request header block too large\r\n')
+        self.assertFalse(self.handler.get_called)
+
+
+class RequestReaderTestCase(unittest.TestCase):
+    """Test the buffered reader used by fast_request_parsing."""
+
+    def setUp(self):
+        self.sock, self.peer = socket.socketpair()
+        self.addCleanup(self.sock.close)
+        self.addCleanup(self.peer.close)
+        self.reader = BaseHTTPServer._RequestReader(self.sock, 16)
+
+    def test_readline(self):
+        self.peer.sendall('line 1\nline 2 is longer than the buffer\nend')
+        self.peer.shutdown(socket.SHUT_WR)
+        self.assertEqual(self.reader.readline(), 'line 1\n')
+        self.assertEqual(self.reader.readline(4), 'line')
+        self.assertEqual(self.reader.readline(),
+                         ' 2 is longer than the buffer\n')
+        self.assertEqual(self.reader.readline(), 'end')
+        self.assertEqual(self.reader.readline(), '')
+
+    def test_read(self):
+        self.peer.sendall('abc' * 100)
+        self.peer.shutdown(socket.SHUT_WR)
+        self.assertEqual(self.reader.read(0), '')
+        self.assertEqual(self.reader.read(2), 'ab')
+        self.assertEqual(self.reader.read(101), ('cab' * 34)[:101])
+        self.assertEqual(len(self.reader.read()), 300 - 103)
+        self.assertEqual(self.reader.read(), '')
+
+    def test_iteration(self):
+        self.peer.sendall('a\nb\nc')
+        self.peer.shutdown(socket.SHUT_WR)
+        self.assertEqual(list(self.reader), ['a\n', 'b\n', 'c'])
+
+    def test_read_header_block(self):
+        head = 'GET / HTTP/1.1\r\nHost: a\r\nX-Long: %s\r\n\r\n' % ('x' * 40)
+        self.peer.sendall(head * 2 + 'GET /')
+        self.reader = BaseHTTPServer._RequestReader(self.sock)
+        self.assertEqual(self.reader.readline(), 'GET / HTTP/1.1\r\n')
+        self.assertEqual(self.reader.read_header_block(),
+                         'Host: a\r\nX-Long: %s\r\n' % ('x' * 40))
+        self.assertTrue(self.reader.has_pending_request())
+        self.assertEqual(self.reader.readline(), 'GET / HTTP/1.1\r\n')
+        self.assertEqual(self.reader.read_header_block(),
+                         'Host: a\r\nX-Long: %s\r\n' % ('x' * 40))
+        self.assertFalse(self.reader.has_pending_request())
+        self.peer.sendall(' HTTP/1.0\n\nGET / HTTP/1.0\r\n\r\nbody')
+        self.peer.shutdown(socket.SHUT_WR)
+        self.assertEqual(self.reader.readline(), 'GET / HTTP/1.0\n')
+        self.assertEqual(self.reader.read_header_block(), '')
+        self.assertEqual(self.reader.readline(), 'GET / HTTP/1.0\r\n')
+        self.assertEqual(self.reader.read_header_block(), '')
+        self.assertEqual(self.reader.read_header_block(), 'body')
+
+    def test_read_header_block_limit(self):
+        self.peer.sendall('X-Spam: %s\r\n\r\n' % ('x' * 100))
+        self.assertIsNone(self.reader.read_header_block(50))
+
+
+class LazyMessageTestCase(unittest.TestCase):
+    """Check that the headers built by fast_request_parsing agree with
+    mimetools.Message."""
+
+    block = ('Host: example.com\r\n'
+             'Content-Type: text/html; charset="utf-8"; q=1\r\n'
+             'X-Folded: first\r\n'
+             '  second\r\n'
+             'X-Repeated: 1\r\n'
+             'x-repeated: 2\r\n'
+             'Content-Length: 12\r\n')
+
+    def check(self, block):
+        expected = mimetools.Message(StringIO(block + '\r\n'), 0)
+        msg = BaseHTTPServer._LazyMessage(block)
+        self.assertIsInstance(msg, mimetools.Message)
+        self.assertEqual(msg.dict, expected.dict)
+        self.assertEqual(msg.headers, expected.headers)
+        self.assertEqual(msg.status, expected.status)
+        for attr in ('typeheader', 'encodingheader', 'type', 'maintype',
+                     'subtype', 'plist'):
+            self.assertEqual(getattr(msg, attr), getattr(expected, attr))
+        return msg
+
+    def test_headers(self):
+        msg = self.check(self.block)
+        self.assertEqual(msg['host'], 'example.com')
+        self.assertEqual(msg.getheader('X-Folded'), 'first\n second')
+        self.assertEqual(msg.getheaders('x-repeated'),
+                         ['1', '2'])
+        self.assertEqual(msg.getparam('charset'), 'utf-8')
+        self.assertIn('content-length', msg)
+        self.assertEqual(len(msg), 5)
+
+    def test_lazy(self):
+        msg = BaseHTTPServer._LazyMessage(self.block)
+        self.assertNotIn('dict', msg.__dict__)
+        msg.get('Host')
+        self.assertIn('dict', msg.__dict__)
+        self.assertNotIn('type', msg.__dict__)
+        self.assertEqual(msg.gettype(), 'text/html')
+        self.assertRaises(AttributeError, getattr, msg, 'spam')
+
+    def test_empty_and_bad_blocks(self):
+        self.check('')
+        self.check('Host: a\r\nnot a header\r\nX-After: b\r\n')
+        self.check('not a header\r\n')
+        self.check('Host: a\r\n: empty name\r\n')
+
 
 class BaseHTTPServerTestCase(BaseTestCase):
     class request_handler(NoLogRequestHandler, BaseHTTPRequestHandler):
@@ -276,6 +403,63 @@ class BaseHTTPServerTestCase(BaseTestCase):
         self.assertEqual(res.status, 999)
 
 
+class FastParsingHTTPServerTestCase(BaseHTTPServerTestCase):
+    class request_handler(BaseHTTPServerTestCase.request_handler):
+        fast_request_parsing = True
+
+        def do_ECHO(self):
+            body = ''.join(self.headers.headers)
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers['content-length']))
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def test_keep_alive(self):
+        for i in range(3):
+            self.con.request('ECHO', '/', headers={'X-Count': str(i)})
+            res = self.con.getresponse()
+            self.assertEqual(res.status, 200)
+            self.assertIn('X-Count: %d\r\n' % i, res.read())
+        self.con.request('POST', '/', body='spam' * 1000)
+        res = self.con.getresponse()
+        self.assertEqual(res.read(), 'spam' * 1000)
+        self.con.request('TEST', '/')
+        res = self.con.getresponse()
+        self.assertEqual(res.status, 204)
+        self.con.close()
+
+    def test_pipelining(self):
+        # The server handles one connection at a time: use the one
+        # opened by setUp().
+        sock = self.con.sock
+        self.addCleanup(self.con.close)
+        requests = ['ECHO / HTTP/1.1\r\nX-Count: %d\r\n\r\n' % i
+                    for i in range(3)]
+        requests.append('POST / HTTP/1.1\r\nContent-Length: 4\r\n\r\nspam')
+        requests.append('TEST / HTTP/1.1\r\n\r\n')
+        sock.sendall(''.join(requests))
+        # The server closes the connection after the last response.
+        chunks = []
+        while True:
+            data = sock.recv(8192)
+            if not data:
+                break
+            chunks.append(data)
+        data = ''.join(chunks)
+        self.assertEqual(re.findall(r'HTTP/1.1 (\d+)', data),
+                         ['200', '200', '200', '200', '204'])
+        self.assertEqual(re.findall(r'X-Count: (\d)\r\n', data),
+                         ['0', '1', '2'])
+        self.assertIn('\r\n\r\nspamHTTP/1.1 204', data)
+
+
 class SimpleHTTPServerTestCase(BaseTestCase):
     class request_handler(NoLogRequestHandler, SimpleHTTPRequestHandler):
         pass
@@ -557,8 +741,11 @@ def test_main(verbose=None):
     try:
         cwd = os.getcwd()
         test_support.run_unittest(BaseHTTPRequestHandlerTestCase,
+                                  RequestReaderTestCase,
+                                  LazyMessageTestCase,
                                   SimpleHTTPRequestHandlerTestCase,
                                   BaseHTTPServerTestCase,
+                                  FastParsingHTTPServerTestCase,
                                   SimpleHTTPServerTestCase,
                                   CGIHTTPServerTestCase
                                  )
@@ -1,4 +1,8 @@
 import imp
+import os
+import sys
+import shutil
+import tempfile
 import unittest
 from test import test_support
 
@@ -70,10 +74,56 @@ class ReloadTests(unittest.TestCase):
             imp.reload(marshal)
 
 
+@unittest.skipUnless(os.name == 'posix', 'directory listings cached on POSIX')
+class InvalidateCachesTests(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        sys.path.insert(0, self.dir)
+        self.addCleanup(sys.path.remove, self.dir)
+        self.addCleanup(imp.invalidate_caches)
+
+    def age(self, path):
+        # Directories modified in the last seconds aren't cached
+        mtime = os.stat(path).st_mtime - 10
+        os.utime(path, (mtime, mtime))
+
+    def write_module(self, name):
+        with open(os.path.join(self.dir, name + os.extsep + 'py'), 'w') as f:
+            f.write('x = 42\n')
+        self.age(self.dir)
+
+    def test_invalidate_caches(self):
+        self.write_module('_dircache_a')
+        with test_support.CleanImport('_dircache_a', '_dircache_b'):
+            import _dircache_a
+            # The new module doesn't change the directory's mtime, so the
+            # cached listing hides it until the cache is invalidated
+            self.write_module('_dircache_b')
+            with self.assertRaises(ImportError):
+                import _dircache_b
+            imp.invalidate_caches()
+            import _dircache_b
+            self.assertEqual(_dircache_b.x, 42)
+
+    def test_modified_directory(self):
+        self.write_module('_dircache_a')
+        with test_support.CleanImport('_dircache_a', '_dircache_pkg'):
+            import _dircache_a
+            pkg = os.path.join(self.dir, '_dircache_pkg')
+            os.mkdir(pkg)
+            open(os.path.join(pkg, '__init__.py'), 'w').close()
+            self.age(pkg)
+            import _dircache_pkg
+            self.assertEqual(_dircache_pkg.__path__, [pkg])
+
+
 def test_main():
     tests = [
         ReloadTests,
         LockTests,
+        InvalidateCachesTests,
     ]
     test_support.run_unittest(*tests)
 
@@ -1,7 +1,10 @@
 import contextlib
 import imp
 import importlib
+import os
+import shutil
 import sys
+import tempfile
 import unittest
 
 
@@ -167,9 +170,94 @@ class ImportModuleTests(unittest.TestCase):
         self.assertRaises(TypeError, importlib.import_module, '.support')
 
 
+class counting_mock_modules(mock_modules):
+
+    """A mock importer/loader which records the modules it loads."""
+
+    def __init__(self, *names):
+        mock_modules.__init__(self, *names)
+        self.loaded = []
+
+    def load_module(self, fullname):
+        self.loaded.append(fullname)
+        return mock_modules.load_module(self, fullname)
+
+
+class LazyImportTests(unittest.TestCase):
+
+    """Test importlib.lazy_import and importlib.mark_lazy."""
+
+    def test_lazy_import(self):
+        with counting_mock_modules('top_level') as mock:
+            with import_state(meta_path=[mock]):
+                module = importlib.lazy_import('top_level')
+                self.assertEqual(mock.loaded, [])
+                self.assertIs(sys.modules['top_level'], module)
+                self.assertIs(importlib.import_module('top_level'), module)
+                self.assertEqual(mock.loaded, [])
+                self.assertEqual(module.attr, 'top_level')
+                self.assertEqual(mock.loaded, ['top_level'])
+                self.assertIs(sys.modules['top_level'], mock['top_level'])
+                module.spam = 42
+                self.assertEqual(mock['top_level'].spam, 42)
+                self.assertEqual(mock.loaded, ['top_level'])
+
+    def test_already_imported(self):
+        with counting_mock_modules('top_level') as mock:
+            with import_state(meta_path=[mock]):
+                module = importlib.import_module('top_level')
+                self.assertIs(importlib.lazy_import('top_level'), module)
+
+    def test_relative_lazy_import(self):
+        modules = ['a.__init__', 'a.b.__init__', 'a.c']
+        with counting_mock_modules(*modules) as mock:
+            with import_state(meta_path=[mock]):
+                module = importlib.lazy_import('..c', 'a.b')
+                self.assertEqual(mock.loaded, [])
+                self.assertEqual(module.__name__, 'a.c')
+                self.assertEqual(mock.loaded, ['a', 'a.c'])
+
+    def test_lazy_import_error(self):
+        with uncache('no_such_module'):
+            with import_state():
+                module = importlib.lazy_import('no_such_module')
+                self.assertRaises(ImportError, getattr, module, 'attr')
+                # The next access tries again
+                self.assertIs(sys.modules['no_such_module'], module)
+                self.assertRaises(ImportError, getattr, module, 'attr')
+
+    def test_mark_lazy(self):
+        # The finder checks that modules exist, so use real ones
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        self.addCleanup(importlib._lazy_finder.names.clear)
+        os.mkdir(os.path.join(path, 'lazy_pkg'))
+        with open(os.path.join(path, 'lazy_log.py'), 'w') as f:
+            f.write('executed = []\n')
+        log = 'import lazy_log; lazy_log.executed.append(__name__)\n'
+        for name in ('lazy_pkg/__init__.py', 'lazy_pkg/mod.py', 'other.py'):
+            with open(os.path.join(path, name), 'w') as f:
+                f.write(log)
+        names = ['lazy_log', 'lazy_pkg', 'lazy_pkg.mod', 'other']
+        with uncache(*names):
+            with import_state(path=[path]):
+                importlib.mark_lazy('lazy_pkg')
+                from lazy_log import executed
+                pkg = __import__('lazy_pkg')
+                other = __import__('other')
+                self.assertEqual(executed, ['other'])
+                __import__('lazy_pkg.mod')
+                # Finding the submodule needs the package's __path__
+                self.assertEqual(executed, ['other', 'lazy_pkg'])
+                self.assertEqual(pkg.mod.__name__, 'lazy_pkg.mod')
+                self.assertEqual(executed,
+                                 ['other', 'lazy_pkg', 'lazy_pkg.mod'])
+                # Modules which don't exist aren't claimed
+                self.assertRaises(ImportError, __import__, 'lazy_pkg.spam')
+
 def test_main():
     from test.test_support import run_unittest
-    run_unittest(ImportModuleTests)
+    run_unittest(ImportModuleTests, LazyImportTests)
 
 
 if __name__ == '__main__':
@@ -26,9 +26,11 @@ import logging.config
 import codecs
 import cPickle
 import cStringIO
+import functools
 import gc
 import json
 import os
+import Queue
 import random
 import re
 import select
@@ -1661,6 +1663,38 @@ class ConfigDictTest(BaseTest):
         }
     }
 
+    # config_queue sends the root logger's events through a queue to a
+    # handler which is configured after the queue handler
+    config_queue = {
+        'version': 1,
+        'formatters': {
+            'form1' : {
+                'format' : '%(levelname)s ++ %(message)s',
+            },
+        },
+        'handlers' : {
+            'aqueue' : {
+                'class' : 'logging.handlers.QueueHandler',
+                'formatter' : 'form1',
+                'level' : 'INFO',
+                'queue' : {
+                    '()' : 'Queue.Queue',
+                    'maxsize' : 100,
+                },
+                'handlers' : ['hand1'],
+                'batch_size' : 10,
+            },
+            'hand1' : {
+                'class' : 'logging.StreamHandler',
+                'stream'  : 'ext://sys.stdout',
+            },
+        },
+        'root' : {
+            'level' : 'DEBUG',
+            'handlers' : ['aqueue'],
+        },
+    }
+
     def apply_config(self, conf):
         logging.config.dictConfig(conf)
 
@@ -1919,6 +1953,22 @@ class ConfigDictTest(BaseTest):
         self.apply_config(self.out_of_order)
         handler = logging.getLogger('mymodule').handlers[0]
         self.assertIsInstance(handler.target, logging.Handler)
+        self.assertIsNotNone(handler.formatter)
+        self.assertEqual(handler.level, logging.DEBUG)
+
+    @unittest.skipUnless(threading, 'Threading required for this test.')
+    def test_config_queue_ok(self):
+        with captured_stdout() as output:
+            self.apply_config(self.config_queue)
+            handler = logging.getLogger().handlers[0]
+            self.assertIsInstance(handler, logging.handlers.QueueHandler)
+            self.assertEqual(handler.queue.maxsize, 100)
+            self.assertEqual(handler.listener.batch_size, 10)
+            logging.debug(self.next_message())
+            logging.warning(self.next_message())
+            handler.close()
+            self.assertIsNone(handler.listener)
+            self.assertEqual(output.getvalue(), 'WARNING ++ 2\n')
 
 class ManagerTest(BaseTest):
     def test_manager_loggerclass(self):
@@ -1996,6 +2046,324 @@ class HandlerTest(BaseTest):
                     os.unlink(fn)
 
 
+class BufferedFileHandlerTest(BaseTest):
+
+    def setUp(self):
+        BaseTest.setUp(self)
+        fd, self.fn = tempfile.mkstemp('.log', 'test_logging-buf-')
+        os.close(fd)
+
+    def tearDown(self):
+        for fn in (self.fn, self.fn + ".1"):
+            if os.path.exists(fn):
+                os.unlink(fn)
+        BaseTest.tearDown(self)
+
+    def contents(self):
+        with open(self.fn) as f:
+            return f.read()
+
+    def record(self, msg, level=logging.INFO, created=None):
+        r = logging.makeLogRecord({'msg': msg, 'levelno': level})
+        if created is not None:
+            r.created = created
+        return r
+
+    def test_unbuffered(self):
+        h = logging.FileHandler(self.fn)
+        try:
+            h.handle(self.record("a"))
+            self.assertEqual(self.contents(), "a\n")
+        finally:
+            h.close()
+
+    def test_buffer_size(self):
+        h = logging.FileHandler(self.fn)
+        try:
+            h.setBuffering(6, None)
+            h.handle(self.record("a"))
+            h.handle(self.record("b"))
+            self.assertEqual(self.contents(), "")
+            h.handle(self.record("c"))
+            self.assertEqual(self.contents(), "a\nb\nc\n")
+            h.handle(self.record("d"))
+            self.assertEqual(self.contents(), "a\nb\nc\n")
+        finally:
+            h.close()
+        self.assertEqual(self.contents(), "a\nb\nc\nd\n")
+
+    def test_flush_level(self):
+        h = logging.FileHandler(self.fn)
+        try:
+            h.setBuffering(1000, None)
+            h.handle(self.record("a"))
+            h.handle(self.record("b", logging.WARNING))
+            self.assertEqual(self.contents(), "")
+            h.handle(self.record("c", logging.ERROR))
+            self.assertEqual(self.contents(), "a\nb\nc\n")
+        finally:
+            h.close()
+
+    def test_flush_interval(self):
+        h = logging.FileHandler(self.fn)
+        try:
+            h.setBuffering(1000, 10.0)
+            now = h._lastFlush
+            h.handle(self.record("a", created=now + 1))
+            self.assertEqual(self.contents(), "")
+            h.handle(self.record("b", created=now + 11))
+            self.assertEqual(self.contents(), "a\nb\n")
+        finally:
+            h.close()
+
+    def test_rotating_size(self):
+        h = logging.handlers.RotatingFileHandler(self.fn, maxBytes=10,
+                                                 backupCount=1)
+        try:
+            h.setBuffering(1000, None)
+            for msg in ("aaa", "bbb", "ccc"):
+                h.handle(self.record(msg))
+            # Nothing has been flushed, but the third record still rolls
+            # the file over.
+            with open(self.fn + ".1") as f:
+                self.assertEqual(f.read(), "aaa\nbbb\n")
+            h.handle(self.record("ddd"))
+        finally:
+            h.close()
+        self.assertEqual(self.contents(), "ccc\nddd\n")
+
+    @unittest.skipIf(os.name == 'nt', 'WatchedFileHandler not appropriate for Windows.')
+    def test_watched_stat_interval(self):
+        h = logging.handlers.WatchedFileHandler(self.fn, statInterval=10.0)
+        try:
+            now = time.time()
+            h.handle(self.record("a", created=now))
+            os.rename(self.fn, self.fn + ".1")
+            h.handle(self.record("b", created=now + 1))
+            self.assertFalse(os.path.exists(self.fn))
+            h.handle(self.record("c", created=now + 11))
+        finally:
+            h.close()
+        with open(self.fn + ".1") as f:
+            self.assertEqual(f.read(), "a\nb\n")
+        self.assertEqual(self.contents(), "c\n")
+
+
+class RecordingFormatter(logging.Formatter):
+
+    """A formatter which declares the record attributes it uses and keeps
+    the records it formats."""
+
+    def __init__(self, attrs):
+        logging.Formatter.__init__(self)
+        self.attrs = attrs
+        self.records = []
+
+    def getRecordAttributes(self):
+        return self.attrs
+
+    def format(self, record):
+        self.records.append(record)
+        return logging.Formatter.format(self, record)
+
+
+class RecordAttributesTest(BaseTest):
+
+    def setUp(self):
+        BaseTest.setUp(self)
+        self.logger = logging.getLogger("attributes")
+        self.logger.propagate = 0
+        self.handler = logging.StreamHandler(cStringIO.StringIO())
+        self.logger.addHandler(self.handler)
+
+    def tearDown(self):
+        self.logger.removeHandler(self.handler)
+        self.handler.close()
+        BaseTest.tearDown(self)
+
+    def log(self, attrs):
+        formatter = RecordingFormatter(attrs)
+        self.handler.setFormatter(formatter)
+        self.logger.info("%s", "message")
+        self.assertEqual(len(formatter.records), 1)
+        return formatter.records[0]
+
+    def assert_full_record(self, record):
+        self.assertEqual(record.funcName, "log")
+        self.assertNotEqual(record.lineno, 0)
+        self.assertEqual(record.process, os.getpid())
+        if threading:
+            self.assertEqual(record.threadName,
+                             threading.current_thread().name)
+
+    def test_formatter_attributes(self):
+        f = logging.Formatter("%(asctime)s %(levelname)s: %(message)s")
+        self.assertEqual(f.getRecordAttributes(),
+                         frozenset(["asctime", "created", "msecs",
+                                    "levelname", "message"]))
+        self.assertIsNone(ExceptionFormatter().getRecordAttributes())
+        self.assertEqual(self.handler.getRecordAttributes(),
+                         frozenset(["message"]))
+        self.assertIsNone(logging.Handler().getRecordAttributes())
+
+    def test_unused_attributes(self):
+        record = self.log(frozenset(["message"]))
+        self.assertEqual(record.getMessage(), "message")
+        self.assertEqual(record.pathname, "(unknown file)")
+        self.assertEqual(record.lineno, 0)
+        self.assertIsNone(record.thread)
+        self.assertIsNone(record.threadName)
+        self.assertIsNone(record.process)
+        self.assertIsNone(record.processName)
+
+    def test_used_attributes(self):
+        record = self.log(frozenset(["lineno"]))
+        self.assertEqual(record.funcName, "log")
+        self.assertEqual(os.path.splitext(record.filename)[0],
+                         "test_logging")
+        self.assertIsNone(record.process)
+        record = self.log(frozenset(["process", "thread"]))
+        self.assertEqual(record.lineno, 0)
+        self.assertEqual(record.process, os.getpid())
+        if threading:
+            self.assertEqual(record.threadName,
+                             threading.current_thread().name)
+
+    def test_unknown_attributes(self):
+        self.assert_full_record(self.log(None))
+        # Filters may use any attribute
+        self.logger.addFilter(logging.Filter())
+        self.assert_full_record(self.log(frozenset()))
+        self.logger.filters = []
+        self.handler.addFilter(logging.Filter())
+        self.assert_full_record(self.log(frozenset()))
+        self.handler.filters = []
+        # So may other handlers
+        other = logging.handlers.BufferingHandler(10)
+        self.logger.addHandler(other)
+        try:
+            self.assert_full_record(self.log(frozenset()))
+        finally:
+            self.logger.removeHandler(other)
+
+    def test_message_always_set(self):
+        # Subclasses and other handlers may read the message of a record
+        # even if the format string doesn't use it
+        formatter = RecordingFormatter(None)
+        formatter._fmt = "%(levelname)s"
+        self.handler.setFormatter(formatter)
+        self.logger.info("%s", "message")
+        self.assertEqual(formatter.records[0].message, "message")
+
+    def test_makeRecord_replaced(self):
+        # makeRecord() replaced on the instance by something other than a
+        # method
+        records = []
+        def makeRecord(*args):
+            record = logging.Logger.makeRecord(self.logger, *args)
+            records.append(record)
+            return record
+        self.logger.makeRecord = functools.partial(makeRecord)
+        try:
+            self.assert_full_record(self.log(frozenset()))
+            self.logger.makeRecord = makeRecord
+            self.assert_full_record(self.log(frozenset()))
+        finally:
+            del self.logger.makeRecord
+        self.assertEqual(len(records), 2)
+
+
+@unittest.skipUnless(threading, 'Threading required for this test.')
+class QueueHandlerTest(BaseTest):
+
+    expected_log_pat = r"^[\w.]+ -> ([\w]+): ([\d]+)$"
+
+    def setUp(self):
+        BaseTest.setUp(self)
+        self.queue = Queue.Queue(2)
+        self.que_hdlr = logging.handlers.QueueHandler(self.queue)
+        self.que_logger = logging.getLogger('que')
+        self.que_logger.propagate = False
+        self.que_logger.setLevel(logging.WARNING)
+        self.que_logger.addHandler(self.que_hdlr)
+
+    def tearDown(self):
+        self.que_logger.removeHandler(self.que_hdlr)
+        self.que_hdlr.close()
+        BaseTest.tearDown(self)
+
+    def test_queue_handler(self):
+        self.que_logger.debug(self.next_message())
+        self.assertRaises(Queue.Empty, self.queue.get_nowait)
+        self.que_logger.info(self.next_message())
+        self.assertRaises(Queue.Empty, self.queue.get_nowait)
+        msg = self.next_message()
+        self.que_logger.warning(msg)
+        data = self.queue.get_nowait()
+        self.assertIsInstance(data, logging.LogRecord)
+        self.assertEqual(data.name, self.que_logger.name)
+        self.assertEqual((data.msg, data.args), (msg, None))
+
+    def test_prepare(self):
+        self.que_hdlr.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            self.que_logger.exception('%s', 'failed')
+        data = self.queue.get_nowait()
+        self.assertTrue(data.msg.startswith('ERROR: failed\nTraceback'))
+        self.assertEqual(data.message, data.msg)
+        self.assertIsNone(data.exc_info)
+        # The record can be sent to another process
+        data = cPickle.loads(cPickle.dumps(data))
+        self.assertEqual(data.getMessage(), data.message)
+
+    def test_full(self):
+        for i in range(4):
+            self.que_logger.warning(self.next_message())
+        self.assertEqual(self.que_hdlr.dropped, 2)
+        self.assertEqual(self.queue.get_nowait().msg, '1')
+        self.que_hdlr.block = True
+        self.que_hdlr.timeout = 0.01
+        for i in range(2):
+            self.que_logger.warning(self.next_message())
+        self.assertEqual(self.que_hdlr.dropped, 3)
+
+    def test_queue_listener(self):
+        listener = logging.handlers.QueueListener(self.queue, self.root_hdlr,
+                                                  batch_size=3)
+        self.que_hdlr.block = True
+        listener.start()
+        try:
+            for i in range(10):
+                self.que_logger.warning(self.next_message())
+        finally:
+            listener.stop()
+        self.assertEqual(self.que_hdlr.dropped, 0)
+        self.assert_log_lines([('WARNING', str(i)) for i in range(1, 11)])
+
+    def test_respect_handler_level(self):
+        self.root_hdlr.setLevel(logging.ERROR)
+        listener = logging.handlers.QueueListener(self.queue, self.root_hdlr,
+                                                  respect_handler_level=True)
+        listener.start()
+        self.que_logger.warning(self.next_message())
+        self.que_logger.error(self.next_message())
+        listener.stop()
+        self.assert_log_lines([('ERROR', '2')])
+        self.assertRaises(TypeError, logging.handlers.QueueListener,
+                          self.queue, spam=True)
+
+    def test_close_stops_listener(self):
+        listener = logging.handlers.QueueListener(self.queue, self.root_hdlr)
+        self.que_hdlr.listener = listener
+        listener.start()
+        self.que_logger.warning(self.next_message())
+        self.que_hdlr.close()
+        self.assertIsNone(listener._thread)
+        self.assert_log_lines([('WARNING', '1')])
+
+
 # Set the locale to the platform-dependent default.  I have no idea
 # why the test does this, but in any case we save the current locale
 # first and restore it at the end.
@@ -2005,7 +2373,8 @@ def test_main():
                  CustomLevelsAndFiltersTest, MemoryHandlerTest,
                  ConfigFileTest, SocketHandlerTest, MemoryTest,
                  EncodingTest, WarningsTest, ConfigDictTest, ManagerTest,
-                 ChildLoggerTest, HandlerTest)
+                 ChildLoggerTest, HandlerTest, BufferedFileHandlerTest,
+                 RecordAttributesTest, QueueHandlerTest)
 
 if __name__ == "__main__":
     test_main()
@@ -0,0 +1,118 @@
+import pickle
+import unittest
+from test import test_support
+try:
+    import thread
+    import threading
+except ImportError:
+    thread = None
+
+from _lrucache import LRUCache, CacheInfo
+
+
+class LRUCacheTests(unittest.TestCase):
+
+    def test_basic(self):
+        cache = LRUCache(2)
+        self.assertEqual(len(cache), 0)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('a', 42), 42)
+        cache['a'] = 1
+        self.assertIn('a', cache)
+        self.assertEqual(cache['a'], 1)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertRaises(KeyError, cache.__getitem__, 'b')
+        del cache['a']
+        self.assertNotIn('a', cache)
+        self.assertRaises(KeyError, cache.__delitem__, 'a')
+
+    def test_eviction_order(self):
+        cache = LRUCache(3)
+        for key in 'abc':
+            cache[key] = key.upper()
+        cache.get('a')
+        cache['d'] = 'D'
+        self.assertEqual(sorted(cache._map), ['a', 'c', 'd'])
+        cache['c'] = 'C2'
+        cache['e'] = 'E'
+        self.assertEqual(sorted(cache._map), ['c', 'd', 'e'])
+        self.assertEqual(cache['c'], 'C2')
+        self.assertEqual(cache.info().evictions, 2)
+
+    def test_info(self):
+        cache = LRUCache(1)
+        cache.get('x')
+        cache['x'] = 1
+        cache.get('x')
+        cache['y'] = 2
+        info = cache.info()
+        self.assertIsInstance(info, CacheInfo)
+        self.assertEqual(info, (1, 1, 1, 1, 1))
+        self.assertEqual((info.hits, info.misses, info.evictions,
+                          info.maxsize, info.currsize), tuple(info))
+        self.assertEqual(repr(info), 'CacheInfo(hits=1, misses=1, '
+                         'evictions=1, maxsize=1, currsize=1)')
+        self.assertEqual(pickle.loads(pickle.dumps(info)), info)
+        cache.clear()
+        self.assertEqual(cache.info(), (0, 0, 0, 1, 0))
+
+    def test_resize(self):
+        cache = LRUCache(None)
+        for i in range(10):
+            cache[i] = i
+        self.assertEqual(len(cache), 10)
+        cache.resize(4)
+        self.assertEqual(cache.maxsize, 4)
+        self.assertEqual(sorted(cache._map), [6, 7, 8, 9])
+        cache.resize(0)
+        self.assertEqual(len(cache), 0)
+        cache[1] = 1
+        self.assertEqual(len(cache), 0)
+        self.assertRaises(ValueError, cache.resize, -1)
+        self.assertRaises(ValueError, LRUCache, -1)
+
+    def test_reentrant_key(self):
+        # A key whose comparison uses the cache again does not deadlock
+        cache = LRUCache(2)
+        class Key(object):
+            def __hash__(self):
+                return 1
+            def __eq__(self, other):
+                cache.get('other')
+                return self is other
+        key = Key()
+        cache[key] = 1
+        cache[Key()] = 2
+        self.assertEqual(cache.get(key), 1)
+        cache['x'] = 3
+        self.assertEqual(len(cache), 2)
+
+    @unittest.skipUnless(thread, 'Threading required for this test.')
+    def test_threads(self):
+        cache = LRUCache(10)
+        errors = []
+        def worker(n):
+            try:
+                for i in range(2000):
+                    key = (n * i) % 25
+                    if cache.get(key) is None:
+                        cache[key] = key
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=worker, args=(n,))
+                   for n in range(1, 5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+        self.assertLessEqual(len(cache), 10)
+        for key in cache._map:
+            self.assertEqual(cache[key], key)
+
+
+def test_main():
+    test_support.run_unittest(LRUCacheTests)
+
+if __name__ == "__main__":
+    test_main()
@@ -268,6 +268,58 @@ class BugsTestCase(unittest.TestCase):
         invalid_string = 'l\x02\x00\x00\x00\x00\x00\x00\x00'
         self.assertRaises(ValueError, marshal.loads, invalid_string)
 
+class ReferencesTestCase(unittest.TestCase):
+    def test_shared_objects(self):
+        t = ('spam', 2.5, 12345678)
+        f = frozenset([t])
+        data = [t, t, f, f]
+        new = marshal.loads(marshal.dumps(data, 3))
+        self.assertEqual(new, data)
+        self.assertIs(new[0], new[1])
+        self.assertIs(new[2], new[3])
+        self.assertIn(new[0], new[2])
+        self.assertLess(len(marshal.dumps(data, 3)),
+                        len(marshal.dumps(data, 2)))
+        # Earlier versions don't share objects
+        new = marshal.loads(marshal.dumps(data, 2))
+        self.assertEqual(new, data)
+        self.assertIsNot(new[0], new[1])
+
+    def test_recursive(self):
+        l = [1]
+        l.append(l)
+        new = marshal.loads(marshal.dumps(l, 3))
+        self.assertIs(new[1], new)
+        d = {}
+        d['self'] = d
+        new = marshal.loads(marshal.dumps(d, 3))
+        self.assertIs(new['self'], new)
+        self.assertRaises(ValueError, marshal.dumps, l, 2)
+        self.assertRaises(ValueError, marshal.dumps, l)
+
+    def test_default_version(self):
+        # Version 3 is only the default for .pyc files
+        self.assertEqual(marshal.version, 2)
+        t = ('spam',)
+        self.assertEqual(marshal.dumps([t, t]), marshal.dumps([t, t], 2))
+
+    def test_code(self):
+        co = compile('def f(): pass\ndef g(): pass\n', 'spam.py', 'exec')
+        new = marshal.loads(marshal.dumps(co, 3))
+        self.assertEqual(new, co)
+        f, g = [c for c in new.co_consts if hasattr(c, 'co_code')]
+        self.assertIs(f.co_filename, g.co_filename)
+        self.assertIs(f.co_filename, new.co_filename)
+
+    def test_invalid_reference(self):
+        self.assertRaises(ValueError, marshal.loads, 'r\x00\x00\x00\x00')
+        self.assertRaises(ValueError, marshal.loads,
+                          '(\x02\x00\x00\x00\xe9\x01\x00\x00\x00'
+                          'r\x01\x00\x00\x00')
+        # A frozenset can't refer to itself
+        self.assertRaises(ValueError, marshal.loads,
+                          '\xbe\x01\x00\x00\x00r\x00\x00\x00\x00')
+
 LARGE_SIZE = 2**31
 character_size = 4 if sys.maxunicode > 0xFFFF else 2
 pointer_size = 8 if sys.maxsize > 0xFFFFFFFF else 4
@@ -324,6 +376,7 @@ def test_main():
                               ContainerTestCase,
                               ExceptionTestCase,
                               BugsTestCase,
+                              ReferencesTestCase,
                               LargeValuesTestCase,
                              )
 
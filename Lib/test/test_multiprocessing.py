@@ -8,12 +8,14 @@ import time
 import sys
 import os
 import gc
+import itertools
 import signal
 import array
 import socket
 import random
 import logging
 import errno
+import textwrap
 import test.script_helper
 from test import test_support
 from StringIO import StringIO
@@ -31,6 +33,7 @@ import multiprocessing.connection
 import multiprocessing.managers
 import multiprocessing.heap
 import multiprocessing.pool
+import multiprocessing.queues
 
 from multiprocessing import util
 
@@ -590,6 +593,43 @@ class _TestQueue(BaseTestCase):
         q.get()
         self.assertEqual(q.qsize(), 0)
 
+    @classmethod
+    def _test_shared_memory(cls, queue, results):
+        for i in range(5):
+            results.put(queue.get())
+
+    def test_shared_memory(self):
+        if self.TYPE != 'processes':
+            self.skipTest('test not appropriate for {}'.format(self.TYPE))
+
+        queue = self.Queue(shared_memory=1 << 20)
+        results = self.Queue()
+        p = self.Process(target=self._test_shared_memory,
+                         args=(queue, results))
+        p.daemon = True
+        p.start()
+
+        objs = [bytearray('x' * 100000),
+                array.array('d', range(20000)),
+                'y' * 70000,
+                buffer('abc'),
+                (1, bytearray('z' * 200000), [array.array('i', [7] * 30000)])]
+        for obj in objs:
+            queue.put(obj)
+        for obj in objs:
+            if type(obj) is buffer:
+                obj = str(obj)
+            res = results.get()
+            self.assertEqual(type(res), type(obj))
+            self.assertEqual(res, obj)
+        p.join()
+
+        # all the space in the ring has been released
+        ring = queue._ring
+        reserved, released = ring._header.unpack_from(ring._buffer, 0)
+        self.assertEqual(reserved, released)
+        self.assertGreater(reserved, 0)
+
     @classmethod
     def _test_task_done(cls, q):
         for obj in iter(q.get, None):
@@ -1102,6 +1142,11 @@ class _TestContainers(BaseTestCase):
 def sqr(x, wait=0.0):
     time.sleep(wait)
     return x*x
+
+def sqr_or_raise(x):
+    if x == 500:
+        raise ValueError(x)
+    return x*x
 class _TestPool(BaseTestCase):
 
     def test_apply(self):
@@ -1164,6 +1209,61 @@ class _TestPool(BaseTestCase):
         it = self.pool.imap_unordered(sqr, range(1000), chunksize=53)
         self.assertEqual(sorted(it), map(sqr, range(1000)))
 
+    def test_imap_adaptive_chunksize(self):
+        it = self.pool.imap(sqr, range(1000), chunksize=None)
+        self.assertEqual(list(it), map(sqr, range(1000)))
+
+        # The length of an iterator is not known in advance (iterators
+        # cannot be sent to a manager)
+        if self.TYPE != 'manager':
+            it = self.pool.imap(sqr, iter(range(1000)), chunksize=None)
+            self.assertEqual(list(it), map(sqr, range(1000)))
+
+        it = self.pool.imap_unordered(sqr, range(1000), chunksize=None)
+        self.assertEqual(sorted(it), map(sqr, range(1000)))
+
+        it = self.pool.imap(sqr_or_raise, range(1000), chunksize=None)
+        self.assertRaises(ValueError, list, it)
+
+    def test_max_pending(self):
+        self.assertEqual(self.pool.map(sqr, range(100), max_pending=3),
+                         map(sqr, range(100)))
+        it = self.pool.imap(sqr, range(100), chunksize=7, max_pending=2)
+        self.assertEqual(list(it), map(sqr, range(100)))
+        it = self.pool.imap_unordered(sqr, range(100), max_pending=3)
+        self.assertEqual(sorted(it), map(sqr, range(100)))
+        self.assertRaises(ValueError, self.pool.map, sqr, range(10),
+                          max_pending=0)
+
+        # Iterators cannot be sent to a manager
+        if self.TYPE == 'manager':
+            return
+
+        consumed = []
+        def numbers(n):
+            for i in range(n):
+                consumed.append(i)
+                yield i
+
+        it = self.pool.imap(sqr, numbers(100), max_pending=4)
+        self.assertEqual(it.next(), 0)
+        time.sleep(DELTA)
+        self.assertLessEqual(len(consumed), 5)
+        self.assertEqual(list(it), map(sqr, range(1, 100)))
+
+        for chunksize in (None, 1, 9):
+            result = self.pool.map(sqr, numbers(100), chunksize=chunksize,
+                                   max_pending=2)
+            self.assertEqual(result, map(sqr, range(100)))
+        res = self.pool.map_async(sqr, numbers(0), max_pending=2)
+        self.assertEqual(res.get(timeout=TIMEOUT1), [])
+
+        del consumed[:]
+        self.assertRaises(ValueError, self.pool.map, sqr_or_raise,
+                          numbers(1000), chunksize=1, max_pending=2)
+        # The feeding stops once a task has failed
+        self.assertLess(len(consumed), 1000)
+
     def test_make_pool(self):
         self.assertRaises(ValueError, multiprocessing.Pool, -1)
         self.assertRaises(ValueError, multiprocessing.Pool, 0)
@@ -1183,6 +1283,42 @@ class _TestPool(BaseTestCase):
         join()
         self.assertTrue(join.elapsed < 0.2)
 
+    def test_terminate_max_pending(self):
+        # The task handler is waiting for the unconsumed results
+        p = self.Pool(2)
+        it = p.imap(sqr, xrange(10000), max_pending=2)
+        time.sleep(DELTA)
+        p.terminate()
+        join = TimingWrapper(p.join)
+        join()
+        self.assertTrue(join.elapsed < 0.5)
+
+    def test_max_pending_other_jobs(self):
+        # An unconsumed iterator does not hold up the other jobs
+        p = self.Pool(2)
+        try:
+            it = p.imap(sqr, xrange(100), max_pending=2)
+            self.assertEqual(it.next(), 0)
+            res = p.apply_async(sqr, (7,))
+            self.assertEqual(res.get(timeout=5), 49)
+            it2 = p.imap(sqr, xrange(100), max_pending=3)
+            self.assertEqual(list(it2), map(sqr, xrange(100)))
+            self.assertEqual(list(it), map(sqr, xrange(1, 100)))
+        finally:
+            p.terminate()
+            p.join()
+
+    def test_close_max_pending(self):
+        # join() does not wait for the results of a window to be consumed
+        p = self.Pool(2)
+        it = p.imap(sqr, xrange(100), max_pending=2)
+        self.assertEqual(it.next(), 0)
+        del it
+        res = p.map_async(sqr, xrange(1000), chunksize=1, max_pending=2)
+        p.close()
+        p.join()
+        self.assertEqual(res.get(timeout=5), map(sqr, xrange(1000)))
+
     def test_empty_iterable(self):
         # See Issue 12157
         p = self.Pool(1)
@@ -2528,13 +2664,261 @@ class TestIgnoreEINTR(unittest.TestCase):
         finally:
             conn.close()
 
+#
+# Test the chunk sizes chosen by Pool.imap(chunksize=None)
+#
+
+class TestAdaptiveChunker(unittest.TestCase):
+
+    def complete(self, chunker, size, item_time):
+        return chunker.unpack((True, (size * item_time, range(size))))
+
+    def test_unpack(self):
+        chunker = multiprocessing.pool.AdaptiveChunker(4)
+        self.assertEqual(self.complete(chunker, 3, 0.001), (True, [0, 1, 2]))
+        error = (False, ValueError())
+        self.assertIs(chunker.unpack(error), error)
+
+    def test_grows_with_cheap_items(self):
+        chunker = multiprocessing.pool.AdaptiveChunker(4)
+        tasks = chunker.tasks(sqr, itertools.count())
+        sizes = []
+        for i in range(30):
+            func, chunk = next(tasks)
+            sizes.append(len(chunk))
+            self.complete(chunker, len(chunk), 1e-8)
+        self.assertEqual(sizes[:4], [1, 2, 4, 8])
+        self.assertEqual(sizes[-1], chunker.max_chunksize)
+
+    def test_target_duration(self):
+        chunker = multiprocessing.pool.AdaptiveChunker(4)
+        tasks = chunker.tasks(sqr, itertools.count())
+        for i in range(30):
+            func, chunk = next(tasks)
+            self.complete(chunker, len(chunk), 0.001)
+        self.assertEqual(len(next(tasks)[1]), int(chunker.target / 0.001))
+
+        # The chunks shrink as soon as the items become more expensive
+        for i in range(10):
+            func, chunk = next(tasks)
+            self.complete(chunker, len(chunk), 0.1)
+        self.assertEqual(len(next(tasks)[1]), 1)
+
+    def test_shrinks_at_the_tail(self):
+        chunker = multiprocessing.pool.AdaptiveChunker(4, range(1000))
+        sizes = []
+        for func, chunk in chunker.tasks(sqr, range(1000)):
+            sizes.append(len(chunk))
+            self.complete(chunker, len(chunk), 1e-6)
+        self.assertEqual(sum(sizes), 1000)
+        self.assertLessEqual(max(sizes), 1000 // 8 + 1)
+        self.assertEqual(sizes[-8:], [1] * 8)
+
 #
 #
 #
 
+#
+# Test processes started by the fork server
+#
+
+@unittest.skipIf(WIN32, 'fork server not available on Windows')
+class TestForkServer(unittest.TestCase):
+
+    def setUp(self):
+        self.old_method = multiprocessing.get_start_method()
+        try:
+            multiprocessing.set_start_method('forkserver')
+        except ValueError:
+            self.skipTest('fork server not supported')
+
+    def tearDown(self):
+        multiprocessing.set_start_method(self.old_method)
+
+    @classmethod
+    def _test_process(cls, queue, lock, conn, x):
+        with lock:
+            queue.put((x, os.getpid(), multiprocessing.get_start_method()))
+        conn.send(x)
+
+    def test_process(self):
+        queue = multiprocessing.Queue()
+        lock = multiprocessing.Lock()
+        reader, writer = multiprocessing.Pipe(duplex=False)
+        procs = [multiprocessing.Process(target=self._test_process,
+                                         args=(queue, lock, writer, i))
+                 for i in range(3)]
+        for p in procs:
+            p.start()
+        results = sorted(queue.get() for p in procs)
+        self.assertEqual([x for x, pid, method in results], [0, 1, 2])
+        self.assertEqual(sorted(pid for x, pid, method in results),
+                         sorted(p.pid for p in procs))
+        self.assertEqual(set(method for x, pid, method in results),
+                         set(['forkserver']))
+        self.assertEqual(sorted(reader.recv() for p in procs), [0, 1, 2])
+        for p in procs:
+            p.join()
+            self.assertEqual(p.exitcode, 0)
+
+    @classmethod
+    def _test_exitcode(cls, code):
+        sys.exit(code)
+
+    def test_exitcode(self):
+        p = multiprocessing.Process(target=self._test_exitcode, args=(3,))
+        p.start()
+        p.join()
+        self.assertEqual(p.exitcode, 3)
+
+        p = multiprocessing.Process(target=time.sleep, args=(10,))
+        p.start()
+        self.assertTrue(p.is_alive())
+        p.join(0.1)
+        self.assertIsNone(p.exitcode)
+        p.terminate()
+        p.join()
+        self.assertEqual(p.exitcode, -signal.SIGTERM)
+
+    def test_pool(self):
+        pool = multiprocessing.Pool(2)
+        try:
+            self.assertEqual(pool.map(sqr, range(10)), map(sqr, range(10)))
+        finally:
+            pool.close()
+            pool.join()
+
+    def test_inherited_lock(self):
+        multiprocessing.set_start_method('fork')
+        lock = multiprocessing.Lock()
+        multiprocessing.set_start_method('forkserver')
+        p = multiprocessing.Process(target=self._test_process,
+                                    args=(None, lock, None, 0))
+        self.assertRaises(RuntimeError, p.start)
+
+    def test_set_start_method(self):
+        self.assertRaises(ValueError, multiprocessing.set_start_method, 'x')
+        self.assertRaises(TypeError, multiprocessing.set_forkserver_preload,
+                          [sys])
+
+    def test_passed_fds(self):
+        # The fds passed to a child do not replace the fds of the fork
+        # server which have the same numbers in the parent
+        import subprocess
+        import shutil
+        import tempfile
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        with open(os.path.join(tmpdir, 'fsmod.py'), 'w') as f:
+            f.write(textwrap.dedent('''
+                import os
+                fd = os.open(__file__, os.O_RDONLY)
+                os.dup2(fd, 100)
+                os.close(fd)
+                def child(conn):
+                    conn.send(os.read(100, 6))
+                '''))
+        cmd = textwrap.dedent('''
+            import multiprocessing, os, sys
+            import _multiprocessing
+            sys.path.insert(0, %r)
+            import fsmod
+            multiprocessing.set_start_method('forkserver')
+            multiprocessing.set_forkserver_preload(['fsmod'])
+            multiprocessing.forkserver.ensure_running()
+            reader, writer = multiprocessing.Pipe(duplex=False)
+            os.dup2(writer.fileno(), 100)
+            writer.close()
+            writer = _multiprocessing.Connection(100, readable=False)
+            p = multiprocessing.Process(target=fsmod.child, args=(writer,))
+            p.start()
+            if reader.poll(10):
+                sys.stdout.write(reader.recv())
+            p.join()
+            ''') % tmpdir
+        p = subprocess.Popen([sys.executable, '-E', '-c', cmd],
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        out, err = p.communicate()
+        self.assertEqual(out, '\nimpor', err)
+
+    def check_semaphore_unlinked(self, exit, leaked):
+        import subprocess
+        import _multiprocessing
+        cmd = textwrap.dedent('''
+            import multiprocessing, os, sys
+            multiprocessing.set_start_method('forkserver')
+            lock = multiprocessing.Lock()
+            sys.stdout.write(lock._semlock.name + '\\n')
+            sys.stdout.flush()
+            %s
+            ''') % exit
+        p = subprocess.Popen([sys.executable, '-E', '-c', cmd],
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        # The semaphore tracker shares stderr, so this waits for it to exit
+        out, err = p.communicate()
+        name = out.strip()
+        self.assertTrue(name)
+        with self.assertRaises(OSError) as cm:
+            _multiprocessing.SemLock._rebuild(0, multiprocessing.
+                                              synchronize.RECURSIVE_MUTEX,
+                                              1, name)
+        self.assertEqual(cm.exception.errno, errno.ENOENT)
+        self.assertEqual('leaked semaphores' in err, leaked, err)
+
+    def test_semaphore_unlinked(self):
+        self.check_semaphore_unlinked('', False)
+
+    def test_semaphore_tracker(self):
+        # The semaphore is unlinked even if its creator doesn't run its
+        # finalizers
+        self.check_semaphore_unlinked('os._exit(0)', True)
+
+#
+# Test the space management of the ring buffer used by
+# Queue(shared_memory=...)
+#
+
+class TestRingBuffer(unittest.TestCase):
+
+    def setUp(self):
+        self.ring = multiprocessing.queues.RingBuffer(1)
+        self.size = self.ring._size
+
+    def test_read_write(self):
+        start = self.ring.write(bytearray('abc'))
+        self.assertEqual(start, 0)
+        self.assertEqual(str(self.ring.read(start, 3)), 'abc')
+        self.assertEqual(self.ring.write('defg'), 3)
+        self.assertEqual(str(self.ring.read(3, 4)), 'defg')
+
+    def test_full(self):
+        self.assertIsNone(self.ring.reserve(self.size + 1))
+        self.assertEqual(self.ring.reserve(self.size - 10), 0)
+        self.assertIsNone(self.ring.reserve(20))
+        self.ring.release(self.size - 10)
+        # the reservation does not fit before the end of the ring, so it
+        # starts at the beginning
+        self.assertEqual(self.ring.reserve(20), self.size)
+
+    def test_release_in_order(self):
+        half = self.size // 2
+        self.assertEqual(self.ring.reserve(half), 0)
+        self.assertEqual(self.ring.reserve(half), half)
+        self.assertIsNone(self.ring.reserve(1))
+        self.ring.release(half)
+        self.assertEqual(self.ring.reserve(half), 2 * half)
+
+    def test_fallback(self):
+        # objects which do not fit are pickled normally
+        ring = self.ring
+        obj = (bytearray(self.size + 1), buffer('a' * (self.size + 1)))
+        self.assertEqual(ring.loads(ring.dumps(obj)), (obj[0], str(obj[1])))
+        self.assertEqual(ring._header.unpack_from(ring._buffer, 0), (0, 0))
+
 testcases_other = [OtherTest, TestInvalidHandle, TestInitializers,
                    TestStdinBadfiledescriptor, TestTimeouts, TestNoForkBomb,
-                   TestFlags, TestForkAwareThreadLock, TestIgnoreEINTR]
+                   TestFlags, TestForkAwareThreadLock, TestIgnoreEINTR,
+                   TestAdaptiveChunker, TestRingBuffer, TestForkServer]
 
 #
 #
@@ -488,6 +488,151 @@ class WalkTests(unittest.TestCase):
                     os.remove(dirname)
         os.rmdir(test_support.TESTFN)
 
+class ScandirTests(unittest.TestCase):
+    """Tests for os.scandir()."""
+
+    scandir = staticmethod(os.scandir)
+
+    def setUp(self):
+        self.path = os.path.realpath(test_support.TESTFN)
+        os.mkdir(self.path)
+        self.addCleanup(test_support.rmtree, self.path)
+
+    def create_file(self, name="file.txt"):
+        filename = os.path.join(self.path, name)
+        with open(filename, "wb") as f:
+            f.write("python")
+        return filename
+
+    def get_entries(self, names):
+        entries = dict((entry.name, entry)
+                       for entry in self.scandir(self.path))
+        self.assertEqual(sorted(entries), sorted(names))
+        return entries
+
+    def check_entry(self, entry, name, is_dir, is_file, is_symlink):
+        self.assertEqual(entry.name, name)
+        self.assertEqual(entry.path, os.path.join(self.path, name))
+        self.assertEqual(entry.inode(), os.lstat(entry.path).st_ino)
+
+        self.assertEqual(entry.is_dir(), is_dir)
+        self.assertEqual(entry.is_file(), is_file)
+        self.assertEqual(entry.is_symlink(), is_symlink)
+        self.assertEqual(entry.is_dir(follow_symlinks=False),
+                         is_dir and not is_symlink)
+        self.assertEqual(entry.is_file(follow_symlinks=False),
+                         is_file and not is_symlink)
+
+        entry_stat = entry.stat()
+        self.assertEqual(entry_stat.st_ino, os.stat(entry.path).st_ino)
+        entry_lstat = entry.stat(follow_symlinks=False)
+        self.assertEqual(entry_lstat.st_ino, os.lstat(entry.path).st_ino)
+
+    def test_attributes(self):
+        os.mkdir(os.path.join(self.path, "dir"))
+        self.create_file("file.txt")
+        entries = self.get_entries(["dir", "file.txt"])
+        self.check_entry(entries["dir"], "dir", True, False, False)
+        self.check_entry(entries["file.txt"], "file.txt", False, True, False)
+
+    @unittest.skipUnless(hasattr(os, "symlink"), "test needs os.symlink()")
+    def test_symlinks(self):
+        os.mkdir(os.path.join(self.path, "dir"))
+        filename = self.create_file("file.txt")
+        os.symlink(os.path.join(self.path, "dir"),
+                   os.path.join(self.path, "link_to_dir"))
+        os.symlink(filename, os.path.join(self.path, "link_to_file"))
+        entries = self.get_entries(["dir", "file.txt",
+                                    "link_to_dir", "link_to_file"])
+        self.check_entry(entries["link_to_dir"], "link_to_dir",
+                         True, False, True)
+        self.check_entry(entries["link_to_file"], "link_to_file",
+                         False, True, True)
+
+    @unittest.skipUnless(hasattr(os, "symlink"), "test needs os.symlink()")
+    def test_broken_symlink(self):
+        os.symlink(os.path.join(self.path, "missing"),
+                   os.path.join(self.path, "broken"))
+        entry = self.get_entries(["broken"])["broken"]
+        self.assertFalse(entry.is_dir())
+        self.assertFalse(entry.is_file())
+        self.assertTrue(entry.is_symlink())
+        self.assertRaises(OSError, entry.stat)
+        # The entry itself can be stat()ed without following the link.
+        entry.stat(follow_symlinks=False)
+
+    def test_removed_entry(self):
+        self.create_file("file.txt")
+        entry = self.get_entries(["file.txt"])["file.txt"]
+        os.unlink(entry.path)
+        self.assertFalse(entry.is_dir())
+        self.assertFalse(entry.is_symlink())
+        self.assertRaises(OSError, entry.stat)
+
+    def test_stat_cached(self):
+        filename = self.create_file("file.txt")
+        entry = self.get_entries(["file.txt"])["file.txt"]
+        size = entry.stat().st_size
+        with open(filename, "ab") as f:
+            f.write("more data")
+        # The result of the first call is kept by the entry.
+        self.assertEqual(entry.stat().st_size, size)
+        self.assertNotEqual(os.stat(filename).st_size, size)
+
+    def test_repr(self):
+        self.create_file("file.txt")
+        entry = self.get_entries(["file.txt"])["file.txt"]
+        self.assertEqual(repr(entry), "<DirEntry 'file.txt'>")
+
+    def test_unicode_path(self):
+        self.create_file("file.txt")
+        entries = list(self.scandir(unicode(self.path)))
+        self.assertEqual(len(entries), 1)
+        self.assertIsInstance(entries[0].name, unicode)
+        self.assertIsInstance(entries[0].path, unicode)
+        self.assertEqual(entries[0].name, u"file.txt")
+
+    def test_default_path(self):
+        self.create_file("file.txt")
+        old_cwd = os.getcwd()
+        os.chdir(self.path)
+        try:
+            names = [entry.name for entry in self.scandir()]
+        finally:
+            os.chdir(old_cwd)
+        self.assertEqual(names, ["file.txt"])
+
+    def test_empty_directory(self):
+        self.assertEqual(list(self.scandir(self.path)), [])
+
+    def test_not_found(self):
+        missing = os.path.join(self.path, "missing")
+        with self.assertRaises(OSError) as cm:
+            self.scandir(missing)
+        self.assertEqual(cm.exception.errno, errno.ENOENT)
+        self.assertEqual(cm.exception.filename, missing)
+
+    def test_close(self):
+        self.create_file("file.txt")
+        self.create_file("file2.txt")
+        iterator = self.scandir(self.path)
+        next(iterator)
+        iterator.close()
+        self.assertRaises(StopIteration, next, iterator)
+        # close() can be called more than once.
+        iterator.close()
+
+    def test_context_manager(self):
+        self.create_file("file.txt")
+        with self.scandir(self.path) as iterator:
+            next(iterator)
+        self.assertRaises(StopIteration, next, iterator)
+
+class PythonScandirTests(ScandirTests):
+    """Tests for the scandir() used where posixmodule lacks one."""
+
+    scandir = staticmethod(os._scandir_python)
+
 class MakedirTests (unittest.TestCase):
     def setUp(self):
         os.mkdir(test_support.TESTFN)
@@ -871,6 +1016,121 @@ class Win32KillTests(unittest.TestCase):
         self._kill_with_event(signal.CTRL_BREAK_EVENT, "CTRL_BREAK_EVENT")
 
 
+@unittest.skipUnless(hasattr(os, 'sendfile'), 'test needs os.sendfile()')
+class SendfileTests(unittest.TestCase):
+    DATA = 'abcdefghijklmnopq' * 256
+
+    def setUp(self):
+        import socket
+        with open(test_support.TESTFN, 'wb') as f:
+            f.write(self.DATA)
+        self.addCleanup(test_support.unlink, test_support.TESTFN)
+        self.f = open(test_support.TESTFN, 'rb')
+        self.addCleanup(self.f.close)
+        self.server, self.client = socket.socketpair()
+        self.addCleanup(self.server.close)
+        self.addCleanup(self.client.close)
+
+    def sendfile(self, offset, count):
+        return os.sendfile(self.server.fileno(), self.f.fileno(),
+                           offset, count)
+
+    def recv(self, size):
+        data = ''
+        while len(data) < size:
+            data += self.client.recv(size - len(data))
+        return data
+
+    def test_send_whole_file(self):
+        sent = self.sendfile(0, len(self.DATA))
+        self.assertEqual(sent, len(self.DATA))
+        self.assertEqual(self.recv(sent), self.DATA)
+        # The file position is not changed when an offset is given.
+        self.assertEqual(os.lseek(self.f.fileno(), 0, 1), 0)
+
+    def test_offset_and_count(self):
+        sent = self.sendfile(100, 1000)
+        self.assertEqual(sent, 1000)
+        self.assertEqual(self.recv(sent), self.DATA[100:1100])
+
+    def test_eof(self):
+        sent = self.sendfile(len(self.DATA) - 5, 100)
+        self.assertEqual(sent, 5)
+        self.assertEqual(self.recv(sent), self.DATA[-5:])
+        self.assertEqual(self.sendfile(len(self.DATA), 100), 0)
+        self.assertEqual(self.sendfile(0, 0), 0)
+
+    @unittest.skipUnless(sys.platform.startswith('linux'),
+                         'offset None is only supported on Linux')
+    def test_offset_none(self):
+        os.lseek(self.f.fileno(), 10, 0)
+        sent = self.sendfile(None, 20)
+        self.assertEqual(sent, 20)
+        self.assertEqual(self.recv(sent), self.DATA[10:30])
+        self.assertEqual(os.lseek(self.f.fileno(), 0, 1), 30)
+
+    def test_invalid_arguments(self):
+        self.assertRaises(ValueError, self.sendfile, -1, 10)
+        self.assertRaises(ValueError, self.sendfile, 0, -1)
+        self.assertRaises(TypeError, self.sendfile, 'a', 10)
+        self.assertRaises(OSError, os.sendfile, self.server.fileno(),
+                          test_support.make_bad_fd(), 0, 10)
+
+
+@unittest.skipUnless(hasattr(os, 'copy_file_range'),
+                     'test needs os.copy_file_range()')
+class CopyFileRangeTests(unittest.TestCase):
+    DATA = 'abcdefghijklmnopq' * 256
+
+    def setUp(self):
+        with open(test_support.TESTFN, 'wb') as f:
+            f.write(self.DATA)
+        self.addCleanup(test_support.unlink, test_support.TESTFN)
+        self.addCleanup(test_support.unlink, test_support.TESTFN + '2')
+        self.src = os.open(test_support.TESTFN, os.O_RDONLY)
+        self.addCleanup(os.close, self.src)
+        self.dst = os.open(test_support.TESTFN + '2',
+                           os.O_RDWR | os.O_CREAT | os.O_TRUNC)
+        self.addCleanup(os.close, self.dst)
+
+    def copy_file_range(self, *args):
+        try:
+            return os.copy_file_range(self.src, self.dst, *args)
+        except OSError as e:
+            if e.errno == errno.ENOSYS:
+                self.skipTest('copy_file_range() not supported')
+            raise
+
+    def read_dst(self):
+        os.lseek(self.dst, 0, 0)
+        return os.read(self.dst, len(self.DATA) * 2)
+
+    def test_copy(self):
+        copied = 0
+        while copied < len(self.DATA):
+            n = self.copy_file_range(len(self.DATA))
+            self.assertGreater(n, 0)
+            copied += n
+        self.assertEqual(self.copy_file_range(10), 0)
+        self.assertEqual(os.lseek(self.src, 0, 1), len(self.DATA))
+        self.assertEqual(self.read_dst(), self.DATA)
+
+    def test_offsets(self):
+        n = self.copy_file_range(20, 10, 5)
+        self.assertEqual(n, 20)
+        # The file positions are not changed when offsets are given.
+        self.assertEqual(os.lseek(self.src, 0, 1), 0)
+        self.assertEqual(os.lseek(self.dst, 0, 1), 0)
+        self.assertEqual(self.read_dst(), '\0' * 5 + self.DATA[10:30])
+
+    def test_invalid_arguments(self):
+        self.assertRaises(ValueError, self.copy_file_range, -1)
+        self.assertRaises(ValueError, self.copy_file_range, 10, -1)
+        self.assertRaises(ValueError, self.copy_file_range, 10, None, -1)
+        self.assertRaises(OSError, os.copy_file_range,
+                          test_support.make_bad_fd(), self.dst, 10)
+
+
 def test_main():
     test_support.run_unittest(
         FileTests,
@@ -878,6 +1138,8 @@ def test_main():
         StatAttributeTests,
         EnvironTests,
         WalkTests,
+        ScandirTests,
+        PythonScandirTests,
         MakedirTests,
         DevNullTests,
         URandomTests,
@@ -885,7 +1147,9 @@ def test_main():
         Win32ErrorTests,
         TestInvalidFD,
         PosixUidGidTests,
-        Win32KillTests
+        Win32KillTests,
+        SendfileTests,
+        CopyFileRangeTests
     )
 
 if __name__ == "__main__":
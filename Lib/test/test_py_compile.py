@@ -1,4 +1,5 @@
 import imp
+import marshal
 import os
 import py_compile
 import shutil
@@ -47,6 +48,19 @@ class PyCompileTests(unittest.TestCase):
                            os.path.relpath(self.pyc_path))
         self.assertTrue(os.path.exists(self.pyc_path))
 
+    def test_marshal_version(self):
+        # Like the import machinery, py_compile writes marshal version 3,
+        # in which the code objects of a module share their filename
+        with open(self.source_path, 'w') as file:
+            file.write('def f(): pass\ndef g(): pass\n')
+        py_compile.compile(self.source_path, self.pyc_path)
+        with open(self.pyc_path, 'rb') as file:
+            self.assertEqual(file.read(4), imp.get_magic())
+            file.read(4)
+            co = marshal.load(file)
+        f, g = [c for c in co.co_consts if hasattr(c, 'co_code')]
+        self.assertIs(f.co_filename, g.co_filename)
+
 def test_main():
     test_support.run_unittest(PyCompileTests)
 
@@ -1058,6 +1058,51 @@ subpattern None
         self.assertEqual(re.match("(foo)", "foo").group(1L), "foo")
         self.assertRaises(IndexError, re.match("", "").group, sys.maxint + 1)
 
+    def test_cache_info(self):
+        re.purge()
+        self.addCleanup(re.purge)
+        info = re.cache_info()
+        self.assertEqual(info, (0, 0, 0, re._MAXCACHE, 0))
+        re.match('cache_info_a', '')
+        re.match('cache_info_a', '')
+        re.match('cache_info_b', '')
+        info = re.cache_info()
+        self.assertEqual(info.hits, 1)
+        self.assertEqual(info.misses, 2)
+        self.assertEqual(info.evictions, 0)
+        self.assertEqual(info.currsize, 2)
+
+    def test_cache_lru(self):
+        re.purge()
+        self.addCleanup(re.set_cache_size, re._MAXCACHE)
+        self.addCleanup(re.purge)
+        re.set_cache_size(3)
+        p1 = re.compile('lru1')
+        p2 = re.compile('lru2')
+        re.compile('lru3')
+        # Touch p1 so that p2 becomes the least recently used pattern.
+        self.assertIs(re.compile('lru1'), p1)
+        re.compile('lru4')
+        info = re.cache_info()
+        self.assertEqual(info.currsize, 3)
+        self.assertEqual(info.evictions, 1)
+        self.assertIs(re.compile('lru1'), p1)
+        self.assertIsNot(re.compile('lru2'), p2)
+
+    def test_set_cache_size(self):
+        re.purge()
+        self.addCleanup(re.set_cache_size, re._MAXCACHE)
+        self.addCleanup(re.purge)
+        for i in range(5):
+            re.compile('size%d' % i)
+        re.set_cache_size(2)
+        self.assertEqual(re.cache_info().currsize, 2)
+        self.assertEqual(re.cache_info().maxsize, 2)
+        re.set_cache_size(0)
+        re.compile('size0')
+        self.assertEqual(re.cache_info().currsize, 0)
+        self.assertRaises(ValueError, re.set_cache_size, -1)
+
     def test_locale_caching(self):
         # Issue #22410
         oldlocale = locale.setlocale(locale.LC_CTYPE)
@@ -101,6 +101,61 @@ class TestCase(unittest.TestCase):
         p2 = d['key']
         self.assertNotEqual(p1, p2)  # Write creates new object in store
 
+    def test_writeback_only_changed_entries(self):
+        class CountingDict(dict):
+            writes = 0
+            def __setitem__(self, key, value):
+                self.writes += 1
+                dict.__setitem__(self, key, value)
+        d = CountingDict()
+        s = shelve.Shelf(d, protocol=2)
+        for i in range(10):
+            s[str(i)] = [i]
+        s.close()
+        d.writes = 0
+        s = shelve.Shelf(d, protocol=2, writeback=True)
+        for i in range(10):
+            s[str(i)]
+        s['3'].append(4)
+        s.sync()
+        self.assertEqual(d.writes, 1)
+        s.close()
+        s = shelve.Shelf(d, protocol=2)
+        self.assertEqual(s['3'], [3, 4])
+        self.assertEqual(s['4'], [4])
+
+    def test_cachesize(self):
+        d = {}
+        s = shelve.Shelf(d, protocol=2, writeback=True, cachesize=3)
+        for i in range(10):
+            s[str(i)] = [i]
+        self.assertEqual(list(s.cache), ['7', '8', '9'])
+        s['0'].append(0)
+        s['7']
+        self.assertEqual(list(s.cache), ['9', '0', '7'])
+        # Evicted entries are written back
+        for i in range(1, 4):
+            s[str(i)]
+        self.assertEqual(list(s.cache), ['1', '2', '3'])
+        self.assertEqual(shelve.Shelf(d)['0'], [0, 0])
+        s['2'].append(2)
+        s.close()
+        self.assertEqual(shelve.Shelf(d)['2'], [2, 2])
+        self.assertRaises(ValueError, shelve.Shelf, {}, cachesize=0)
+
+    def test_update_get_many(self):
+        for writeback in (False, True):
+            d = {}
+            s = shelve.Shelf(d, protocol=2, writeback=writeback)
+            s.update({'a': [1]}, b=(2,))
+            s.update([('c', 3)])
+            self.assertEqual(sorted(d), ['a', 'b', 'c'])
+            self.assertEqual(s.get_many(['c', 'x', 'a'], 0), [3, 0, [1]])
+            s.get_many(['a'])[0].append(2)
+            s.close()
+            self.assertEqual(shelve.Shelf(d)['a'],
+                             [1, 2] if writeback else [1])
+
 
 from test import mapping_tests
 
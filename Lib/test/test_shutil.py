@@ -309,6 +309,23 @@ class TestShutil(unittest.TestCase):
             finally:
                 shutil.rmtree(TESTFN, ignore_errors=True)
 
+        def test_rmtree_with_symlink_in_tree(self):
+            # Symlinks to directories are removed, not followed.
+            os.mkdir(TESTFN)
+            try:
+                outside = os.path.join(TESTFN, 'outside')
+                tree = os.path.join(TESTFN, 'tree')
+                os.mkdir(outside)
+                self.write_file((outside, 'keep'), 'keep me')
+                os.makedirs(os.path.join(tree, 'sub'))
+                self.write_file((tree, 'sub', 'file'), 'remove me')
+                os.symlink(outside, os.path.join(tree, 'link'))
+                shutil.rmtree(tree)
+                self.assertFalse(os.path.lexists(tree))
+                self.assertEqual(os.listdir(outside), ['keep'])
+            finally:
+                shutil.rmtree(TESTFN, ignore_errors=True)
+
     # Issue #3002: copyfile and copytree block indefinitely on named pipes
     @unittest.skipUnless(hasattr(os, "mkfifo"), 'requires os.mkfifo()')
     def test_copyfile_named_pipe(self):
@@ -371,6 +388,143 @@ class TestShutil(unittest.TestCase):
         finally:
             os.chflags = old_chflags
 
+    def _check_copyfile(self, size=3 * 1024 * 1024 + 17):
+        tmpdir = self.mkdtemp()
+        src = os.path.join(tmpdir, 'src')
+        dst = os.path.join(tmpdir, 'dst')
+        data = os.urandom(size)
+        with open(src, 'wb') as f:
+            f.write(data)
+        shutil.copyfile(src, dst)
+        with open(dst, 'rb') as f:
+            self.assertEqual(f.read(), data)
+
+    def test_copyfile_large(self):
+        self._check_copyfile()
+        self._check_copyfile(0)
+        self._check_copyfile(1)
+
+    def test_copyfile_user_space(self):
+        with test_support.swap_attr(shutil, '_USE_CP_COPY_FILE_RANGE', False):
+            with test_support.swap_attr(shutil, '_USE_CP_SENDFILE', False):
+                self._check_copyfile()
+                self._check_copyfile(shutil.COPY_BUFSIZE)
+                self._check_copyfile(shutil.COPY_BUFSIZE - 1)
+
+    @unittest.skipUnless(shutil._USE_CP_COPY_FILE_RANGE or
+                         shutil._USE_CP_SENDFILE, 'requires in-kernel copies')
+    def test_copyfile_kernel_copy_fails(self):
+        # The copy falls back to the next method if nothing was copied.
+        def fail(*args):
+            raise OSError(errno.EXDEV, os.strerror(errno.EXDEV))
+        for name in 'copy_file_range', 'sendfile':
+            if hasattr(os, name):
+                with test_support.swap_attr(os, name, fail):
+                    self._check_copyfile()
+        with test_support.swap_attr(os, 'copy_file_range', fail):
+            with test_support.swap_attr(os, 'sendfile', fail):
+                self._check_copyfile()
+        self.assertTrue(shutil._USE_CP_COPY_FILE_RANGE or
+                        shutil._USE_CP_SENDFILE)
+
+    @unittest.skipUnless(shutil._USE_CP_COPY_FILE_RANGE or
+                         shutil._USE_CP_SENDFILE, 'requires in-kernel copies')
+    def test_copyfile_kernel_copy_partial_failure(self):
+        # An error after a part of the file has been copied is raised.
+        calls = []
+        def copy(infd, outfd, count):
+            calls.append(count)
+            if len(calls) > 1:
+                raise OSError(errno.EIO, os.strerror(errno.EIO))
+            return os.write(outfd, os.read(infd, 10))
+        tmpdir = self.mkdtemp()
+        src = os.path.join(tmpdir, 'src')
+        self.write_file(src, 'x' * 100)
+        with test_support.swap_attr(shutil, '_copy_file_range', copy):
+            with test_support.swap_attr(shutil, '_sendfile', copy):
+                with self.assertRaises(OSError) as cm:
+                    shutil.copyfile(src, os.path.join(tmpdir, 'dst'))
+        self.assertEqual(cm.exception.errno, errno.EIO)
+        self.assertEqual(cm.exception.filename, src)
+        self.assertEqual(len(calls), 2)
+
+    def _make_tree(self):
+        src_dir = os.path.join(self.mkdtemp(), 'src')
+        os.mkdir(src_dir)
+        for i in range(5):
+            subdir = os.path.join(src_dir, 'dir%d' % i)
+            os.mkdir(subdir)
+            os.mkdir(os.path.join(subdir, 'empty'))
+            for j in range(10):
+                self.write_file((subdir, 'file%d' % j), 'data %d %d' % (i, j))
+        self.write_file((src_dir, 'top'), 'top')
+        return src_dir
+
+    def _tree_contents(self, top):
+        result = {}
+        for dirpath, dirnames, filenames in os.walk(top):
+            relpath = os.path.relpath(dirpath, top)
+            result[relpath] = None
+            for name in filenames:
+                with open(os.path.join(dirpath, name)) as f:
+                    result[os.path.join(relpath, name)] = f.read()
+        return result
+
+    def test_copytree_workers(self):
+        src_dir = self._make_tree()
+        dst_dir = os.path.join(self.mkdtemp(), 'dst')
+        os.utime(os.path.join(src_dir, 'dir3'), (1000000000, 1000000000))
+        shutil.copytree(src_dir, dst_dir, workers=4)
+        self.assertEqual(self._tree_contents(dst_dir),
+                         self._tree_contents(src_dir))
+        # Times of directories are copied after their files.
+        self.assertEqual(os.stat(os.path.join(dst_dir, 'dir3')).st_mtime,
+                         1000000000)
+
+    def test_copytree_workers_with_exclude(self):
+        src_dir = self._make_tree()
+        dst_dir = os.path.join(self.mkdtemp(), 'dst')
+        shutil.copytree(src_dir, dst_dir, workers=3,
+                        ignore=shutil.ignore_patterns('file[0-4]', 'dir2'))
+        self.assertFalse(os.path.exists(os.path.join(dst_dir, 'dir2')))
+        self.assertEqual(sorted(os.listdir(os.path.join(dst_dir, 'dir0'))),
+                         ['empty', 'file5', 'file6', 'file7', 'file8',
+                          'file9'])
+
+    @unittest.skipUnless(hasattr(os, "mkfifo"), 'requires os.mkfifo()')
+    def test_copytree_workers_errors(self):
+        src_dir = self._make_tree()
+        dst_dir = os.path.join(self.mkdtemp(), 'dst')
+        pipes = []
+        for i in range(3):
+            pipe = os.path.join(src_dir, 'dir%d' % i, 'pipe')
+            os.mkfifo(pipe)
+            pipes.append(pipe)
+        with self.assertRaises(shutil.Error) as cm:
+            shutil.copytree(src_dir, dst_dir, workers=4)
+        errors = sorted(cm.exception.args[0])
+        self.assertEqual([src for src, dst, msg in errors], pipes)
+        for src, dst, msg in errors:
+            self.assertEqual(msg, "`%s` is a named pipe" % src)
+        # The other files were copied.
+        self.assertEqual(open(os.path.join(dst_dir, 'dir4', 'file9')).read(),
+                         'data 4 9')
+
+    def test_copytree_workers_unexpected_errors(self):
+        # Errors other than EnvironmentError don't stop the workers, which
+        # would leave the walk blocked on the queue of files.
+        src_dir = self._make_tree()
+        dst_dir = os.path.join(self.mkdtemp(), 'dst')
+        def copy2(src, dst):
+            raise ValueError('cannot copy %s' % src)
+        with test_support.swap_attr(shutil, 'copy2', copy2):
+            with self.assertRaises(shutil.Error) as cm:
+                shutil.copytree(src_dir, dst_dir, workers=2)
+        errors = cm.exception.args[0]
+        self.assertEqual(len(errors), 51)
+        for src, dst, msg in errors:
+            self.assertEqual(msg, 'cannot copy %s' % src)
+
     @unittest.skipUnless(zlib, "requires zlib")
     def test_make_tarball(self):
         # creating something to tar
@@ -10,7 +10,9 @@ import traceback
 import Queue
 import sys
 import os
+import stat
 import array
+import StringIO
 import contextlib
 import signal
 import math
@@ -769,6 +771,21 @@ class GeneralModuleTests(unittest.TestCase):
         finally:
             s.close()
 
+    def test_sendfile_invalid_args(self):
+        f = StringIO.StringIO('data')
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.addCleanup(sock.close)
+        self.assertRaises(ValueError, sock.sendfile, f)
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.addCleanup(sock.close)
+        self.assertRaises(TypeError, sock.sendfile, f, count='2')
+        self.assertRaises(ValueError, sock.sendfile, f, count=0)
+        self.assertRaises(ValueError, sock.sendfile, f, count=-1)
+        sock.setblocking(False)
+        self.assertRaises(ValueError, sock.sendfile, f)
+        with open(__file__, 'rb') as f:
+            self.assertRaises(ValueError, sock.sendfile, f)
+
 
 @unittest.skipUnless(thread, 'Threading required for this test.')
 class BasicTCPTest(SocketConnectedTest):
@@ -875,6 +892,151 @@ class BasicTCPTest(SocketConnectedTest):
                           2 + (_testcapi.UINT_MAX + 1))
         self.serv_conn.shutdown(2)
 
+@unittest.skipUnless(thread, 'Threading required for this test.')
+class SendfileTest(SocketConnectedTest):
+    # A pattern whose length is not a power of two, so that data sent
+    # from a wrong offset does not compare equal.
+    DATA = 'abcdefghijklmnopq' * 100000
+
+    @classmethod
+    def setUpClass(cls):
+        with open(test_support.TESTFN, 'wb') as f:
+            f.write(cls.DATA)
+
+    @classmethod
+    def tearDownClass(cls):
+        test_support.unlink(test_support.TESTFN)
+
+    def recv_data(self):
+        chunks = []
+        while True:
+            data = self.cli_conn.recv(65536)
+            if not data:
+                break
+            chunks.append(data)
+        return ''.join(chunks)
+
+    def sendfile(self, *args, **kwargs):
+        calls = []
+        def sendfile(*args):
+            calls.append(args)
+            return real_sendfile(*args)
+        real_sendfile = getattr(os, 'sendfile', None)
+        if real_sendfile is None:
+            self.calls = None
+            return self.serv_conn.sendfile(*args, **kwargs)
+        with test_support.swap_attr(os, 'sendfile', sendfile):
+            sent = self.serv_conn.sendfile(*args, **kwargs)
+        self.calls = calls
+        return sent
+
+    def testRegularFile(self):
+        self.assertEqual(self.recv_data(), self.DATA)
+
+    def _testRegularFile(self):
+        with open(test_support.TESTFN, 'rb') as f:
+            sent = self.sendfile(f)
+            self.assertEqual(sent, len(self.DATA))
+            self.assertEqual(f.tell(), len(self.DATA))
+        if self.calls is not None:
+            self.assertTrue(self.calls)
+        self.serv_conn.close()
+
+    def testOffsetAndCount(self):
+        self.assertEqual(self.recv_data(), self.DATA[5000:1005000])
+
+    def _testOffsetAndCount(self):
+        with open(test_support.TESTFN, 'rb') as f:
+            sent = self.sendfile(f, 5000, 1000000)
+            self.assertEqual(sent, 1000000)
+            self.assertEqual(f.tell(), 1005000)
+        self.serv_conn.close()
+
+    def testCountPastEOF(self):
+        self.assertEqual(self.recv_data(), self.DATA[-10:])
+
+    def _testCountPastEOF(self):
+        with open(test_support.TESTFN, 'rb') as f:
+            sent = self.sendfile(f, len(self.DATA) - 10, 100)
+            self.assertEqual(sent, 10)
+            self.assertEqual(f.tell(), len(self.DATA))
+            self.assertEqual(self.sendfile(f, len(self.DATA)), 0)
+        self.serv_conn.close()
+
+    def testTimeout(self):
+        # The socket is non-blocking at the system level: os.sendfile()
+        # fails with EAGAIN whenever the send buffer is full.
+        time.sleep(0.1)
+        self.assertEqual(self.recv_data(), self.DATA)
+
+    def _testTimeout(self):
+        self.serv_conn.settimeout(10)
+        with open(test_support.TESTFN, 'rb') as f:
+            self.assertEqual(self.sendfile(f), len(self.DATA))
+        self.serv_conn.close()
+
+    def testNonRegularFile(self):
+        self.assertEqual(self.recv_data(), self.DATA[3:])
+
+    def _testNonRegularFile(self):
+        f = StringIO.StringIO(self.DATA)
+        sent = self.sendfile(f, 3)
+        self.assertEqual(sent, len(self.DATA) - 3)
+        self.assertEqual(f.tell(), len(self.DATA))
+        if self.calls is not None:
+            self.assertEqual(self.calls, [])
+        self.serv_conn.close()
+
+    def testZeroSize(self):
+        self.assertEqual(self.recv_data(), self.DATA * 2)
+
+    def _testZeroSize(self):
+        # Files of pseudo file systems (/proc...) report a size of 0, but
+        # are sent in full.
+        import shutil
+        real_fstat = os.fstat
+        def fstat(fd):
+            st = list(real_fstat(fd))
+            st[stat.ST_SIZE] = 0
+            return os.stat_result(st)
+        with test_support.swap_attr(os, 'fstat', fstat):
+            with open(test_support.TESTFN, 'rb') as f:
+                self.assertEqual(self.sendfile(f), len(self.DATA))
+                self.assertEqual(f.tell(), len(self.DATA))
+            fileobj = self.serv_conn.makefile('wb')
+            with open(test_support.TESTFN, 'rb') as f:
+                shutil.copyfileobj(f, fileobj)
+            fileobj.close()
+        self.serv_conn.close()
+
+    def testFileObject(self):
+        self.assertEqual(self.recv_data(), 'header' + self.DATA[100:])
+
+    def _testFileObject(self):
+        # shutil.copyfileobj() sends regular files to the socket of a
+        # socket file object, after what has been written to it.
+        import shutil
+        fileobj = self.serv_conn.makefile('wb')
+        fileobj.write('header')
+        with open(test_support.TESTFN, 'rb') as f:
+            f.read(100)
+            calls = []
+            def sendfile(*args):
+                calls.append(args)
+                return real_sendfile(*args)
+            real_sendfile = getattr(os, 'sendfile', None)
+            if real_sendfile is None:
+                shutil.copyfileobj(f, fileobj)
+            else:
+                with test_support.swap_attr(os, 'sendfile', sendfile):
+                    shutil.copyfileobj(f, fileobj)
+                self.assertTrue(calls)
+            self.assertEqual(f.tell(), len(self.DATA))
+        fileobj.close()
+        self.serv_conn.close()
+
+
+
 @unittest.skipUnless(thread, 'Threading required for this test.')
 class BasicUDPTest(ThreadedUDPSocketTest):
 
@@ -1782,6 +1944,7 @@ def test_main():
 
     tests.extend([
         NonBlockingTCPTests,
+        SendfileTest,
         FileObjectClassTestCase,
         FileObjectInterruptedTestCase,
         UnbufferedFileObjectClassTestCase,
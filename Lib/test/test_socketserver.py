@@ -11,6 +11,7 @@ import socket
 import select
 import errno
 import tempfile
+import time
 import unittest
 import SocketServer
 
@@ -158,6 +159,7 @@ class SocketServerTest(unittest.TestCase):
         if verbose: print "waiting for server"
         server.shutdown()
         t.join()
+        server.server_close()
         if verbose: print "done"
 
     def stream_examine(self, proto, addr):
@@ -191,6 +193,11 @@ class SocketServerTest(unittest.TestCase):
                         SocketServer.StreamRequestHandler,
                         self.stream_examine)
 
+    def test_ThreadPoolTCPServer(self):
+        self.run_server(SocketServer.ThreadPoolTCPServer,
+                        SocketServer.StreamRequestHandler,
+                        self.stream_examine)
+
     @requires_forking
     def test_ForkingTCPServer(self):
         with simple_subprocess(self):
@@ -237,27 +244,61 @@ class SocketServerTest(unittest.TestCase):
 
     @contextlib.contextmanager
     def mocked_select_module(self):
-        """Mocks the select.select() call to raise EINTR for first call"""
-        old_select = select.select
-
-        class MockSelect:
-            def __init__(self):
-                self.called = 0
-
-            def __call__(self, *args):
-                self.called += 1
-                if self.called == 1:
-                    # raise the exception on first call
-                    raise select.error(errno.EINTR, os.strerror(errno.EINTR))
-                else:
-                    # Return real select value for consecutive calls
-                    return old_select(*args)
-
-        select.select = MockSelect()
+        """Mocks the select.poll() or select.select() call used by the
+        server to raise EINTR for first call"""
+        if hasattr(select, 'poll'):
+            name = 'poll'
+            old_poll = select.poll
+
+            class MockPoll:
+                def __init__(self, mock):
+                    self.mock = mock
+                    self.poller = old_poll()
+
+                def register(self, *args):
+                    self.poller.register(*args)
+
+                def poll(self, *args):
+                    self.mock.called += 1
+                    if self.mock.called == 1:
+                        # raise the exception on first call
+                        raise select.error(errno.EINTR,
+                                           os.strerror(errno.EINTR))
+                    else:
+                        # Return real poll value for consecutive calls
+                        return self.poller.poll(*args)
+
+            class MockSelect:
+                def __init__(self):
+                    self.called = 0
+
+                def __call__(self):
+                    return MockPoll(self)
+        else:
+            name = 'select'
+            old_select = select.select
+
+            class MockSelect:
+                def __init__(self):
+                    self.called = 0
+
+                def __call__(self, *args):
+                    self.called += 1
+                    if self.called == 1:
+                        # raise the exception on first call
+                        raise select.error(errno.EINTR,
+                                           os.strerror(errno.EINTR))
+                    else:
+                        # Return real select value for consecutive calls
+                        return old_select(*args)
+
+        old = getattr(select, name)
+        mock = MockSelect()
+        setattr(select, name, mock)
         try:
-            yield select.select
+            yield mock
         finally:
-            select.select = old_select
+            setattr(select, name, old)
 
     def test_InterruptServerSelectCall(self):
         with self.mocked_select_module() as mock_select:
@@ -267,6 +308,63 @@ class SocketServerTest(unittest.TestCase):
             # Make sure select was called again:
             self.assertGreater(mock_select.called, 1)
 
+    def test_ThreadPoolUDPServer(self):
+        self.run_server(SocketServer.ThreadPoolUDPServer,
+                        SocketServer.DatagramRequestHandler,
+                        self.dgram_examine)
+
+    @reap_threads
+    def test_thread_pool(self):
+        release = threading.Event()
+        handled = []
+
+        class MyServer(SocketServer.ThreadPoolTCPServer):
+            pool_size = 2
+            pool_queue_size = 1
+            pool_block = False
+            full = 0
+            def handle_pool_full(self, request, client_address):
+                self.full += 1
+                SocketServer.ThreadPoolTCPServer.handle_pool_full(
+                    self, request, client_address)
+
+        class MyHandler(SocketServer.BaseRequestHandler):
+            def handle(self):
+                handled.append(threading.current_thread())
+                release.wait()
+
+        server = MyServer((HOST, 0), MyHandler)
+        self.assertEqual(server.pool_stats()['workers'], 0)
+        clients = []
+        try:
+            for i in range(4):
+                clients.append(socket.create_connection(
+                    server.server_address))
+                server.handle_request()
+                # Give the workers a chance to take the requests.
+                for j in range(100):
+                    if len(handled) >= min(i + 1, 2):
+                        break
+                    time.sleep(0.01)
+            stats = server.pool_stats()
+            self.assertEqual(stats['workers'], 2)
+            self.assertEqual(stats['processed'], 2)
+            self.assertEqual(stats['queued'], 1)
+            self.assertEqual(stats['max_queued'], 1)
+            self.assertEqual(stats['rejected'], 1)
+            self.assertEqual(server.full, 1)
+            # The rejected connection has been closed by the server.
+            self.assertEqual(clients[3].recv(1), '')
+        finally:
+            release.set()
+            server.server_close()
+            for c in clients:
+                c.close()
+        stats = server.pool_stats()
+        self.assertEqual(stats['workers'], 0)
+        self.assertEqual(len(handled), 3)
+        self.assertEqual(len(set(handled)), 2)
+
     # Alas, on Linux (at least) recvfrom() doesn't return a meaningful
     # client address so this cannot work:
 
@@ -314,6 +412,36 @@ class SocketServerTest(unittest.TestCase):
         for t, s in threads:
             t.join()
 
+    @reap_threads
+    def test_shutdown_wakes_up(self):
+        # serve_forever() must not wait for a poll interval to notice
+        # a shutdown request.
+        s = SocketServer.TCPServer((HOST, 0),
+                                   SocketServer.StreamRequestHandler)
+        self.addCleanup(s.server_close)
+        t = threading.Thread(target=s.serve_forever,
+                             kwargs={'poll_interval': 60})
+        t.daemon = True
+        t.start()
+        start = time.time()
+        s.shutdown()
+        t.join(30)
+        self.assertFalse(t.is_alive())
+        if os.name == 'posix':
+            self.assertLess(time.time() - start, 10)
+        self.assertIsNone(s._BaseServer__wakeup_fd)
+
+    def test_handle_request_timeout(self):
+        class MyServer(SocketServer.TCPServer):
+            timeout = 0.01
+            timed_out = False
+            def handle_timeout(self):
+                self.timed_out = True
+        s = MyServer((HOST, 0), SocketServer.StreamRequestHandler)
+        self.addCleanup(s.server_close)
+        s.handle_request()
+        self.assertTrue(s.timed_out)
+
     def test_tcpserver_bind_leak(self):
         # Issue #22435: the server socket wouldn't be closed if bind()/listen()
         # failed.
@@ -2941,6 +2941,38 @@ else:
                 self.assertRaises(ValueError, s.read, 1024)
                 self.assertRaises(ValueError, s.write, b'hello')
 
+        def test_copyfileobj_to_makefile(self):
+            # shutil.copyfileobj() must not bypass the SSL layer when it
+            # writes a regular file to the file object of an SSL socket.
+            import shutil
+            data = b'abcdefghijklmnopq' * 1000
+            with open(support.TESTFN, 'wb') as f:
+                f.write(data)
+            self.addCleanup(support.unlink, support.TESTFN)
+            server = ThreadedEchoServer(CERTFILE,
+                                        certreqs=ssl.CERT_NONE,
+                                        ssl_version=ssl.PROTOCOL_TLSv1,
+                                        cacerts=CERTFILE,
+                                        chatty=False)
+            with server:
+                s = ssl.wrap_socket(socket.socket(),
+                                    cert_reqs=ssl.CERT_NONE,
+                                    ssl_version=ssl.PROTOCOL_TLSv1)
+                s.connect((HOST, server.port))
+                fileobj = s.makefile('wb')
+                with open(support.TESTFN, 'rb') as f:
+                    shutil.copyfileobj(f, fileobj)
+                fileobj.close()
+                received = []
+                while sum(map(len, received)) < len(data):
+                    chunk = s.read(len(data))
+                    if not chunk:
+                        break
+                    received.append(chunk)
+                self.assertEqual(b''.join(received), data)
+                s.write(b'over\n')
+                s.close()
+
 
 def test_main(verbose=False):
     if support.verbose:
@@ -4,6 +4,7 @@ import unittest
 import signal
 import os
 import sys
+import time
 from test.test_support import run_unittest, import_module, reap_threads
 thread = import_module('thread')
 
@@ -13,6 +14,10 @@ if sys.platform[:3] in ('win', 'os2') or sys.platform=='riscos':
 process_pid = os.getpid()
 signalled_all=thread.allocate_lock()
 
+# On OS X the locks are built on a condition variable, whose waits are not
+# interrupted by signals.
+USING_PTHREAD_COND = sys.platform == 'darwin'
+
 
 def registerSignals(for_usr1, for_usr2, for_alrm):
     usr1 = signal.signal(signal.SIGUSR1, for_usr1)
@@ -67,6 +72,60 @@ class ThreadSignals(unittest.TestCase):
     def spawnSignallingThread(self):
         thread.start_new_thread(send_signals, ())
 
+    def alarm_interrupt(self, sig, frame):
+        raise KeyboardInterrupt
+
+    @unittest.skipIf(USING_PTHREAD_COND,
+                     'POSIX condition variables cannot be interrupted')
+    def test_lock_acquire_interruption(self):
+        # Mimic receiving a SIGINT (KeyboardInterrupt) with SIGALRM while stuck
+        # in a deadlock.
+        oldalrm = signal.signal(signal.SIGALRM, self.alarm_interrupt)
+        try:
+            lock = thread.allocate_lock()
+            lock.acquire()
+            signal.alarm(1)
+            t1 = time.time()
+            self.assertRaises(KeyboardInterrupt, lock.acquire, timeout=5)
+            dt = time.time() - t1
+            # Checking that KeyboardInterrupt was raised is not sufficient.
+            # We want to assert that lock.acquire() was interrupted because
+            # of the signal, not that the signal handler was called immediately
+            # after timeout return of lock.acquire() (which can fool
+            # assertRaises).
+            self.assertLess(dt, 3.0)
+        finally:
+            signal.alarm(0)
+            signal.signal(signal.SIGALRM, oldalrm)
+
+    def test_lock_acquire_retries_on_intr(self):
+        # A signal handler that does not raise does not cut the timeout short.
+        self.sig_recvd = False
+        def my_handler(signal, frame):
+            self.sig_recvd = True
+        old_handler = signal.signal(signal.SIGUSR1, my_handler)
+        try:
+            lock = thread.allocate_lock()
+            lock.acquire()
+            done = thread.allocate_lock()
+            done.acquire()
+            def other_thread():
+                try:
+                    time.sleep(0.5)
+                    os.kill(process_pid, signal.SIGUSR1)
+                    # Let the main thread take the interrupt, handle it, and
+                    # retry the lock acquisition.  Then we'll let it run.
+                    time.sleep(0.5)
+                    lock.release()
+                finally:
+                    done.release()
+            thread.start_new_thread(other_thread, ())
+            self.assertTrue(lock.acquire(timeout=10))
+            done.acquire()
+            self.assertTrue(self.sig_recvd)
+        finally:
+            signal.signal(signal.SIGUSR1, old_handler)
+
 
 def test_main():
     global signal_blackboard
@@ -2,6 +2,8 @@ import os
 import base64
 import urlparse
 import urllib2
+import httplib
+import socket
 import BaseHTTPServer
 import unittest
 import hashlib
@@ -698,6 +700,91 @@ class TestUrlopen(BaseTestCase):
             self.server.stop()
         self.assertEqual(index + 1, len(lines))
 
+class KeepAliveRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Handler answering every GET with the client port on a persistent
+    connection."""
+
+    connections = []
+
+    def setup(self):
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        self.connections.append(self.client_address)
+
+    def do_GET(self):
+        body = "connection %d" % len(self.connections)
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestPooledUrlopen(BaseTestCase):
+    """Tests urllib2 handlers sharing an httplib.HTTPConnectionPool."""
+
+    def setUp(self):
+        super(TestPooledUrlopen, self).setUp()
+        KeepAliveRequestHandler.connections = []
+        self.server = LoopbackHttpServerThread(KeepAliveRequestHandler)
+        KeepAliveRequestHandler.protocol_version = "HTTP/1.1"
+        self.server.start()
+        self.server.ready.wait()
+        self.url = "http://localhost:%s/" % self.server.port
+        self.pool = httplib.HTTPConnectionPool()
+        self.opener = urllib2.build_opener(
+            urllib2.ProxyHandler({}), urllib2.HTTPHandler(pool=self.pool))
+
+    def tearDown(self):
+        # The server handles one connection at a time: close the pooled
+        # ones so that it can stop.
+        self.pool.close()
+        self.server.stop()
+        super(TestPooledUrlopen, self).tearDown()
+
+    def test_connection_reused(self):
+        for i in range(3):
+            f = self.opener.open(self.url)
+            self.assertNotEqual(f.info().get("Connection"), "close")
+            self.assertEqual(f.read(), "connection 1")
+            f.close()
+        self.assertEqual(len(KeepAliveRequestHandler.connections), 1)
+
+    def test_unread_response_closes_connection(self):
+        f = self.opener.open(self.url)
+        f.read(3)
+        f.close()
+        f = self.opener.open(self.url)
+        self.assertEqual(f.read(), "connection 2")
+        f.close()
+
+    def test_handler_connection_class(self):
+        class Connection(httplib.HTTPConnection):
+            pass
+        class Handler(urllib2.HTTPHandler):
+            def http_open(self, req):
+                return self.do_open(Connection, req)
+        opener = urllib2.build_opener(urllib2.ProxyHandler({}),
+                                      Handler(pool=self.pool))
+        f = opener.open(self.url)
+        f.read()
+        f.close()
+        [[(conn, released)]] = self.pool._idle.values()
+        self.assertIsInstance(conn, Connection)
+
+    def test_dropped_connection_retried(self):
+        f = self.opener.open(self.url)
+        f.read()
+        f.close()
+        # Drop the idle connection behind the pool's back.
+        [(conn, released)] = self.pool._idle.values()[0]
+        conn.sock.shutdown(socket.SHUT_RDWR)
+        f = self.opener.open(self.url)
+        self.assertEqual(f.read(), "connection 2")
+        f.close()
+
+
 def test_main():
     # We will NOT depend on the network resource flag
     # (Lib/test/regrtest.py -u network) since all tests here are only
@@ -705,7 +792,8 @@ def test_main():
     # the next line.
     #test_support.requires("network")
 
-    test_support.run_unittest(BasicAuthTests, ProxyAuthTests, TestUrlopen)
+    test_support.run_unittest(BasicAuthTests, ProxyAuthTests, TestUrlopen,
+                              TestPooledUrlopen)
 
 if __name__ == "__main__":
     test_main()
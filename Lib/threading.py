@@ -30,12 +30,14 @@ from traceback import format_exc as _format_exc
 __all__ = ['activeCount', 'active_count', 'Condition', 'currentThread',
            'current_thread', 'enumerate', 'Event',
            'Lock', 'RLock', 'Semaphore', 'BoundedSemaphore', 'Thread',
-           'Timer', 'setprofile', 'settrace', 'local', 'stack_size']
+           'Timer', 'setprofile', 'settrace', 'local', 'stack_size',
+           'TIMEOUT_MAX']
 
 _start_new_thread = thread.start_new_thread
 _allocate_lock = thread.allocate_lock
 _get_ident = thread.get_ident
 ThreadError = thread.error
+TIMEOUT_MAX = thread.TIMEOUT_MAX
 del thread
 
 
@@ -341,22 +343,12 @@ class _Condition(_Verbose):
                 if __debug__:
                     self._note("%s.wait(): got it", self)
             else:
-                # Balancing act:  We can't afford a pure busy loop, so we
-                # have to sleep; but if we sleep the whole timeout time,
-                # we'll be unresponsive.  The scheme here sleeps very
-                # little at first, longer as time goes on, but never longer
-                # than 20 times per second (or the timeout time remaining).
-                endtime = _time() + timeout
-                delay = 0.0005 # 500 us -> initial delay of 1 ms
-                while True:
-                    gotit = waiter.acquire(0)
-                    if gotit:
-                        break
-                    remaining = endtime - _time()
-                    if remaining <= 0:
-                        break
-                    delay = min(delay * 2, remaining, .05)
-                    _sleep(delay)
+                # The lock waits for the timeout itself, so the thread
+                # sleeps until it is notified instead of polling.
+                if timeout > 0:
+                    gotit = waiter.acquire(True, min(timeout, TIMEOUT_MAX))
+                else:
+                    gotit = waiter.acquire(False)
                 if not gotit:
                     if __debug__:
                         self._note("%s.wait(%s): timed out", self, timeout)
@@ -437,7 +429,7 @@ class _Semaphore(_Verbose):
         self.__cond = Condition(Lock())
         self.__value = value
 
-    def acquire(self, blocking=1):
+    def acquire(self, blocking=1, timeout=None):
         """Acquire a semaphore, decrementing the internal counter by one.
 
         When invoked without arguments: if the internal counter is larger than
@@ -456,16 +448,30 @@ class _Semaphore(_Verbose):
         an argument would block, return false immediately; otherwise, do the
         same thing as when called without arguments, and return true.
 
+        When invoked with a timeout other than None, it will block for at
+        most timeout seconds.  If acquire does not complete successfully in
+        that interval, return false.  Return true otherwise.
+
         """
+        if not blocking and timeout is not None:
+            raise ValueError("can't specify timeout for non-blocking acquire")
         rc = False
+        endtime = None
         with self.__cond:
             while self.__value == 0:
                 if not blocking:
                     break
+                if timeout is not None:
+                    if endtime is None:
+                        endtime = _time() + timeout
+                    else:
+                        timeout = endtime - _time()
+                        if timeout <= 0:
+                            break
                 if __debug__:
                     self._note("%s.acquire(%s): blocked waiting, value=%s",
                             self, blocking, self.__value)
-                self.__cond.wait()
+                self.__cond.wait(timeout)
             else:
                 self.__value = self.__value - 1
                 if __debug__:
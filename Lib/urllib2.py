@@ -1111,10 +1111,59 @@ class ProxyDigestAuthHandler(BaseHandler, AbstractDigestAuthHandler):
         self.reset_retry_count()
         return retry
 
+# Requests which may be sent again on a new connection if a pooled
+# connection turns out to have been closed by the server.
+_IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'TRACE',
+                                 'PUT', 'DELETE'])
+
+class _PooledResponse:
+    """Wrapper around an httplib response on a pooled connection.
+
+    The connection is given back to the pool as soon as the response
+    has been read completely, and closed if the response is closed
+    before that.
+    """
+
+    def __init__(self, response, conn, pool):
+        self._response = response
+        self._conn = conn
+        self._pool = pool
+        if response.length == 0:
+            # Nothing to read (HEAD, 204, 304...).
+            response.close()
+            self._release()
+
+    def _release(self):
+        conn = self._conn
+        if conn is not None:
+            self._conn = None
+            self._pool.release(conn)
+
+    def read(self, amt=None):
+        data = self._response.read(amt)
+        if self._response.isclosed():
+            self._release()
+        return data
+
+    # socket._fileobject calls recv()
+    recv = read
+
+    def fileno(self):
+        return self._response.fileno()
+
+    def close(self):
+        if not self._response.isclosed() and self._conn is not None:
+            # Unread data is left on the connection: it cannot be reused.
+            self._conn.close()
+        self._response.close()
+        self._release()
+
+
 class AbstractHTTPHandler(BaseHandler):
 
-    def __init__(self, debuglevel=0):
+    def __init__(self, debuglevel=0, pool=None):
         self._debuglevel = debuglevel
+        self._pool = pool
 
     def set_http_debuglevel(self, level):
         self._debuglevel = level
@@ -1162,24 +1211,31 @@ class AbstractHTTPHandler(BaseHandler):
         if not host:
             raise URLError('no host given')
 
-        # will parse host:port
-        h = http_class(host, timeout=req.timeout, **http_conn_args)
-        h.set_debuglevel(self._debuglevel)
-
         headers = dict(req.unredirected_hdrs)
         headers.update(dict((k, v) for k, v in req.headers.items()
                             if k not in headers))
 
-        # We want to make an HTTP/1.1 request, but the addinfourl
-        # class isn't prepared to deal with a persistent connection.
-        # It will try to read all remaining data from the socket,
-        # which will block while the server waits for the next request.
-        # So make sure the connection gets closed after the (only)
-        # request.
-        headers["Connection"] = "close"
+        pool = self._pool
+        if pool is None or req._tunnel_host:
+            # We want to make an HTTP/1.1 request, but the addinfourl
+            # class isn't prepared to deal with a persistent connection.
+            # It will try to read all remaining data from the socket,
+            # which will block while the server waits for the next request.
+            # So make sure the connection gets closed after the (only)
+            # request.  Tunnelled connections are never pooled.
+            headers["Connection"] = "close"
+            pool = None
         headers = dict(
             (name.title(), val) for name, val in headers.items())
 
+        if pool is not None:
+            return self._pooled_open(pool, http_class, req, headers,
+                                     http_conn_args)
+
+        # will parse host:port
+        h = http_class(host, timeout=req.timeout, **http_conn_args)
+        h.set_debuglevel(self._debuglevel)
+
         if req._tunnel_host:
             tunnel_headers = {}
             proxy_auth_hdr = "Proxy-Authorization"
@@ -1220,6 +1276,38 @@ class AbstractHTTPHandler(BaseHandler):
         resp.msg = r.reason
         return resp
 
+    def _pooled_open(self, pool, http_class, req, headers, http_conn_args):
+        # do_open() for a handler with a connection pool: the connection
+        # is kept open and goes back to the pool once the response has
+        # been read.
+        method = req.get_method()
+        while True:
+            h = pool.get_connection(req.get_type(), req.get_host(),
+                                    connection_class=http_class,
+                                    timeout=req.timeout, **http_conn_args)
+            h.set_debuglevel(self._debuglevel)
+            reused = h.sock is not None
+            try:
+                h.request(method, req.get_selector(), req.data, headers)
+                r = h.getresponse(buffering=True)
+            except (socket.error, httplib.BadStatusLine), err:
+                h.close()
+                # The server may have closed an idle connection just as
+                # it was taken from the pool.
+                if reused and method in _IDEMPOTENT_METHODS:
+                    continue
+                if isinstance(err, socket.error):
+                    raise URLError(err)
+                raise
+            break
+
+        fp = socket._fileobject(_PooledResponse(r, h, pool), close=True)
+
+        resp = addinfourl(fp, r.msg, req.get_full_url())
+        resp.code = r.status
+        resp.msg = r.reason
+        return resp
+
 
 class HTTPHandler(AbstractHTTPHandler):
 
@@ -1231,8 +1319,8 @@ class HTTPHandler(AbstractHTTPHandler):
 if hasattr(httplib, 'HTTPS'):
     class HTTPSHandler(AbstractHTTPHandler):
 
-        def __init__(self, debuglevel=0, context=None):
-            AbstractHTTPHandler.__init__(self, debuglevel)
+        def __init__(self, debuglevel=0, context=None, pool=None):
+            AbstractHTTPHandler.__init__(self, debuglevel, pool)
             self._context = context
 
         def https_open(self, req):
@@ -29,6 +29,7 @@ test_urlparse.py provides a good indicator of parsing behavior.
 """
 
 import re
+import _lrucache
 
 __all__ = ["urlparse", "urlunparse", "urljoin", "urldefrag",
            "urlsplit", "urlunsplit", "parse_qs", "parse_qsl"]
@@ -63,7 +64,7 @@ scheme_chars = ('abcdefghijklmnopqrstuvwxyz'
                 '+-.')
 
 MAX_CACHE_SIZE = 20
-_parse_cache = {}
+_parse_cache = _lrucache.LRUCache(MAX_CACHE_SIZE)
 
 def clear_cache():
     """Clear the parse cache."""
@@ -176,8 +177,6 @@ def urlsplit(url, scheme='', allow_fragments=True):
     cached = _parse_cache.get(key, None)
     if cached:
         return cached
-    if len(_parse_cache) >= MAX_CACHE_SIZE: # avoid runaway growth
-        clear_cache()
     netloc = query = fragment = ''
     i = url.find(':')
     if i > 0:
@@ -62,6 +62,11 @@ typedef struct _PyEncoderObject {
     PyObject *item_separator;
     PyObject *sort_keys;
     PyObject *skipkeys;
+    PyObject *write;
+    Py_ssize_t indent_width;
+    Py_ssize_t chunk_size;
+    Py_ssize_t buffered;
+    Py_ssize_t scanned;
     int fast_encode;
     int allow_nan;
 } PyEncoderObject;
@@ -127,6 +132,8 @@ static PyObject *
 _convertPyInt_FromSsize_t(Py_ssize_t *size_ptr);
 static PyObject *
 encoder_encode_float(PyEncoderObject *s, PyObject *obj);
+static int
+encoder_flush(PyEncoderObject *s, PyObject *rval, int force);
 
 #define S_CHAR(c) (c >= ' ' && c <= '~' && c != '\\' && c != '"')
 #define IS_WHITESPACE(c) (((c) == ' ') || ((c) == '\t') || ((c) == '\n') || ((c) == '\r'))
@@ -1813,6 +1820,7 @@ encoder_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
         s->item_separator = NULL;
         s->sort_keys = NULL;
         s->skipkeys = NULL;
+        s->write = NULL;
     }
     return (PyObject *)s;
 }
@@ -1843,6 +1851,14 @@ encoder_init(PyObject *self, PyObject *args, PyObject *kwds)
     s->item_separator = item_separator;
     s->sort_keys = sort_keys;
     s->skipkeys = skipkeys;
+    s->indent_width = 0;
+    if (indent != Py_None) {
+        s->indent_width = PyNumber_AsSsize_t(indent, PyExc_OverflowError);
+        if (s->indent_width == -1 && PyErr_Occurred())
+            return -1;
+        if (s->indent_width < 0)
+            s->indent_width = 0;
+    }
     s->fast_encode = (PyCFunction_Check(s->encoder) && PyCFunction_GetFunction(s->encoder) == (PyCFunction)py_encode_basestring_ascii);
     s->allow_nan = PyObject_IsTrue(allow_nan);
 
@@ -1861,24 +1877,116 @@ static PyObject *
 encoder_call(PyObject *self, PyObject *args, PyObject *kwds)
 {
     /* Python callable interface to encode_listencode_obj */
-    static char *kwlist[] = {"obj", "_current_indent_level", NULL};
+    static char *kwlist[] = {"obj", "_current_indent_level", "_write", "_chunk_size", NULL};
     PyObject *obj;
     PyObject *rval;
+    PyObject *write = Py_None;
     Py_ssize_t indent_level;
+    Py_ssize_t chunk_size = 65536;
     PyEncoderObject *s;
+    int rv;
     assert(PyEncoder_Check(self));
     s = (PyEncoderObject *)self;
-    if (!PyArg_ParseTupleAndKeywords(args, kwds, "OO&:_iterencode", kwlist,
-        &obj, _convertPyInt_AsSsize_t, &indent_level))
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "OO&|OO&:_iterencode", kwlist,
+        &obj, _convertPyInt_AsSsize_t, &indent_level,
+        &write, _convertPyInt_AsSsize_t, &chunk_size))
         return NULL;
+    if (write != Py_None && s->write != NULL) {
+        PyErr_SetString(PyExc_RuntimeError, "encoder is already writing");
+        return NULL;
+    }
     rval = PyList_New(0);
     if (rval == NULL)
         return NULL;
-    if (encoder_listencode_obj(s, rval, obj, indent_level)) {
-        Py_DECREF(rval);
+    if (write == Py_None) {
+        if (encoder_listencode_obj(s, rval, obj, indent_level)) {
+            Py_DECREF(rval);
+            return NULL;
+        }
+        return rval;
+    }
+
+    /* Pass the output to write() in chunks of about chunk_size characters */
+    Py_INCREF(write);
+    s->write = write;
+    s->chunk_size = chunk_size;
+    s->buffered = 0;
+    s->scanned = 0;
+    rv = encoder_listencode_obj(s, rval, obj, indent_level);
+    if (rv == 0)
+        rv = encoder_flush(s, rval, 1);
+    Py_CLEAR(s->write);
+    Py_DECREF(rval);
+    if (rv)
         return NULL;
+    Py_RETURN_NONE;
+}
+
+static int
+encoder_flush(PyEncoderObject *s, PyObject *rval, int force)
+{
+    /* Join the chunks in rval and pass them to s->write once they hold
+       at least s->chunk_size characters, or whatever they hold if force
+       is set.  Does nothing unless the encoder is writing. */
+    static PyObject *empty = NULL;
+    PyObject *joined;
+    PyObject *result;
+    Py_ssize_t n;
+
+    if (s->write == NULL)
+        return 0;
+    n = PyList_GET_SIZE(rval);
+    for (; s->scanned < n; s->scanned++) {
+        PyObject *chunk = PyList_GET_ITEM(rval, s->scanned);
+        if (PyString_Check(chunk))
+            s->buffered += PyString_GET_SIZE(chunk);
+        else if (PyUnicode_Check(chunk))
+            s->buffered += PyUnicode_GET_SIZE(chunk);
+    }
+    if (n == 0 || (!force && s->buffered < s->chunk_size))
+        return 0;
+    if (empty == NULL) {
+        empty = PyString_InternFromString("");
+        if (empty == NULL)
+            return -1;
     }
-    return rval;
+    joined = _PyString_Join(empty, rval);
+    if (joined == NULL)
+        return -1;
+    if (PyList_SetSlice(rval, 0, n, NULL)) {
+        Py_DECREF(joined);
+        return -1;
+    }
+    s->buffered = 0;
+    s->scanned = 0;
+    result = PyObject_CallFunctionObjArgs(s->write, joined, NULL);
+    Py_DECREF(joined);
+    if (result == NULL)
+        return -1;
+    Py_DECREF(result);
+    return 0;
+}
+
+static PyObject *
+encoder_newline_indent(PyEncoderObject *s, Py_ssize_t indent_level)
+{
+    /* Return '\n' + (' ' * (_indent * _current_indent_level)) */
+    PyObject *newline_indent;
+    char *p;
+    Py_ssize_t width;
+
+    if (indent_level > 0 && s->indent_width > (PY_SSIZE_T_MAX - 1) / indent_level) {
+        PyErr_SetString(PyExc_OverflowError, "indent too large");
+        return NULL;
+    }
+    width = s->indent_width * indent_level;
+    newline_indent = PyString_FromStringAndSize(NULL, width + 1);
+    if (newline_indent == NULL)
+        return NULL;
+    p = PyString_AS_STRING(newline_indent);
+    p[0] = '\n';
+    memset(p + 1, ' ', width);
+    return newline_indent;
 }
 
 static PyObject *
@@ -2062,6 +2170,8 @@ encoder_listencode_dict(PyEncoderObject *s, PyObject *rval, PyObject *dct, Py_ss
     PyObject *key = NULL;
     PyObject *value = NULL;
     PyObject *it = NULL;
+    PyObject *newline_indent = NULL;
+    PyObject *separator = NULL;
     int skipkeys;
     Py_ssize_t idx;
 
@@ -2095,13 +2205,19 @@ encoder_listencode_dict(PyEncoderObject *s, PyObject *rval, PyObject *dct, Py_ss
         goto bail;
 
     if (s->indent != Py_None) {
-        /* TODO: DOES NOT RUN */
         indent_level += 1;
-        /*
-            newline_indent = '\n' + (' ' * (_indent * _current_indent_level))
-            separator = _item_separator + newline_indent
-            buf += newline_indent
-        */
+        newline_indent = encoder_newline_indent(s, indent_level);
+        if (newline_indent == NULL)
+            goto bail;
+        separator = PyNumber_Add(s->item_separator, newline_indent);
+        if (separator == NULL)
+            goto bail;
+        if (PyList_Append(rval, newline_indent))
+            goto bail;
+    }
+    else {
+        Py_INCREF(s->item_separator);
+        separator = s->item_separator;
     }
 
     /* TODO: C speedup not implemented for sort_keys */
@@ -2144,7 +2260,7 @@ encoder_listencode_dict(PyEncoderObject *s, PyObject *rval, PyObject *dct, Py_ss
         }
 
         if (idx) {
-            if (PyList_Append(rval, s->item_separator))
+            if (PyList_Append(rval, separator))
                 goto bail;
         }
 
@@ -2165,6 +2281,8 @@ encoder_listencode_dict(PyEncoderObject *s, PyObject *rval, PyObject *dct, Py_ss
             goto bail;
         if (encoder_listencode_obj(s, rval, value, indent_level))
             goto bail;
+        if (encoder_flush(s, rval, 0))
+            goto bail;
         idx += 1;
         Py_CLEAR(value);
         Py_DECREF(key);
@@ -2179,15 +2297,18 @@ encoder_listencode_dict(PyEncoderObject *s, PyObject *rval, PyObject *dct, Py_ss
         Py_CLEAR(ident);
     }
     if (s->indent != Py_None) {
-        /* TODO: DOES NOT RUN */
-        /*
-            indent_level -= 1;
-
-            yield '\n' + (' ' * (_indent * _current_indent_level))
-        */
+        indent_level -= 1;
+        Py_CLEAR(newline_indent);
+        newline_indent = encoder_newline_indent(s, indent_level);
+        if (newline_indent == NULL)
+            goto bail;
+        if (PyList_Append(rval, newline_indent))
+            goto bail;
+        Py_CLEAR(newline_indent);
     }
     if (PyList_Append(rval, close_dict))
         goto bail;
+    Py_DECREF(separator);
     return 0;
 
 bail:
@@ -2196,6 +2317,8 @@ bail:
     Py_XDECREF(value);
     Py_XDECREF(kstr);
     Py_XDECREF(ident);
+    Py_XDECREF(newline_indent);
+    Py_XDECREF(separator);
     return -1;
 }
 
@@ -2209,6 +2332,8 @@ encoder_listencode_list(PyEncoderObject *s, PyObject *rval, PyObject *seq, Py_ss
     static PyObject *empty_array = NULL;
     PyObject *ident = NULL;
     PyObject *s_fast = NULL;
+    PyObject *newline_indent = NULL;
+    PyObject *separator = NULL;
     Py_ssize_t i;
 
     if (open_array == NULL || close_array == NULL || empty_array == NULL) {
@@ -2246,22 +2371,30 @@ encoder_listencode_list(PyEncoderObject *s, PyObject *rval, PyObject *seq, Py_ss
     if (PyList_Append(rval, open_array))
         goto bail;
     if (s->indent != Py_None) {
-        /* TODO: DOES NOT RUN */
         indent_level += 1;
-        /*
-            newline_indent = '\n' + (' ' * (_indent * _current_indent_level))
-            separator = _item_separator + newline_indent
-            buf += newline_indent
-        */
+        newline_indent = encoder_newline_indent(s, indent_level);
+        if (newline_indent == NULL)
+            goto bail;
+        separator = PyNumber_Add(s->item_separator, newline_indent);
+        if (separator == NULL)
+            goto bail;
+        if (PyList_Append(rval, newline_indent))
+            goto bail;
+    }
+    else {
+        Py_INCREF(s->item_separator);
+        separator = s->item_separator;
     }
     for (i = 0; i < PySequence_Fast_GET_SIZE(s_fast); i++) {
         PyObject *obj = PySequence_Fast_GET_ITEM(s_fast, i);
         if (i) {
-            if (PyList_Append(rval, s->item_separator))
+            if (PyList_Append(rval, separator))
                 goto bail;
         }
         if (encoder_listencode_obj(s, rval, obj, indent_level))
             goto bail;
+        if (encoder_flush(s, rval, 0))
+            goto bail;
     }
     if (ident != NULL) {
         if (PyDict_DelItem(s->markers, ident))
@@ -2269,20 +2402,25 @@ encoder_listencode_list(PyEncoderObject *s, PyObject *rval, PyObject *seq, Py_ss
         Py_CLEAR(ident);
     }
     if (s->indent != Py_None) {
-        /* TODO: DOES NOT RUN */
-        /*
-            indent_level -= 1;
-
-            yield '\n' + (' ' * (_indent * _current_indent_level))
-        */
+        indent_level -= 1;
+        Py_CLEAR(newline_indent);
+        newline_indent = encoder_newline_indent(s, indent_level);
+        if (newline_indent == NULL)
+            goto bail;
+        if (PyList_Append(rval, newline_indent))
+            goto bail;
+        Py_CLEAR(newline_indent);
     }
     if (PyList_Append(rval, close_array))
         goto bail;
+    Py_DECREF(separator);
     Py_DECREF(s_fast);
     return 0;
 
 bail:
     Py_XDECREF(ident);
+    Py_XDECREF(newline_indent);
+    Py_XDECREF(separator);
     Py_DECREF(s_fast);
     return -1;
 }
@@ -2309,6 +2447,7 @@ encoder_traverse(PyObject *self, visitproc visit, void *arg)
     Py_VISIT(s->item_separator);
     Py_VISIT(s->sort_keys);
     Py_VISIT(s->skipkeys);
+    Py_VISIT(s->write);
     return 0;
 }
 
@@ -2327,10 +2466,11 @@ encoder_clear(PyObject *self)
     Py_CLEAR(s->item_separator);
     Py_CLEAR(s->sort_keys);
     Py_CLEAR(s->skipkeys);
+    Py_CLEAR(s->write);
     return 0;
 }
 
-PyDoc_STRVAR(encoder_doc, "_iterencode(obj, _current_indent_level) -> iterable");
+PyDoc_STRVAR(encoder_doc, "_iterencode(obj, _current_indent_level[, _write[, _chunk_size]]) -> iterable");
 
 static
 PyTypeObject PyEncoderType = {
@@ -17,6 +17,7 @@ typedef struct {
     int count;
     int maxvalue;
     int kind;
+    char *name;
 } SemLockObject;
 
 #define ISMINE(o) (o->count > 0 && PyThread_get_thread_ident() == o->last_tid)
@@ -406,18 +407,30 @@ semlock_release(SemLockObject *self, PyObject *args)
  */
 
 static PyObject *
-newsemlockobject(PyTypeObject *type, SEM_HANDLE handle, int kind, int maxvalue)
+newsemlockobject(PyTypeObject *type, SEM_HANDLE handle, int kind, int maxvalue,
+                 char *name)
 {
     SemLockObject *self;
+    char *name_copy = NULL;
+
+    if (name != NULL) {
+        name_copy = PyMem_Malloc(strlen(name) + 1);
+        if (name_copy == NULL)
+            return PyErr_NoMemory();
+        strcpy(name_copy, name);
+    }
 
     self = PyObject_New(SemLockObject, type);
-    if (!self)
+    if (!self) {
+        PyMem_Free(name_copy);
         return NULL;
+    }
     self->handle = handle;
     self->kind = kind;
     self->count = 0;
     self->last_tid = 0;
     self->maxvalue = maxvalue;
+    self->name = name_copy;
     return (PyObject*)self;
 }
 
@@ -426,13 +439,13 @@ semlock_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
 {
     char buffer[256];
     SEM_HANDLE handle = SEM_FAILED;
-    int kind, maxvalue, value;
+    int kind, maxvalue, value, unlink = 1;
     PyObject *result;
-    static char *kwlist[] = {"kind", "value", "maxvalue", NULL};
+    static char *kwlist[] = {"kind", "value", "maxvalue", "unlink", NULL};
     static int counter = 0;
 
-    if (!PyArg_ParseTupleAndKeywords(args, kwds, "iii", kwlist,
-                                     &kind, &value, &maxvalue))
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "iii|i", kwlist,
+                                     &kind, &value, &maxvalue, &unlink))
         return NULL;
 
     if (kind != RECURSIVE_MUTEX && kind != SEMAPHORE) {
@@ -448,13 +461,26 @@ semlock_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
     if (handle == SEM_FAILED || SEM_GET_LAST_ERROR() != 0)
         goto failure;
 
-    if (SEM_UNLINK(buffer) < 0)
-        goto failure;
+#ifdef MS_WINDOWS
+    /* Windows semaphores are unnamed */
+    unlink = 1;
+#endif
 
-    result = newsemlockobject(type, handle, kind, maxvalue);
-    if (!result)
+    /* A semaphore which is not unlinked can be opened by name by processes
+       which do not inherit it.  It must be unlinked with _unlink() later. */
+    if (unlink && SEM_UNLINK(buffer) < 0)
         goto failure;
 
+    result = newsemlockobject(type, handle, kind, maxvalue,
+                              unlink ? NULL : buffer);
+    if (!result) {
+        if (!unlink)
+            SEM_UNLINK(buffer);
+        if (handle != SEM_FAILED)
+            SEM_CLOSE(handle);
+        return NULL;
+    }
+
     return result;
 
   failure:
@@ -469,12 +495,35 @@ semlock_rebuild(PyTypeObject *type, PyObject *args)
 {
     SEM_HANDLE handle;
     int kind, maxvalue;
+    char *name = NULL;
 
-    if (!PyArg_ParseTuple(args, F_SEM_HANDLE "ii",
-                          &handle, &kind, &maxvalue))
+    if (!PyArg_ParseTuple(args, F_SEM_HANDLE "ii|z",
+                          &handle, &kind, &maxvalue, &name))
         return NULL;
 
-    return newsemlockobject(type, handle, kind, maxvalue);
+#ifndef MS_WINDOWS
+    if (name != NULL) {
+        handle = sem_open(name, 0);
+        if (handle == SEM_FAILED)
+            return mp_SetError(NULL, MP_STANDARD_ERROR);
+    }
+#endif
+
+    return newsemlockobject(type, handle, kind, maxvalue, name);
+}
+
+static PyObject *
+semlock_unlink(PyObject *ignore, PyObject *args)
+{
+    char *name;
+
+    if (!PyArg_ParseTuple(args, "s", &name))
+        return NULL;
+
+    if (SEM_UNLINK(name) < 0)
+        return mp_SetError(NULL, MP_STANDARD_ERROR);
+
+    Py_RETURN_NONE;
 }
 
 static void
@@ -482,6 +531,7 @@ semlock_dealloc(SemLockObject* self)
 {
     if (self->handle != SEM_FAILED)
         SEM_CLOSE(self->handle);
+    PyMem_Free(self->name);
     PyObject_Del(self);
 }
 
@@ -544,6 +594,14 @@ semlock_afterfork(SemLockObject *self)
     Py_RETURN_NONE;
 }
 
+static PyObject *
+semlock_getname(SemLockObject *self, void *closure)
+{
+    if (self->name == NULL)
+        Py_RETURN_NONE;
+    return PyString_FromString(self->name);
+}
+
 /*
  * Semaphore methods
  */
@@ -569,6 +627,8 @@ static PyMethodDef semlock_methods[] = {
      ""},
     {"_after_fork", (PyCFunction)semlock_afterfork, METH_NOARGS,
      "rezero the net acquisition count after fork()"},
+    {"_unlink", (PyCFunction)semlock_unlink, METH_VARARGS | METH_STATIC,
+     "unlink the named semaphore"},
     {NULL}
 };
 
@@ -586,6 +646,16 @@ static PyMemberDef semlock_members[] = {
     {NULL}
 };
 
+/*
+ * Getters and setters
+ */
+
+static PyGetSetDef semlock_getset[] = {
+    {"name", (getter)semlock_getname, NULL,
+     "name of a semaphore which has not been unlinked, or None"},
+    {NULL}
+};
+
 /*
  * Semaphore type
  */
@@ -620,7 +690,7 @@ PyTypeObject SemLockType = {
     /* tp_iternext       */ 0,
     /* tp_methods        */ semlock_methods,
     /* tp_members        */ semlock_members,
-    /* tp_getset         */ 0,
+    /* tp_getset         */ semlock_getset,
     /* tp_base           */ 0,
     /* tp_dict           */ 0,
     /* tp_descr_get      */ 0,
@@ -40,7 +40,7 @@ static char **orig_argv;
 static int  orig_argc;
 
 /* command line options */
-#define BASE_OPTS "3bBc:dEhiJm:OQ:RsStuUvVW:xX?"
+#define BASE_OPTS "3bBc:dEhiJm:OQ:RsStuUvVW:xX:?"
 
 #ifndef RISCOS
 #define PROGRAM_OPTS BASE_OPTS
@@ -90,6 +90,8 @@ static char *usage_3 = "\
 -x     : skip first line of source, allowing use of non-Unix forms of #!cmd\n\
 ";
 static char *usage_4 = "\
+-X opt : implementation-specific option; -X importtime reports the time\n\
+         taken by each import; also PYTHONPROFILEIMPORTTIME=x\n\
 -3     : warn about Python 3.x incompatibilities that 2to3 cannot trivially fix\n\
 file   : program read from script file\n\
 -      : program read from stdin (default; interactive mode if a tty)\n\
@@ -409,7 +411,14 @@ Py_Main(int argc, char **argv)
             skipfirstline = 1;
             break;
 
-        /* case 'X': reserved for implementation-specific arguments */
+        case 'X':
+            /* implementation-specific options */
+            if (strcmp(_PyOS_optarg, "importtime") == 0) {
+                Py_ImportTimeFlag = 1;
+                break;
+            }
+            fprintf(stderr, "Unknown option: -X %s\n", _PyOS_optarg);
+            return usage(2, argv[0]);
 
         case 'U':
             Py_UnicodeFlag++;
@@ -27,6 +27,7 @@
 
 #include "Python.h"
 #include "structseq.h"
+#include "structmember.h"
 #ifndef MS_WINDOWS
 #include "posixmodule.h"
 #endif
@@ -6789,6 +6790,164 @@ posix_write(PyObject *self, PyObject *args)
 }
 
 
+#ifdef HAVE_SENDFILE
+#ifdef HAVE_SYS_SENDFILE_H
+#include <sys/sendfile.h>
+#endif
+#if defined(__APPLE__) || defined(__FreeBSD__) || defined(__DragonFly__)
+#include <sys/socket.h>
+#include <sys/uio.h>
+#endif
+
+PyDoc_STRVAR(posix_sendfile__doc__,
+"sendfile(out, in, offset, count) -> byteswritten\n\n\
+Copy count bytes from file descriptor in to file descriptor out, starting\n\
+at offset, without copying them through user space.  Return the number of\n\
+bytes sent, which is 0 once the end of in has been reached.\n\
+On Linux, offset may be None to read from the current position of in,\n\
+which is then updated.");
+
+static PyObject *
+posix_sendfile(PyObject *self, PyObject *args)
+{
+    int in, out;
+    Py_ssize_t count;
+    PyObject *offobj;
+    off_t offset;
+#if defined(__APPLE__) || defined(__FreeBSD__) || defined(__DragonFly__)
+    off_t sbytes;
+#endif
+    Py_ssize_t ret;
+
+    if (!PyArg_ParseTuple(args, "iiOn:sendfile", &out, &in, &offobj, &count))
+        return NULL;
+    if (count < 0) {
+        PyErr_SetString(PyExc_ValueError, "count must not be negative");
+        return NULL;
+    }
+    if (!_PyVerify_fd(out) || !_PyVerify_fd(in))
+        return posix_error();
+
+#if defined(__APPLE__) || defined(__FreeBSD__) || defined(__DragonFly__)
+    if (offobj == Py_None) {
+        PyErr_SetString(PyExc_TypeError, "an integer offset is required");
+        return NULL;
+    }
+#else
+    if (offobj == Py_None) {
+        Py_BEGIN_ALLOW_THREADS
+        ret = sendfile(out, in, NULL, count);
+        Py_END_ALLOW_THREADS
+        if (ret < 0)
+            return posix_error();
+        return PyInt_FromSsize_t(ret);
+    }
+#endif
+
+#if !defined(HAVE_LARGEFILE_SUPPORT)
+    offset = PyInt_AsLong(offobj);
+#else
+    offset = PyLong_Check(offobj) ?
+        PyLong_AsLongLong(offobj) : PyInt_AsLong(offobj);
+#endif
+    if (PyErr_Occurred())
+        return NULL;
+    if (offset < 0) {
+        PyErr_SetString(PyExc_ValueError, "offset must not be negative");
+        return NULL;
+    }
+
+#if defined(__APPLE__)
+    sbytes = count;
+    Py_BEGIN_ALLOW_THREADS
+    ret = sendfile(in, out, offset, &sbytes, NULL, 0);
+    Py_END_ALLOW_THREADS
+#elif defined(__FreeBSD__) || defined(__DragonFly__)
+    sbytes = 0;
+    Py_BEGIN_ALLOW_THREADS
+    ret = sendfile(in, out, offset, count, NULL, &sbytes, 0);
+    Py_END_ALLOW_THREADS
+#else
+    Py_BEGIN_ALLOW_THREADS
+    ret = sendfile(out, in, &offset, count);
+    Py_END_ALLOW_THREADS
+#endif
+
+#if defined(__APPLE__) || defined(__FreeBSD__) || defined(__DragonFly__)
+    /* A partial write to a non-blocking socket is reported as an error,
+       but sbytes holds what has been sent. */
+    if (ret < 0) {
+        if (sbytes != 0 && (errno == EAGAIN || errno == EBUSY ||
+                            errno == EINTR))
+            return PyInt_FromSsize_t((Py_ssize_t)sbytes);
+        return posix_error();
+    }
+    return PyInt_FromSsize_t((Py_ssize_t)sbytes);
+#else
+    if (ret < 0)
+        return posix_error();
+    return PyInt_FromSsize_t(ret);
+#endif
+}
+#endif /* HAVE_SENDFILE */
+
+#ifdef HAVE_COPY_FILE_RANGE
+PyDoc_STRVAR(posix_copy_file_range__doc__,
+"copy_file_range(src, dst, count[, offset_src[, offset_dst]]) -> bytescopied\n\n\
+Copy count bytes from file descriptor src to file descriptor dst, in the\n\
+kernel.  Return the number of bytes copied, which is 0 once the end of src\n\
+has been reached.  If offset_src or offset_dst is omitted or None, the\n\
+current position of the file is used and updated; otherwise the position\n\
+is not changed.");
+
+static int
+_parse_copy_offset(PyObject *obj, loff_t *offset, loff_t **p_offset)
+{
+    if (obj == NULL || obj == Py_None) {
+        *p_offset = NULL;
+        return 1;
+    }
+    *offset = PyLong_Check(obj) ? PyLong_AsLongLong(obj) : PyInt_AsLong(obj);
+    if (PyErr_Occurred())
+        return 0;
+    if (*offset < 0) {
+        PyErr_SetString(PyExc_ValueError, "offset must not be negative");
+        return 0;
+    }
+    *p_offset = offset;
+    return 1;
+}
+
+static PyObject *
+posix_copy_file_range(PyObject *self, PyObject *args)
+{
+    int src, dst;
+    Py_ssize_t count, ret;
+    PyObject *offobj_src = NULL, *offobj_dst = NULL;
+    loff_t offset_src, offset_dst, *p_offset_src, *p_offset_dst;
+
+    if (!PyArg_ParseTuple(args, "iin|OO:copy_file_range", &src, &dst, &count,
+                          &offobj_src, &offobj_dst))
+        return NULL;
+    if (count < 0) {
+        PyErr_SetString(PyExc_ValueError, "count must not be negative");
+        return NULL;
+    }
+    if (!_parse_copy_offset(offobj_src, &offset_src, &p_offset_src) ||
+        !_parse_copy_offset(offobj_dst, &offset_dst, &p_offset_dst))
+        return NULL;
+    if (!_PyVerify_fd(src) || !_PyVerify_fd(dst))
+        return posix_error();
+
+    Py_BEGIN_ALLOW_THREADS
+    ret = copy_file_range(src, p_offset_src, dst, p_offset_dst, count, 0);
+    Py_END_ALLOW_THREADS
+    if (ret < 0)
+        return posix_error();
+    return PyInt_FromSsize_t(ret);
+}
+#endif /* HAVE_COPY_FILE_RANGE */
+
 PyDoc_STRVAR(posix_fstat__doc__,
 "fstat(fd) -> stat result\n\n\
 Like stat(), but for an open file descriptor.");
@@ -8785,6 +8944,548 @@ posix_getresgid (PyObject *self, PyObject *noargs)
 }
 #endif
 
+#if !defined(MS_WINDOWS) && !defined(PYOS_OS2)
+#define HAVE_POSIX_SCANDIR 1
+
+/* scandir(): an iterator over the entries of a directory, which keeps the
+   file type returned by readdir() so that is_dir() and friends usually
+   need no system call, and caches the results of stat(). */
+
+typedef struct {
+    PyObject_HEAD
+    PyObject *name;
+    PyObject *path;
+    PyObject *stat;
+    PyObject *lstat;
+#ifdef HAVE_DIRENT_D_TYPE
+    unsigned char d_type;
+#endif
+    ino_t d_ino;
+} DirEntry;
+
+static PyTypeObject DirEntryType;
+
+static void
+DirEntry_dealloc(DirEntry *entry)
+{
+    Py_XDECREF(entry->name);
+    Py_XDECREF(entry->path);
+    Py_XDECREF(entry->stat);
+    Py_XDECREF(entry->lstat);
+    PyObject_Del(entry);
+}
+
+static PyObject *
+DirEntry_fetch_stat(DirEntry *self, int follow_symlinks)
+{
+    PyObject *args, *result;
+
+    args = PyTuple_Pack(1, self->path);
+    if (args == NULL)
+        return NULL;
+    if (follow_symlinks)
+        result = posix_stat(NULL, args);
+    else
+        result = posix_lstat(NULL, args);
+    Py_DECREF(args);
+    return result;
+}
+
+static PyObject *
+DirEntry_get_lstat(DirEntry *self)
+{
+    if (self->lstat == NULL)
+        self->lstat = DirEntry_fetch_stat(self, 0);
+    Py_XINCREF(self->lstat);
+    return self->lstat;
+}
+
+static int DirEntry_test_mode(DirEntry *self, int follow_symlinks,
+                              unsigned short mode_bits);
+
+static int
+DirEntry_test_symlink(DirEntry *self)
+{
+#ifdef HAVE_DIRENT_D_TYPE
+    if (self->d_type != DT_UNKNOWN)
+        return self->d_type == DT_LNK;
+#endif
+    return DirEntry_test_mode(self, 0, S_IFLNK);
+}
+
+static PyObject *
+DirEntry_get_stat(DirEntry *self, int follow_symlinks)
+{
+    int is_symlink;
+
+    if (!follow_symlinks)
+        return DirEntry_get_lstat(self);
+    if (self->stat == NULL) {
+        is_symlink = DirEntry_test_symlink(self);
+        if (is_symlink == -1)
+            return NULL;
+        if (is_symlink)
+            self->stat = DirEntry_fetch_stat(self, 1);
+        else
+            self->stat = DirEntry_get_lstat(self);
+    }
+    Py_XINCREF(self->stat);
+    return self->stat;
+}
+
+/* Return 1 if the current exception is an OSError for ENOENT. */
+static int
+_is_enoent_error(void)
+{
+    PyObject *type, *value, *tb, *err;
+    int result = 0;
+
+    if (!PyErr_ExceptionMatches(PyExc_OSError))
+        return 0;
+    PyErr_Fetch(&type, &value, &tb);
+    PyErr_NormalizeException(&type, &value, &tb);
+    err = value != NULL ? PyObject_GetAttrString(value, "errno") : NULL;
+    if (err != NULL) {
+        result = PyInt_Check(err) && PyInt_AS_LONG(err) == ENOENT;
+        Py_DECREF(err);
+    }
+    else
+        PyErr_Clear();
+    PyErr_Restore(type, value, tb);
+    return result;
+}
+
+/* Return 1 if the entry is of the file type mode_bits, 0 if it is not or
+   no longer exists, and -1 on error. */
+static int
+DirEntry_test_mode(DirEntry *self, int follow_symlinks,
+                   unsigned short mode_bits)
+{
+    PyObject *st, *st_mode;
+    long mode;
+
+#ifdef HAVE_DIRENT_D_TYPE
+    if (self->d_type != DT_UNKNOWN &&
+        !(follow_symlinks && self->d_type == DT_LNK)) {
+        if (mode_bits == S_IFDIR)
+            return self->d_type == DT_DIR;
+        else if (mode_bits == S_IFREG)
+            return self->d_type == DT_REG;
+        else
+            return self->d_type == DT_LNK;
+    }
+#endif
+    st = DirEntry_get_stat(self, follow_symlinks);
+    if (st == NULL) {
+        if (_is_enoent_error()) {
+            PyErr_Clear();
+            return 0;
+        }
+        return -1;
+    }
+    st_mode = PyObject_GetAttrString(st, "st_mode");
+    Py_DECREF(st);
+    if (st_mode == NULL)
+        return -1;
+    mode = PyInt_AsLong(st_mode);
+    Py_DECREF(st_mode);
+    if (mode == -1 && PyErr_Occurred())
+        return -1;
+    return (mode & S_IFMT) == mode_bits;
+}
+
+static PyObject *
+DirEntry_test_mode_method(DirEntry *self, PyObject *args, PyObject *kwargs,
+                          char *format, unsigned short mode_bits)
+{
+    static char *kwlist[] = {"follow_symlinks", NULL};
+    int follow_symlinks = 1;
+    int result;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, format, kwlist,
+                                     &follow_symlinks))
+        return NULL;
+    result = DirEntry_test_mode(self, follow_symlinks, mode_bits);
+    if (result == -1)
+        return NULL;
+    return PyBool_FromLong(result);
+}
+
+PyDoc_STRVAR(DirEntry_is_dir__doc__,
+"is_dir(follow_symlinks=True) -> bool\n\n\
+Return True if the entry is a directory, or a symbolic link pointing to\n\
+one if follow_symlinks is true.");
+
+static PyObject *
+DirEntry_is_dir(DirEntry *self, PyObject *args, PyObject *kwargs)
+{
+    return DirEntry_test_mode_method(self, args, kwargs, "|i:is_dir",
+                                     S_IFDIR);
+}
+
+PyDoc_STRVAR(DirEntry_is_file__doc__,
+"is_file(follow_symlinks=True) -> bool\n\n\
+Return True if the entry is a regular file, or a symbolic link pointing\n\
+to one if follow_symlinks is true.");
+
+static PyObject *
+DirEntry_is_file(DirEntry *self, PyObject *args, PyObject *kwargs)
+{
+    return DirEntry_test_mode_method(self, args, kwargs, "|i:is_file",
+                                     S_IFREG);
+}
+
+PyDoc_STRVAR(DirEntry_is_symlink__doc__,
+"is_symlink() -> bool\n\n\
+Return True if the entry is a symbolic link.");
+
+static PyObject *
+DirEntry_is_symlink(DirEntry *self, PyObject *noargs)
+{
+    int result = DirEntry_test_symlink(self);
+    if (result == -1)
+        return NULL;
+    return PyBool_FromLong(result);
+}
+
+PyDoc_STRVAR(DirEntry_stat__doc__,
+"stat(follow_symlinks=True) -> stat result\n\n\
+Return the stat result of the entry, following symbolic links unless\n\
+follow_symlinks is false.  The result is cached.");
+
+static PyObject *
+DirEntry_stat(DirEntry *self, PyObject *args, PyObject *kwargs)
+{
+    static char *kwlist[] = {"follow_symlinks", NULL};
+    int follow_symlinks = 1;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "|i:stat", kwlist,
+                                     &follow_symlinks))
+        return NULL;
+    return DirEntry_get_stat(self, follow_symlinks);
+}
+
+PyDoc_STRVAR(DirEntry_inode__doc__,
+"inode() -> int\n\n\
+Return the inode number of the entry.");
+
+static PyObject *
+DirEntry_inode(DirEntry *self, PyObject *noargs)
+{
+#ifdef HAVE_LARGEFILE_SUPPORT
+    return PyLong_FromLongLong((PY_LONG_LONG)self->d_ino);
+#else
+    return PyInt_FromLong((long)self->d_ino);
+#endif
+}
+
+static PyObject *
+DirEntry_repr(DirEntry *self)
+{
+    PyObject *name_repr, *result;
+
+    name_repr = PyObject_Repr(self->name);
+    if (name_repr == NULL)
+        return NULL;
+    result = PyString_FromFormat("<DirEntry %s>",
+                                 PyString_AS_STRING(name_repr));
+    Py_DECREF(name_repr);
+    return result;
+}
+
+static PyMemberDef DirEntry_members[] = {
+    {"name", T_OBJECT_EX, offsetof(DirEntry, name), READONLY,
+     "the entry's base filename, relative to the scandir() argument"},
+    {"path", T_OBJECT_EX, offsetof(DirEntry, path), READONLY,
+     "the entry's full path name, the scandir() argument joined to name"},
+    {NULL}
+};
+
+static PyMethodDef DirEntry_methods[] = {
+    {"is_dir", (PyCFunction)DirEntry_is_dir, METH_VARARGS | METH_KEYWORDS,
+     DirEntry_is_dir__doc__},
+    {"is_file", (PyCFunction)DirEntry_is_file, METH_VARARGS | METH_KEYWORDS,
+     DirEntry_is_file__doc__},
+    {"is_symlink", (PyCFunction)DirEntry_is_symlink, METH_NOARGS,
+     DirEntry_is_symlink__doc__},
+    {"stat", (PyCFunction)DirEntry_stat, METH_VARARGS | METH_KEYWORDS,
+     DirEntry_stat__doc__},
+    {"inode", (PyCFunction)DirEntry_inode, METH_NOARGS,
+     DirEntry_inode__doc__},
+    {NULL}
+};
+
+PyDoc_STRVAR(DirEntry__doc__,
+"An entry of a directory, as yielded by scandir().");
+
+static PyTypeObject DirEntryType = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    "posix.DirEntry",                           /* tp_name */
+    sizeof(DirEntry),                           /* tp_basicsize */
+    0,                                          /* tp_itemsize */
+    (destructor)DirEntry_dealloc,               /* tp_dealloc */
+    0,                                          /* tp_print */
+    0,                                          /* tp_getattr */
+    0,                                          /* tp_setattr */
+    0,                                          /* tp_compare */
+    (reprfunc)DirEntry_repr,                    /* tp_repr */
+    0,                                          /* tp_as_number */
+    0,                                          /* tp_as_sequence */
+    0,                                          /* tp_as_mapping */
+    0,                                          /* tp_hash */
+    0,                                          /* tp_call */
+    0,                                          /* tp_str */
+    0,                                          /* tp_getattro */
+    0,                                          /* tp_setattro */
+    0,                                          /* tp_as_buffer */
+    Py_TPFLAGS_DEFAULT,                         /* tp_flags */
+    DirEntry__doc__,                            /* tp_doc */
+    0,                                          /* tp_traverse */
+    0,                                          /* tp_clear */
+    0,                                          /* tp_richcompare */
+    0,                                          /* tp_weaklistoffset */
+    0,                                          /* tp_iter */
+    0,                                          /* tp_iternext */
+    DirEntry_methods,                           /* tp_methods */
+    DirEntry_members,                           /* tp_members */
+};
+
+typedef struct {
+    PyObject_HEAD
+    DIR *dirp;
+    char *path;         /* encoded with the file system encoding */
+    int arg_is_unicode;
+} ScandirIterator;
+
+static PyTypeObject ScandirIteratorType;
+
+#ifdef Py_USING_UNICODE
+/* Replace *obj by its decoded form if it can be decoded, like listdir()
+   does; otherwise keep the byte string. */
+static void
+_decode_filename(PyObject **obj)
+{
+    PyObject *w;
+
+    w = PyUnicode_FromEncodedObject(*obj, Py_FileSystemDefaultEncoding,
+                                    "strict");
+    if (w != NULL) {
+        Py_DECREF(*obj);
+        *obj = w;
+    }
+    else
+        PyErr_Clear();
+}
+#endif
+
+static PyObject *
+DirEntry_from_dirent(ScandirIterator *it, struct dirent *ep)
+{
+    DirEntry *entry;
+    Py_ssize_t name_len, dir_len;
+    int need_sep;
+    char *p;
+
+    entry = PyObject_New(DirEntry, &DirEntryType);
+    if (entry == NULL)
+        return NULL;
+    entry->name = entry->path = NULL;
+    entry->stat = entry->lstat = NULL;
+
+    name_len = NAMLEN(ep);
+    dir_len = strlen(it->path);
+    need_sep = dir_len > 0 && it->path[dir_len - 1] != '/';
+    entry->name = PyString_FromStringAndSize(ep->d_name, name_len);
+    if (entry->name == NULL)
+        goto error;
+    entry->path = PyString_FromStringAndSize(NULL,
+                                             dir_len + need_sep + name_len);
+    if (entry->path == NULL)
+        goto error;
+    p = PyString_AS_STRING(entry->path);
+    memcpy(p, it->path, dir_len);
+    p += dir_len;
+    if (need_sep)
+        *p++ = '/';
+    memcpy(p, ep->d_name, name_len);
+#ifdef Py_USING_UNICODE
+    if (it->arg_is_unicode) {
+        _decode_filename(&entry->name);
+        _decode_filename(&entry->path);
+    }
+#endif
+#ifdef HAVE_DIRENT_D_TYPE
+    entry->d_type = ep->d_type;
+#endif
+    entry->d_ino = ep->d_ino;
+    return (PyObject *)entry;
+
+error:
+    Py_DECREF(entry);
+    return NULL;
+}
+
+static void
+ScandirIterator_closedir(ScandirIterator *it)
+{
+    DIR *dirp = it->dirp;
+
+    if (dirp == NULL)
+        return;
+    it->dirp = NULL;
+    Py_BEGIN_ALLOW_THREADS
+    closedir(dirp);
+    Py_END_ALLOW_THREADS
+}
+
+static PyObject *
+ScandirIterator_iternext(ScandirIterator *it)
+{
+    struct dirent *ep;
+
+    if (it->dirp == NULL)
+        return NULL;
+    for (;;) {
+        errno = 0;
+        Py_BEGIN_ALLOW_THREADS
+        ep = readdir(it->dirp);
+        Py_END_ALLOW_THREADS
+        if (ep == NULL) {
+            if (errno != 0)
+                posix_error_with_filename(it->path);
+            ScandirIterator_closedir(it);
+            return NULL;
+        }
+        if (ep->d_name[0] == '.' &&
+            (NAMLEN(ep) == 1 ||
+             (ep->d_name[1] == '.' && NAMLEN(ep) == 2)))
+            continue;
+        return DirEntry_from_dirent(it, ep);
+    }
+}
+
+static void
+ScandirIterator_dealloc(ScandirIterator *it)
+{
+    ScandirIterator_closedir(it);
+    PyMem_Free(it->path);
+    PyObject_Del(it);
+}
+
+PyDoc_STRVAR(ScandirIterator_close__doc__,
+"close()\n\n\
+Close the directory; the iterator yields no more entries.");
+
+static PyObject *
+ScandirIterator_close(ScandirIterator *it, PyObject *noargs)
+{
+    ScandirIterator_closedir(it);
+    Py_RETURN_NONE;
+}
+
+static PyObject *
+ScandirIterator_enter(PyObject *self, PyObject *noargs)
+{
+    Py_INCREF(self);
+    return self;
+}
+
+static PyObject *
+ScandirIterator_exit(ScandirIterator *it, PyObject *args)
+{
+    ScandirIterator_closedir(it);
+    Py_RETURN_NONE;
+}
+
+static PyMethodDef ScandirIterator_methods[] = {
+    {"close", (PyCFunction)ScandirIterator_close, METH_NOARGS,
+     ScandirIterator_close__doc__},
+    {"__enter__", (PyCFunction)ScandirIterator_enter, METH_NOARGS, NULL},
+    {"__exit__", (PyCFunction)ScandirIterator_exit, METH_VARARGS, NULL},
+    {NULL}
+};
+
+static PyTypeObject ScandirIteratorType = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    "posix.ScandirIterator",                    /* tp_name */
+    sizeof(ScandirIterator),                    /* tp_basicsize */
+    0,                                          /* tp_itemsize */
+    (destructor)ScandirIterator_dealloc,        /* tp_dealloc */
+    0,                                          /* tp_print */
+    0,                                          /* tp_getattr */
+    0,                                          /* tp_setattr */
+    0,                                          /* tp_compare */
+    0,                                          /* tp_repr */
+    0,                                          /* tp_as_number */
+    0,                                          /* tp_as_sequence */
+    0,                                          /* tp_as_mapping */
+    0,                                          /* tp_hash */
+    0,                                          /* tp_call */
+    0,                                          /* tp_str */
+    0,                                          /* tp_getattro */
+    0,                                          /* tp_setattro */
+    0,                                          /* tp_as_buffer */
+    Py_TPFLAGS_DEFAULT,                         /* tp_flags */
+    0,                                          /* tp_doc */
+    0,                                          /* tp_traverse */
+    0,                                          /* tp_clear */
+    0,                                          /* tp_richcompare */
+    0,                                          /* tp_weaklistoffset */
+    PyObject_SelfIter,                          /* tp_iter */
+    (iternextfunc)ScandirIterator_iternext,     /* tp_iternext */
+    ScandirIterator_methods,                    /* tp_methods */
+};
+
+PyDoc_STRVAR(posix_scandir__doc__,
+"scandir(path='.') -> iterator of DirEntry objects\n\n\
+Return an iterator over the entries of the directory given by path,\n\
+in arbitrary order, excluding '.' and '..'.  The entries have the\n\
+attributes name and path and the methods is_dir(), is_file(),\n\
+is_symlink(), stat() and inode(); the file type is usually known from\n\
+the directory itself, without calling stat().");
+
+static PyObject *
+posix_scandir(PyObject *self, PyObject *args)
+{
+    ScandirIterator *it;
+    char *name = NULL;
+    int arg_is_unicode;
+    DIR *dirp;
+
+    if (!PyArg_ParseTuple(args, "|et:scandir",
+                          Py_FileSystemDefaultEncoding, &name))
+        return NULL;
+    arg_is_unicode = PyTuple_GET_SIZE(args) > 0 &&
+        PyUnicode_Check(PyTuple_GET_ITEM(args, 0));
+    if (name == NULL) {
+        name = PyMem_Malloc(2);
+        if (name == NULL)
+            return PyErr_NoMemory();
+        strcpy(name, ".");
+    }
+
+    Py_BEGIN_ALLOW_THREADS
+    dirp = opendir(name);
+    Py_END_ALLOW_THREADS
+    if (dirp == NULL)
+        return posix_error_with_allocated_filename(name);
+
+    it = PyObject_New(ScandirIterator, &ScandirIteratorType);
+    if (it == NULL) {
+        Py_BEGIN_ALLOW_THREADS
+        closedir(dirp);
+        Py_END_ALLOW_THREADS
+        PyMem_Free(name);
+        return NULL;
+    }
+    it->dirp = dirp;
+    it->path = name;
+    it->arg_is_unicode = arg_is_unicode;
+    return (PyObject *)it;
+}
+#endif /* !MS_WINDOWS && !PYOS_OS2 */
+
+
 static PyMethodDef posix_methods[] = {
     {"access",          posix_access, METH_VARARGS, posix_access__doc__},
 #ifdef HAVE_TTYNAME
@@ -8829,6 +9530,9 @@ static PyMethodDef posix_methods[] = {
     {"link",            posix_link, METH_VARARGS, posix_link__doc__},
 #endif /* HAVE_LINK */
     {"listdir",         posix_listdir, METH_VARARGS, posix_listdir__doc__},
+#ifdef HAVE_POSIX_SCANDIR
+    {"scandir",         posix_scandir, METH_VARARGS, posix_scandir__doc__},
+#endif
     {"lstat",           posix_lstat, METH_VARARGS, posix_lstat__doc__},
     {"mkdir",           posix_mkdir, METH_VARARGS, posix_mkdir__doc__},
 #ifdef HAVE_NICE
@@ -8997,6 +9701,13 @@ static PyMethodDef posix_methods[] = {
     {"lseek",           posix_lseek, METH_VARARGS, posix_lseek__doc__},
     {"read",            posix_read, METH_VARARGS, posix_read__doc__},
     {"write",           posix_write, METH_VARARGS, posix_write__doc__},
+#ifdef HAVE_SENDFILE
+    {"sendfile",        posix_sendfile, METH_VARARGS, posix_sendfile__doc__},
+#endif
+#ifdef HAVE_COPY_FILE_RANGE
+    {"copy_file_range", posix_copy_file_range, METH_VARARGS,
+     posix_copy_file_range__doc__},
+#endif
     {"fstat",           posix_fstat, METH_VARARGS, posix_fstat__doc__},
     {"fdopen",          posix_fdopen, METH_VARARGS, posix_fdopen__doc__},
     {"isatty",          posix_isatty, METH_VARARGS, posix_isatty__doc__},
@@ -9432,6 +10143,12 @@ INITFUNC(void)
     Py_INCREF(PyExc_OSError);
     PyModule_AddObject(m, "error", PyExc_OSError);
 
+#ifdef HAVE_POSIX_SCANDIR
+    if (PyType_Ready(&ScandirIteratorType) < 0 ||
+        PyType_Ready(&DirEntryType) < 0)
+        return;
+#endif
+
 #ifdef HAVE_PUTENV
     if (posix_putenv_garbage == NULL)
         posix_putenv_garbage = PyDict_New();
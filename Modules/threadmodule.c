@@ -40,23 +40,116 @@ lock_dealloc(lockobject *self)
     PyObject_Del(self);
 }
 
+/* Current time in seconds, used to compute how much of a timeout is left
+   after a wait was interrupted by a signal. */
+static double
+lock_gettime(void)
+{
+#ifdef HAVE_GETTIMEOFDAY
+    struct timeval t;
+#ifdef GETTIMEOFDAY_NO_TZ
+    if (gettimeofday(&t) == 0)
+        return (double)t.tv_sec + t.tv_usec*0.000001;
+#else /* !GETTIMEOFDAY_NO_TZ */
+    if (gettimeofday(&t, (struct timezone *)NULL) == 0)
+        return (double)t.tv_sec + t.tv_usec*0.000001;
+#endif /* !GETTIMEOFDAY_NO_TZ */
+#endif /* !HAVE_GETTIMEOFDAY */
+    return (double)time(NULL);
+}
+
+/* Helper to acquire a lock with a timeout in microseconds, a negative value
+   meaning no timeout.  If the wait is interrupted by a signal, the pending
+   signal handlers are run and the wait is resumed for the rest of the
+   timeout; PY_LOCK_INTR is returned with an exception set if a handler
+   raised. */
+static PyLockStatus
+acquire_timed(PyThread_type_lock lock, PY_TIMEOUT_T microseconds)
+{
+    PyLockStatus r;
+    double endtime = 0;
+
+    if (microseconds > 0)
+        endtime = lock_gettime() + microseconds * 1e-6;
+
+    do {
+        /* first a simple non-blocking try without releasing the GIL */
+        r = PyThread_acquire_lock_timed(lock, 0, 0);
+        if (r == PY_LOCK_FAILURE && microseconds != 0) {
+            Py_BEGIN_ALLOW_THREADS
+            r = PyThread_acquire_lock_timed(lock, microseconds, 1);
+            Py_END_ALLOW_THREADS
+        }
+
+        if (r == PY_LOCK_INTR) {
+            /* Run signal handlers if we were interrupted.  Propagate
+             * exceptions from signal handlers, such as KeyboardInterrupt, by
+             * passing up PY_LOCK_INTR.  */
+            if (Py_MakePendingCalls() < 0)
+                return PY_LOCK_INTR;
+
+            /* If we're using a timeout, recompute the timeout after processing
+             * signals, since those can take time.  */
+            if (microseconds > 0) {
+                microseconds = (PY_TIMEOUT_T)
+                    ((endtime - lock_gettime()) * 1e6);
+
+                /* Check for negative values, since those mean block forever.
+                 */
+                if (microseconds <= 0)
+                    r = PY_LOCK_FAILURE;
+            }
+        }
+    } while (r == PY_LOCK_INTR);  /* Retry if we were interrupted. */
+
+    return r;
+}
+
 static PyObject *
-lock_PyThread_acquire_lock(lockobject *self, PyObject *args)
+lock_PyThread_acquire_lock(lockobject *self, PyObject *args, PyObject *kwds)
 {
-    int i = 1;
+    char *kwlist[] = {"blocking", "timeout", NULL};
+    int blocking = 1;
+    double timeout = -1;
+    PY_TIMEOUT_T microseconds;
+    PyLockStatus r;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds, "|id:acquire", kwlist,
+                                     &blocking, &timeout))
+        return NULL;
 
-    if (!PyArg_ParseTuple(args, "|i:acquire", &i))
+    if (!blocking && timeout != -1) {
+        PyErr_SetString(PyExc_ValueError, "can't specify a timeout "
+                        "for a non-blocking call");
         return NULL;
+    }
+    if (timeout < 0 && timeout != -1) {
+        PyErr_SetString(PyExc_ValueError, "timeout value must be positive");
+        return NULL;
+    }
+    if (!blocking)
+        microseconds = 0;
+    else if (timeout == -1)
+        microseconds = -1;
+    else {
+        timeout *= 1e6;
+        if (timeout >= PY_TIMEOUT_MAX) {
+            PyErr_SetString(PyExc_OverflowError,
+                            "timeout value is too large");
+            return NULL;
+        }
+        microseconds = (PY_TIMEOUT_T) timeout;
+    }
 
-    Py_BEGIN_ALLOW_THREADS
-    i = PyThread_acquire_lock(self->lock_lock, i);
-    Py_END_ALLOW_THREADS
+    r = acquire_timed(self->lock_lock, microseconds);
+    if (r == PY_LOCK_INTR)
+        return NULL;
 
-    return PyBool_FromLong((long)i);
+    return PyBool_FromLong(r == PY_LOCK_ACQUIRED);
 }
 
 PyDoc_STRVAR(acquire_doc,
-"acquire([wait]) -> bool\n\
+"acquire([blocking[, timeout]]) -> bool\n\
 (acquire_lock() is an obsolete synonym)\n\
 \n\
 Lock the lock.  Without argument, this blocks if the lock is already\n\
@@ -64,7 +157,10 @@ locked (even by the same thread), waiting for another thread to release\n\
 the lock, and return True once the lock is acquired.\n\
 With an argument, this will only block if the argument is true,\n\
 and the return value reflects whether the lock is acquired.\n\
-The blocking operation is not interruptible.");
+If timeout is given and positive, this blocks for at most timeout\n\
+seconds and returns False if the lock could not be acquired in time.\n\
+The blocking operation can be interrupted by signal handlers that\n\
+raise an exception, such as KeyboardInterrupt.");
 
 static PyObject *
 lock_PyThread_release_lock(lockobject *self)
@@ -107,9 +203,9 @@ Return whether the lock is in the locked state.");
 
 static PyMethodDef lock_methods[] = {
     {"acquire_lock", (PyCFunction)lock_PyThread_acquire_lock,
-     METH_VARARGS, acquire_doc},
+     METH_VARARGS | METH_KEYWORDS, acquire_doc},
     {"acquire",      (PyCFunction)lock_PyThread_acquire_lock,
-     METH_VARARGS, acquire_doc},
+     METH_VARARGS | METH_KEYWORDS, acquire_doc},
     {"release_lock", (PyCFunction)lock_PyThread_release_lock,
      METH_NOARGS, release_doc},
     {"release",      (PyCFunction)lock_PyThread_release_lock,
@@ -119,7 +215,7 @@ static PyMethodDef lock_methods[] = {
     {"locked",       (PyCFunction)lock_locked_lock,
      METH_NOARGS, locked_doc},
     {"__enter__",    (PyCFunction)lock_PyThread_acquire_lock,
-     METH_VARARGS, acquire_doc},
+     METH_VARARGS | METH_KEYWORDS, acquire_doc},
     {"__exit__",    (PyCFunction)lock_PyThread_release_lock,
      METH_VARARGS, release_doc},
     {NULL}              /* sentinel */
@@ -919,6 +1015,11 @@ initthread(void)
     Py_INCREF(&Locktype);
     PyDict_SetItemString(d, "LockType", (PyObject *)&Locktype);
 
+    /* The maximum timeout accepted by lock.acquire(), in seconds */
+    if (PyModule_AddObject(m, "TIMEOUT_MAX", PyFloat_FromDouble(
+            (double)(PY_TIMEOUT_MAX / 1000000))) < 0)
+        return;
+
     Py_INCREF(&localtype);
     if (PyModule_AddObject(m, "_local", (PyObject *)&localtype) < 0)
         return;
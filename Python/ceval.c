@@ -233,36 +233,38 @@ PyEval_GetCallStats(PyObject *self)
 #endif
 #include "pythread.h"
 
-static PyThread_type_lock interpreter_lock = 0; /* This is the GIL */
 static PyThread_type_lock pending_lock = 0; /* for pending calls */
 static long main_thread = 0;
 
+#include "ceval_gil.h"
+
 int
 PyEval_ThreadsInitialized(void)
 {
-    return interpreter_lock != 0;
+    return gil_created();
 }
 
 void
 PyEval_InitThreads(void)
 {
-    if (interpreter_lock)
+    if (gil_created())
         return;
-    interpreter_lock = PyThread_allocate_lock();
-    PyThread_acquire_lock(interpreter_lock, 1);
+    create_gil();
+    take_gil(PyThreadState_GET());
     main_thread = PyThread_get_thread_ident();
 }
 
 void
 PyEval_AcquireLock(void)
 {
-    PyThread_acquire_lock(interpreter_lock, 1);
+    take_gil(_PyThreadState_Current);
 }
 
 void
 PyEval_ReleaseLock(void)
 {
-    PyThread_release_lock(interpreter_lock);
+    /* This function must succeed when the current thread state is NULL */
+    drop_gil(_PyThreadState_Current);
 }
 
 void
@@ -271,8 +273,8 @@ PyEval_AcquireThread(PyThreadState *tstate)
     if (tstate == NULL)
         Py_FatalError("PyEval_AcquireThread: NULL new thread state");
     /* Check someone has called PyEval_InitThreads() to create the lock */
-    assert(interpreter_lock);
-    PyThread_acquire_lock(interpreter_lock, 1);
+    assert(gil_created());
+    take_gil(tstate);
     if (PyThreadState_Swap(tstate) != NULL)
         Py_FatalError(
             "PyEval_AcquireThread: non-NULL old thread state");
@@ -285,7 +287,7 @@ PyEval_ReleaseThread(PyThreadState *tstate)
         Py_FatalError("PyEval_ReleaseThread: NULL thread state");
     if (PyThreadState_Swap(NULL) != tstate)
         Py_FatalError("PyEval_ReleaseThread: wrong thread state");
-    PyThread_release_lock(interpreter_lock);
+    drop_gil(tstate);
 }
 
 /* This function is called from PyOS_AfterFork to ensure that newly
@@ -299,20 +301,20 @@ PyEval_ReInitThreads(void)
     PyObject *threading, *result;
     PyThreadState *tstate;
 
-    if (!interpreter_lock)
+    if (!gil_created())
         return;
+    recreate_gil();
     /*XXX Can't use PyThread_free_lock here because it does too
       much error-checking.  Doing this cleanly would require
       adding a new function to each thread_*.h.  Instead, just
       create a new lock and waste a little bit of memory */
-    interpreter_lock = PyThread_allocate_lock();
     pending_lock = PyThread_allocate_lock();
-    PyThread_acquire_lock(interpreter_lock, 1);
+    tstate = PyThreadState_GET();
+    take_gil(tstate);
     main_thread = PyThread_get_thread_ident();
 
     /* Update the threading module with the new state.
      */
-    tstate = PyThreadState_GET();
     threading = PyMapping_GetItemString(tstate->interp->modules,
                                         "threading");
     if (threading == NULL) {
@@ -340,8 +342,8 @@ PyEval_SaveThread(void)
     if (tstate == NULL)
         Py_FatalError("PyEval_SaveThread: NULL tstate");
 #ifdef WITH_THREAD
-    if (interpreter_lock)
-        PyThread_release_lock(interpreter_lock);
+    if (gil_created())
+        drop_gil(tstate);
 #endif
     return tstate;
 }
@@ -352,9 +354,9 @@ PyEval_RestoreThread(PyThreadState *tstate)
     if (tstate == NULL)
         Py_FatalError("PyEval_RestoreThread: NULL tstate");
 #ifdef WITH_THREAD
-    if (interpreter_lock) {
+    if (gil_created()) {
         int err = errno;
-        PyThread_acquire_lock(interpreter_lock, 1);
+        take_gil(tstate);
         errno = err;
     }
 #endif
@@ -1008,19 +1010,21 @@ PyEval_EvalFrameEx(PyFrameObject *f, int throwflag)
                     _Py_Ticker = 0;
             }
 #ifdef WITH_THREAD
-            if (interpreter_lock) {
-                /* Give another thread a chance */
+            if (gil_created()) {
+                if (GIL_DROP_REQUESTED()) {
+                    /* Give another thread a chance */
 
-                if (PyThreadState_Swap(NULL) != tstate)
-                    Py_FatalError("ceval: tstate mix-up");
-                PyThread_release_lock(interpreter_lock);
+                    if (PyThreadState_Swap(NULL) != tstate)
+                        Py_FatalError("ceval: tstate mix-up");
+                    drop_gil(tstate);
 
-                /* Other threads may run now */
+                    /* Other threads may run now */
 
-                PyThread_acquire_lock(interpreter_lock, 1);
+                    take_gil(tstate);
 
-                if (PyThreadState_Swap(tstate) != NULL)
-                    Py_FatalError("ceval: orphan tstate");
+                    if (PyThreadState_Swap(tstate) != NULL)
+                        Py_FatalError("ceval: orphan tstate");
+                }
 
                 /* Check for thread interrupts */
 
@@ -134,6 +134,7 @@ managed by compiler_enter_scope() and compiler_exit_scope().
 
 struct compiler {
     const char *c_filename;
+    PyObject *c_filename_obj;    /* c_filename, shared by all code objects */
     struct symtable *c_st;
     PyFutureFeatures *c_future; /* pointer to module's __future__ */
     PyCompilerFlags *c_flags;
@@ -268,6 +269,9 @@ PyAST_Compile(mod_ty mod, const char *filename, PyCompilerFlags *flags,
     if (!compiler_init(&c))
         return NULL;
     c.c_filename = filename;
+    c.c_filename_obj = PyString_FromString(filename);
+    if (c.c_filename_obj == NULL)
+        goto finally;
     c.c_arena = arena;
     c.c_future = PyFuture_FromAST(mod, filename);
     if (c.c_future == NULL)
@@ -319,6 +323,7 @@ compiler_free(struct compiler *c)
         PySymtable_Free(c->c_st);
     if (c->c_future)
         PyObject_Free(c->c_future);
+    Py_XDECREF(c->c_filename_obj);
     Py_DECREF(c->c_stack);
 }
 
@@ -3872,9 +3877,8 @@ makecode(struct compiler *c, struct assembler *a)
     freevars = dict_keys_inorder(c->u->u_freevars, PyTuple_Size(cellvars));
     if (!freevars)
         goto error;
-    filename = PyString_FromString(c->c_filename);
-    if (!filename)
-        goto error;
+    filename = c->c_filename_obj;
+    Py_INCREF(filename);
 
     nlocals = PyDict_Size(c->u->u_varnames);
     flags = compute_code_flags(c);
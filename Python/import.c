@@ -77,9 +77,15 @@ typedef unsigned short mode_t;
        Python 2.7a0  62191 (introduce SETUP_WITH)
        Python 2.7a0  62201 (introduce BUILD_SET)
        Python 2.7a0  62211 (introduce MAP_ADD and SET_ADD)
+       Python 2.7.10 62221 (marshal version 3: references to shared objects)
 .
 */
-#define MAGIC (62211 | ((long)'\r'<<16) | ((long)'\n'<<24))
+#define MAGIC (62221 | ((long)'\r'<<16) | ((long)'\n'<<24))
+
+/* The marshal format of the .pyc files for the current magic number.  It
+   is newer than Py_MARSHAL_VERSION, the default of the marshal module,
+   whose output other Python 2.7 releases must be able to read. */
+#define PYC_MARSHAL_VERSION 3
 
 /* Magic word as global; note that _PyImport_Init() can change the
    value of this global to accommodate for alterations of how the
@@ -271,6 +277,9 @@ _PyImport_Fini(void)
 {
     Py_XDECREF(extensions);
     extensions = NULL;
+#ifdef HAVE_DIRCACHE
+    Py_CLEAR(dircache);
+#endif
     PyMem_DEL(_PyImport_Filetab);
     _PyImport_Filetab = NULL;
 }
@@ -926,10 +935,10 @@ write_compiled_module(PyCodeObject *co, char *cpathname, struct stat *srcstat, t
                 "# can't create %s\n", cpathname);
         return;
     }
-    PyMarshal_WriteLongToFile(pyc_magic, fp, Py_MARSHAL_VERSION);
+    PyMarshal_WriteLongToFile(pyc_magic, fp, PYC_MARSHAL_VERSION);
     /* First write a 0 for mtime */
-    PyMarshal_WriteLongToFile(0L, fp, Py_MARSHAL_VERSION);
-    PyMarshal_WriteObjectToFile((PyObject *)co, fp, Py_MARSHAL_VERSION);
+    PyMarshal_WriteLongToFile(0L, fp, PYC_MARSHAL_VERSION);
+    PyMarshal_WriteObjectToFile((PyObject *)co, fp, PYC_MARSHAL_VERSION);
     if (fflush(fp) != 0 || ferror(fp)) {
         if (Py_VerboseFlag)
             PySys_WriteStderr("# can't write %s\n", cpathname);
@@ -941,7 +950,7 @@ write_compiled_module(PyCodeObject *co, char *cpathname, struct stat *srcstat, t
     /* Now write the true mtime (as a 32-bit field) */
     fseek(fp, 4L, 0);
     assert(mtime <= 0xFFFFFFFF);
-    PyMarshal_WriteLongToFile((long)mtime, fp, Py_MARSHAL_VERSION);
+    PyMarshal_WriteLongToFile((long)mtime, fp, PYC_MARSHAL_VERSION);
     fflush(fp);
     fclose(fp);
     if (Py_VerboseFlag)
@@ -1288,6 +1297,116 @@ static int case_ok(char *, Py_ssize_t, Py_ssize_t, char *);
 static int find_init_module(char *); /* Forward */
 static struct filedescr importhookdescr = {"", "", IMP_HOOK};
 
+/* Cache of directory listings, so that find_module() only probes for
+   files which actually exist.  It maps an absolute directory name to a
+   tuple (mtime, set of entry names); an entry is trusted for as long as
+   the directory's modification time doesn't change.  Listings of
+   directories modified within the last couple of seconds aren't cached,
+   because a later change in the same second wouldn't alter the mtime.
+   imp.invalidate_caches() empties the cache. */
+
+#if defined(HAVE_DIRENT_H) && defined(HAVE_STAT) && \
+    !defined(MS_WINDOWS) && !defined(PYOS_OS2) && !defined(RISCOS)
+#define HAVE_DIRCACHE
+#include <sys/types.h>
+#include <dirent.h>
+
+static PyObject *dircache = NULL;
+
+/* Return a new reference to the set of names in directory dirname, or
+   NULL if the directory can't be cached.  Never sets an exception. */
+static PyObject *
+dircache_get(const char *dirname)
+{
+    struct stat statbuf;
+    PyObject *entry, *names, *name;
+    DIR *dirp;
+    struct dirent *dp;
+
+    if (dirname[0] != SEP || Py_GETENV("PYTHONCASEOK") != NULL)
+        return NULL;
+    if (stat(dirname, &statbuf) != 0 || !S_ISDIR(statbuf.st_mode))
+        return NULL;
+    if (dircache == NULL) {
+        dircache = PyDict_New();
+        if (dircache == NULL)
+            goto error;
+    }
+    entry = PyDict_GetItemString(dircache, dirname);
+    if (entry != NULL) {
+        if (PyInt_AS_LONG(PyTuple_GET_ITEM(entry, 0)) ==
+            (long)statbuf.st_mtime) {
+            names = PyTuple_GET_ITEM(entry, 1);
+            Py_INCREF(names);
+            return names;
+        }
+        if (PyDict_DelItemString(dircache, dirname) < 0)
+            goto error;
+    }
+    if ((long)statbuf.st_mtime >= (long)time(NULL) - 1)
+        return NULL;
+
+    dirp = opendir(dirname);
+    if (dirp == NULL)
+        return NULL;
+    names = PySet_New(NULL);
+    if (names == NULL) {
+        (void)closedir(dirp);
+        goto error;
+    }
+    while ((dp = readdir(dirp)) != NULL) {
+        name = PyString_FromString(dp->d_name);
+        if (name == NULL || PySet_Add(names, name) < 0) {
+            Py_XDECREF(name);
+            Py_DECREF(names);
+            (void)closedir(dirp);
+            goto error;
+        }
+        Py_DECREF(name);
+    }
+    (void)closedir(dirp);
+    entry = Py_BuildValue("(lO)", (long)statbuf.st_mtime, names);
+    if (entry == NULL || PyDict_SetItemString(dircache, dirname, entry) < 0) {
+        Py_XDECREF(entry);
+        Py_DECREF(names);
+        goto error;
+    }
+    Py_DECREF(entry);
+    return names;
+
+error:
+    PyErr_Clear();
+    return NULL;
+}
+
+/* Return 0 if filename is known not to be in the listing, else 1. */
+static int
+dircache_contains(PyObject *names, const char *filename)
+{
+    PyObject *name;
+    int found;
+
+    if (names == NULL)
+        return 1;
+    name = PyString_FromString(filename);
+    if (name == NULL) {
+        PyErr_Clear();
+        return 1;
+    }
+    found = PySet_Contains(names, name);
+    Py_DECREF(name);
+    if (found < 0) {
+        PyErr_Clear();
+        return 1;
+    }
+    return found;
+}
+
+#else
+#define dircache_get(dirname) NULL
+#define dircache_contains(names, filename) 1
+#endif /* HAVE_DIRCACHE */
+
 static struct filedescr *
 find_module(char *fullname, char *subname, PyObject *path, char *buf,
             size_t buflen, FILE **p_fp, PyObject **p_loader)
@@ -1298,6 +1417,7 @@ find_module(char *fullname, char *subname, PyObject *path, char *buf,
     char *filemode;
     FILE *fp = NULL;
     PyObject *path_hooks, *path_importer_cache;
+    PyObject *listing;
     static struct filedescr fd_frozen = {"", "", PY_FROZEN};
     static struct filedescr fd_builtin = {"", "", C_BUILTIN};
     static struct filedescr fd_package = {"", "", PKG_DIRECTORY};
@@ -1483,6 +1603,7 @@ find_module(char *fullname, char *subname, PyObject *path, char *buf,
         }
         /* no hook was found, use builtin import */
 
+        listing = len > 0 ? dircache_get(buf) : NULL;
         if (len > 0 && buf[len-1] != SEP
 #ifdef ALTSEP
             && buf[len-1] != ALTSEP
@@ -1494,9 +1615,11 @@ find_module(char *fullname, char *subname, PyObject *path, char *buf,
 
         /* Check for package import (buf holds a directory name,
            and there's an __init__ module in that directory */
-        if (isdir(buf) &&         /* it's an existing directory */
+        if (dircache_contains(listing, name) &&
+            isdir(buf) &&         /* it's an existing directory */
             case_ok(buf, len, namelen, name)) { /* case matches */
             if (find_init_module(buf)) { /* and has __init__.py */
+                Py_XDECREF(listing);
                 Py_XDECREF(copy);
                 PyMem_FREE(name);
                 return &fd_package;
@@ -1508,6 +1631,7 @@ find_module(char *fullname, char *subname, PyObject *path, char *buf,
                     MAXPATHLEN, buf);
                 if (PyErr_Warn(PyExc_ImportWarning,
                                warnstr)) {
+                    Py_XDECREF(listing);
                     Py_XDECREF(copy);
                     goto error_exit;
                 }
@@ -1548,6 +1672,8 @@ find_module(char *fullname, char *subname, PyObject *path, char *buf,
             }
 #endif /* PYOS_OS2 */
             strcpy(buf+len, fdp->suffix);
+            if (!dircache_contains(listing, buf+len-namelen))
+                continue;
             if (Py_VerboseFlag > 1)
                 PySys_WriteStderr("# trying %s\n", buf);
             filemode = fdp->mode;
@@ -1577,6 +1703,7 @@ find_module(char *fullname, char *subname, PyObject *path, char *buf,
             saved_buf = NULL;
         }
 #endif
+        Py_XDECREF(listing);
         Py_XDECREF(copy);
         if (fp != NULL)
             break;
@@ -1803,6 +1930,7 @@ find_init_module(char *buf)
     size_t i = save_len;
     char *pname;  /* pointer to start of __init__ */
     struct stat statbuf;
+    PyObject *listing;
 
 /*      For calling case_ok(buf, len, namelen, name):
  *      /a/b/c/d/e/f/g/h/i/j/k/some_long_module_name.py\0
@@ -1814,30 +1942,34 @@ find_init_module(char *buf)
  */
     if (save_len + 13 >= MAXPATHLEN)
         return 0;
+    listing = dircache_get(buf);
     buf[i++] = SEP;
     pname = buf + i;
     strcpy(pname, "__init__.py");
-    if (stat(buf, &statbuf) == 0) {
+    if (dircache_contains(listing, pname) && stat(buf, &statbuf) == 0) {
         if (case_ok(buf,
                     save_len + 9,               /* len("/__init__") */
                 8,                              /* len("__init__") */
                 pname)) {
             buf[save_len] = '\0';
+            Py_XDECREF(listing);
             return 1;
         }
     }
     i += strlen(pname);
     strcpy(buf+i, Py_OptimizeFlag ? "o" : "c");
-    if (stat(buf, &statbuf) == 0) {
+    if (dircache_contains(listing, pname) && stat(buf, &statbuf) == 0) {
         if (case_ok(buf,
                     save_len + 9,               /* len("/__init__") */
                 8,                              /* len("__init__") */
                 pname)) {
             buf[save_len] = '\0';
+            Py_XDECREF(listing);
             return 1;
         }
     }
     buf[save_len] = '\0';
+    Py_XDECREF(listing);
     return 0;
 }
 
@@ -2650,6 +2782,37 @@ add_submodule(PyObject *mod, PyObject *submod, char *fullname, char *subname,
     return 1;
 }
 
+/* Support for -X importtime: the time taken by each import, in
+   microseconds, is written to stderr once it completes.  Imports done
+   while another import runs are indented below it, and their time is
+   subtracted from its "self" time. */
+static int import_time_level = 0;
+static double import_time_accumulated = 0.0;
+
+static double
+import_time_now(void)
+{
+#if defined(MS_WINDOWS)
+    static LARGE_INTEGER freq;
+    LARGE_INTEGER now;
+
+    if (freq.QuadPart == 0 && !QueryPerformanceFrequency(&freq))
+        return 0.0;
+    QueryPerformanceCounter(&now);
+    return (double)now.QuadPart * 1e6 / (double)freq.QuadPart;
+#elif defined(HAVE_GETTIMEOFDAY)
+    struct timeval tv;
+#ifdef GETTIMEOFDAY_NO_TZ
+    gettimeofday(&tv);
+#else
+    gettimeofday(&tv, (struct timezone *)NULL);
+#endif
+    return (double)tv.tv_sec * 1e6 + (double)tv.tv_usec;
+#else
+    return (double)time(NULL) * 1e6;
+#endif
+}
+
 static PyObject *
 import_submodule(PyObject *mod, char *subname, char *fullname)
 {
@@ -2669,6 +2832,7 @@ import_submodule(PyObject *mod, char *subname, char *fullname)
         char *buf;
         struct filedescr *fdp;
         FILE *fp = NULL;
+        double t0 = 0.0, accumulated = 0.0, elapsed;
 
         if (mod == Py_None)
             path = NULL;
@@ -2686,11 +2850,28 @@ import_submodule(PyObject *mod, char *subname, char *fullname)
             return PyErr_NoMemory();
         }
         buf[0] = '\0';
+        if (Py_ImportTimeFlag) {
+            static int header = 1;
+            if (header) {
+                fputs("import time: self [us] | cumulative | "
+                      "imported package\n", stderr);
+                header = 0;
+            }
+            accumulated = import_time_accumulated;
+            import_time_accumulated = 0.0;
+            import_time_level++;
+            t0 = import_time_now();
+        }
         fdp = find_module(fullname, subname, path, buf, MAXPATHLEN+1,
                           &fp, &loader);
         Py_XDECREF(path);
         if (fdp == NULL) {
             PyMem_FREE(buf);
+            if (Py_ImportTimeFlag) {
+                /* Charge a failed search to the importing module */
+                import_time_level--;
+                import_time_accumulated = accumulated;
+            }
             if (!PyErr_ExceptionMatches(PyExc_ImportError))
                 return NULL;
             PyErr_Clear();
@@ -2706,6 +2887,14 @@ import_submodule(PyObject *mod, char *subname, char *fullname)
             m = NULL;
         }
         PyMem_FREE(buf);
+        if (Py_ImportTimeFlag) {
+            elapsed = import_time_now() - t0;
+            import_time_level--;
+            fprintf(stderr, "import time: %9ld | %10ld | %*s%s\n",
+                    (long)(elapsed - import_time_accumulated),
+                    (long)elapsed, import_time_level * 2, "", fullname);
+            import_time_accumulated = accumulated + elapsed;
+        }
     }
 
     return m;
@@ -3207,6 +3396,16 @@ imp_reload(PyObject *self, PyObject *v)
     return PyImport_ReloadModule(v);
 }
 
+static PyObject *
+imp_invalidate_caches(PyObject *self, PyObject *noargs)
+{
+#ifdef HAVE_DIRCACHE
+    if (dircache != NULL)
+        PyDict_Clear(dircache);
+#endif
+    Py_RETURN_NONE;
+}
+
 
 /* Doc strings */
 
@@ -3245,6 +3444,11 @@ PyDoc_STRVAR(doc_new_module,
 Create a new module.  Do not enter it in sys.modules.\n\
 The module name must include the full package name, if any.");
 
+PyDoc_STRVAR(doc_invalidate_caches,
+"invalidate_caches() -> None\n\
+Forget the directory listings cached by find_module().  Call this after\n\
+adding modules to a directory whose modification time doesn't change.");
+
 PyDoc_STRVAR(doc_lock_held,
 "lock_held() -> boolean\n\
 Return True if the import lock is currently held, else False.\n\
@@ -3269,6 +3473,8 @@ static PyMethodDef imp_methods[] = {
     {"get_suffixes", imp_get_suffixes, METH_NOARGS,  doc_get_suffixes},
     {"load_module",      imp_load_module,  METH_VARARGS, doc_load_module},
     {"new_module",       imp_new_module,   METH_VARARGS, doc_new_module},
+    {"invalidate_caches", imp_invalidate_caches, METH_NOARGS,
+     doc_invalidate_caches},
     {"lock_held",        imp_lock_held,    METH_NOARGS,  doc_lock_held},
     {"acquire_lock", imp_acquire_lock, METH_NOARGS,  doc_acquire_lock},
     {"release_lock", imp_release_lock, METH_NOARGS,  doc_release_lock},
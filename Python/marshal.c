@@ -43,6 +43,12 @@
 #define TYPE_UNKNOWN            '?'
 #define TYPE_SET                '<'
 #define TYPE_FROZENSET          '>'
+#define TYPE_REF                'r'
+
+/* In version 3 and above, this bit of a type code says that the object is
+   entered in the table of references when read, so that a later TYPE_REF
+   can refer back to it. */
+#define FLAG_REF                0x80
 
 #define WFERR_OK 0
 #define WFERR_UNMARSHALLABLE 1
@@ -58,6 +64,7 @@ typedef struct {
     char *ptr;
     char *end;
     PyObject *strings; /* dict on marshal, list on unmarshal */
+    PyObject *refs; /* dict on marshal, list on unmarshal */
     int version;
 } WFILE;
 
@@ -131,7 +138,6 @@ w_long64(long x, WFILE *p)
 #if SIZEOF_SIZE_T > 4
 # define W_SIZE(n, p)  do {                     \
         if ((n) > SIZE32_MAX) {                 \
-            (p)->depth--;                       \
             (p)->error = WFERR_UNMARSHALLABLE;  \
             return;                             \
         }                                       \
@@ -160,13 +166,17 @@ w_pstring(const char *s, Py_ssize_t n, WFILE *p)
 #endif
 #define PyLong_MARSHAL_RATIO (PyLong_SHIFT / PyLong_MARSHAL_SHIFT)
 
+#define W_TYPE(t, p) do { \
+    w_byte((t) | flag, (p)); \
+} while(0)
+
 static void
-w_PyLong(const PyLongObject *ob, WFILE *p)
+w_PyLong(const PyLongObject *ob, char flag, WFILE *p)
 {
     Py_ssize_t i, j, n, l;
     digit d;
 
-    w_byte(TYPE_LONG, p);
+    W_TYPE(TYPE_LONG, p);
     if (Py_SIZE(ob) == 0) {
         w_long((long)0, p);
         return;
@@ -182,7 +192,6 @@ w_PyLong(const PyLongObject *ob, WFILE *p)
         l++;
     } while (d != 0);
     if (l > SIZE32_MAX) {
-        p->depth--;
         p->error = WFERR_UNMARSHALLABLE;
         return;
     }
@@ -203,10 +212,63 @@ w_PyLong(const PyLongObject *ob, WFILE *p)
     } while (d != 0);
 }
 
+/* Write a reference to v if it was written before, and return 1.
+   Otherwise enter v in the table of references, setting FLAG_REF in *flag,
+   and return 0 so that v is written in full.  The table maps the address of
+   each object to its index; the addresses stay valid while writing, since
+   every object written is kept alive by the object passed to w_object(). */
+static int
+w_ref(PyObject *v, char *flag, WFILE *p)
+{
+    PyObject *id, *idx;
+    Py_ssize_t size;
+    int ok;
+
+    if (p->version < 3 || p->refs == NULL)
+        return 0; /* not writing object references */
+
+    /* if it has only one reference, it definitely isn't shared */
+    if (Py_REFCNT(v) == 1)
+        return 0;
+
+    id = PyLong_FromVoidPtr(v);
+    if (id == NULL)
+        goto err;
+    idx = PyDict_GetItem(p->refs, id);
+    if (idx != NULL) {
+        /* write the reference index to the stream */
+        Py_DECREF(id);
+        w_byte(TYPE_REF, p);
+        w_long(PyInt_AS_LONG(idx), p);
+        return 1;
+    }
+    size = PyDict_Size(p->refs);
+    /* we don't support long indices */
+    if (size >= SIZE32_MAX) {
+        Py_DECREF(id);
+        goto err;
+    }
+    idx = PyInt_FromSsize_t(size);
+    ok = idx != NULL && PyDict_SetItem(p->refs, id, idx) == 0;
+    Py_DECREF(id);
+    Py_XDECREF(idx);
+    if (!ok)
+        goto err;
+    *flag |= FLAG_REF;
+    return 0;
+
+err:
+    p->error = WFERR_UNMARSHALLABLE;
+    return 1;
+}
+
+static void
+w_complex_object(PyObject *v, char flag, WFILE *p);
+
 static void
 w_object(PyObject *v, WFILE *p)
 {
-    Py_ssize_t i, n;
+    char flag = '\0';
 
     p->depth++;
 
@@ -231,24 +293,35 @@ w_object(PyObject *v, WFILE *p)
     else if (v == Py_True) {
         w_byte(TYPE_TRUE, p);
     }
-    else if (PyInt_CheckExact(v)) {
+    else if (!w_ref(v, &flag, p))
+        w_complex_object(v, flag, p);
+
+    p->depth--;
+}
+
+static void
+w_complex_object(PyObject *v, char flag, WFILE *p)
+{
+    Py_ssize_t i, n;
+
+    if (PyInt_CheckExact(v)) {
         long x = PyInt_AS_LONG((PyIntObject *)v);
 #if SIZEOF_LONG > 4
         long y = Py_ARITHMETIC_RIGHT_SHIFT(long, x, 31);
         if (y && y != -1) {
-            w_byte(TYPE_INT64, p);
+            W_TYPE(TYPE_INT64, p);
             w_long64(x, p);
         }
         else
 #endif
             {
-            w_byte(TYPE_INT, p);
+            W_TYPE(TYPE_INT, p);
             w_long(x, p);
         }
     }
     else if (PyLong_CheckExact(v)) {
         PyLongObject *ob = (PyLongObject *)v;
-        w_PyLong(ob, p);
+        w_PyLong(ob, flag, p);
     }
     else if (PyFloat_CheckExact(v)) {
         if (p->version > 1) {
@@ -258,7 +331,7 @@ w_object(PyObject *v, WFILE *p)
                 p->error = WFERR_UNMARSHALLABLE;
                 return;
             }
-            w_byte(TYPE_BINARY_FLOAT, p);
+            W_TYPE(TYPE_BINARY_FLOAT, p);
             w_string((char*)buf, 8, p);
         }
         else {
@@ -269,7 +342,7 @@ w_object(PyObject *v, WFILE *p)
                 return;
             }
             n = strlen(buf);
-            w_byte(TYPE_FLOAT, p);
+            W_TYPE(TYPE_FLOAT, p);
             w_byte((int)n, p);
             w_string(buf, n, p);
             PyMem_Free(buf);
@@ -284,7 +357,7 @@ w_object(PyObject *v, WFILE *p)
                 p->error = WFERR_UNMARSHALLABLE;
                 return;
             }
-            w_byte(TYPE_BINARY_COMPLEX, p);
+            W_TYPE(TYPE_BINARY_COMPLEX, p);
             w_string((char*)buf, 8, p);
             if (_PyFloat_Pack8(PyComplex_ImagAsDouble(v),
                                buf, 1) < 0) {
@@ -295,7 +368,7 @@ w_object(PyObject *v, WFILE *p)
         }
         else {
             char *buf;
-            w_byte(TYPE_COMPLEX, p);
+            W_TYPE(TYPE_COMPLEX, p);
             buf = PyOS_double_to_string(PyComplex_RealAsDouble(v),
                                         'g', 17, 0, NULL);
             if (!buf) {
@@ -320,13 +393,17 @@ w_object(PyObject *v, WFILE *p)
     }
 #endif
     else if (PyString_CheckExact(v)) {
-        if (p->strings && PyString_CHECK_INTERNED(v)) {
+        if (p->version >= 3 && PyString_CHECK_INTERNED(v)) {
+            /* Repeats are written as references */
+            W_TYPE(TYPE_INTERNED, p);
+        }
+        else if (p->strings && PyString_CHECK_INTERNED(v)) {
             PyObject *o = PyDict_GetItem(p->strings, v);
             if (o) {
                 long w = PyInt_AsLong(o);
                 w_byte(TYPE_STRINGREF, p);
                 w_long(w, p);
-                goto exit;
+                return;
             }
             else {
                 int ok;
@@ -335,15 +412,14 @@ w_object(PyObject *v, WFILE *p)
                      PyDict_SetItem(p->strings, v, o) >= 0;
                 Py_XDECREF(o);
                 if (!ok) {
-                    p->depth--;
                     p->error = WFERR_UNMARSHALLABLE;
                     return;
                 }
-                w_byte(TYPE_INTERNED, p);
+                W_TYPE(TYPE_INTERNED, p);
             }
         }
         else {
-            w_byte(TYPE_STRING, p);
+            W_TYPE(TYPE_STRING, p);
         }
         w_pstring(PyBytes_AS_STRING(v), PyString_GET_SIZE(v), p);
     }
@@ -352,17 +428,16 @@ w_object(PyObject *v, WFILE *p)
         PyObject *utf8;
         utf8 = PyUnicode_AsUTF8String(v);
         if (utf8 == NULL) {
-            p->depth--;
             p->error = WFERR_UNMARSHALLABLE;
             return;
         }
-        w_byte(TYPE_UNICODE, p);
+        W_TYPE(TYPE_UNICODE, p);
         w_pstring(PyString_AS_STRING(utf8), PyString_GET_SIZE(utf8), p);
         Py_DECREF(utf8);
     }
 #endif
     else if (PyTuple_CheckExact(v)) {
-        w_byte(TYPE_TUPLE, p);
+        W_TYPE(TYPE_TUPLE, p);
         n = PyTuple_Size(v);
         W_SIZE(n, p);
         for (i = 0; i < n; i++) {
@@ -370,7 +445,7 @@ w_object(PyObject *v, WFILE *p)
         }
     }
     else if (PyList_CheckExact(v)) {
-        w_byte(TYPE_LIST, p);
+        W_TYPE(TYPE_LIST, p);
         n = PyList_GET_SIZE(v);
         W_SIZE(n, p);
         for (i = 0; i < n; i++) {
@@ -380,7 +455,7 @@ w_object(PyObject *v, WFILE *p)
     else if (PyDict_CheckExact(v)) {
         Py_ssize_t pos;
         PyObject *key, *value;
-        w_byte(TYPE_DICT, p);
+        W_TYPE(TYPE_DICT, p);
         /* This one is NULL object terminated! */
         pos = 0;
         while (PyDict_Next(v, &pos, &key, &value)) {
@@ -393,19 +468,17 @@ w_object(PyObject *v, WFILE *p)
         PyObject *value, *it;
 
         if (PyObject_TypeCheck(v, &PySet_Type))
-            w_byte(TYPE_SET, p);
+            W_TYPE(TYPE_SET, p);
         else
-            w_byte(TYPE_FROZENSET, p);
+            W_TYPE(TYPE_FROZENSET, p);
         n = PyObject_Size(v);
         if (n == -1) {
-            p->depth--;
             p->error = WFERR_UNMARSHALLABLE;
             return;
         }
         W_SIZE(n, p);
         it = PyObject_GetIter(v);
         if (it == NULL) {
-            p->depth--;
             p->error = WFERR_UNMARSHALLABLE;
             return;
         }
@@ -415,14 +488,13 @@ w_object(PyObject *v, WFILE *p)
         }
         Py_DECREF(it);
         if (PyErr_Occurred()) {
-            p->depth--;
             p->error = WFERR_UNMARSHALLABLE;
             return;
         }
     }
     else if (PyCode_Check(v)) {
         PyCodeObject *co = (PyCodeObject *)v;
-        w_byte(TYPE_CODE, p);
+        W_TYPE(TYPE_CODE, p);
         w_long(co->co_argcount, p);
         w_long(co->co_nlocals, p);
         w_long(co->co_stacksize, p);
@@ -442,16 +514,14 @@ w_object(PyObject *v, WFILE *p)
         /* Write unknown buffer-style objects as a string */
         char *s;
         PyBufferProcs *pb = v->ob_type->tp_as_buffer;
-        w_byte(TYPE_STRING, p);
+        W_TYPE(TYPE_STRING, p);
         n = (*pb->bf_getreadbuffer)(v, 0, (void **)&s);
         w_pstring(s, n, p);
     }
     else {
-        w_byte(TYPE_UNKNOWN, p);
+        W_TYPE(TYPE_UNKNOWN, p);
         p->error = WFERR_UNMARSHALLABLE;
     }
-   exit:
-    p->depth--;
 }
 
 /* version currently has no effect for writing longs. */
@@ -463,6 +533,7 @@ PyMarshal_WriteLongToFile(long x, FILE *fp, int version)
     wf.error = WFERR_OK;
     wf.depth = 0;
     wf.strings = NULL;
+    wf.refs = NULL;
     wf.version = version;
     w_long(x, &wf);
 }
@@ -475,9 +546,11 @@ PyMarshal_WriteObjectToFile(PyObject *x, FILE *fp, int version)
     wf.error = WFERR_OK;
     wf.depth = 0;
     wf.strings = (version > 0) ? PyDict_New() : NULL;
+    wf.refs = (version >= 3) ? PyDict_New() : NULL;
     wf.version = version;
     w_object(x, &wf);
     Py_XDECREF(wf.strings);
+    Py_XDECREF(wf.refs);
 }
 
 typedef WFILE RFILE; /* Same struct with different invariants */
@@ -624,6 +697,57 @@ r_PyLong(RFILE *p)
     return NULL;
 }
 
+/* Reserve a slot in the table of references for an object which can only be
+   entered in it once it has been read completely, such as a frozenset or a
+   code object.  Return its index, 0 if flag isn't set, or -1 on error. */
+static Py_ssize_t
+r_ref_reserve(int flag, RFILE *p)
+{
+    if (flag) {
+        Py_ssize_t idx = PyList_GET_SIZE(p->refs);
+        if (idx >= SIZE32_MAX) {
+            PyErr_SetString(PyExc_ValueError,
+                            "bad marshal data (index list too large)");
+            return -1;
+        }
+        if (PyList_Append(p->refs, Py_None) < 0)
+            return -1;
+        return idx;
+    }
+    return 0;
+}
+
+/* Fill the slot reserved by r_ref_reserve() with o, if it isn't NULL. */
+static PyObject *
+r_ref_insert(PyObject *o, Py_ssize_t idx, int flag, RFILE *p)
+{
+    if (o != NULL && flag) {
+        PyObject *tmp = PyList_GET_ITEM(p->refs, idx);
+        Py_INCREF(o);
+        PyList_SET_ITEM(p->refs, idx, o);
+        Py_DECREF(tmp);
+    }
+    return o;
+}
+
+/* Enter o in the table of references if flag is set.  On error, o is
+   released and NULL is returned. */
+static PyObject *
+r_ref(PyObject *o, int flag, RFILE *p)
+{
+    if (o != NULL && flag) {
+        if (PyList_Append(p->refs, o) < 0) {
+            Py_DECREF(o);
+            return NULL;
+        }
+    }
+    return o;
+}
+
+#define R_REF(O) do { \
+    if (flag) \
+        O = r_ref(O, flag, p); \
+} while (0)
 
 static PyObject *
 r_object(RFILE *p)
@@ -632,9 +756,20 @@ r_object(RFILE *p)
        an exception is set. */
     PyObject *v, *v2;
     long i, n;
-    int type = r_byte(p);
+    int code = r_byte(p);
+    int type, flag;
+    Py_ssize_t idx = 0;
     PyObject *retval;
 
+    if (code == EOF) {
+        type = EOF;
+        flag = 0;
+    }
+    else {
+        type = code & ~FLAG_REF;
+        flag = code & FLAG_REF;
+    }
+
     p->depth++;
 
     if (p->depth > MAX_MARSHAL_STACK_DEPTH) {
@@ -682,14 +817,17 @@ r_object(RFILE *p)
 
     case TYPE_INT:
         retval = PyInt_FromLong(r_long(p));
+        R_REF(retval);
         break;
 
     case TYPE_INT64:
         retval = r_long64(p);
+        R_REF(retval);
         break;
 
     case TYPE_LONG:
         retval = r_PyLong(p);
+        R_REF(retval);
         break;
 
     case TYPE_FLOAT:
@@ -710,6 +848,7 @@ r_object(RFILE *p)
                 break;
             }
             retval = PyFloat_FromDouble(dx);
+            R_REF(retval);
             break;
         }
 
@@ -729,6 +868,7 @@ r_object(RFILE *p)
                 break;
             }
             retval = PyFloat_FromDouble(x);
+            R_REF(retval);
             break;
         }
 
@@ -764,6 +904,7 @@ r_object(RFILE *p)
                 break;
             }
             retval = PyComplex_FromCComplex(c);
+            R_REF(retval);
             break;
         }
 
@@ -794,6 +935,7 @@ r_object(RFILE *p)
                 break;
             }
             retval = PyComplex_FromCComplex(c);
+            R_REF(retval);
             break;
         }
 #endif
@@ -821,10 +963,12 @@ r_object(RFILE *p)
         if (type == TYPE_INTERNED) {
             PyString_InternInPlace(&v);
             if (PyList_Append(p->strings, v) < 0) {
+                Py_DECREF(v);
                 retval = NULL;
                 break;
             }
         }
+        R_REF(v);
         retval = v;
         break;
 
@@ -865,6 +1009,7 @@ r_object(RFILE *p)
         }
         v = PyUnicode_DecodeUTF8(buffer, n, NULL);
         PyMem_DEL(buffer);
+        R_REF(v);
         retval = v;
         break;
         }
@@ -878,6 +1023,7 @@ r_object(RFILE *p)
             break;
         }
         v = PyTuple_New(n);
+        R_REF(v);
         if (v == NULL) {
             retval = NULL;
             break;
@@ -905,6 +1051,7 @@ r_object(RFILE *p)
             break;
         }
         v = PyList_New(n);
+        R_REF(v);
         if (v == NULL) {
             retval = NULL;
             break;
@@ -926,6 +1073,7 @@ r_object(RFILE *p)
 
     case TYPE_DICT:
         v = PyDict_New();
+        R_REF(v);
         if (v == NULL) {
             retval = NULL;
             break;
@@ -956,7 +1104,20 @@ r_object(RFILE *p)
             retval = NULL;
             break;
         }
-        v = (type == TYPE_SET) ? PySet_New(NULL) : PyFrozenSet_New(NULL);
+        if (type == TYPE_SET) {
+            v = PySet_New(NULL);
+            R_REF(v);
+        }
+        else {
+            /* A frozenset can only be filled while nothing else refers
+               to it, so it is entered in the table once it is complete */
+            idx = r_ref_reserve(flag, p);
+            if (idx < 0) {
+                retval = NULL;
+                break;
+            }
+            v = PyFrozenSet_New(NULL);
+        }
         if (v == NULL) {
             retval = NULL;
             break;
@@ -979,6 +1140,8 @@ r_object(RFILE *p)
             }
             Py_DECREF(v2);
         }
+        if (type != TYPE_SET)
+            v = r_ref_insert(v, idx, flag, p);
         retval = v;
         break;
 
@@ -1007,6 +1170,9 @@ r_object(RFILE *p)
             PyObject *lnotab = NULL;
 
             v = NULL;
+            idx = r_ref_reserve(flag, p);
+            if (idx < 0)
+                goto code_error;
 
             /* XXX ignore long->int overflows for now */
             argcount = (int)r_long(p);
@@ -1047,6 +1213,7 @@ r_object(RFILE *p)
                             code, consts, names, varnames,
                             freevars, cellvars, filename, name,
                             firstlineno, lnotab);
+            v = r_ref_insert(v, idx, flag, p);
 
           code_error:
             Py_XDECREF(code);
@@ -1063,6 +1230,23 @@ r_object(RFILE *p)
         retval = v;
         break;
 
+    case TYPE_REF:
+        n = r_long(p);
+        if (n < 0 || n >= PyList_GET_SIZE(p->refs)) {
+            PyErr_SetString(PyExc_ValueError, "bad marshal data (invalid reference)");
+            retval = NULL;
+            break;
+        }
+        v = PyList_GET_ITEM(p->refs, n);
+        if (v == Py_None) {
+            PyErr_SetString(PyExc_ValueError, "bad marshal data (invalid reference)");
+            retval = NULL;
+            break;
+        }
+        Py_INCREF(v);
+        retval = v;
+        break;
+
     default:
         /* Bogus data got written, which isn't ideal.
            This will let you keep working and recover. */
@@ -1096,6 +1280,7 @@ PyMarshal_ReadShortFromFile(FILE *fp)
     assert(fp);
     rf.fp = fp;
     rf.strings = NULL;
+    rf.refs = NULL;
     rf.end = rf.ptr = NULL;
     return r_short(&rf);
 }
@@ -1106,6 +1291,7 @@ PyMarshal_ReadLongFromFile(FILE *fp)
     RFILE rf;
     rf.fp = fp;
     rf.strings = NULL;
+    rf.refs = NULL;
     rf.ptr = rf.end = NULL;
     return r_long(&rf);
 }
@@ -1163,10 +1349,12 @@ PyMarshal_ReadObjectFromFile(FILE *fp)
     PyObject *result;
     rf.fp = fp;
     rf.strings = PyList_New(0);
+    rf.refs = PyList_New(0);
     rf.depth = 0;
     rf.ptr = rf.end = NULL;
     result = r_object(&rf);
     Py_DECREF(rf.strings);
+    Py_DECREF(rf.refs);
     return result;
 }
 
@@ -1179,9 +1367,11 @@ PyMarshal_ReadObjectFromString(char *str, Py_ssize_t len)
     rf.ptr = str;
     rf.end = str + len;
     rf.strings = PyList_New(0);
+    rf.refs = PyList_New(0);
     rf.depth = 0;
     result = r_object(&rf);
     Py_DECREF(rf.strings);
+    Py_DECREF(rf.refs);
     return result;
 }
 
@@ -1217,8 +1407,10 @@ PyMarshal_WriteObjectToString(PyObject *x, int version)
     wf.depth = 0;
     wf.version = version;
     wf.strings = (version > 0) ? PyDict_New() : NULL;
+    wf.refs = (version >= 3) ? PyDict_New() : NULL;
     w_object(x, &wf);
     Py_XDECREF(wf.strings);
+    Py_XDECREF(wf.refs);
     if (wf.str != NULL) {
         char *base = PyString_AS_STRING((PyStringObject *)wf.str);
         if (wf.ptr - base > PY_SSIZE_T_MAX) {
@@ -1260,9 +1452,11 @@ marshal_dump(PyObject *self, PyObject *args)
     wf.error = WFERR_OK;
     wf.depth = 0;
     wf.strings = (version > 0) ? PyDict_New() : 0;
+    wf.refs = (version >= 3) ? PyDict_New() : 0;
     wf.version = version;
     w_object(x, &wf);
     Py_XDECREF(wf.strings);
+    Py_XDECREF(wf.refs);
     if (wf.error != WFERR_OK) {
         set_error(wf.error);
         return NULL;
@@ -1297,9 +1491,11 @@ marshal_load(PyObject *self, PyObject *f)
     }
     rf.fp = PyFile_AsFile(f);
     rf.strings = PyList_New(0);
+    rf.refs = PyList_New(0);
     rf.depth = 0;
     result = read_object(&rf);
     Py_DECREF(rf.strings);
+    Py_DECREF(rf.refs);
     return result;
 }
 
@@ -1350,9 +1546,11 @@ marshal_loads(PyObject *self, PyObject *args)
     rf.ptr = s;
     rf.end = s + n;
     rf.strings = PyList_New(0);
+    rf.refs = PyList_New(0);
     rf.depth = 0;
     result = read_object(&rf);
     Py_DECREF(rf.strings);
+    Py_DECREF(rf.refs);
     return result;
 }
 
@@ -1390,8 +1588,9 @@ Variables:\n\
 \n\
 version -- indicates the format that the module uses. Version 0 is the\n\
     historical format, version 1 (added in Python 2.4) shares interned\n\
-    strings and version 2 (added in Python 2.5) uses a binary format for\n\
-    floating point numbers. (New in version 2.4)\n\
+    strings, version 2 (added in Python 2.5) uses a binary format for\n\
+    floating point numbers and version 3 (added in Python 2.7.10) refers\n\
+    back to objects which were written before. (New in version 2.4)\n\
 \n\
 Functions:\n\
 \n\
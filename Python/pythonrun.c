@@ -90,6 +90,7 @@ int Py_IgnoreEnvironmentFlag; /* e.g. PYTHONPATH, PYTHONHOME */
 int _Py_QnewFlag = 0;
 int Py_NoUserSiteDirectory = 0; /* for -s and site.py */
 int Py_HashRandomizationFlag = 0; /* for -R and PYTHONHASHSEED */
+int Py_ImportTimeFlag = 0; /* for -X importtime and PYTHONPROFILEIMPORTTIME */
 
 
 /* Hack to force loading of object files */
@@ -176,6 +177,8 @@ Py_InitializeEx(int install_sigs)
        check its value further. */
     if ((p = Py_GETENV("PYTHONHASHSEED")) && *p != '\0')
         Py_HashRandomizationFlag = add_flag(Py_HashRandomizationFlag, p);
+    if ((p = Py_GETENV("PYTHONPROFILEIMPORTTIME")) && *p != '\0')
+        Py_ImportTimeFlag = add_flag(Py_ImportTimeFlag, p);
 
     _PyRandom_Init();
 
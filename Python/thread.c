@@ -151,6 +151,48 @@ static size_t _pythread_stacksize = 0;
 #endif
 */
 
+#ifndef THREAD_ACQUIRE_LOCK_TIMED
+/* Fallback for the platforms whose locks cannot wait with a timeout: poll
+   the lock, sleeping for increasing periods of up to 50ms in between.
+   The wait cannot be interrupted, so intr_flag is ignored. */
+static void
+_pythread_sleep(long microseconds)
+{
+#if defined(MS_WINDOWS) || defined(MS_WINCE)
+    Sleep((DWORD)(microseconds / 1000));
+#else
+    struct timeval t;
+    t.tv_sec = microseconds / 1000000;
+    t.tv_usec = microseconds % 1000000;
+    select(0, (fd_set *)0, (fd_set *)0, (fd_set *)0, &t);
+#endif
+}
+
+PyLockStatus
+PyThread_acquire_lock_timed(PyThread_type_lock lock, PY_TIMEOUT_T microseconds,
+                            int intr_flag)
+{
+    long delay = 500;
+
+    if (microseconds <= 0)
+        return PyThread_acquire_lock(lock, microseconds < 0) ?
+            PY_LOCK_ACQUIRED : PY_LOCK_FAILURE;
+    for (;;) {
+        if (PyThread_acquire_lock(lock, 0))
+            return PY_LOCK_ACQUIRED;
+        if (microseconds <= 0)
+            return PY_LOCK_FAILURE;
+        if (delay > microseconds)
+            delay = (long)microseconds;
+        _pythread_sleep(delay);
+        microseconds -= delay;
+        delay *= 2;
+        if (delay > 50000)
+            delay = 50000;
+    }
+}
+#endif
+
 /* return the current thread stack size */
 size_t
 PyThread_get_stacksize(void)
@@ -9,83 +9,40 @@
 #include <process.h>
 #endif
 
-typedef struct NRMUTEX {
-    LONG   owned ;
-    DWORD  thread_id ;
-    HANDLE hevent ;
-} NRMUTEX, *PNRMUTEX ;
+/* The lock is a Win32 semaphore with a maximum count of 1: unlike the
+   event based lock used before, waiting on it can time out without leaving
+   the lock in an inconsistent state. */
+typedef HANDLE PNRMUTEX;
 
-
-BOOL
-InitializeNonRecursiveMutex(PNRMUTEX mutex)
+PNRMUTEX
+AllocNonRecursiveMutex(void)
 {
-    mutex->owned = -1 ;  /* No threads have entered NonRecursiveMutex */
-    mutex->thread_id = 0 ;
-    mutex->hevent = CreateEvent(NULL, FALSE, FALSE, NULL) ;
-    return mutex->hevent != NULL ;      /* TRUE if the mutex is created */
+    return CreateSemaphore(NULL, 1, 1, NULL);
 }
 
 VOID
-DeleteNonRecursiveMutex(PNRMUTEX mutex)
+FreeNonRecursiveMutex(PNRMUTEX mutex)
 {
     /* No in-use check */
-    CloseHandle(mutex->hevent) ;
-    mutex->hevent = NULL ; /* Just in case */
+    if (mutex)
+        CloseHandle(mutex);
 }
 
 DWORD
-EnterNonRecursiveMutex(PNRMUTEX mutex, BOOL wait)
+EnterNonRecursiveMutex(PNRMUTEX mutex, DWORD milliseconds)
 {
-    /* Assume that the thread waits successfully */
-    DWORD ret ;
-
-    /* InterlockedIncrement(&mutex->owned) == 0 means that no thread currently owns the mutex */
-    if (!wait)
-    {
-        if (InterlockedCompareExchange(&mutex->owned, 0, -1) != -1)
-            return WAIT_TIMEOUT ;
-        ret = WAIT_OBJECT_0 ;
-    }
-    else
-        ret = InterlockedIncrement(&mutex->owned) ?
-            /* Some thread owns the mutex, let's wait... */
-            WaitForSingleObject(mutex->hevent, INFINITE) : WAIT_OBJECT_0 ;
-
-    mutex->thread_id = GetCurrentThreadId() ; /* We own it */
-    return ret ;
+    return WaitForSingleObject(mutex, milliseconds);
 }
 
 BOOL
 LeaveNonRecursiveMutex(PNRMUTEX mutex)
 {
-    /* We don't own the mutex */
-    mutex->thread_id = 0 ;
-    return
-        InterlockedDecrement(&mutex->owned) < 0 ||
-        SetEvent(mutex->hevent) ; /* Other threads are waiting, wake one on them up */
+    return ReleaseSemaphore(mutex, 1, NULL);
 }
 
-PNRMUTEX
-AllocNonRecursiveMutex(void)
-{
-    PNRMUTEX mutex = (PNRMUTEX)malloc(sizeof(NRMUTEX)) ;
-    if (mutex && !InitializeNonRecursiveMutex(mutex))
-    {
-        free(mutex) ;
-        mutex = NULL ;
-    }
-    return mutex ;
-}
-
-void
-FreeNonRecursiveMutex(PNRMUTEX mutex)
-{
-    if (mutex)
-    {
-        DeleteNonRecursiveMutex(mutex) ;
-        free(mutex) ;
-    }
-}
+/* PyThread_acquire_lock_timed() is implemented natively here, so thread.c
+   does not provide its fallback. */
+#define THREAD_ACQUIRE_LOCK_TIMED
 
 long PyThread_get_thread_ident(void);
 
@@ -233,25 +190,50 @@ PyThread_free_lock(PyThread_type_lock aLock)
 }
 
 /*
- * Return 1 on success if the lock was acquired
+ * Return PY_LOCK_ACQUIRED on success if the lock was acquired
  *
- * and 0 if the lock was not acquired. This means a 0 is returned
- * if the lock has already been acquired by this thread!
+ * and PY_LOCK_FAILURE if the lock was not acquired. This means a
+ * failure is returned if the lock has already been acquired by this thread!
+ * The wait cannot be interrupted, so intr_flag is ignored.
  */
-int
-PyThread_acquire_lock(PyThread_type_lock aLock, int waitflag)
+PyLockStatus
+PyThread_acquire_lock_timed(PyThread_type_lock aLock,
+                            PY_TIMEOUT_T microseconds, int intr_flag)
 {
-    int success ;
+    PyLockStatus success;
+    DWORD milliseconds;
+
+    if (microseconds >= 0) {
+        milliseconds = (DWORD)(microseconds / 1000);
+        if (microseconds % 1000 > 0)
+            ++milliseconds;
+        if (milliseconds == INFINITE)
+            --milliseconds;
+    }
+    else
+        milliseconds = INFINITE;
 
-    dprintf(("%ld: PyThread_acquire_lock(%p, %d) called\n", PyThread_get_thread_ident(),aLock, waitflag));
+    dprintf(("%ld: PyThread_acquire_lock_timed(%p, %ld) called\n",
+             PyThread_get_thread_ident(), aLock, (long)microseconds));
 
-    success = aLock && EnterNonRecursiveMutex((PNRMUTEX) aLock, (waitflag ? INFINITE : 0)) == WAIT_OBJECT_0 ;
+    if (aLock && EnterNonRecursiveMutex((PNRMUTEX)aLock,
+                                        milliseconds) == WAIT_OBJECT_0)
+        success = PY_LOCK_ACQUIRED;
+    else
+        success = PY_LOCK_FAILURE;
 
-    dprintf(("%ld: PyThread_acquire_lock(%p, %d) -> %d\n", PyThread_get_thread_ident(),aLock, waitflag, success));
+    dprintf(("%ld: PyThread_acquire_lock_timed(%p, %ld) -> %d\n",
+             PyThread_get_thread_ident(), aLock, (long)microseconds, success));
 
     return success;
 }
 
+int
+PyThread_acquire_lock(PyThread_type_lock aLock, int waitflag)
+{
+    return PyThread_acquire_lock_timed(aLock, waitflag ? -1 : 0, 0);
+}
+
 void
 PyThread_release_lock(PyThread_type_lock aLock)
 {
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""Compare the speed of the dbm modules available to anydbm.
+
+Usage: dbmbench.py [-n NUMBER] [-s SIZE] [module ...]
+
+For each module (by default all of those anydbm knows about which can be
+imported), a new database is filled with NUMBER keys, and the time taken
+to insert, read back, overwrite and delete them is printed together with
+the size of the files left on disk.
+"""
+
+import os
+import sys
+import time
+import glob
+import random
+import shutil
+import tempfile
+from optparse import OptionParser
+
+import anydbm
+
+
+def available_modules():
+    names = []
+    for name in anydbm._names:
+        try:
+            __import__(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+def disk_usage(basename):
+    return sum(os.path.getsize(fn) for fn in glob.glob(basename + '*'))
+
+def bench(name, number, size):
+    mod = __import__(name)
+    tmpdir = tempfile.mkdtemp()
+    basename = os.path.join(tmpdir, 'bench')
+    keys = ['key%d' % i for i in xrange(number)]
+    value = 'x' * size
+    shuffled = keys[:]
+    random.shuffle(shuffled)
+    results = []
+    try:
+        db = mod.open(basename, 'c')
+
+        def timed(label, func):
+            t = time.time()
+            func()
+            results.append((label, time.time() - t))
+
+        def insert():
+            for key in keys:
+                db[key] = value
+        def read():
+            for key in shuffled:
+                db[key]
+        def overwrite():
+            for key in shuffled:
+                db[key] = value
+        def delete():
+            for key in shuffled[:number // 2]:
+                del db[key]
+        def close():
+            db.close()
+
+        timed('insert', insert)
+        timed('read', read)
+        timed('overwrite', overwrite)
+        timed('delete half', delete)
+        timed('close', close)
+        usage = disk_usage(basename)
+    finally:
+        shutil.rmtree(tmpdir)
+    return results, usage
+
+def main():
+    parser = OptionParser(usage='%prog [-n NUMBER] [-s SIZE] [module ...]')
+    parser.add_option('-n', '--number', type='int', default=100000,
+                      help='number of keys (default %default)')
+    parser.add_option('-s', '--size', type='int', default=100,
+                      help='size of the values in bytes (default %default)')
+    options, names = parser.parse_args()
+    if not names:
+        names = available_modules()
+    for name in names:
+        results, usage = bench(name, options.number, options.size)
+        print '%s (%d keys of %d bytes):' % (name, options.number,
+                                             options.size)
+        for label, elapsed in results:
+            print '    %-12s %8.3f s' % (label, elapsed)
+        print '    %-12s %8.1f MB' % ('disk usage', usage / 1048576.0)
+        sys.stdout.flush()
+
+if __name__ == '__main__':
+    main()